@@ -30,14 +30,14 @@ class ScimConsumer:
         self.group_membership_resolver = group_membership_resolver
         self.settings = settings
 
-    def write_udm_object(self, udm_object: object, topic: str) -> None:
+    async def write_udm_object(self, udm_object: object, topic: str) -> None:
         """
         Writes the record to the SCIM server.
 
         raises:
             ValueError: If no external_id is given.
         """
-        scim_resource = self.prepare_data(udm_object, topic)
+        scim_resource = await self.prepare_data(udm_object, topic)
         if not scim_resource.external_id:
             raise ValueError("No external_id given!")
         try:
@@ -72,7 +72,7 @@ class ScimConsumer:
 
         self.scim_http_client.delete_resource(existing["id"], topic)
 
-    def prepare_data(self, udm_object: object, topic: str) -> Resource:
+    async def prepare_data(self, udm_object: object, topic: str) -> Resource:
         """
         Maps the data from UDM to SCIM
 
@@ -100,7 +100,8 @@ class ScimConsumer:
                 self.scim_http_client.get_client().get_resource_model("User").model_validate(scim_resource.model_dump())
             )
         elif topic == "groups/group":
-            scim_resource = mapper.map_group(udm_group=udm_object)
+            # Members are resolved by LDAP and SCIM requests, resolve them concurrently
+            scim_resource = await mapper.amap_group(udm_group=udm_object)
             # FIXME: The scim client validates the response of a message with the pydantic model given in the request.
             #        Make sure to use the correct pydantic model required by the server
             scim_resource = (
@@ -133,7 +134,7 @@ class ScimConsumer:
 
         if should_exist_in_scim(message, self.settings.scim_user_filter_attribute):
             udm_object = type("Obj", (object,), {k: v for k, v in message.body.new.items()})()
-            self.write_udm_object(udm_object, message.topic)
+            await self.write_udm_object(udm_object, message.topic)
         else:
             if message.body.old:
                 udm_object = type("Obj", (object,), {k: v for k, v in message.body.old.items()})()
@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+"""
+Memory benchmark for the id cache entries.
+
+Compares the per-entry footprint of the previous CacheItem representation
+(plain class, entries stored in a dict under DN and UUID) with the compact
+CacheItem and CacheItemStore.
+
+Run with: python id_cache_memory.py [number of entries]
+"""
+
+import sys
+import time
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore
+
+
+class LegacyCacheItem:
+    def __init__(self, dn: str, uuid: str, display_name: str, univention_object_identifier: str | None = None):
+        self.dn = dn
+        self.uuid = uuid
+        self.display_name = display_name
+        self.created = int(time.time())
+        self.univention_object_identifier = univention_object_identifier
+
+
+def make_entries(count: int) -> list[tuple[str, str, str]]:
+    # DN and UUID strings are created the same way the UDM client creates them (decoded from JSON)
+    return [
+        (
+            ",".join([f"uid=user{i:07d}", "cn=users", "dc=example", "dc=test"]),
+            str(uuid.uuid4()),
+            f"User {i:07d}",
+        )
+        for i in range(count)
+    ]
+
+
+def fill_legacy(entries: list[tuple[str, str, str]]) -> Any:
+    cache: dict[str, LegacyCacheItem] = {}
+    for dn, uuid_str, display_name in entries:
+        item = LegacyCacheItem(dn, uuid_str, display_name)
+        cache[item.dn] = item
+        cache[item.uuid] = item
+    return cache
+
+
+def fill_compact(entries: list[tuple[str, str, str]]) -> Any:
+    store = CacheItemStore()
+    for dn, uuid_str, display_name in entries:
+        store.add(CacheItem(dn, uuid_str, display_name))
+    return store
+
+
+def measure(fill: Callable[[list[tuple[str, str, str]]], Any], count: int) -> float:
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    entries = make_entries(count)
+    cache = fill(entries)
+    # Only count what the cache keeps alive, not the input data
+    del entries
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return (current - baseline) / count
+
+
+def run_benchmark(count: int) -> None:
+    print(f"\n=== Id cache memory benchmark ({count} entries) ===\n")
+
+    legacy = measure(fill_legacy, count)
+    compact = measure(fill_compact, count)
+
+    print(f"Legacy CacheItem + dict:       {legacy:8.1f} bytes/entry")
+    print(f"Compact CacheItem + store:     {compact:8.1f} bytes/entry")
+    print(f"Saved:                         {100 * (legacy - compact) / legacy:8.1f} %")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
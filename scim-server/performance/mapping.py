@@ -0,0 +1,158 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+"""
+Microbenchmarks for the UDM <-> SCIM mapping.
+
+Compares the model mapping (map_user / map_group returning pydantic models,
+which then have to be serialized) with the dict mapping (map_user_dict /
+map_group_dict returning SCIM dicts ready for serialization) in both directions.
+
+Run with: python mapping.py [number of iterations]
+"""
+
+import base64
+import json
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation import ScimToUdmMapper, UdmToScimMapper
+from univention.scim.transformation.id_cache import CacheItem, IdCache
+
+
+BASE_URL = "https://scim.example.test/scim/v2"
+
+
+class StaticIdCache(IdCache):
+    def __init__(self, items: list[CacheItem]) -> None:
+        self.items = {item.dn: item for item in items} | {str(item.uuid): item for item in items}
+
+    def get_user(self, key: str) -> CacheItem | None:
+        return self.items.get(key)
+
+    def get_group(self, key: str) -> CacheItem | None:
+        return self.items.get(key)
+
+
+def make_udm_user(i: int) -> SimpleNamespace:
+    properties = {
+        "univentionObjectIdentifier": str(uuid.uuid4()),
+        "username": f"user{i}",
+        "description": "Benchmark user",
+        "disabled": False,
+        "displayName": f"Given{i} Family{i}",
+        "title": "Engineer",
+        "employeeNumber": str(i),
+        "employeeType": "employee",
+        "preferredLanguage": "de-DE",
+        "firstname": f"Given{i}",
+        "lastname": f"Family{i}",
+        "mailPrimaryAddress": f"user{i}@example.test",
+        "mailAlternativeAddress": [f"alias{i}@example.test"],
+        "e-mail": [],
+        "phone": [f"+49 421 {i:06d}"],
+        "mobileTelephoneNumber": [],
+        "homeTelephoneNumber": [],
+        "pagerTelephoneNumber": [],
+        "street": f"Street {i}",
+        "city": "Bremen",
+        "postcode": "28359",
+        "country": "DE",
+        "state": None,
+        "homePostalAddress": [],
+        "userCertificate": base64.b64encode(b"certificate").decode(),
+        "certificateSubjectCommonName": f"user{i}",
+        "guardianRoles": ["app:namespace:role"],
+        "guardianInheritedRoles": [],
+        "PasswordRecoveryEmail": None,
+        "primaryOrgUnit": "Development",
+        "secondaryOrgUnits": [],
+        "createTimestamp": 1700000000,
+        "modifyTimestamp": 1700000000,
+    }
+    return SimpleNamespace(dn=f"uid=user{i},cn=users,dc=example,dc=test", properties=properties, etag="1.0")
+
+
+def make_udm_group(members: list[CacheItem]) -> SimpleNamespace:
+    properties = {
+        "univentionObjectIdentifier": str(uuid.uuid4()),
+        "name": "benchmark",
+        "description": "Benchmark group",
+        "users": [member.dn for member in members],
+        "nestedGroup": [],
+        "guardianMemberRoles": ["app:namespace:role"],
+    }
+    return SimpleNamespace(dn="cn=benchmark,cn=groups,dc=example,dc=test", properties=properties, etag="1.0")
+
+
+def measure(iterations: int, func: Callable[[], Any]) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def report(name: str, model: float, dictionary: float) -> None:
+    print(f"{name}")
+    print(f"  models: {model * 1_000_000:9.1f} us  ({1 / model:9.0f} / s)")
+    print(f"  dicts:  {dictionary * 1_000_000:9.1f} us  ({1 / dictionary:9.0f} / s)  {model / dictionary:5.1f} x\n")
+
+
+def run_benchmark(iterations: int) -> None:
+    print(f"\n=== Mapping benchmark ({iterations} iterations) ===\n")
+
+    udm_user = make_udm_user(1)
+    members = [CacheItem(f"uid=member{i},cn=users,dc=example,dc=test", uuid.uuid4(), f"Member {i}") for i in range(100)]
+    udm_group = make_udm_group(members)
+    cache = StaticIdCache(members)
+
+    udm2scim = UdmToScimMapper[UserWithExtensions, GroupWithExtensions](
+        cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions
+    )
+    scim2udm = ScimToUdmMapper(cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions)
+
+    # Both paths have to produce the same result
+    user = udm2scim.map_user(udm_user, BASE_URL)
+    group = udm2scim.map_group(udm_group, BASE_URL)
+    user_dict = user.model_dump(mode="json", by_alias=True, exclude_none=True)
+    group_dict = group.model_dump(mode="json", by_alias=True, exclude_none=True)
+    assert udm2scim.map_user_dict(udm_user, BASE_URL) == json.loads(user.model_dump_json())
+    assert udm2scim.map_group_dict(udm_group, BASE_URL) == json.loads(group.model_dump_json())
+    assert scim2udm.map_user_dict(user_dict) == scim2udm.map_user(user)
+    assert scim2udm.map_group_dict(group_dict) == scim2udm.map_group(group)
+
+    report(
+        "UDM -> SCIM user (map + serialize)",
+        measure(iterations, lambda: udm2scim.map_user(udm_user, BASE_URL).model_dump_json()),
+        measure(iterations, lambda: json.dumps(udm2scim.map_user_dict(udm_user, BASE_URL))),
+    )
+    report(
+        "UDM -> SCIM group with 100 members (map + serialize)",
+        measure(iterations, lambda: udm2scim.map_group(udm_group, BASE_URL).model_dump_json()),
+        measure(iterations, lambda: json.dumps(udm2scim.map_group_dict(udm_group, BASE_URL))),
+    )
+    report(
+        "SCIM -> UDM user",
+        measure(iterations, lambda: scim2udm.map_user(user)),
+        measure(iterations, lambda: scim2udm.map_user_dict(user_dict)),
+    )
+    report(
+        "SCIM -> UDM group with 100 members",
+        measure(iterations, lambda: scim2udm.map_group(group)),
+        measure(iterations, lambda: scim2udm.map_group_dict(group_dict)),
+    )
+
+
+if __name__ == "__main__":
+    from loguru import logger
+
+    # Debug logging of the mappers would dominate the measurement
+    logger.remove()
+
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+"""
+Benchmark for the serialization of resource responses.
+
+Compares a ListResponse with 1,000 users returned as model with response_model
+(FastAPI validates and serializes it again) to the same ListResponse returned
+as ScimJSONResponse. The last measurement returns the same data as plain dict
+to show the share of the pydantic serialization.
+
+Run with: python response_serialization.py [number of users] [number of requests]
+"""
+
+import json
+import sys
+import time
+from datetime import UTC, datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from scim2_models import Address, EnterpriseUser, ListResponse, Meta, PhoneNumber
+
+from univention.scim.server.models.extensions.customer1_user import Customer1User
+from univention.scim.server.models.extensions.univention_user import UniventionUser
+from univention.scim.server.models.types import UserWithExtensions
+from univention.scim.server.models.user import Email, Name
+from univention.scim.server.rest.response import ScimJSONResponse
+
+
+def make_user(i: int) -> UserWithExtensions:
+    now = datetime.now(UTC)
+    user = UserWithExtensions(
+        id=f"00000000-0000-4000-8000-{i:012d}",
+        user_name=f"user{i}",
+        display_name=f"Given{i} Family{i}",
+        name=Name(given_name=f"Given{i}", family_name=f"Family{i}", formatted=f"Given{i} Family{i}"),
+        emails=[
+            Email(value=f"user{i}@example.test", type="mailbox", primary=False),
+            Email(value=f"alias{i}@example.test", type="alias", primary=False),
+        ],
+        phone_numbers=[PhoneNumber(value=f"+49 421 {i:06d}", type="work")],
+        addresses=[Address(street_address=f"Street {i}", locality="Bremen", postal_code="28359", type="work")],
+        title="Engineer",
+        preferred_language="de-DE",
+        active=True,
+        meta=Meta(
+            resource_type="User",
+            location=f"https://scim.example.test/scim/v2/Users/{i}",
+            created=now,
+            last_modified=now,
+        ),
+    )
+    user[EnterpriseUser] = EnterpriseUser(employee_number=str(i), department="Development")
+    user[UniventionUser] = UniventionUser()
+    user[Customer1User] = Customer1User()
+
+    return user
+
+
+def make_app(list_response: ListResponse[UserWithExtensions]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=ListResponse[UserWithExtensions])
+    async def response_model() -> ListResponse[UserWithExtensions]:
+        return list_response
+
+    @app.get("/scim-json-response", response_model=ListResponse[UserWithExtensions])
+    async def scim_json_response() -> ScimJSONResponse:
+        return ScimJSONResponse(list_response)
+
+    # Resources which are already SCIM dicts skip the pydantic serialization completely
+    list_response_dict = list_response.model_dump(mode="json")
+
+    @app.get("/scim-json-response-dict", response_model=ListResponse[UserWithExtensions])
+    async def scim_json_response_dict() -> ScimJSONResponse:
+        return ScimJSONResponse(list_response_dict)
+
+    return app
+
+
+def measure(client: TestClient, path: str, requests: int) -> tuple[float, bytes]:
+    body = client.get(path).content
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    return (time.perf_counter() - start) / requests, body
+
+
+def run_benchmark(users: int, requests: int) -> None:
+    print(f"\n=== Response serialization benchmark ({users} users, {requests} requests) ===\n")
+
+    resources = [make_user(i) for i in range(users)]
+    list_response = ListResponse[UserWithExtensions](
+        total_results=users, items_per_page=users, start_index=1, resources=resources
+    )
+
+    with TestClient(make_app(list_response)) as client:
+        response_model, body_response_model = measure(client, "/response-model", requests)
+        scim_json, body_scim_json = measure(client, "/scim-json-response", requests)
+        scim_json_dict, body_scim_json_dict = measure(client, "/scim-json-response-dict", requests)
+
+    assert body_response_model == body_scim_json, "Both paths must return the same document"
+    assert json.loads(body_response_model) == json.loads(body_scim_json_dict), "Both paths must return the same data"
+
+    print(f"response_model (validate + serialize): {response_model * 1000:8.1f} ms/request")
+    print(f"ScimJSONResponse:                      {scim_json * 1000:8.1f} ms/request")
+    print(f"ScimJSONResponse (dict content):       {scim_json_dict * 1000:8.1f} ms/request")
+
+
+if __name__ == "__main__":
+    run_benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -1,7 +1,10 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import hashlib
 import json
+import time
+from collections import OrderedDict
 from typing import Any
 
 from fastapi import HTTPException, status
@@ -19,18 +22,68 @@ class OpenIDConnectAuthentication(Authentication):
     Implements bearer authentication for the SCIM API.
 
     Validates an open id connect token against the given open id connect configuration.
+    Validated tokens are cached, so clients reusing a token skip the signature check until
+    the token expires, the cache TTL is reached or the JWKS changes.
     """
 
-    def __init__(self, oidc_configuration: OpenIDConnectConfiguration, client_id: str):
+    def __init__(
+        self,
+        oidc_configuration: OpenIDConnectConfiguration,
+        client_id: str,
+        token_cache_size: int = 1000,
+        token_cache_ttl: int = 300,
+    ):
+        """
+        Args:
+            oidc_configuration: OpenID connect configuration providing the signing keys
+            client_id: Client ID which must be in the azp claim
+            token_cache_size: Maximum number of validated tokens to cache
+            token_cache_ttl: Maximum seconds to cache a validated token, 0 disables the cache
+        """
         self.oidc_configuration = oidc_configuration
         self.client_id = client_id
-
-    def _validate_token(self, token: str, jwks: JWKSet, algs: str, retry: bool) -> JWT:
+        self.token_cache_size = token_cache_size
+        self.token_cache_ttl = token_cache_ttl
+        # Hash of the token to the time the cache entry expires and the user information
+        self._token_cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._token_cache_jwks: JWKSet | None = None
+
+    def _get_cached_token(self, key: str, jwks: JWKSet) -> dict[str, Any] | None:
+        if jwks is not self._token_cache_jwks:
+            # Tokens validated with a previous key set must be validated again
+            self._token_cache.clear()
+            self._token_cache_jwks = jwks
+            return None
+
+        entry = self._token_cache.get(key)
+        if entry is None:
+            return None
+
+        expires, user_info = entry
+        if expires <= time.time():
+            del self._token_cache[key]
+            return None
+
+        self._token_cache.move_to_end(key)
+        return dict(user_info)
+
+    def _cache_token(self, key: str, user_info: dict[str, Any]) -> None:
+        if self.token_cache_ttl <= 0 or self.token_cache_size <= 0:
+            return
+
+        expires = min(float(user_info["expires"]), time.time() + self.token_cache_ttl)
+        self._token_cache[key] = (expires, user_info)
+        self._token_cache.move_to_end(key)
+        while len(self._token_cache) > self.token_cache_size:
+            self._token_cache.popitem(last=False)
+
+    async def _validate_token(self, token: str, jwks: JWKSet, algs: str, retry: bool) -> JWT:
         """
         Validate a JWT token
 
         If key is not found in key set, redownload key set from oidc configuration once
-        to be sure keys have not changed since initial fetching.
+        to be sure keys have not changed since initial fetching. The configuration limits
+        how often this happens, so tokens with unknown keys can not flood the IdP.
 
         Args:
             token: The JWT token to validate
@@ -52,14 +105,19 @@ class OpenIDConnectAuthentication(Authentication):
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token.") from e
 
             try:
-                jwks = self.oidc_configuration.get_jwks(True)
+                reloaded_jwks = await self.oidc_configuration.get_jwks(True)
             except Exception:
                 logger.error("Token validation failed: Invalid OpenID connect configuration")
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN, detail="Invalid OpenID connect configuration."
                 ) from e
 
-            return self._validate_token(token, jwks, algs, False)
+            if reloaded_jwks is jwks:
+                # Reloaded recently, the key is still unknown
+                logger.error("Token validation failed: Invalid signature", error=e)
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token.") from e
+
+            return await self._validate_token(token, reloaded_jwks, algs, False)
         except JWTMissingClaim as e:
             logger.error("Token validation failed: Mandatory claim missing", error=e)
         except JWTExpired as e:
@@ -83,21 +141,29 @@ class OpenIDConnectAuthentication(Authentication):
             HTTPException: If authentication fails
         """
         try:
-            configuration = self.oidc_configuration.get_configuration()
+            configuration = await self.oidc_configuration.get_configuration()
             if "id_token_signing_alg_values_supported" not in configuration:
                 logger.error("Token validation failed: Invalid OpenID connect configuration")
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN, detail="Invalid OpenID connect configuration."
                 )
 
-            jwks = self.oidc_configuration.get_jwks()
+            jwks = await self.oidc_configuration.get_jwks()
         except Exception as e:
             logger.error("Token validation failed: Invalid OpenID connect configuration")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Invalid OpenID connect configuration."
             ) from e
 
-        jwt = self._validate_token(token, jwks, configuration["id_token_signing_alg_values_supported"], True)
+        # Only a hash of the token is kept in memory
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        user_info = self._get_cached_token(cache_key, jwks)
+        if user_info is not None:
+            return user_info
+
+        jwt = await self._validate_token(token, jwks, configuration["id_token_signing_alg_values_supported"], True)
         jwt_claims = json.loads(jwt.claims)
 
-        return {"sub": jwt_claims.get("sub", None), "audience": jwt_claims["aud"], "expires": jwt_claims["exp"]}
+        user_info = {"sub": jwt_claims.get("sub", None), "audience": jwt_claims["aud"], "expires": jwt_claims["exp"]}
+        self._cache_token(cache_key, user_info)
+        return user_info
@@ -15,7 +15,7 @@ class OpenIDConnectConfiguration(ABC):
     """
 
     @abstractmethod
-    def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
+    async def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
         """
         Get OpenID configuration from cache or from configured idp_openid_configuration_url
 
@@ -28,19 +28,28 @@ class OpenIDConnectConfiguration(ABC):
         pass
 
     @abstractmethod
-    def get_jwks(self, force_reload: bool = False) -> JWKSet:
+    async def get_jwks(self, force_reload: bool = False) -> JWKSet:
         """
         Get JWKs from cache or from OpenID configuration key "jwk_uri"
 
         Args:
-            force_reload: Reload jwks from remote URL even if cache is available
+            force_reload: Reload jwks from remote URL even if cache is available,
+                implementations may limit how often this happens
 
         Returns:
             dict: JWKS from OpenID configuration
 
         Raises:
-            requests.exceptions.RequestException: If getting configuration or jwks fails
+            httpx.HTTPError: If getting configuration or jwks fails
             KeyError: If mandatory key is not available in returned OpenID configuration
             JWException: If parsing jwks fails
         """
         pass
+
+    async def refresh_jwks(self) -> None:
+        """
+        Keep the JWKS up to date in the background, runs until cancelled.
+
+        Implementations without remote keys return immediately.
+        """
+        return None
@@ -1,9 +1,12 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import asyncio
+import re
+import time
 from typing import Any
 
-import requests
+import httpx
 from jwcrypto.common import JWException
 from jwcrypto.jwk import JWKSet
 from loguru import logger
@@ -12,19 +15,54 @@ from univention.scim.server.authn.oidc_configuration import OpenIDConnectConfigu
 from univention.scim.server.config import AuthenticatorConfig
 
 
+_MAX_AGE_PATTERN = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def _max_age(cache_control: str | None) -> int | None:
+    """
+    Get the seconds a response may be cached from a Cache-Control header.
+    Args:
+        cache_control: Value of the Cache-Control header
+    Returns:
+        The max-age, 0 for no-cache or no-store and None if the header does not say
+    """
+    if not cache_control:
+        return None
+
+    if "no-cache" in cache_control.lower() or "no-store" in cache_control.lower():
+        return 0
+
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    return int(match.group(1)) if match else None
+
+
 class OpenIDConnectConfigurationImpl(OpenIDConnectConfiguration):
     """
     Implements well-known OpenID connect configuration.
 
-    Gets the OpenID connection settings from a well-known URL
+    Gets the OpenID connection settings from a well-known URL. The JWKS is refreshed in the
+    background as the IdP allows with Cache-Control, so validating tokens does not wait for
+    the IdP. Forced reloads for unknown keys are shared by concurrent callers and happen at
+    most once per jwks_min_reload_interval.
     """
 
     def __init__(self, config: AuthenticatorConfig) -> None:
         self.config = config
         self.oidc_config: dict[str, Any] | None = None
         self.jwks: JWKSet | None = None
-
-    def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
+        # Seconds until the next background refresh of the JWKS
+        self.jwks_max_age = config.jwks_refresh_interval
+        self._jwks_text: str | None = None
+        self._jwks_loaded = 0.0
+        self._jwks_reload: asyncio.Task[JWKSet] | None = None
+
+    async def _get(self, url: str) -> httpx.Response:
+        async with httpx.AsyncClient(timeout=self.config.request_timeout) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response
+
+    async def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
         """
         Get OpenID configuration from cache or from configured idp_openid_configuration_url
 
@@ -35,65 +73,106 @@ class OpenIDConnectConfigurationImpl(OpenIDConnectConfiguration):
             dict: OpenID configuration
 
         Raises:
-            requests.exceptions.RequestException: If getting configuration or jwks fails
+            ValueError: If getting the configuration fails or it is invalid
         """
         if not force_reload and self.oidc_config:
             return self.oidc_config
 
         logger.info("Getting OpenID connect configuration", url=self.config.idp_openid_configuration_url)
         try:
-            self.oidc_config = requests.get(self.config.idp_openid_configuration_url).json()
-        except requests.exceptions.RequestException as e:
+            oidc_config = (await self._get(str(self.config.idp_openid_configuration_url))).json()
+        except httpx.HTTPError as e:
             logger.error(
                 "Failed to get OpenID connect configuration", url=self.config.idp_openid_configuration_url, error=e
             )
-            raise
+            raise ValueError("Failed to get OpenID connect configuration") from e
 
         if (
-            not self.oidc_config
-            or not isinstance(self.oidc_config, dict)
-            or "authorization_endpoint" not in self.oidc_config
-            or "token_endpoint" not in self.oidc_config
-            or "jwks_uri" not in self.oidc_config
-            or "id_token_signing_alg_values_supported" not in self.oidc_config
+            not oidc_config
+            or not isinstance(oidc_config, dict)
+            or "authorization_endpoint" not in oidc_config
+            or "token_endpoint" not in oidc_config
+            or "jwks_uri" not in oidc_config
+            or "id_token_signing_alg_values_supported" not in oidc_config
         ):
             logger.error("Invalid OpenID connect configuration", url=self.config.idp_openid_configuration_url)
             raise ValueError("Invalid OpenID connect configuration")
 
+        self.oidc_config = oidc_config
         return self.oidc_config
 
-    def get_jwks(self, force_reload: bool = False) -> JWKSet:
+    async def _load_jwks(self) -> JWKSet:
+        self._jwks_loaded = time.monotonic()
+
+        configuration = await self.get_configuration()
+        jwks_url = configuration["jwks_uri"]
+        logger.info("Getting OpenID connect jwks", url=jwks_url)
+        try:
+            response = await self._get(jwks_url)
+            # Keep the key set if nothing changed, so tokens validated with it stay cached
+            if self.jwks is None or response.text != self._jwks_text:
+                self.jwks = JWKSet.from_json(response.text)
+                self._jwks_text = response.text
+        except httpx.HTTPError:
+            logger.error("Failed to get jwks", url=jwks_url)
+            raise
+        except JWException:
+            logger.error("Failed to read jwks", url=jwks_url)
+            raise
+
+        max_age = _max_age(response.headers.get("cache-control"))
+        self.jwks_max_age = max(
+            max_age if max_age is not None else self.config.jwks_refresh_interval,
+            self.config.jwks_min_reload_interval,
+        )
+        return self.jwks
+
+    async def get_jwks(self, force_reload: bool = False) -> JWKSet:
         """
         Get JWKs from cache or from OpenID configuration key "jwk_uri"
 
         Args:
-            force_reload: Reload jwks from remote URL even if cache is available
+            force_reload: Reload jwks from remote URL even if cache is available, ignored if
+                the last reload was less than jwks_min_reload_interval seconds ago
 
         Returns:
             dict: JWKS from OpenID configuration
 
         Raises:
-            requests.exceptions.RequestException: If getting configuration or jwks fails
+            httpx.HTTPError: If getting configuration or jwks fails
             KeyError: If mandatory key is not available in returned OpenID configuration
             JWException: If parsing jwks fails
         """
-        if not force_reload and self.jwks:
+        if self.jwks is not None and not force_reload:
             return self.jwks
 
-        configuration = self.get_configuration()
-        if "jwks_uri" not in configuration:
-            logger.error("No JWK information in OpenID configuration", url=self.config.idp_openid_configuration_url)
-            raise KeyError("jwks_uri")
+        reload = self._jwks_reload
+        if (
+            reload is not None
+            and reload.done()
+            and time.monotonic() - self._jwks_loaded < self.config.jwks_min_reload_interval
+        ):
+            logger.debug("Skip reloading jwks, reloaded recently")
+            # Without keys the error of the last attempt is raised again
+            return self.jwks if self.jwks is not None else reload.result()
 
-        jwks_url = configuration["jwks_uri"]
-        logger.info("Getting OpenID connect jwks", url=jwks_url)
-        try:
-            self.jwks = JWKSet.from_json(requests.get(jwks_url).text)
-        except requests.exceptions.RequestException:
-            logger.error("Failed to get jwks", url=configuration["jwks_uri"])
-            raise
-        except JWException:
-            logger.error("Failed to read jwks", url=configuration["jwks_uri"])
-            raise
+        # All callers wait for the same request instead of each asking the IdP
+        if self._jwks_reload is None or self._jwks_reload.done():
+            self._jwks_reload = asyncio.ensure_future(self._load_jwks())
 
-        return self.jwks
+        # Callers which give up must not cancel the request of the others
+        return await asyncio.shield(self._jwks_reload)
+
+    async def refresh_jwks(self) -> None:
+        """
+        Reload the JWKS whenever its max-age has passed, runs until cancelled.
+        """
+        while True:
+            try:
+                await self.get_jwks(force_reload=True)
+                delay = self.jwks_max_age
+            except Exception as e:
+                logger.exception("Failed to refresh jwks", error=str(e))
+                delay = self.config.jwks_min_reload_interval
+
+            await asyncio.sleep(delay)
@@ -2,6 +2,7 @@
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
 from functools import lru_cache
+from typing import Literal
 
 from lancelog import LogLevel
 from pydantic import AnyHttpUrl, Field
@@ -13,6 +14,17 @@ class AuthenticatorConfig(BaseSettings):
     idp_openid_configuration_url: AnyHttpUrl = AnyHttpUrl("http://id.example.test/.well-known/openid-configuration")
     allowed_client_id: str = ""
     allowed_audience: str = ""
+    token_cache_size: int = Field(default=1000, description="Maximum number of validated tokens kept in memory")
+    token_cache_ttl: int = Field(
+        default=300, description="Maximum seconds a validated token is trusted without verifying it again, 0 disables"
+    )
+    jwks_refresh_interval: int = Field(
+        default=3600, description="Seconds between JWKS refreshes if the IdP does not send a Cache-Control max-age"
+    )
+    jwks_min_reload_interval: int = Field(
+        default=30, description="Minimum seconds between two JWKS requests, also when tokens use unknown keys"
+    )
+    request_timeout: float = Field(default=10, description="Timeout in seconds for requests to the IdP")
 
 
 class UdmConfig(BaseSettings):
@@ -25,6 +37,140 @@ class UdmConfig(BaseSettings):
     url: AnyHttpUrl = AnyHttpUrl("http://localhost:9979/univention/udm/")
     username: str = "admin"
     password: str = "univention"
+    connect_timeout: float = Field(default=5, description="Seconds to wait for a connection to the UDM REST API")
+    circuit_failure_rate: float = Field(default=0.5, description="Share of failed UDM requests which opens the circuit")
+    circuit_slow_call_duration: float = Field(
+        default=10, description="Seconds after which a UDM request counts as failed"
+    )
+    circuit_window_size: int = Field(
+        default=20, description="Number of recent UDM requests the failure rate is based on"
+    )
+    circuit_minimum_calls: int = Field(
+        default=10, description="Minimum number of UDM requests before the circuit opens"
+    )
+    circuit_open_duration: float = Field(
+        default=30, description="Seconds requests fail immediately before UDM is probed again"
+    )
+    circuit_half_open_probes: int = Field(
+        default=3, description="Number of successful probe requests needed to close the circuit"
+    )
+
+
+class LdapConfig(BaseSettings):
+    """
+    Settings for reading users and groups directly from LDAP.
+    """
+
+    model_config = SettingsConfigDict()
+
+    enabled: bool = Field(
+        default=False, description="If true GET requests are answered from LDAP, writes still go through UDM"
+    )
+    uri: str = Field(default="ldap://localhost:389", description="LDAP server URI")
+    base: str = Field(default="", description="LDAP base DN to search users and groups below")
+    bind_dn: str = Field(default="", description="DN to bind with, anonymous if empty")
+    password: str = Field(default="", description="Password of the bind DN")
+    pool_size: int = Field(default=10, description="Maximum number of open LDAP connections")
+    page_size: int = Field(default=500, description="Number of entries fetched per LDAP request")
+    user_attributes: dict[str, str] = Field(
+        default={},
+        description="Additional UDM user properties and their LDAP attribute, e.g. for extended attributes",
+    )
+    group_attributes: dict[str, str] = Field(
+        default={},
+        description="Additional UDM group properties and their LDAP attribute, e.g. for extended attributes",
+    )
+    multi_value_properties: list[str] = Field(
+        default=[], description="Additional UDM properties which have a list of values"
+    )
+
+
+class AdmissionConfig(BaseSettings):
+    """
+    Settings to limit the concurrent requests forwarded to UDM.
+    """
+
+    model_config = SettingsConfigDict()
+
+    enabled: bool = Field(default=False, description="If true concurrent SCIM requests are limited")
+    read_limit: int = Field(default=32, description="Maximum number of concurrent GET requests")
+    write_limit: int = Field(default=8, description="Maximum number of concurrent POST, PUT, PATCH and DELETE requests")
+    min_limit: int = Field(default=1, description="The limits are never decreased below this")
+    queue_size: int = Field(default=256, description="Maximum number of requests waiting, more are rejected with 429")
+    queue_timeout: float = Field(
+        default=10, description="Seconds a request waits to be processed before it is rejected with 503"
+    )
+    target_latency: float = Field(
+        default=2, description="Seconds a request may take before the limits are decreased, they recover when faster"
+    )
+
+
+class MetricsConfig(BaseSettings):
+    """
+    Settings for the Prometheus metrics endpoint and the per-request timing and backend call accounting.
+    """
+
+    model_config = SettingsConfigDict()
+
+    enabled: bool = Field(
+        default=False,
+        description="If true metrics are served under /metrics without authentication,"
+        " requires a single worker (SERVER_WORKERS=1) because every worker process has its own metrics",
+    )
+    server_timing: bool = Field(
+        default=False,
+        description="If true responses contain a Server-Timing header with the time spent in auth, UDM, mapping, ..."
+        " which is returned to all clients, also on 401 and 403 responses",
+    )
+    backend_call_budget: int = Field(
+        default=50,
+        description="Log a warning for requests making more calls to UDM and LDAP than this, 0 disables the check",
+    )
+
+
+class TracingConfig(BaseSettings):
+    """
+    Settings for OpenTelemetry tracing, which requires the OpenTelemetry SDK and exporter to be installed.
+    """
+
+    model_config = SettingsConfigDict()
+
+    enabled: bool = Field(default=False, description="If true spans are created and exported")
+    exporter: Literal["otlp", "console"] = Field(
+        default="otlp", description="Export spans to an OTLP/HTTP collector or write them as JSON to the console"
+    )
+    endpoint: str = Field(
+        default="http://localhost:4318/v1/traces", description="Traces endpoint of the OTLP/HTTP collector"
+    )
+    file: str = Field(default="", description="File the console exporter appends to instead of stdout")
+    service_name: str = Field(default="scim-server", description="Name of the service in the traces")
+    sample_rate: float = Field(
+        default=1.0,
+        description="Fraction of traces started by the server which are recorded, callers decide for theirs",
+    )
+
+
+class ProfilingConfig(BaseSettings):
+    """
+    Settings for profiling single requests, for finding out where slow requests spend their time.
+    """
+
+    model_config = SettingsConfigDict()
+
+    enabled: bool = Field(default=False, description="If true requests can be profiled")
+    token: str = Field(
+        default="", description="Requests with this value in the X-SCIM-Profile header are profiled, empty disables"
+    )
+    sample_rate: float = Field(
+        default=0.0, description="Fraction of all requests which are profiled into the directory"
+    )
+    directory: str = Field(
+        default="", description="Directory the profiles are written to, if empty requested profiles are downloaded"
+    )
+    profiler: Literal["cprofile", "pyinstrument"] = Field(
+        default="cprofile",
+        description="cProfile writes pstats files, pyinstrument (must be installed) speedscope JSON files",
+    )
 
 
 class DocuConfig(BaseSettings):
@@ -37,6 +183,39 @@ class DocuConfig(BaseSettings):
     client_secret: str = Field(default="", description="Client secret to be used to login at the swagger UI")
 
 
+class ServerConfig(BaseSettings):
+    """
+    Settings for running the application with uvicorn.
+    """
+
+    model_config = SettingsConfigDict()
+
+    workers: int | None = Field(
+        default=None,
+        description="Number of worker processes, if not set it is derived from the CPUs available to the process",
+    )
+    loop: Literal["auto", "asyncio", "uvloop"] = Field(
+        default="auto", description="Event loop implementation, auto uses uvloop if it is installed"
+    )
+    http: Literal["auto", "h11", "httptools"] = Field(
+        default="auto", description="HTTP protocol implementation, auto uses httptools if it is installed"
+    )
+    backlog: int = Field(default=2048, description="Maximum number of connections waiting to be accepted")
+    timeout_keep_alive: int = Field(
+        default=5, description="Seconds to keep idle HTTP keep-alive connections open before closing them"
+    )
+    limit_max_requests: int | None = Field(
+        default=None,
+        description="Gracefully restart a worker after it handled this many requests, only used with multiple workers",
+    )
+    limit_max_requests_jitter: int = Field(
+        default=0, description="Random number of requests added to limit_max_requests to stagger worker restarts"
+    )
+    timeout_graceful_shutdown: int | None = Field(
+        default=20, description="Seconds to wait for running requests when a worker is stopped"
+    )
+
+
 class ApplicationSettings(BaseSettings):
     """
     Application settings with support for environment variables and .env files.
@@ -60,6 +239,15 @@ class ApplicationSettings(BaseSettings):
     # Server
     listen: str = "0.0.0.0"
     port: int = 8000
+    server: ServerConfig = ServerConfig()
+    # Concurrency limits protecting UDM
+    admission: AdmissionConfig = AdmissionConfig()
+    # Prometheus metrics
+    metrics: MetricsConfig = MetricsConfig()
+    # OpenTelemetry tracing
+    tracing: TracingConfig = TracingConfig()
+    # Profiling of single requests
+    profiling: ProfilingConfig = ProfilingConfig()
 
     # CORS
     cors_origins: list[str] = ["*"]
@@ -70,8 +258,16 @@ class ApplicationSettings(BaseSettings):
     docu: DocuConfig = DocuConfig()
     # PATCH operations
     patch_enabled: bool = False
+    # Answer PATCH requests which only add or remove group members with 204 No Content instead of the group,
+    # saves reading the group with all its members after the change
+    patch_members_no_content: bool = False
+    # Map the groups of users from an index of all group memberships, refreshed every interval seconds
+    user_groups_enabled: bool = False
+    user_groups_refresh_interval: int = 300
     # UDM configuration
     udm: UdmConfig = UdmConfig()
+    # Direct LDAP read access
+    ldap: LdapConfig = LdapConfig()
     # SCIM externalId mapping configuration
     external_id_user_mapping: str | None = Field(
         default=None, description="UDM property to map to SCIM User externalId"
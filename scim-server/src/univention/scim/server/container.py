@@ -10,8 +10,11 @@ from univention.scim.server.authz.authz import Authorization
 from univention.scim.server.config import ApplicationSettings, application_settings, dependency_injection_settings
 from univention.scim.server.domain.group_service import GroupService
 from univention.scim.server.domain.repo.container import RepositoryContainer
+from univention.scim.server.domain.repo.udm.circuit_breaker import CircuitBreaker
 from univention.scim.server.domain.user_service import UserService
 from univention.scim.server.model_service.load_schemas import LoadSchemas
+from univention.scim.server.tracing import instrument_service
+from univention.scim.transformation.id_cache import IdCache
 
 
 # Concrete implementations / adapters can be overwritten by setting them as env vars for DependencyInjectionSettings.
@@ -31,15 +34,21 @@ class ApplicationContainer(DeclarativeContainer):
     else:
         user_repo = Singleton(di.di_user_repo)
 
-    user_service: UserService = Singleton(di.di_user_service, user_repository=user_repo)
+    user_service: UserService = Singleton(
+        instrument_service, Singleton(di.di_user_service, user_repository=user_repo), "UserService"
+    )
 
     if di.di_group_repo == "univention.scim.server.domain.repo.container.RepositoryContainer.group_crud_manager":
         group_repo = repositories.group_crud_manager
     else:
         group_repo = Singleton(di.di_group_repo)
 
-    group_service: GroupService = Singleton(di.di_group_service, group_repository=group_repo)
+    group_service: GroupService = Singleton(
+        instrument_service, Singleton(di.di_group_service, group_repository=group_repo), "GroupService"
+    )
     schema_loader: LoadSchemas = Singleton(di.di_schema_loader)
+    id_cache: IdCache = repositories.id_cache
+    circuit_breaker: CircuitBreaker = repositories.circuit_breaker
 
     if settings().auth_enabled:
         oidc_configuration: OpenIDConnectConfiguration = Singleton(
@@ -49,6 +58,8 @@ class ApplicationContainer(DeclarativeContainer):
             di.di_authenticator,
             oidc_configuration=oidc_configuration,
             client_id=settings().authenticator.allowed_client_id,
+            token_cache_size=settings().authenticator.token_cache_size,
+            token_cache_ttl=settings().authenticator.token_cache_ttl,
         )
         authorization: Authorization = Singleton(
             di.di_authorization, audience=settings().authenticator.allowed_audience
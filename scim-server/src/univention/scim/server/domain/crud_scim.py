@@ -2,7 +2,7 @@
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 from scim2_models import Resource
 
@@ -27,9 +27,30 @@ class CrudScim(Generic[T], ABC):
         """
         pass
 
+    # Defined before list() which shadows the builtin in the class body
+    @abstractmethod
+    async def update_members(
+        self, resource_id: str, added: list[dict[str, Any]], removed: list[dict[str, Any]]
+    ) -> None:
+        """
+        Add and remove members of a group without replacing the other members.
+        Args:
+            resource_id: The group's unique identifier
+            added: SCIM members to add
+            removed: SCIM members to remove, members which do not exist are ignored
+        Raises:
+            ValueError: If the group cannot be updated
+        """
+        pass
+
     @abstractmethod
     async def list(
-        self, filter_str: str | None = None, start_index: int = 1, count: int | None = None
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
     ) -> tuple[int, list[T]]:
         """
         List resources with optional filtering and pagination.
@@ -37,11 +58,24 @@ class CrudScim(Generic[T], ABC):
             filter_str: SCIM filter expression
             start_index: 1-based index for the first result
             count: Maximum number of results to return
+            attributes: SCIM attributes the client asked for, implementations may skip resolving others
+            excluded_attributes: SCIM attributes the client does not want
         Returns:
             tuple of int the total results and List of resources matching the criteria
         """
         pass
 
+    @abstractmethod
+    async def count(self, filter_str: str | None = None) -> int:
+        """
+        Count resources without mapping them.
+        Args:
+            filter_str: SCIM filter expression
+        Returns:
+            Number of resources matching the filter
+        """
+        pass
+
     @abstractmethod
     async def create(self, resource: T) -> T:
         """
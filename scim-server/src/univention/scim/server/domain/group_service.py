@@ -30,7 +30,12 @@ class GroupService(ABC):
 
     @abstractmethod
     async def list_groups(
-        self, filter_str: str | None = None, start_index: int = 1, count: int | None = None
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
     ) -> ListResponse[GroupWithExtensions]:
         """
         List groups with optional filtering and pagination.
@@ -38,11 +43,24 @@ class GroupService(ABC):
             filter_str: SCIM filter expression
             start_index: 1-based index for the first result
             count: Maximum number of results to return
+            attributes: SCIM attributes to return
+            excluded_attributes: SCIM attributes not to return
         Returns:
             ListResponse: Paginated list of groups
         """
         pass
 
+    @abstractmethod
+    async def count_groups(self, filter_str: str | None = None) -> int:
+        """
+        Count groups without retrieving them.
+        Args:
+            filter_str: SCIM filter expression
+        Returns:
+            Number of groups matching the filter
+        """
+        pass
+
     @abstractmethod
     async def create_group(self, group: GroupWithExtensions) -> GroupWithExtensions:
         """
@@ -84,5 +102,17 @@ class GroupService(ABC):
         pass
 
     @abstractmethod
-    async def apply_patch_operations(self, group_id: str, operations: list[dict[str, Any]]) -> GroupWithExtensions:
+    async def apply_patch_operations(
+        self, group_id: str, operations: list[dict[str, Any]]
+    ) -> GroupWithExtensions | None:
+        """
+        Apply SCIM patch operations to a group.
+        Args:
+            group_id: The group's unique identifier
+            operations: SCIM patch operations
+        Returns:
+            The patched group, None if only members were added or removed and the group was not read
+        Raises:
+            ValueError: If the group is not found or the operations are invalid
+        """
         pass
@@ -7,7 +7,7 @@ from loguru import logger
 from scim2_models import Group, ListResponse
 
 from univention.scim.server.domain.group_service import GroupService
-from univention.scim.server.domain.patch_mixin import PatchMixin
+from univention.scim.server.domain.patch_mixin import PatchMixin, PathParser, ScimPatchError
 from univention.scim.server.domain.repo.crud_manager import CrudManager
 from univention.scim.server.domain.rules.action import Action
 from univention.scim.server.domain.rules.evaluate import RuleEvaluator
@@ -39,11 +39,18 @@ class GroupServiceImpl(GroupService, PatchMixin):
         return group
 
     async def list_groups(
-        self, filter_str: str | None = None, start_index: int = 1, count: int | None = None
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
     ) -> ListResponse[Group]:
         """List groups with optional filtering and pagination."""
         logger.debug(f"Listing groups with filter: {filter_str}, start_index: {start_index}, count: {count}")
-        total, groups = await self.group_repository.list(filter_str, start_index, count)
+        total, groups = await self.group_repository.list(
+            filter_str, start_index, count, attributes, excluded_attributes
+        )
         return ListResponse[Group](
             schemas=["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
             total_results=total,
@@ -52,6 +59,11 @@ class GroupServiceImpl(GroupService, PatchMixin):
             items_per_page=len(groups),
         )
 
+    async def count_groups(self, filter_str: str | None = None) -> int:
+        """Count groups matching a filter."""
+        logger.debug(f"Counting groups with filter: {filter_str}")
+        return await self.group_repository.count(filter_str)
+
     async def create_group(self, group: Group) -> Group:
         """Create a new group."""
         logger.debug("Creating new group")
@@ -92,10 +104,18 @@ class GroupServiceImpl(GroupService, PatchMixin):
         logger.info("Updated group.", id=group_id)
         return updated_group
 
-    async def apply_patch_operations(self, group_id: str, operations: list[dict[str, Any]]) -> Group:
+    async def apply_patch_operations(self, group_id: str, operations: list[dict[str, Any]]) -> Group | None:
         """Apply SCIM patch operations to the group with the given ID."""
         logger.debug(f"Applying patch operations to group ID: {group_id}")
 
+        # Adding or removing members only touches these members, unless rules need to see the whole group
+        member_changes = _member_changes(operations) if not self.rule_evaluator.rules else None
+        if member_changes is not None:
+            added, removed = member_changes
+            await self.group_repository.update_members(group_id, added, removed)
+            logger.info("Patched members of group.", id=group_id, added=len(added), removed=len(removed))
+            return None
+
         # Fetch the existing group
         existing_group = await self.group_repository.get(group_id)
         if not existing_group:
@@ -137,3 +157,46 @@ class GroupServiceImpl(GroupService, PatchMixin):
         # Validate required fields
         if not group.display_name:
             raise ValueError("displayName is required")
+
+
+def _member_changes(operations: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]] | None:
+    """
+    Collect the members added and removed by patch operations.
+    Returns:
+        Added and removed members, None if an operation does anything else
+    """
+    added: dict[str, dict[str, Any]] = {}
+    removed: dict[str, dict[str, Any]] = {}
+    for operation in operations:
+        op = str(operation.get("op", "")).lower()
+        try:
+            path = PathParser.parse(operation.get("path") or "")
+        except ScimPatchError:
+            # Reported by the generic patch
+            return None
+        if not path["attribute"] or path["schema"] or path["subattr"] or path["attribute"].lower() != "members":
+            return None
+
+        value = operation.get("value")
+        if path["filter"]:
+            # remove members[value eq "<id>"]
+            member_filter = path["filter"]
+            if op != "remove" or member_filter.get("attr") != "value" or member_filter.get("op") != "eq":
+                return None
+            members = [{"value": member_filter["value"]}]
+        elif op in ("add", "remove") and value:
+            # Microsoft Entra ID removes members with a value instead of a filter
+            members = value if isinstance(value, list) else [value]
+        else:
+            # Replacing or removing all members needs the whole group
+            return None
+
+        # Later operations on the same member win
+        target, other = (added, removed) if op == "add" else (removed, added)
+        for member in members:
+            if not isinstance(member, dict) or not member.get("value"):
+                return None
+            other.pop(member["value"], None)
+            target[member["value"]] = member
+
+    return list(added.values()), list(removed.values())
@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from univention.scim.server.metrics import COALESCED_READS
+from univention.scim.server.request_timing import RequestTiming, current_timing
+
+
+R = TypeVar("R")
+
+# Identifies what the caller of the current request is allowed to see, set after authorization.
+# Requests of different callers never share results.
+authorization_context: ContextVar[str] = ContextVar("authorization_context", default="")
+
+
+class RequestCoalescer:
+    """
+    Lets concurrent identical reads share one execution and its result.
+
+    A read which arrives while the same read of the same caller is already running waits
+    for that one instead of asking the backend again. Results are only shared while the
+    read is running, nothing is cached. Writes call invalidate(), so a read started after
+    a write never gets the result of a read started before it.
+
+    The read records its backend calls and durations into a timing of its own, which is
+    added to the timing of every caller when the read is done. So all callers report the
+    time and calls of the shared read, spans of the read belong to the trace of the first one.
+
+    Callers must not modify the shared results.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, tuple[asyncio.Future[Any], RequestTiming]] = {}
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        """
+        Reads started from now on do not join reads which are already running.
+        """
+        self._generation += 1
+
+    async def run(self, key: tuple[Hashable, ...], read: Callable[[], Awaitable[R]]) -> R:
+        """
+        Run a read or wait for the identical one which is already running.
+        Args:
+            key: Everything the result depends on, e.g. resource type, operation and arguments
+            read: Executes the read
+        Returns:
+            The result of the read, shared with concurrent callers
+        """
+        key = (authorization_context.get(), self._generation, *key)
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            shared_timing = RequestTiming()
+
+            async def shared_read() -> R:
+                # The task runs in a copy of the context, the timing of the caller is not changed
+                current_timing.set(shared_timing)
+                return await read()
+
+            task: asyncio.Future[Any] = asyncio.ensure_future(shared_read())
+            self._in_flight[key] = (task, shared_timing)
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            task, shared_timing = in_flight
+            COALESCED_READS.inc()
+            logger.trace("Joining running read", key=key[2:])
+
+        try:
+            # A caller which gives up must not cancel the read for the others
+            return await asyncio.shield(task)
+        finally:
+            timing = current_timing.get()
+            if timing is not None and task.done():
+                timing.merge(shared_timing)
+
+    def _done(self, key: Hashable, task: asyncio.Future[Any]) -> None:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None and in_flight[0] is task:
+            del self._in_flight[key]
+
+        # Retrieve the error, the callers may all have given up
+        if not task.cancelled():
+            task.exception()
@@ -12,11 +12,19 @@ from univention.admin.rest.client import UDM
 
 from univention.scim.server.config import ApplicationSettings
 from univention.scim.server.domain.crud_scim import CrudScim
+from univention.scim.server.domain.repo.coalescing import RequestCoalescer
 from univention.scim.server.domain.repo.crud_manager import CrudManager
+from univention.scim.server.domain.repo.ldap.crud_ldap import CrudLdap
+from univention.scim.server.domain.repo.ldap.ldap_id_cache import LdapIdCache
+from univention.scim.server.domain.repo.ldap.ldap_pool import LdapConnectionPool
+from univention.scim.server.domain.repo.ldap.ldap_properties import group_property_mapping, user_property_mapping
+from univention.scim.server.domain.repo.udm.circuit_breaker import CircuitBreaker, protect_udm_client
 from univention.scim.server.domain.repo.udm.crud_udm import CrudUdm
 from univention.scim.server.domain.repo.udm.udm_id_cache import UdmIdCache
 from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
 from univention.scim.transformation import ScimToUdmMapper, UdmToScimMapper
+from univention.scim.transformation.id_cache import IdCache
+from univention.scim.transformation.membership_index import MembershipIndex
 
 
 T = TypeVar("T", bound=Resource)
@@ -38,24 +46,57 @@ def _get_base_url(host: AnyHttpUrl, api_prefix: str) -> str:
     return f"{str(host).rstrip('/')}{api_prefix}"
 
 
+def _get_repository_backend(ldap_enabled: bool) -> str:
+    return "ldap" if ldap_enabled else "udm"
+
+
+def _get_membership_index(user_groups_enabled: bool, index: MembershipIndex) -> MembershipIndex | None:
+    return index if user_groups_enabled else None
+
+
 class RepositoryContainer(containers.DeclarativeContainer):
     """Container for repository-related dependencies."""
 
     settings = providers.Dependency(instance_of=ApplicationSettings)
 
+    # Fails UDM requests immediately while UDM is down instead of waiting for timeouts
+    circuit_breaker: CircuitBreaker = providers.Singleton(
+        CircuitBreaker,
+        "UDM",
+        failure_rate_threshold=settings.provided.udm.circuit_failure_rate,
+        slow_call_duration=settings.provided.udm.circuit_slow_call_duration,
+        window_size=settings.provided.udm.circuit_window_size,
+        minimum_calls=settings.provided.udm.circuit_minimum_calls,
+        open_duration=settings.provided.udm.circuit_open_duration,
+        half_open_probes=settings.provided.udm.circuit_half_open_probes,
+    )
+
     udm_client: UDM = providers.Singleton(
-        UDM.http,
-        settings.provided.udm.url,
-        settings.provided.udm.username,
-        settings.provided.udm.password,
-        request_id_generator=_generate_udm_request_id,
+        protect_udm_client,
+        providers.Singleton(
+            UDM.http,
+            settings.provided.udm.url,
+            settings.provided.udm.username,
+            settings.provided.udm.password,
+            request_id_generator=_generate_udm_request_id,
+        ),
+        circuit_breaker,
+        settings.provided.udm.connect_timeout,
     )
     cache: UdmIdCache = providers.Singleton(UdmIdCache, udm_client, 120)
 
+    # Shared by the UDM and LDAP mappers, both map the groups read and written
+    membership_index: MembershipIndex = providers.Singleton(MembershipIndex)
+    optional_membership_index = providers.Callable(
+        _get_membership_index, settings.provided.user_groups_enabled, membership_index
+    )
+
     # Mappers
     scim2udm_mapper: ScimToUdmMapper = providers.Singleton(
         ScimToUdmMapper,
         cache=cache,
+        user_type=UserWithExtensions,
+        group_type=GroupWithExtensions,
         external_id_user_mapping=settings.provided.external_id_user_mapping,
         external_id_group_mapping=settings.provided.external_id_group_mapping,
         roles_user_mapping=settings.provided.roles_user_mapping,
@@ -69,10 +110,11 @@ class RepositoryContainer(containers.DeclarativeContainer):
         external_id_user_mapping=settings.provided.external_id_user_mapping,
         external_id_group_mapping=settings.provided.external_id_group_mapping,
         roles_user_mapping=settings.provided.roles_user_mapping,
+        membership_index=optional_membership_index,
     )
 
     # Repository factories
-    user_repository: CrudScim[UserWithExtensions] = providers.Factory(
+    udm_user_repository: CrudScim[UserWithExtensions] = providers.Factory(
         CrudUdm[UserWithExtensions],
         resource_type="User",
         scim2udm_mapper=scim2udm_mapper,
@@ -85,7 +127,7 @@ class RepositoryContainer(containers.DeclarativeContainer):
         external_id_mapping=settings.provided.external_id_user_mapping,
     )
 
-    group_repository: CrudScim[GroupWithExtensions] = providers.Factory(
+    udm_group_repository: CrudScim[GroupWithExtensions] = providers.Factory(
         CrudUdm[GroupWithExtensions],
         resource_type="Group",
         scim2udm_mapper=scim2udm_mapper,
@@ -98,11 +140,101 @@ class RepositoryContainer(containers.DeclarativeContainer):
         external_id_mapping=settings.provided.external_id_group_mapping,
     )
 
+    # Direct LDAP read access, only created if enabled
+    ldap_pool: LdapConnectionPool = providers.Singleton(
+        LdapConnectionPool,
+        settings.provided.ldap.uri,
+        settings.provided.ldap.bind_dn,
+        settings.provided.ldap.password,
+        size=settings.provided.ldap.pool_size,
+    )
+    ldap_cache: LdapIdCache = providers.Singleton(LdapIdCache, ldap_pool, settings.provided.ldap.base, 120)
+
+    # The LDAP repositories resolve ids through the LDAP cache in both directions
+    ldap_scim2udm_mapper: ScimToUdmMapper = providers.Singleton(
+        ScimToUdmMapper,
+        cache=ldap_cache,
+        user_type=UserWithExtensions,
+        group_type=GroupWithExtensions,
+        external_id_user_mapping=settings.provided.external_id_user_mapping,
+        external_id_group_mapping=settings.provided.external_id_group_mapping,
+        roles_user_mapping=settings.provided.roles_user_mapping,
+    )
+
+    ldap_udm2scim_mapper: UdmToScimMapper = providers.Singleton(
+        UdmToScimMapper[UserWithExtensions, GroupWithExtensions],
+        cache=ldap_cache,
+        user_type=UserWithExtensions,
+        group_type=GroupWithExtensions,
+        external_id_user_mapping=settings.provided.external_id_user_mapping,
+        external_id_group_mapping=settings.provided.external_id_group_mapping,
+        roles_user_mapping=settings.provided.roles_user_mapping,
+        membership_index=optional_membership_index,
+    )
+
+    ldap_user_repository: CrudScim[UserWithExtensions] = providers.Factory(
+        CrudLdap[UserWithExtensions],
+        resource_type="User",
+        scim2udm_mapper=ldap_scim2udm_mapper,
+        udm2scim_mapper=ldap_udm2scim_mapper,
+        resource_class=User,
+        pool=ldap_pool,
+        base_dn=settings.provided.ldap.base,
+        property_mapping=providers.Singleton(
+            user_property_mapping,
+            settings.provided.ldap.user_attributes,
+            settings.provided.ldap.multi_value_properties,
+        ),
+        write_repository=udm_user_repository,
+        base_url=providers.Callable(
+            _get_base_url, host=settings.provided.host, api_prefix=settings.provided.api_prefix
+        ),
+        page_size=settings.provided.ldap.page_size,
+    )
+
+    ldap_group_repository: CrudScim[GroupWithExtensions] = providers.Factory(
+        CrudLdap[GroupWithExtensions],
+        resource_type="Group",
+        scim2udm_mapper=ldap_scim2udm_mapper,
+        udm2scim_mapper=ldap_udm2scim_mapper,
+        resource_class=Group,
+        pool=ldap_pool,
+        base_dn=settings.provided.ldap.base,
+        property_mapping=providers.Singleton(
+            group_property_mapping,
+            settings.provided.ldap.group_attributes,
+            settings.provided.ldap.multi_value_properties,
+        ),
+        write_repository=udm_group_repository,
+        base_url=providers.Callable(
+            _get_base_url, host=settings.provided.host, api_prefix=settings.provided.api_prefix
+        ),
+        page_size=settings.provided.ldap.page_size,
+    )
+
+    repository_backend = providers.Callable(_get_repository_backend, settings.provided.ldap.enabled)
+
+    id_cache: IdCache = providers.Selector(repository_backend, udm=cache, ldap=ldap_cache)
+
+    user_repository: CrudScim[UserWithExtensions] = providers.Selector(
+        repository_backend, udm=udm_user_repository, ldap=ldap_user_repository
+    )
+
+    group_repository: CrudScim[GroupWithExtensions] = providers.Selector(
+        repository_backend, udm=udm_group_repository, ldap=ldap_group_repository
+    )
+
+    # Shared by users and groups, writes of one type change reads of the other
+    coalescer: RequestCoalescer = providers.Singleton(RequestCoalescer)
+
     # CRUD Manager factories
     user_crud_manager: CrudManager[UserWithExtensions] = providers.Factory(
-        CrudManager[UserWithExtensions], primary_repository=user_repository, resource_type="User"
+        CrudManager[UserWithExtensions], primary_repository=user_repository, resource_type="User", coalescer=coalescer
     )
 
     group_crud_manager: CrudManager[GroupWithExtensions] = providers.Factory(
-        CrudManager[GroupWithExtensions], primary_repository=group_repository, resource_type="Group"
+        CrudManager[GroupWithExtensions],
+        primary_repository=group_repository,
+        resource_type="Group",
+        coalescer=coalescer,
     )
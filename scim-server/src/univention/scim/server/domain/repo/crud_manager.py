@@ -3,12 +3,13 @@
 
 from __future__ import annotations
 
-from typing import Generic, TypeVar, cast
+from typing import Any, Generic, TypeVar, cast
 
 from loguru import logger
 from scim2_models import Resource
 
 from univention.scim.server.domain.crud_scim import CrudScim
+from univention.scim.server.domain.repo.coalescing import RequestCoalescer
 
 
 T = TypeVar("T", bound=Resource)
@@ -21,15 +22,18 @@ class CrudManager(Generic[T], CrudScim[T]):
     implementations, providing a single access point for resource management.
     """
 
-    def __init__(self, primary_repository: CrudScim[T], resource_type: str):
+    def __init__(self, primary_repository: CrudScim[T], resource_type: str, coalescer: RequestCoalescer | None = None):
         """
         Initialize the CRUD manager.
         Args:
             primary_repository: The primary repository to use for CRUD operations (e.g., UDM)
             resource_type: The type of resource being managed (e.g., 'User', 'Group')
+            coalescer: Shares concurrent identical reads, should be shared by all managers because
+                writes of one resource type change reads of the others
         """
         self.primary_repository = primary_repository
         self.resource_type = resource_type
+        self.coalescer = coalescer or RequestCoalescer()
         self.logger = logger.bind(resource_type=resource_type)
         self.logger.info("Initialized CRUD manager.")
 
@@ -37,42 +41,84 @@ class CrudManager(Generic[T], CrudScim[T]):
         """Get a resource by ID."""
         self.logger.trace("Getting resource.", id=resource_id)
         try:
-            resource = await self.primary_repository.get(resource_id)
+            resource = await self.coalescer.run(
+                (self.resource_type, "get", resource_id), lambda: self.primary_repository.get(resource_id)
+            )
             return cast(T, resource)
         except Exception as exc:
             raise ValueError(f"Resource with ID {resource_id} not found") from exc
 
-    async def list(self, filter_str: str | None = None, start_index: int = 1, count: int | None = None) -> list[T]:
+    # Defined before list() which shadows the builtin in the class body
+    async def update_members(
+        self, resource_id: str, added: list[dict[str, Any]], removed: list[dict[str, Any]]
+    ) -> None:
+        """Add and remove members of a group."""
+        self.logger.trace("Updating members", id=resource_id, added=len(added), removed=len(removed))
+        try:
+            await self.primary_repository.update_members(resource_id, added, removed)
+        finally:
+            self.coalescer.invalidate()
+
+    async def list(
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
+    ) -> list[T]:
         """List resources with optional filtering and pagination."""
         self.logger.trace("Listing resources", filter_str=filter_str)
         # For now, we're just using the primary repository for listing
-        resources = await self.primary_repository.list(filter_str, start_index, count)
+        resources = await self.coalescer.run(
+            (
+                self.resource_type,
+                "list",
+                filter_str,
+                start_index,
+                count,
+                tuple(attributes or ()),
+                tuple(excluded_attributes or ()),
+            ),
+            lambda: self.primary_repository.list(filter_str, start_index, count, attributes, excluded_attributes),
+        )
         return cast(list[T], resources)
 
     async def count(self, filter_str: str | None = None) -> int:
         """Count resources matching a filter."""
         self.logger.trace("Counting resources", filter_str=filter_str)
         # For now, we're just using the primary repository for counting
-        result = await self.primary_repository.count(filter_str)
+        result = await self.coalescer.run(
+            (self.resource_type, "count", filter_str), lambda: self.primary_repository.count(filter_str)
+        )
         return cast(int, result)
 
     async def create(self, resource: T) -> T:
         """Create a new resource."""
         self.logger.trace("Creating resource")
         # Create in the primary repository
-        created_resource = await self.primary_repository.create(resource)
+        try:
+            created_resource = await self.primary_repository.create(resource)
+        finally:
+            self.coalescer.invalidate()
         return cast(T, created_resource)
 
     async def update(self, resource_id: str, resource: T) -> T:
         """Update an existing resource."""
         self.logger.trace("Updating resource", id=resource_id)
         # Update in the primary repository
-        updated_resource = await self.primary_repository.update(resource_id, resource)
+        try:
+            updated_resource = await self.primary_repository.update(resource_id, resource)
+        finally:
+            self.coalescer.invalidate()
         return cast(T, updated_resource)
 
     async def delete(self, resource_id: str) -> bool:
         """Delete a resource."""
         self.logger.trace("Deleting resource", id=resource_id)
         # Delete from the primary repository
-        result = await self.primary_repository.delete(resource_id)
+        try:
+            result = await self.primary_repository.delete(resource_id)
+        finally:
+            self.coalescer.invalidate()
         return bool(result)
@@ -0,0 +1,8 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+"""
+LDAP-based repository implementations.
+
+This package contains a read-only implementation of the CrudScim interface
+that queries the LDAP directory directly and delegates all writes.
+"""
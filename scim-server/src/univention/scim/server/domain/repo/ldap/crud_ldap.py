@@ -0,0 +1,267 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import time
+from typing import Any, Generic, TypeVar, cast
+
+from ldap3.utils.conv import escape_filter_chars
+from loguru import logger
+from scim2_models import Group, Resource, User
+
+from univention.scim.server.domain.crud_scim import CrudScim
+from univention.scim.server.domain.repo.ldap.ldap_pool import LdapConnectionPool
+from univention.scim.server.domain.repo.ldap.ldap_properties import LdapObject, LdapPropertyMapping
+from univention.scim.server.metrics import MAPPING_DURATION
+from univention.scim.server.request_timing import MAPPING, record_duration
+from univention.scim.server.tracing import span
+
+
+T = TypeVar("T", bound=Resource)
+
+
+class CrudLdap(Generic[T], CrudScim[T]):
+    """
+    Read-only implementation of CrudScim that queries LDAP directly.
+
+    Reads skip the UDM REST API, the LDAP entries are converted to the same
+    properties UDM returns and mapped by the UdmToScimMapper. All writes are
+    delegated to another repository, usually the UDM one.
+    """
+
+    def __init__(
+        self,
+        resource_type: str,
+        scim2udm_mapper: Any,
+        udm2scim_mapper: Any,
+        resource_class: type[T],
+        pool: LdapConnectionPool,
+        base_dn: str,
+        property_mapping: LdapPropertyMapping,
+        write_repository: CrudScim[T],
+        base_url: str,
+        page_size: int = 500,
+    ):
+        """
+        Initialize the LDAP CRUD implementation.
+        Args:
+            resource_type: The type of resource ('User' or 'Group')
+            scim2udm_mapper: Mapper to convert SCIM filters to UDM filters
+            udm2scim_mapper: Mapper to convert UDM to SCIM objects
+            resource_class: The class of resource being managed (e.g., User, Group)
+            pool: Pool of LDAP connections
+            base_dn: DN to search objects below
+            property_mapping: Converts LDAP entries to UDM properties
+            write_repository: Repository handling create, update and delete
+            base_url: Base URL used for SCIM resource location
+            page_size: Number of entries fetched per LDAP request
+        """
+        self.resource_type = resource_type
+        self.resource_class = resource_class
+        self.scim2udm_mapper = scim2udm_mapper
+        self.udm2scim_mapper = udm2scim_mapper
+        self.pool = pool
+        self.base_dn = base_dn
+        self.property_mapping = property_mapping
+        self.write_repository = write_repository
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+
+        self.logger = logger.bind(resource_type=resource_type)
+        self.logger.info("Initialized read-only LDAP CRUD", base_dn=base_dn)
+
+    async def _search(self, search_filter: str) -> list[LdapObject]:
+        # ldap3 is blocking, don't block the event loop
+        entries = await asyncio.to_thread(
+            self.pool.search,
+            self.base_dn,
+            search_filter,
+            self.property_mapping.ldap_attributes,
+            page_size=self.page_size,
+        )
+        return [self.property_mapping.to_object(entry) for entry in entries]
+
+    async def get(self, resource_id: str) -> T:
+        """
+        Get a resource by ID.
+        Args:
+            resource_id: The resource's unique identifier (univentionObjectIdentifier)
+        Returns:
+            The resource if found
+        Raises:
+            ValueError: If the resource is not found
+        """
+        self.logger.trace("Getting resource from LDAP", id=resource_id)
+
+        if not resource_id:
+            raise ValueError(f"Invalid {self.resource_type} ID: {resource_id}")
+
+        try:
+            objects = await self._search(
+                self.property_mapping.object_filter(f"(univentionObjectIdentifier={escape_filter_chars(resource_id)})")
+            )
+            if not objects:
+                raise ValueError(f"{self.resource_type} with ID {resource_id} not found")
+
+            resources = await self._convert_objects_to_scim(objects[:1])
+            if not resources:
+                raise ValueError(f"Failed to map {self.resource_type} with ID {resource_id}")
+
+            return resources[0]
+
+        except Exception as e:
+            self.logger.error(f"Error retrieving {self.resource_type}: {e}")
+            raise ValueError(f"Error retrieving {self.resource_type}: {str(e)}") from e
+
+    # Defined before list() which shadows the builtin in the class body
+    async def update_members(
+        self, resource_id: str, added: list[dict[str, Any]], removed: list[dict[str, Any]]
+    ) -> None:
+        """
+        Update the members of a group using the write repository.
+        """
+        await self.write_repository.update_members(resource_id, added, removed)
+
+    async def _convert_objects_to_scim(self, objects: list[LdapObject], resolve_members: bool = True) -> list[T]:
+        # Objects which can not be mapped are logged and skipped by the mapper.
+        # Defined before list() which shadows the builtin in the class body.
+        with span(f"Map {self.resource_type}", {"scim.resources": len(objects)}):
+            start_time = time.perf_counter()
+            try:
+                if self.resource_class == User:
+                    return cast(list[T], self.udm2scim_mapper.map_users(objects, base_url=self.base_url))
+                elif self.resource_class == Group:
+                    return cast(
+                        list[T],
+                        await self.udm2scim_mapper.amap_groups(
+                            objects, base_url=self.base_url, resolve_members=resolve_members
+                        ),
+                    )
+                else:
+                    raise ValueError(f"Unsupported resource class: {self.resource_class}")
+            finally:
+                duration = time.perf_counter() - start_time
+                MAPPING_DURATION.labels(self.resource_type).observe(duration)
+                record_duration(MAPPING, duration)
+
+    async def list(
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
+    ) -> tuple[int, list[T]]:
+        """
+        List resources with optional filtering and pagination.
+        Args:
+            filter_str: SCIM filter expression
+            start_index: 1-based index for the first result
+            count: Maximum number of results to return
+            attributes: SCIM attributes to return, members of groups are only resolved if requested
+            excluded_attributes: SCIM attributes not to return
+        Returns:
+            Number of all matching resources and the resources on the page
+        """
+        self.logger.trace("Listing resources using LDAP.", filter_str=filter_str)
+
+        # Convert the SCIM filter to a UDM filter and that to an LDAP filter
+        ldap_filter = await self._convert_scim_filter_to_ldap(filter_str) if filter_str else None
+        if filter_str and ldap_filter is None:
+            # Filter on a member which does not exist
+            return 0, []
+
+        resolve_members = self.scim2udm_mapper.group_members_requested(attributes, excluded_attributes)
+        filters = [ldap_filter] if ldap_filter else []
+
+        try:
+            objects = await self._search(self.property_mapping.object_filter(*filters, hidden=False))
+
+            # Entries without univentionObjectIdentifier can not be mapped, they don't count like in count()
+            objects = [obj for obj in objects if obj.properties.get("univentionObjectIdentifier")]
+
+            # Only the objects on the page are converted, objects which can not be mapped are skipped
+            offset = start_index - 1 if start_index > 1 else 0
+            end_pos = offset + count if count else None
+            resources = await self._convert_objects_to_scim(objects[offset:end_pos], resolve_members)
+
+            # The total counts all available results, not only the ones on the page
+            return len(objects), resources
+
+        except Exception as e:
+            self.logger.error(f"Error listing {self.resource_type}s: {e}")
+            raise ValueError(f"Error listing {self.resource_type}s: {str(e)}") from e
+
+    async def count(self, filter_str: str | None = None) -> int:
+        """
+        Count resources without mapping them.
+        Args:
+            filter_str: SCIM filter expression
+        Returns:
+            Number of resources matching the filter, entries without univentionObjectIdentifier are
+            skipped like in list()
+        """
+        self.logger.trace("Counting resources using LDAP.", filter_str=filter_str)
+
+        ldap_filter = await self._convert_scim_filter_to_ldap(filter_str) if filter_str else None
+        if filter_str and ldap_filter is None:
+            return 0
+
+        filters = [ldap_filter] if ldap_filter else []
+
+        try:
+            # Only fetch the identifier, the other attributes are not needed for counting
+            entries = await asyncio.to_thread(
+                self.pool.search,
+                self.base_dn,
+                self.property_mapping.object_filter(*filters, hidden=False),
+                ["univentionObjectIdentifier"],
+                page_size=self.page_size,
+            )
+            return sum(1 for entry in entries if entry["raw_attributes"].get("univentionObjectIdentifier"))
+
+        except Exception as e:
+            self.logger.error(f"Error counting {self.resource_type}s: {e}")
+            raise ValueError(f"Error counting {self.resource_type}s: {str(e)}") from e
+
+    async def create(self, resource: T) -> T:
+        """
+        Create a new resource using the write repository.
+        """
+        return await self.write_repository.create(resource)
+
+    async def update(self, resource_id: str, resource: T) -> T:
+        """
+        Update an existing resource using the write repository.
+        """
+        return await self.write_repository.update(resource_id, resource)
+
+    async def delete(self, resource_id: str) -> bool:
+        """
+        Delete a resource using the write repository.
+        """
+        return await self.write_repository.delete(resource_id)
+
+    async def _convert_scim_filter_to_ldap(self, scim_filter: str) -> str | None:
+        """
+        Convert a SCIM filter to an LDAP filter.
+        Args:
+            scim_filter: SCIM filter expression
+        Returns:
+            LDAP filter expression, None if the member of a group filter does not exist
+        Raises:
+            ValueError: If the filter is not supported
+        """
+        if self.resource_class == User:
+            udm_filter: str | None = self.scim2udm_mapper.map_user_filter(scim_filter)
+        elif self.resource_class == Group:
+            udm_filter = await self.scim2udm_mapper.amap_group_filter(scim_filter)
+        else:
+            raise ValueError(f"Unsupported resource class: {self.resource_class}")
+
+        if udm_filter is None:
+            return None
+
+        ldap_filter = self.property_mapping.ldap_filter(udm_filter)
+        self.logger.trace("Converted SCIM filter", filter=scim_filter, ldap_filter=ldap_filter)
+        return ldap_filter
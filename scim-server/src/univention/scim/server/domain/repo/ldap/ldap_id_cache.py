@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import time
+
+from ldap3 import BASE
+from ldap3.utils.conv import escape_filter_chars
+from loguru import logger
+
+from univention.scim.server.domain.repo.ldap.ldap_pool import LdapConnectionPool
+from univention.scim.server.metrics import ID_CACHE_LOOKUPS
+from univention.scim.server.request_timing import ID_CACHE, timed
+from univention.scim.server.tracing import span
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore, IdCache
+
+
+class LdapIdCache(IdCache):
+    """
+    IdCache reading the DNs and UUIDs of users and groups directly from LDAP
+    """
+
+    def __init__(self, pool: LdapConnectionPool, base_dn: str, ttl: int):
+        """
+        Initialize LdapIdCache
+        args:
+            pool: Pool of LDAP connections
+            base_dn: DN to search objects below
+            ttl: Time in seconds after which a cache item will be invalid and refetched
+        """
+        self.pool = pool
+        self.base_dn = base_dn
+        self.ttl = ttl
+        self.users = CacheItemStore()
+        self.groups = CacheItemStore()
+
+    def _get_entry(self, cache: CacheItemStore, key: str) -> CacheItem | None:
+        name = "user" if cache is self.users else "group"
+        entry = cache.get(key)
+        if entry is None:
+            ID_CACHE_LOOKUPS.labels(name, "miss").inc()
+            return None
+
+        if (entry.created + self.ttl) < int(time.time()):
+            ID_CACHE_LOOKUPS.labels(name, "expired").inc()
+            return None
+
+        ID_CACHE_LOOKUPS.labels(name, "hit").inc()
+        return entry
+
+    def _query_ldap(self, key: str, object_type: str, display_attribute: str) -> CacheItem | None:
+        with timed(ID_CACHE), span("IdCache miss", {"udm.module": object_type}):
+            return self._fetch_ldap(key, object_type, display_attribute)
+
+    def _fetch_ldap(self, key: str, object_type: str, display_attribute: str) -> CacheItem | None:
+        attributes = ["univentionObjectIdentifier", display_attribute]
+        if "=" in key:
+            logger.debug("Fetch item from LDAP by DN", key=key, object_type=object_type)
+            entries = self.pool.search(
+                key, f"(univentionObjectType={object_type})", attributes, search_scope=BASE, page_size=1
+            )
+        else:
+            logger.debug("Fetch item from LDAP by univentionObjectIdentifier", key=key, object_type=object_type)
+            search_filter = (
+                f"(&(univentionObjectType={object_type})(univentionObjectIdentifier={escape_filter_chars(key)}))"
+            )
+            entries = self.pool.search(self.base_dn, search_filter, attributes, page_size=1)
+
+        if not entries:
+            logger.error("Failed to fetch value from LDAP", key=key, object_type=object_type)
+            return None
+
+        raw_attributes = entries[0]["raw_attributes"]
+        uuid = raw_attributes.get("univentionObjectIdentifier")
+        display_name = raw_attributes.get(display_attribute)
+        item = CacheItem(
+            entries[0]["dn"],
+            uuid[0].decode() if uuid else None,
+            display_name[0].decode() if display_name else "",
+        )
+        logger.debug("Fetched item from LDAP", object_type=object_type, item=repr(item))
+        return item
+
+    def _query_user(self, key: str) -> CacheItem | None:
+        user = self._query_ldap(key, "users/user", "displayName")
+        if user is not None:
+            self.users.add(user)
+
+        return user
+
+    def _query_group(self, key: str) -> CacheItem | None:
+        group = self._query_ldap(key, "groups/group", "cn")
+        if group is not None:
+            self.groups.add(group)
+
+        return group
+
+    def get_user(self, key: str) -> CacheItem | None:
+        entry = self._get_entry(self.users, key) or self._query_user(key)
+        return entry if entry and entry.uuid else None
+
+    def get_group(self, key: str) -> CacheItem | None:
+        entry = self._get_entry(self.groups, key) or self._query_group(key)
+        return entry if entry and entry.uuid else None
+
+    def cached_type(self, key: str) -> str | None:
+        if self._get_entry(self.users, key):
+            return "User"
+        if self._get_entry(self.groups, key):
+            return "Group"
+
+        return None
+
+    def load_groups(self) -> list[tuple[CacheItem, list[str]]]:
+        logger.debug("Load all groups from LDAP", base_dn=self.base_dn)
+        entries = self.pool.search(
+            self.base_dn,
+            "(&(univentionObjectType=groups/group)(!(univentionObjectFlag=hidden)))",
+            ["univentionObjectIdentifier", "cn", "uniqueMember"],
+        )
+
+        groups = []
+        for entry in entries:
+            raw_attributes = entry["raw_attributes"]
+            uuid = raw_attributes.get("univentionObjectIdentifier")
+            name = raw_attributes.get("cn")
+            item = CacheItem(entry["dn"], uuid[0].decode() if uuid else None, name[0].decode() if name else "")
+            self.groups.add(item)
+            groups.append((item, [member.decode() for member in raw_attributes.get("uniqueMember") or []]))
+
+        logger.info("Loaded all groups from LDAP", count=len(groups))
+        return groups
+
+    async def aget_user(self, key: str) -> CacheItem | None:
+        entry = self._get_entry(self.users, key) or await asyncio.to_thread(self._query_user, key)
+        return entry if entry and entry.uuid else None
+
+    async def aget_group(self, key: str) -> CacheItem | None:
+        entry = self._get_entry(self.groups, key) or await asyncio.to_thread(self._query_group, key)
+        return entry if entry and entry.uuid else None
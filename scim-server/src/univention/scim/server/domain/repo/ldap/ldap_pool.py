@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from queue import Empty, LifoQueue
+from typing import Any
+
+from ldap3 import SAFE_SYNC, SUBTREE, Connection, Server
+from ldap3.core.exceptions import LDAPBindError, LDAPException, LDAPNoSuchObjectResult
+from loguru import logger
+
+from univention.scim.server.request_timing import LDAP, record_backend_call, timed
+
+
+class LdapConnectionPool:
+    """
+    Fixed size pool of read-only ldap3 connections.
+
+    Connections are opened on demand up to the pool size and reused afterwards.
+    A connection which failed with an LDAP error is discarded and replaced on the next request.
+    All methods are blocking, async callers run them in a worker thread.
+    """
+
+    def __init__(
+        self,
+        server: Server | str,
+        user: str | None = None,
+        password: str | None = None,
+        size: int = 10,
+        timeout: float = 30,
+        client_strategy: str = SAFE_SYNC,
+    ):
+        """
+        Initialize the pool.
+        Args:
+            server: ldap3 server or LDAP URI, e.g. ldap://ldap-server:389
+            user: DN to bind with, anonymous if not set
+            password: Password of the bind DN
+            size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection if all connections are in use
+            client_strategy: ldap3 client strategy, must be thread safe or only used by one thread
+        """
+        self.server = server if isinstance(server, Server) else Server(server)
+        self.user = user or None
+        self.password = password or None
+        self.size = size
+        self.timeout = timeout
+        self.client_strategy = client_strategy
+
+        self._idle: LifoQueue[Connection] = LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        logger.debug("Opening LDAP connection", server=str(self.server), user=self.user)
+        connection = Connection(
+            self.server,
+            self.user,
+            self.password,
+            client_strategy=self.client_strategy,
+            read_only=True,
+        )
+        # Bind explicitly instead of auto_bind, which the mock strategies ignore
+        connection.bind()
+        if not connection.bound:
+            raise LDAPBindError(f"Failed to bind to {self.server}: {connection.last_error}")
+
+        return connection
+
+    def _acquire(self) -> Connection:
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+
+        if not can_open:
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except Empty:
+                raise TimeoutError(f"No free LDAP connection within {self.timeout} seconds") from None
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, connection: Connection) -> None:
+        with self._lock:
+            self._opened -= 1
+
+        with suppress(LDAPException):
+            connection.unbind()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        Borrow a connection from the pool.
+        """
+        connection = self._acquire()
+        try:
+            yield connection
+        except LDAPException:
+            logger.warning("Discarding LDAP connection after error", server=str(self.server))
+            self._discard(connection)
+            raise
+        else:
+            self._idle.put(connection)
+
+    def search(
+        self,
+        search_base: str,
+        search_filter: str,
+        attributes: list[str],
+        search_scope: str = SUBTREE,
+        page_size: int = 500,
+    ) -> list[dict[str, Any]]:
+        """
+        Search with the simple paged results control, returning the entries of all pages.
+        Args:
+            search_base: DN to search below
+            search_filter: LDAP filter
+            attributes: Attributes to return
+            search_scope: ldap3 search scope
+            page_size: Number of entries fetched per request
+        Returns:
+            ldap3 response entries, a base search for a not existing DN returns no entries
+        """
+        record_backend_call("ldap search")
+        with timed(LDAP), self.connection() as connection:
+            try:
+                response = connection.extend.standard.paged_search(
+                    search_base=search_base,
+                    search_filter=search_filter,
+                    search_scope=search_scope,
+                    attributes=attributes,
+                    paged_size=page_size,
+                    generator=False,
+                )
+            except LDAPNoSuchObjectResult:
+                return []
+
+        return [entry for entry in response if entry["type"] == "searchResEntry"]
+
+    def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                return
+
+            self._discard(connection)
@@ -0,0 +1,248 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import base64
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from ldap3.utils.conv import escape_filter_chars
+
+
+# UDM property -> LDAP attribute, as mapped by the UDM users/user module
+USER_ATTRIBUTES = {
+    "univentionObjectIdentifier": "univentionObjectIdentifier",
+    "username": "uid",
+    "firstname": "givenName",
+    "lastname": "sn",
+    "displayName": "displayName",
+    "title": "title",
+    "description": "description",
+    "employeeNumber": "employeeNumber",
+    "employeeType": "employeeType",
+    "preferredLanguage": "preferredLanguage",
+    "mailPrimaryAddress": "mailPrimaryAddress",
+    "mailAlternativeAddress": "mailAlternativeAddress",
+    "e-mail": "mail",
+    "phone": "telephoneNumber",
+    "mobileTelephoneNumber": "mobile",
+    "homeTelephoneNumber": "homePhone",
+    "pagerTelephoneNumber": "pager",
+    "street": "street",
+    "city": "l",
+    "postcode": "postalCode",
+    # UDM stores the country of the business address in st
+    "country": "st",
+    "homePostalAddress": "homePostalAddress",
+    "userCertificate": "userCertificate;binary",
+    "guardianRoles": "univentionGuardianRoles",
+    "PasswordRecoveryEmail": "univentionPasswordSelfServiceEmail",
+    "createTimestamp": "createTimestamp",
+    "modifyTimestamp": "modifyTimestamp",
+}
+
+# UDM property -> LDAP attribute, as mapped by the UDM groups/group module
+GROUP_ATTRIBUTES = {
+    "univentionObjectIdentifier": "univentionObjectIdentifier",
+    "name": "cn",
+    "description": "description",
+    "guardianMemberRoles": "univentionGuardianMemberRoles",
+    "createTimestamp": "createTimestamp",
+    "modifyTimestamp": "modifyTimestamp",
+}
+
+MULTI_VALUE_PROPERTIES = {
+    "mailAlternativeAddress",
+    "e-mail",
+    "phone",
+    "mobileTelephoneNumber",
+    "homeTelephoneNumber",
+    "pagerTelephoneNumber",
+    "homePostalAddress",
+    "guardianRoles",
+    "guardianMemberRoles",
+}
+
+# UDM group properties stored in uniqueMember
+MEMBER_PROPERTIES = {"users", "nestedGroup"}
+
+# LDAP attributes UDM derives the disabled state of a user from
+DISABLED_ATTRIBUTES = ["sambaAcctFlags", "krb5KDCFlags", "shadowExpire"]
+# Kerberos flag "disallow all tickets"
+KRB5_DISALLOW_ALL_TIX = 1 << 7
+
+
+@dataclass
+class LdapObject:
+    """
+    An LDAP entry converted to UDM properties, with the attributes the UdmToScimMapper expects of a UDM object.
+    """
+
+    dn: str
+    properties: dict[str, Any]
+    etag: str | None = None
+
+
+def _decode(value: bytes) -> str:
+    return value.decode("utf-8")
+
+
+def _timestamp(value: bytes) -> str:
+    # LDAP generalized time, e.g. 20250101120000Z
+    return datetime.strptime(_decode(value), "%Y%m%d%H%M%SZ").replace(tzinfo=UTC).isoformat()
+
+
+def _certificate(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def _postal_address(value: bytes) -> dict[str, str]:
+    # UDM stores home postal addresses as "street$zipcode$city"
+    street, zipcode, city = (_decode(value).split("$") + ["", ""])[:3]
+    return {"street": street, "zipcode": zipcode, "city": city}
+
+
+CONVERTERS: dict[str, Callable[[bytes], Any]] = {
+    "createTimestamp": _timestamp,
+    "modifyTimestamp": _timestamp,
+    "userCertificate": _certificate,
+    "homePostalAddress": _postal_address,
+}
+
+
+def _is_disabled(attributes: dict[str, list[bytes]]) -> bool:
+    samba_flags = attributes.get("sambaAcctFlags")
+    if samba_flags and "D" in _decode(samba_flags[0]):
+        return True
+
+    krb5_flags = attributes.get("krb5KDCFlags")
+    if krb5_flags and int(krb5_flags[0]) & KRB5_DISALLOW_ALL_TIX:
+        return True
+
+    shadow_expire = attributes.get("shadowExpire")
+    return bool(shadow_expire and _decode(shadow_expire[0]) == "1")
+
+
+class LdapPropertyMapping:
+    """
+    Converts LDAP entries of one UDM module to the UDM properties the UdmToScimMapper expects.
+
+    Only the properties the SCIM mapping needs are converted. Values UDM computes from other
+    objects, like inherited guardian roles, are not available when reading LDAP directly.
+    """
+
+    def __init__(
+        self,
+        object_type: str,
+        attributes: dict[str, str],
+        multi_value_properties: set[str],
+    ):
+        """
+        Initialize the mapping.
+        Args:
+            object_type: UDM module, e.g. users/user
+            attributes: UDM property -> LDAP attribute
+            multi_value_properties: UDM properties with a list value
+        """
+        self.object_type = object_type
+        self.attributes = attributes
+        self.multi_value_properties = multi_value_properties
+        self._ldap_attributes = list(dict.fromkeys(attributes.values()))
+        if object_type == "users/user":
+            self._ldap_attributes.extend(DISABLED_ATTRIBUTES)
+        elif object_type == "groups/group":
+            self._ldap_attributes.append("uniqueMember")
+
+    @property
+    def ldap_attributes(self) -> list[str]:
+        """
+        LDAP attributes to request when searching.
+        """
+        return self._ldap_attributes
+
+    def object_filter(self, *filters: str, hidden: bool = True) -> str:
+        """
+        LDAP filter matching all objects of the module and the given filters.
+        Args:
+            filters: Additional LDAP filters, combined with AND
+            hidden: Also match objects hidden by UDM
+        """
+        object_filter = f"(univentionObjectType={self.object_type})"
+        if not hidden:
+            object_filter += "(!(univentionObjectFlag=hidden))"
+
+        return f"(&{object_filter}{''.join(filters)})"
+
+    def ldap_filter(self, udm_filter: str) -> str:
+        """
+        Translate a UDM filter as created by the ScimToUdmMapper, e.g. username=test, to an LDAP filter.
+        Raises:
+            ValueError: If the UDM property is not stored in LDAP unchanged
+        """
+        udm_property, _, value = udm_filter.partition("=")
+        if self.object_type == "groups/group" and udm_property in MEMBER_PROPERTIES:
+            # Users and nested groups are both stored in uniqueMember
+            return f"(uniqueMember={escape_filter_chars(value)})"
+
+        attribute = self.attributes.get(udm_property)
+        if attribute is None or udm_property in CONVERTERS:
+            raise ValueError(f"Filter on {udm_property} is not supported when reading from LDAP")
+
+        return f"({attribute}={escape_filter_chars(value)})"
+
+    def to_object(self, entry: dict[str, Any]) -> LdapObject:
+        """
+        Convert an ldap3 search result entry.
+        """
+        attributes = entry["raw_attributes"]
+        properties: dict[str, Any] = {}
+        for udm_property, attribute in self.attributes.items():
+            values = attributes.get(attribute) or []
+            convert = CONVERTERS.get(udm_property, _decode)
+            if udm_property in self.multi_value_properties:
+                properties[udm_property] = [convert(value) for value in values]
+            else:
+                properties[udm_property] = convert(values[0]) if values else None
+
+        if self.object_type == "users/user":
+            properties["disabled"] = _is_disabled(attributes)
+        elif self.object_type == "groups/group":
+            # UCS users always have an uid RDN, all other members are nested groups
+            members = [_decode(value) for value in attributes.get("uniqueMember") or []]
+            properties["users"] = [dn for dn in members if dn[:4].lower() == "uid="]
+            properties["nestedGroup"] = [dn for dn in members if dn[:4].lower() != "uid="]
+
+        return LdapObject(dn=entry["dn"], properties=properties)
+
+
+def user_property_mapping(
+    attributes: dict[str, str] | None = None, multi_value_properties: list[str] | None = None
+) -> LdapPropertyMapping:
+    """
+    Property mapping of users/user.
+    Args:
+        attributes: Additional UDM properties and their LDAP attribute, e.g. extended attributes
+        multi_value_properties: Additional UDM properties with a list value
+    """
+    return LdapPropertyMapping(
+        "users/user",
+        USER_ATTRIBUTES | (attributes or {}),
+        MULTI_VALUE_PROPERTIES | set(multi_value_properties or []),
+    )
+
+
+def group_property_mapping(
+    attributes: dict[str, str] | None = None, multi_value_properties: list[str] | None = None
+) -> LdapPropertyMapping:
+    """
+    Property mapping of groups/group.
+    Args:
+        attributes: Additional UDM properties and their LDAP attribute, e.g. extended attributes
+        multi_value_properties: Additional UDM properties with a list value
+    """
+    return LdapPropertyMapping(
+        "groups/group",
+        GROUP_ATTRIBUTES | (attributes or {}),
+        MULTI_VALUE_PROPERTIES | set(multi_value_properties or []),
+    )
@@ -0,0 +1,43 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+
+from loguru import logger
+
+from univention.scim.transformation.id_cache import IdCache
+from univention.scim.transformation.membership_index import MembershipIndex
+
+
+async def refresh_membership_index(cache: IdCache, index: MembershipIndex, interval: int) -> None:
+    """
+    Load all groups into the id cache and the membership index.
+
+    Groups written by the SCIM server update the index right away, the periodic refresh
+    picks up changes made by other UDM clients.
+    Args:
+        cache: Id cache to load the groups from
+        index: Membership index to replace
+        interval: Seconds between two refreshes, only loaded once if 0
+    """
+    while True:
+        generation = index.begin_load()
+        try:
+            # Loading all groups is blocking and may take a while in large directories,
+            # groups written meanwhile are re-applied on top of the loaded ones
+            groups = await asyncio.to_thread(cache.load_groups)
+            if groups is None:
+                logger.warning("Id cache can not load all groups, the membership index stays incomplete")
+                return
+
+            index.replace(groups, since=generation)
+            logger.info("Refreshed group membership index", groups=len(index))
+        except Exception as e:
+            logger.exception("Failed to refresh group membership index", error=str(e))
+        finally:
+            index.end_load()
+
+        if not interval:
+            return
+
+        await asyncio.sleep(interval)
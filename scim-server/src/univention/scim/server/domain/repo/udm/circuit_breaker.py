@@ -0,0 +1,240 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from univention.admin.rest.client import UDM
+
+from univention.scim.server.metrics import UDM_REQUEST_DURATION
+from univention.scim.server.request_timing import UDM as UDM_TIMING, record_backend_call, record_duration
+from univention.scim.server.tracing import client_span
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    The backend is considered down, the request was not sent.
+    """
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is unavailable, retry in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a backend which fails or is too slow.
+
+    The outcome of the last window_size calls is recorded, calls slower than slow_call_duration
+    count as failed. If at least minimum_calls were recorded and the failure rate reaches
+    failure_rate_threshold the circuit opens and all calls fail immediately with CircuitOpenError.
+    After open_duration seconds it is half open and lets half_open_probes calls through: if they
+    all succeed the circuit closes again, any failure opens it again.
+
+    It is used from the event loop and from worker threads, so the state is protected by a lock.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: float = 10,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30,
+        half_open_probes: int = 3,
+    ):
+        """
+        Args:
+            name: Name of the backend, used in logs and errors
+            failure_rate_threshold: Share of failed calls in the window which opens the circuit
+            slow_call_duration: Seconds after which a call counts as failed
+            window_size: Number of recent calls the failure rate is computed from
+            minimum_calls: Minimum number of recorded calls before the circuit may open
+            open_duration: Seconds the circuit stays open before probing the backend again
+            half_open_probes: Number of successful probe calls needed to close the circuit
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._check_open_duration()
+            return self._state
+
+    def _check_open_duration(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_duration:
+            logger.info("Circuit half open, probing backend", backend=self.name)
+            self._state = HALF_OPEN
+            self._probes_started = 0
+            self._probes_succeeded = 0
+
+    def _open(self) -> None:
+        logger.warning("Circuit opened, failing fast", backend=self.name, failures=self._outcomes.count(False))
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may be sent to the backend.
+        Raises:
+            CircuitOpenError: If the circuit is open or enough probe calls are running
+        """
+        with self._lock:
+            self._check_open_duration()
+            if self._state == CLOSED:
+                return
+
+            if self._state == HALF_OPEN and self._probes_started < self.half_open_probes:
+                self._probes_started += 1
+                return
+
+            retry_after = max(1, math.ceil(self._opened_at + self.open_duration - time.monotonic()))
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, success: bool, duration: float) -> None:
+        """
+        Record the outcome of a call which was allowed by before_call().
+        Args:
+            success: False if the call failed because of the backend
+            duration: Seconds the call took
+        """
+        success = success and duration < self.slow_call_duration
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if not success:
+                    self._open()
+                    return
+
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    logger.info("Circuit closed, backend recovered", backend=self.name)
+                    self._state = CLOSED
+                return
+
+            if self._state != CLOSED:
+                # Calls started before the circuit opened
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.minimum_calls
+                and failures / len(self._outcomes) >= self.failure_rate_threshold
+            ):
+                self._open()
+
+
+def udm_operation(method: str | None, url: str | None) -> str:
+    """
+    Classify a request to the UDM REST API for metrics.
+    Args:
+        method: HTTP method
+        url: URL of the request
+    Returns:
+        search, open, save, delete or other
+    """
+    if method == "DELETE":
+        return "delete"
+    if method in ("POST", "PUT", "PATCH"):
+        return "save"
+    if method != "GET" or not url:
+        return "other"
+
+    parts = urlsplit(url)
+    if parts.path.endswith("/add"):
+        # Template for new objects
+        return "other"
+    if not parts.path.endswith("/"):
+        # Objects are addressed by their DN, modules by a path ending with a slash
+        return "open"
+    return "search" if parts.query else "other"
+
+
+class CircuitBreakerAdapter(HTTPAdapter):
+    """
+    Requests transport adapter sending every request through a circuit breaker.
+
+    Connection errors, timeouts and 5xx responses are failures. Requests without a timeout
+    get connect_timeout, so an unreachable backend is noticed fast. The duration of every
+    request is recorded in the UDM request metrics.
+    """
+
+    def __init__(self, circuit_breaker: CircuitBreaker, connect_timeout: float | None = None):
+        super().__init__()
+        self.circuit_breaker = circuit_breaker
+        self.connect_timeout = connect_timeout
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None and self.connect_timeout:
+            kwargs["timeout"] = (self.connect_timeout, None)
+
+        self.circuit_breaker.before_call()
+        operation = udm_operation(request.method, request.url)
+        histogram = UDM_REQUEST_DURATION.labels(operation)
+        record_backend_call(f"udm {operation}")
+        with client_span(
+            f"UDM {operation}",
+            request.headers,
+            {"http.request.method": str(request.method), "url.path": urlsplit(request.url).path},
+        ) as span:
+            start_time = time.monotonic()
+            try:
+                response = super().send(request, *args, **kwargs)
+            except requests.exceptions.RequestException:
+                duration = time.monotonic() - start_time
+                histogram.observe(duration)
+                record_duration(UDM_TIMING, duration)
+                self.circuit_breaker.record(False, duration)
+                raise
+
+            duration = time.monotonic() - start_time
+            histogram.observe(duration)
+            record_duration(UDM_TIMING, duration)
+            self.circuit_breaker.record(response.status_code < 500, duration)
+            if span is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+            return response
+
+
+def protect_udm_client(udm_client: UDM, circuit_breaker: CircuitBreaker, connect_timeout: float | None) -> UDM:
+    """
+    Send all requests of a UDM client through a circuit breaker.
+
+    All modules and objects of the client share its HTTP session, so they are protected as well.
+    Args:
+        udm_client: UDM REST API client
+        circuit_breaker: Circuit breaker for the UDM REST API
+        connect_timeout: Seconds to wait for a connection if a request has no timeout
+    Returns:
+        The same UDM client
+    """
+    adapter = CircuitBreakerAdapter(circuit_breaker, connect_timeout)
+    udm_client.client.session.mount("http://", adapter)
+    udm_client.client.session.mount("https://", adapter)
+    return udm_client
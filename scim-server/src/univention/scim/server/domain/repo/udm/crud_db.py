@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 from loguru import logger
 from scim2_models import Resource
@@ -38,7 +38,27 @@ class CrudDb(Generic[T], CrudScim[T]):
             logger.error(f"Error retrieving {self.resource_type} from database: {e}")
             raise
 
-    async def list(self, filter_str: str | None = None, start_index: int = 1, count: int | None = None) -> list[T]:
+    # Defined before list() which shadows the builtin in the class body
+    async def update_members(
+        self, resource_id: str, added: list[dict[str, Any]], removed: list[dict[str, Any]]
+    ) -> None:
+        """Add and remove members of a group."""
+        logger.debug(f"Updating members of {self.resource_type} with ID {resource_id} in database")
+        try:
+            # TODO: Implement actual database update
+            pass
+        except Exception as e:
+            logger.error(f"Error updating members of {self.resource_type} in database: {e}")
+            raise
+
+    async def list(
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
+    ) -> list[T]:
         """List resources with optional filtering and pagination."""
         logger.debug(f"Listing {self.resource_type}s from database with filter: {filter_str}")
         try:
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import time
 from typing import Any, Generic, TypeVar, cast
 
 from asgi_correlation_id import correlation_id as asgi_correlation_id  # Added for accessing upstream correlation ID
@@ -9,6 +10,9 @@ from scim2_models import Group, Resource, User
 from univention.admin.rest.client import UDM, Object
 
 from univention.scim.server.domain.crud_scim import CrudScim
+from univention.scim.server.metrics import MAPPING_DURATION
+from univention.scim.server.request_timing import MAPPING, record_duration
+from univention.scim.server.tracing import span
 from univention.scim.transformation.exceptions import MappingError
 
 
@@ -99,14 +103,101 @@ class CrudUdm(Generic[T], CrudScim[T]):
             udm_obj = results[0].open()
 
             # Convert UDM object to SCIM resource
-            return self._convert_object_to_scim(udm_obj)
+            return await self._convert_object_to_scim(udm_obj)
 
         except Exception as e:
             self.logger.error(f"Error retrieving {self.resource_type}: {e}")
             raise ValueError(f"Error retrieving {self.resource_type}: {str(e)}") from e
 
+    # Defined before list() which shadows the builtin in the class body
+    async def update_members(
+        self, resource_id: str, added: list[dict[str, Any]], removed: list[dict[str, Any]]
+    ) -> None:
+        """
+        Add and remove members of a group with a JSON patch instead of saving all members.
+        Only the added and removed members are resolved, so the cost depends on the size
+        of the change and not on the size of the group.
+        Args:
+            resource_id: The group's unique identifier
+            added: SCIM members to add
+            removed: SCIM members to remove, members which do not exist are ignored
+        Raises:
+            MappingError: If an added member does not exist
+            ValueError: If the group is not found
+        """
+        self.logger.trace("Updating members in UDM", id=resource_id, added=len(added), removed=len(removed))
+        if self.resource_class != Group:
+            raise ValueError(f"{self.resource_type} has no members")
+
+        try:
+            module = self.udm_client.get(self.udm_module_name)
+            results = list(module.search(f"univentionObjectIdentifier={resource_id}"))
+            if not results:
+                raise ValueError(f"{self.resource_type} with ID {resource_id} not found")
+
+            # Needed for the ETag and the positions of the removed members
+            udm_obj = results[0].open()
+
+            added_users, added_groups = await self.scim2udm_mapper.amap_member_dns(resource_id, added)
+            removed_users, removed_groups = await self.scim2udm_mapper.amap_member_dns(
+                resource_id, removed, ignore_missing=True
+            )
+
+            patch = [
+                *_member_patch("users", udm_obj.properties.get("users") or [], added_users, removed_users),
+                *_member_patch(
+                    "nestedGroup", udm_obj.properties.get("nestedGroup") or [], added_groups, removed_groups
+                ),
+            ]
+            if not patch:
+                self.logger.debug("Members unchanged", id=resource_id)
+                return
+
+            # The response is not needed, don't read the group again
+            udm_obj.json_patch(patch, reload=False)
+
+            membership_index = self.udm2scim_mapper.membership_index
+            if membership_index is not None:
+                membership_index.update_members(
+                    udm_obj.dn, [*added_users, *added_groups], [*removed_users, *removed_groups]
+                )
+
+        except MappingError as e:
+            self.logger.error(f"Error updating members of {self.resource_type}: {e}")
+            raise e
+        except Exception as e:
+            self.logger.error(f"Error updating members of {self.resource_type}: {e}")
+            raise ValueError(f"Error updating members of {self.resource_type}: {str(e)}") from e
+
+    async def _convert_objects_to_scim(self, objs: list[Object], resolve_members: bool = True) -> list[T]:
+        # Objects which can not be mapped are logged and skipped by the mapper.
+        # Defined before list() which shadows the builtin in the class body.
+        with span(f"Map {self.resource_type}", {"scim.resources": len(objs)}):
+            start_time = time.perf_counter()
+            try:
+                if self.resource_class == User:
+                    return cast(list[T], self.udm2scim_mapper.map_users(objs, base_url=self.base_url))
+                elif self.resource_class == Group:
+                    return cast(
+                        list[T],
+                        await self.udm2scim_mapper.amap_groups(
+                            objs, base_url=self.base_url, resolve_members=resolve_members
+                        ),
+                    )
+                else:
+                    raise ValueError(f"Unsupported resource class: {self.resource_class}")
+            finally:
+                duration = time.perf_counter() - start_time
+                MAPPING_DURATION.labels(self.resource_type).observe(duration)
+                record_duration(MAPPING, duration)
+
     async def list(
-        self, filter_str: str | None = None, start_index: int = 1, count: int | None = None
+        self,
+        filter_str: str | None = None,
+        start_index: int = 1,
+        count: int | None = None,
+        attributes: list[str] | None = None,
+        excluded_attributes: list[str] | None = None,
     ) -> tuple[int, list[T]]:
         """
         List resources with optional filtering and pagination.
@@ -114,13 +205,20 @@ class CrudUdm(Generic[T], CrudScim[T]):
             filter_str: SCIM filter expression
             start_index: 1-based index for the first result
             count: Maximum number of results to return
+            attributes: SCIM attributes to return, members of groups are only resolved if requested
+            excluded_attributes: SCIM attributes not to return
         Returns:
-            List of resources
+            Number of all matching resources and the resources on the page
         """
         self.logger.trace("Listing resources using UDM.", filter_str=filter_str)
 
         # Convert SCIM filter to UDM filter if provided
-        udm_filter = self._convert_scim_filter_to_udm(filter_str) if filter_str else None
+        udm_filter = await self._convert_scim_filter_to_udm(filter_str) if filter_str else None
+        if filter_str and udm_filter is None:
+            # Filter on a member which does not exist
+            return 0, []
+
+        resolve_members = self.scim2udm_mapper.group_members_requested(attributes, excluded_attributes)
 
         try:
             # Get the module
@@ -131,41 +229,61 @@ class CrudUdm(Generic[T], CrudScim[T]):
             offset = start_index - 1 if start_index > 1 else 0
             limit = count if count else None
 
-            # Search for objects
+            # Search for objects, opened with the search request instead of one request per object
             results = module.search(
                 udm_filter,
                 position=None,  # Search everywhere
                 scope="sub",  # Subtree search
                 hidden=False,  # Don't include hidden objects
+                opened=True,
             )
 
-            # Convert UDM objects to SCIM resources
-            resources: list[T] = []
+            # Objects without univentionObjectIdentifier can not be mapped, they don't count like in count()
+            objs = [obj for obj in results if obj.properties.get("univentionObjectIdentifier")]
+
+            # Only the objects on the page are converted, all at once so referenced objects are only resolved once.
+            # Objects which can not be mapped are skipped, so a page can contain fewer resources.
             end_pos = offset + limit if limit else None
-            total_results = 0
-            valid_objects = 0
-            for result in results:
-                udm_obj = result.open()
+            resources = await self._convert_objects_to_scim(objs[offset:end_pos], resolve_members)
 
-                try:
-                    resource = self._convert_object_to_scim(udm_obj)
-                except ValueError:
-                    continue
+            # The total counts all available results, not only the ones on the page
+            return len(objs), resources
 
-                if valid_objects >= offset and (not end_pos or valid_objects < end_pos):
-                    # might be different if pagination is implemented:
-                    #  - resources: only contains the values on one page
-                    #  - total_results: all available results based on the request
-                    total_results += 1
-                    resources.append(resource)
+        except Exception as e:
+            self.logger.error(f"Error listing {self.resource_type}s: {e}")
+            raise ValueError(f"Error listing {self.resource_type}s: {str(e)}") from e
+
+    async def count(self, filter_str: str | None = None) -> int:
+        """
+        Count resources without mapping them.
+        Args:
+            filter_str: SCIM filter expression
+        Returns:
+            Number of resources matching the filter, objects without univentionObjectIdentifier are
+            skipped like in list()
+        """
+        self.logger.trace("Counting resources using UDM.", filter_str=filter_str)
 
-                valid_objects += 1
+        udm_filter = await self._convert_scim_filter_to_udm(filter_str) if filter_str else None
+        if filter_str and udm_filter is None:
+            return 0
 
-            return total_results, resources
+        try:
+            module = self.udm_client.get(self.udm_module_name)
+            # Only fetch the identifier, the other properties are not needed for counting
+            results = module.search(
+                udm_filter,
+                position=None,
+                scope="sub",
+                hidden=False,
+                opened=True,
+                properties=["univentionObjectIdentifier"],
+            )
+            return sum(1 for obj in results if obj.properties.get("univentionObjectIdentifier"))
 
         except Exception as e:
-            self.logger.error(f"Error listing {self.resource_type}s: {e}")
-            raise ValueError(f"Error listing {self.resource_type}s: {str(e)}") from e
+            self.logger.error(f"Error counting {self.resource_type}s: {e}")
+            raise ValueError(f"Error counting {self.resource_type}s: {str(e)}") from e
 
     async def create(self, resource: T) -> T:
         """
@@ -196,7 +314,7 @@ class CrudUdm(Generic[T], CrudScim[T]):
                     properties["overridePWLength"] = True
 
             elif self.resource_class == Group:
-                properties = self.scim2udm_mapper.map_group(resource)
+                properties = await self.scim2udm_mapper.amap_group(resource)
             else:
                 raise ValueError(f"Unsupported resource class: {self.resource_class}")
 
@@ -207,7 +325,7 @@ class CrudUdm(Generic[T], CrudScim[T]):
             udm_obj.save()
 
             # Convert the saved UDM object back to SCIM resource
-            return self._convert_object_to_scim(udm_obj)
+            return await self._convert_object_to_scim(udm_obj)
 
         except MappingError as e:
             self.logger.error(f"Error creating {self.resource_type}: {e}")
@@ -257,19 +375,27 @@ class CrudUdm(Generic[T], CrudScim[T]):
             if self.resource_class == User:
                 properties = self.scim2udm_mapper.map_user(resource)
             elif self.resource_class == Group:
-                properties = self.scim2udm_mapper.map_group(resource)
+                properties = await self.scim2udm_mapper.amap_group(resource)
             else:
                 raise ValueError(f"Unsupported resource class: {self.resource_class}")
 
-            # Update UDM object properties
-            for key, value in properties.items():
-                udm_obj.properties[key] = value
+            if self.resource_class == Group:
+                # Only send the changes, so UDM does not rewrite all members of large groups
+                patch = _group_patch(udm_obj.properties, properties)
+                if patch:
+                    udm_obj.json_patch(patch)
+                else:
+                    self.logger.debug("Group unchanged", id=resource_id)
+            else:
+                # Update UDM object properties
+                for key, value in properties.items():
+                    udm_obj.properties[key] = value
 
-            # Save the updated object
-            udm_obj.save()
+                # Save the updated object
+                udm_obj.save()
 
             # Convert the saved UDM object back to SCIM resource
-            return self._convert_object_to_scim(udm_obj)
+            return await self._convert_object_to_scim(udm_obj)
 
         except MappingError as e:
             self.logger.error(f"Error updating {self.resource_type}: {e}")
@@ -309,71 +435,106 @@ class CrudUdm(Generic[T], CrudScim[T]):
             # Delete the object
             udm_obj.delete()
 
+            # UDM removes the object from all groups, keep the memberships of the users in sync
+            membership_index = self.udm2scim_mapper.membership_index
+            if membership_index is not None:
+                if self.resource_class == Group:
+                    membership_index.remove_group(udm_obj.dn)
+                else:
+                    membership_index.remove_member(udm_obj.dn)
+
             return True
 
         except Exception as e:
             self.logger.error(f"Error deleting {self.resource_type}: {e}")
             raise ValueError(f"Error deleting {self.resource_type}: {str(e)}") from e
 
-    def _convert_object_to_scim(self, obj: Object) -> T:
+    async def _convert_object_to_scim(self, obj: Object) -> T:
         # Convert the saved UDM object back to SCIM resource
-        if self.resource_class == User:
+        with span(f"Map {self.resource_type}"):
+            start_time = time.perf_counter()
             try:
-                return cast(T, self.udm2scim_mapper.map_user(obj, base_url=self.base_url))
-            except ValueError:
-                logger.error("Failed to map object, ignoring it")
-                raise
-        elif self.resource_class == Group:
-            try:
-                return cast(T, self.udm2scim_mapper.map_group(obj, base_url=self.base_url))
-            except ValueError:
-                logger.error("Failed to map object, ignoring it")
-                raise
-        else:
-            raise ValueError(f"Unsupported resource class: {self.resource_class}")
-
-    def _convert_scim_filter_to_udm(self, scim_filter: str) -> str | None:
+                if self.resource_class == User:
+                    try:
+                        return cast(T, self.udm2scim_mapper.map_user(obj, base_url=self.base_url))
+                    except ValueError:
+                        logger.error("Failed to map object, ignoring it")
+                        raise
+                elif self.resource_class == Group:
+                    try:
+                        return cast(T, await self.udm2scim_mapper.amap_group(obj, base_url=self.base_url))
+                    except ValueError:
+                        logger.error("Failed to map object, ignoring it")
+                        raise
+                else:
+                    raise ValueError(f"Unsupported resource class: {self.resource_class}")
+            finally:
+                duration = time.perf_counter() - start_time
+                MAPPING_DURATION.labels(self.resource_type).observe(duration)
+                record_duration(MAPPING, duration)
+
+    async def _convert_scim_filter_to_udm(self, scim_filter: str) -> str | None:
         """
         Convert a SCIM filter to a UDM filter.
-        This is a simplified implementation that handles basic filtering.
+        The translation is driven by the mapping spec of the mapper, so every attribute
+        stored unchanged in a UDM property can be filtered with eq. Filters on the members
+        of groups are resolved to a search for the DN of the member.
 
         Args:
             scim_filter: SCIM filter expression
         Returns:
-            UDM filter expression
+            UDM filter expression, None if the member of a group filter does not exist
+        Raises:
+            ValueError: If the filter is not supported
         """
-        # Very basic conversion for the univentionObjectIdentifier filter
-        # A proper implementation would need a more sophisticated parser
-        if "id eq " in scim_filter:
-            # Extract the ID value
-            id_value = scim_filter.split("id eq ")[1].strip("\"'")
-            return f"univentionObjectIdentifier={id_value}"
-
-        # Handle externalId filter using configured mapping
-        if "externalId eq " in scim_filter:
-            external_id_value = scim_filter.split("externalId eq ")[1].strip("\"'")
-            if self.external_id_mapping:
-                self.logger.trace(
-                    "Converting externalId filter", udm_property=self.external_id_mapping, value=external_id_value
-                )
-                return f"{self.external_id_mapping}={external_id_value}"
-            else:
-                self.logger.error("externalId filter requested but no mapping configured", filter={scim_filter})
-                raise ValueError("externalId filter requested but no mapping configured")
+        if self.resource_class == User:
+            udm_filter: str = self.scim2udm_mapper.map_user_filter(scim_filter)
+        elif self.resource_class == Group:
+            udm_filter = await self.scim2udm_mapper.amap_group_filter(scim_filter)
+        else:
+            raise ValueError(f"Unsupported resource class: {self.resource_class}")
 
-        # Handle userName filter for users
-        if "userName eq " in scim_filter and self.resource_class == User:
-            username = scim_filter.split("userName eq ")[1].strip("\"'")
-            return f"username={username}"
+        self.logger.trace("Converted SCIM filter", filter=scim_filter, udm_filter=udm_filter)
+        return udm_filter
 
-        # Handle displayName filter for groups
-        if "displayName eq " in scim_filter and self.resource_class == Group:
-            displayname = scim_filter.split("displayName eq ")[1].strip("\"'")
-            if self.resource_class == User:
-                return f"displayName={displayname}"
-            if self.resource_class == Group:
-                return f"name={displayname}"
 
-        raise ValueError(
-            "Filter query not supported yet. Filtering is only supported for: id, externalId, userName and displayName"
-        )
+def _group_patch(current: dict[str, Any], properties: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    JSON patch operations changing the properties of a group to the given ones.
+    Unchanged properties are skipped, members are compared as sets of DNs.
+    """
+    patch: list[dict[str, Any]] = []
+    for key, value in properties.items():
+        if key in ("users", "nestedGroup"):
+            current_dns = current.get(key) or []
+            new_keys = {dn.lower() for dn in value}
+            removed = [dn for dn in current_dns if dn.lower() not in new_keys]
+            patch.extend(_member_patch(key, current_dns, value, removed))
+        elif current.get(key) != value:
+            # add replaces existing values and also works for properties missing in the current object
+            patch.append({"op": "add", "path": f"/properties/{key}", "value": value})
+
+    return patch
+
+
+def _member_patch(udm_property: str, current: list[str], added: list[str], removed: list[str]) -> list[dict[str, Any]]:
+    """
+    JSON patch operations adding and removing members of one UDM property.
+    Members which are already present are not added again.
+    """
+    current_keys = [dn.lower() for dn in current]
+    removed_keys = {dn.lower() for dn in removed}
+    # Remove from the end, so the positions of the remaining members stay valid
+    patch: list[dict[str, Any]] = [
+        {"op": "remove", "path": f"/properties/{udm_property}/{position}"}
+        for position in reversed(range(len(current_keys)))
+        if current_keys[position] in removed_keys
+    ]
+
+    present = set(current_keys) - removed_keys
+    for dn in added:
+        if dn.lower() not in present:
+            present.add(dn.lower())
+            patch.append({"op": "add", "path": f"/properties/{udm_property}/-", "value": dn})
+
+    return patch
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import asyncio
 import time
 from datetime import UTC, datetime
 from uuid import UUID
@@ -8,7 +9,11 @@ from uuid import UUID
 from loguru import logger
 from univention.admin.rest.client import UDM
 
-from univention.scim.transformation.id_cache import CacheItem, IdCache
+from univention.scim.server.domain.repo.udm.circuit_breaker import CircuitOpenError
+from univention.scim.server.metrics import ID_CACHE_LOOKUPS
+from univention.scim.server.request_timing import ID_CACHE, timed
+from univention.scim.server.tracing import span
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore, IdCache
 
 
 class UdmIdCache(IdCache):
@@ -25,18 +30,20 @@ class UdmIdCache(IdCache):
         """
         self.udm_client = udm_client
         self.ttl = ttl
-        self.users: dict[str, CacheItem] = {}
-        self.groups: dict[str, CacheItem] = {}
+        self.users = CacheItemStore()
+        self.groups = CacheItemStore()
 
-    def _get_entry(self, cache: dict[str, CacheItem], key: str) -> CacheItem | None:
-        if key not in cache:
+    def _get_entry(self, cache: CacheItemStore, key: str) -> CacheItem | None:
+        name = "user" if cache is self.users else "group"
+        entry = cache.get(key)
+        if entry is None:
             logger.debug("Entry not yet in cache", key=key)
+            ID_CACHE_LOOKUPS.labels(name, "miss").inc()
             return None
 
         logger.debug("Found entry in cache", key=key)
 
         current_time = int(time.time())
-        entry = cache[key]
         if (entry.created + self.ttl) < current_time:
             logger.debug(
                 "Cache item expired",
@@ -45,8 +52,19 @@ class UdmIdCache(IdCache):
                 current_time=datetime.fromtimestamp(current_time, tz=UTC),
                 ttl=self.ttl,
             )
+            ID_CACHE_LOOKUPS.labels(name, "expired").inc()
             return None
 
+        ID_CACHE_LOOKUPS.labels(name, "hit").inc()
+        return entry
+
+    def _get_stale_entry(self, cache: CacheItemStore, key: str, error: CircuitOpenError) -> CacheItem:
+        # UDM is down, an expired entry is better than failing the whole request
+        entry = cache.get(key)
+        if entry is None:
+            raise error
+
+        logger.debug("UDM unavailable, using expired cache item", key=key)
         return entry
 
     def _is_uuid(self, val: str) -> bool:
@@ -57,6 +75,10 @@ class UdmIdCache(IdCache):
             return False
 
     def _query_udm(self, key: str, udm_module: str) -> CacheItem:
+        with timed(ID_CACHE), span("IdCache miss", {"udm.module": udm_module}):
+            return self._fetch_udm(key, udm_module)
+
+    def _fetch_udm(self, key: str, udm_module: str) -> CacheItem:
         module = self.udm_client.get(udm_module)
         properties = ["univentionObjectIdentifier", "displayName", "name"]
         if self._is_uuid(key):
@@ -95,27 +117,39 @@ class UdmIdCache(IdCache):
             uuid,
             udm_obj.properties.get("displayName", udm_obj.properties.get("name", "")),
         )
-        logger.debug("Fetched item from UDM", module=udm_module, item=item.__dict__)
+        logger.debug("Fetched item from UDM", module=udm_module, item=repr(item))
         return item
 
     def _query_user(self, key: str) -> CacheItem:
         user = self._query_udm(key, "users/user")
 
-        self.users[user.dn] = user
-        if user.uuid:
-            self.users[user.uuid] = user
+        self.users.add(user)
 
         return user
 
     def _query_group(self, key: str) -> CacheItem:
         group = self._query_udm(key, "groups/group")
 
-        self.groups[group.dn] = group
-        if group.uuid:
-            self.groups[group.uuid] = group
+        self.groups.add(group)
 
         return group
 
+    def _check_user(self, key: str, entry: CacheItem) -> CacheItem | None:
+        if not entry.uuid:
+            logger.error("Ignore user, group member mapping requires a valid 'univentionObjectIdentifier'", user_id=key)
+            return None
+
+        return entry
+
+    def _check_group(self, key: str, entry: CacheItem) -> CacheItem | None:
+        if not entry.uuid:
+            logger.error(
+                "Ignore group, user groups mapping requires a valid 'univentionObjectIdentifier'", group_id=key
+            )
+            return None
+
+        return entry
+
     def get_user(self, key: str) -> CacheItem | None:
         entry = self._get_entry(self.users, key)
         if not entry:
@@ -123,12 +157,10 @@ class UdmIdCache(IdCache):
                 entry = self._query_user(key)
             except ValueError:
                 return None
+            except CircuitOpenError as e:
+                entry = self._get_stale_entry(self.users, key, e)
 
-        if not entry.uuid:
-            logger.error("Ignore user, group member mapping requires a valid 'univentionObjectIdentifier'", user_id=key)
-            return None
-
-        return entry
+        return self._check_user(key, entry)
 
     def get_group(self, key: str) -> CacheItem | None:
         entry = self._get_entry(self.groups, key)
@@ -137,11 +169,56 @@ class UdmIdCache(IdCache):
                 entry = self._query_group(key)
             except ValueError:
                 return None
+            except CircuitOpenError as e:
+                entry = self._get_stale_entry(self.groups, key, e)
 
-        if not entry.uuid:
-            logger.error(
-                "Ignore group, user groups mapping requires a valid 'univentionObjectIdentifier'", group_id=key
-            )
-            return None
+        return self._check_group(key, entry)
 
-        return entry
+    def cached_type(self, key: str) -> str | None:
+        if self._get_entry(self.users, key):
+            return "User"
+        if self._get_entry(self.groups, key):
+            return "Group"
+
+        return None
+
+    def load_groups(self) -> list[tuple[CacheItem, list[str]]]:
+        module = self.udm_client.get("groups/group")
+        properties = ["univentionObjectIdentifier", "name", "users", "nestedGroup"]
+        logger.debug("Load all groups from UDM")
+
+        groups = []
+        for udm_obj in module.search(opened=True, properties=properties):
+            props = udm_obj.properties
+            item = CacheItem(udm_obj.dn, props.get("univentionObjectIdentifier"), props.get("name", ""))
+            self.groups.add(item)
+            groups.append((item, [*(props.get("users") or []), *(props.get("nestedGroup") or [])]))
+
+        logger.info("Loaded all groups from UDM", count=len(groups))
+        return groups
+
+    async def aget_user(self, key: str) -> CacheItem | None:
+        # Cache hits are answered directly, only the blocking UDM request runs in a worker thread
+        entry = self._get_entry(self.users, key)
+        if not entry:
+            try:
+                entry = await asyncio.to_thread(self._query_user, key)
+            except ValueError:
+                return None
+            except CircuitOpenError as e:
+                entry = self._get_stale_entry(self.users, key, e)
+
+        return self._check_user(key, entry)
+
+    async def aget_group(self, key: str) -> CacheItem | None:
+        # Cache hits are answered directly, only the blocking UDM request runs in a worker thread
+        entry = self._get_entry(self.groups, key)
+        if not entry:
+            try:
+                entry = await asyncio.to_thread(self._query_group, key)
+            except ValueError:
+                return None
+            except CircuitOpenError as e:
+                entry = self._get_stale_entry(self.groups, key, e)
+
+        return self._check_group(key, entry)
@@ -43,6 +43,17 @@ class UserService(ABC):
         """
         pass
 
+    @abstractmethod
+    async def count_users(self, filter_str: str | None = None) -> int:
+        """
+        Count users without retrieving them.
+        Args:
+            filter_str: SCIM filter expression
+        Returns:
+            Number of users matching the filter
+        """
+        pass
+
     @abstractmethod
     async def create_user(self, user: UserWithExtensions) -> UserWithExtensions:
         """
@@ -55,6 +55,11 @@ class UserServiceImpl(UserService, PatchMixin):
             items_per_page=len(users),
         )
 
+    async def count_users(self, filter_str: str | None = None) -> int:
+        """Count users matching a filter."""
+        logger.debug(f"Counting users with filter: {filter_str}")
+        return await self.user_repository.count(filter_str)
+
     async def create_user(self, user: UserWithExtensions) -> UserWithExtensions:
         """Create a new user."""
         logger.debug("Creating new user")
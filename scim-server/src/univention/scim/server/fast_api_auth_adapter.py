@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import json
+import time
 from typing import Any
 
 from fastapi import Request
@@ -8,6 +10,9 @@ from fastapi.security import OAuth2AuthorizationCodeBearer
 
 from univention.scim.server.authn.authn import Authentication
 from univention.scim.server.authz.authz import Authorization
+from univention.scim.server.domain.repo.coalescing import authorization_context
+from univention.scim.server.metrics import AUTH_DURATION
+from univention.scim.server.request_timing import AUTH, record_duration
 
 
 class FastAPIAuthAdapter(OAuth2AuthorizationCodeBearer):
@@ -25,7 +30,22 @@ class FastAPIAuthAdapter(OAuth2AuthorizationCodeBearer):
     async def __call__(self, request: Request) -> Any:
         token: str | None = await super().__call__(request)
 
-        user_data = await self.authentication.authenticate(token)
-        await self.authorization.authorize(request, user_data)
+        start_time = time.perf_counter()
+        result = "failure"
+        try:
+            user_data = await self.authentication.authenticate(token)
+            await self.authorization.authorize(request, user_data)
+            result = "success"
+        finally:
+            duration = time.perf_counter() - start_time
+            AUTH_DURATION.labels(result).observe(duration)
+            record_duration(AUTH, duration)
+
+        # Concurrent identical reads are only shared between requests with the same access rights
+        authorization_context.set(
+            json.dumps(
+                {key: value for key, value in user_data.items() if key != "expires"}, sort_keys=True, default=str
+            )
+        )
 
         return user_data
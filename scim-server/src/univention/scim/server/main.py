@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
@@ -13,21 +14,43 @@ from loguru import logger
 from univention.scim.server.config import ApplicationSettings, application_settings
 from univention.scim.server.configure_logging import configure_logging
 from univention.scim.server.container import ApplicationContainer
+from univention.scim.server.domain.repo.membership import refresh_membership_index
 from univention.scim.server.fast_api_auth_adapter import FastAPIAuthAdapter
+from univention.scim.server.middlewares.admission import add_admission_control_middleware
 from univention.scim.server.middlewares.content_type import add_content_type_middleware
+from univention.scim.server.middlewares.metrics import add_metrics_middleware
+from univention.scim.server.middlewares.profiling import add_profiling_middleware
 from univention.scim.server.middlewares.request_logging import setup_request_logging_middleware
 from univention.scim.server.middlewares.timing import add_timing_middleware
+from univention.scim.server.middlewares.tracing import add_tracing_middleware
 from univention.scim.server.rest.error_handler import (
     fastapi_request_exception_handler,
     generic_exception_handler,
     scim_exception_handler,
 )
 from univention.scim.server.rest.groups import router as groups_router
+from univention.scim.server.rest.health import router as health_router
 from univention.scim.server.rest.id import router as id_router
+from univention.scim.server.rest.metrics import router as metrics_router
 from univention.scim.server.rest.resource_type import router as resources_types_router
 from univention.scim.server.rest.schema import router as schema_router
 from univention.scim.server.rest.service_provider import router as service_provider_router
 from univention.scim.server.rest.users import router as users_router
+from univention.scim.server.runtime import uvicorn_options
+from univention.scim.server.tracing import setup_tracing, shutdown_tracing
+
+
+def init_singletons(container: ApplicationContainer) -> None:
+    """
+    Create the container singletons eagerly.
+
+    Every worker process runs the lifespan on its own, so each worker gets its own
+    UDM client, id cache, mappers and services before it accepts the first request
+    instead of building them lazily while handling it.
+    """
+    container.schema_loader()
+    container.user_service()
+    container.group_service()
 
 
 @asynccontextmanager
@@ -42,16 +65,37 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Use settings from container to allow overriding values in unit tests
     settings = ApplicationContainer().settings()
 
+    init_singletons(container)
+
+    refresh_task = None
+    if settings.user_groups_enabled:
+        # Load the groups in the background, until done users are mapped without groups
+        refresh_task = asyncio.create_task(
+            refresh_membership_index(
+                container.repositories.id_cache(),
+                container.repositories.membership_index(),
+                settings.user_groups_refresh_interval,
+            )
+        )
+
     dependencies = []
+    jwks_task = None
     if settings.auth_enabled:
         # The FastAPI OAuth2AuthorizationCodeBearer requires some information from the IDP
         # which is fetched via network so initialize it here at runtime because
         # we don't want network access at initialization time
+        oidc_configuration = container.oidc_configuration()
         auth = FastAPIAuthAdapter(
-            container.oidc_configuration().get_configuration(), container.authenticator(), container.authorization()
+            await oidc_configuration.get_configuration(), container.authenticator(), container.authorization()
         )
         dependencies.append(Security(auth))
+        # Load the signing keys in the background and keep them up to date
+        jwks_task = asyncio.create_task(oidc_configuration.refresh_jwks())
 
+    # Not below the API prefix and without authentication, so load balancers and monitoring can use them
+    app.include_router(health_router, prefix="/health", tags=["Health"])
+    if settings.metrics.enabled:
+        app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
     app.include_router(users_router, prefix=f"{settings.api_prefix}/Users", tags=["Users"], dependencies=dependencies)
     app.include_router(
         groups_router, prefix=f"{settings.api_prefix}/Groups", tags=["Groups"], dependencies=dependencies
@@ -84,6 +128,11 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     yield
     # Cleanup tasks when the application is shutting down
     logger.info("Shutting down SCIM server")
+    if refresh_task:
+        refresh_task.cancel()
+    if jwks_task:
+        jwks_task.cancel()
+    shutdown_tracing()
 
 
 # Use a function to create the app, this allows the tests to always use a new app object
@@ -93,6 +142,9 @@ def make_app(settings: ApplicationSettings) -> FastAPI:
     # Configure logging
     configure_logging(settings.log_level)
 
+    # Before the services are created in the lifespan, they are only instrumented if tracing is enabled
+    setup_tracing(settings.tracing)
+
     docs_url = None
     redoc_url = None
     openapi_url = None
@@ -124,8 +176,24 @@ def make_app(settings: ApplicationSettings) -> FastAPI:
     # Add correlation ID middleware
     app.add_middleware(CorrelationIdMiddleware)
 
+    # Profile single requests (inside admission control, so waiting for admission is not part of the profile)
+    if settings.profiling.enabled:
+        add_profiling_middleware(app, settings.profiling)
+
+    # Limit the concurrent requests to UDM (inside timing and request logging, so rejections are logged)
+    add_admission_control_middleware(app, settings.admission, settings.api_prefix)
+
+    # Record request durations (outside admission control, so waiting and rejected requests are included)
+    if settings.metrics.enabled:
+        add_metrics_middleware(app)
+
     # Add timing middleware (before request logging middleware)
-    add_timing_middleware(app, prefix="SCIM ")
+    add_timing_middleware(
+        app,
+        prefix="SCIM ",
+        server_timing=settings.metrics.server_timing,
+        backend_call_budget=settings.metrics.backend_call_budget,
+    )
 
     # Add request logging middleware
     setup_request_logging_middleware(app)
@@ -133,6 +201,10 @@ def make_app(settings: ApplicationSettings) -> FastAPI:
     # Add content type middleware (after request logging to not interfere with logs)
     add_content_type_middleware(app)
 
+    # Run each request in a span (outside of everything else, so the span covers the whole request)
+    if settings.tracing.enabled:
+        add_tracing_middleware(app)
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -156,11 +228,7 @@ app = make_app(settings)
 
 def run() -> None:
     """Entry point for running the application."""
-    uvicorn.run(
-        "univention.scim.server.main:app",
-        host=settings.listen,
-        port=settings.port,
-    )
+    uvicorn.run("univention.scim.server.main:app", **uvicorn_options(settings))
 
 
 if __name__ == "__main__":
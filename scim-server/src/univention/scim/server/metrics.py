@@ -0,0 +1,225 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import bisect
+import math
+import threading
+from collections.abc import Iterator, Sequence
+
+
+# Seconds, covers fast cache hits up to UDM requests running into timeouts
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds, for work done in process without waiting for the network
+CPU_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Registry:
+    """
+    Collects the metrics of the process and renders them in the Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Child:
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float]):
+        self._lock = lock
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    """
+    A metric with a fixed set of label names, each combination of label values is a child.
+
+    Label values must come from small, fixed sets (e.g. route templates, not paths), every
+    combination is kept until the process ends.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], _Child | _HistogramChild] = {}
+        registry.register(self)
+
+    def _new_child(self) -> _Child | _HistogramChild:
+        return _Child(self._lock)
+
+    def _child(self, values: tuple[str, ...]) -> _Child | _HistogramChild:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            assert isinstance(child, _Child)
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def labels(self, *values: str) -> _Child:
+        child = self._child(values)
+        assert isinstance(child, _Child)
+        return child
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Registry = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._lock, self.buckets)
+
+    def labels(self, *values: str) -> _HistogramChild:
+        child = self._child(values)
+        assert isinstance(child, _HistogramChild)
+        return child
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            assert isinstance(child, _HistogramChild)
+            with self._lock:
+                counts = list(child.counts)
+                total = child.sum
+
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels((*self.labelnames, "le"), (*values, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge("scim_http_requests_in_flight", "Number of HTTP requests being processed")
+HTTP_REQUEST_DURATION = Histogram(
+    "scim_http_request_duration_seconds",
+    "Duration of HTTP requests by method, route template and status code",
+    ("method", "route", "status"),
+)
+UDM_REQUEST_DURATION = Histogram(
+    "scim_udm_request_duration_seconds",
+    "Duration of requests to the UDM REST API by operation (search, open, save, delete, other)",
+    ("operation",),
+)
+MAPPING_DURATION = Histogram(
+    "scim_mapping_duration_seconds",
+    "Duration of mapping UDM objects to SCIM resources, including resolving members and groups",
+    ("resource_type",),
+    buckets=CPU_BUCKETS,
+)
+ID_CACHE_LOOKUPS = Counter(
+    "scim_id_cache_lookups_total",
+    "Lookups in the id cache by cache and result (hit, miss, expired)",
+    ("cache", "result"),
+)
+AUTH_DURATION = Histogram(
+    "scim_auth_duration_seconds",
+    "Duration of authenticating and authorizing requests by result",
+    ("result",),
+    buckets=CPU_BUCKETS,
+)
+COALESCED_READS = Counter("scim_coalesced_reads_total", "Reads answered by an identical read already running")
+ADMISSION_IN_FLIGHT = Gauge(
+    "scim_admission_in_flight", "Number of requests admitted by admission control", ("limiter",)
+)
+ADMISSION_QUEUED = Gauge("scim_admission_queued", "Number of requests waiting for admission", ("limiter",))
+ADMISSION_LIMIT = Gauge("scim_admission_limit", "Current concurrency limit of admission control", ("limiter",))
+UDM_CIRCUIT_STATE = Gauge(
+    "scim_udm_circuit_state", "State of the circuit breaker in front of UDM, 1 for the current state", ("state",)
+)
@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse
+from loguru import logger
+from scim2_models import Error
+
+from univention.scim.server.config import AdmissionConfig
+from univention.scim.server.request_timing import QUEUE, timed
+
+
+READ_METHODS = {"GET", "HEAD"}
+
+
+class AdmissionRejected(Exception):
+    """
+    A request was not admitted because the backend is overloaded.
+    """
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class AdmissionLimiter:
+    """
+    Limits the number of concurrent requests, the limit adapts to the observed latency.
+
+    Requests above the limit wait in a bounded queue. The limit grows by one after a window
+    of requests faster than the target latency and is cut multiplicatively after a slow
+    request (AIMD), so a slow backend gets less load instead of more.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        min_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        target_latency: float,
+        decrease_factor: float = 0.7,
+    ):
+        """
+        Args:
+            name: Name used for logging
+            max_limit: Maximum and initial number of concurrent requests
+            min_limit: The limit is never decreased below this
+            queue_size: Maximum number of requests waiting for a slot
+            queue_timeout: Seconds a request waits for a slot before it is rejected
+            target_latency: Requests slower than this many seconds decrease the limit
+            decrease_factor: Factor the limit is multiplied with after a slow request
+        """
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        # Moving average of the latency, used to estimate when to retry
+        self.latency = target_latency
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self) -> int:
+        # Time until the queue in front of a new request has been worked off
+        return max(1, math.ceil(self.latency * (self.queued + 1) / max(int(self.limit), 1)))
+
+    async def acquire(self) -> None:
+        """
+        Wait for a free slot.
+        Raises:
+            AdmissionRejected: If the queue is full or no slot got free in time
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if self.queued >= self.queue_size:
+            logger.warning("Reject request, queue full", limiter=self.name, queued=self.queued, limit=int(self.limit))
+            raise AdmissionRejected(status.HTTP_429_TOO_MANY_REQUESTS, self._retry_after(), "Too many requests.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except TimeoutError as e:
+            if waiter.done():
+                # Got the slot at the same moment the deadline passed
+                return
+
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            logger.warning("Reject request, waited too long", limiter=self.name, limit=int(self.limit))
+            raise AdmissionRejected(
+                status.HTTP_503_SERVICE_UNAVAILABLE, self._retry_after(), "Service overloaded."
+            ) from e
+        except asyncio.CancelledError:
+            if waiter.done():
+                # The slot was handed over already, give it to the next one
+                self.release(None)
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float | None) -> None:
+        """
+        Free a slot and adapt the limit.
+        Args:
+            latency: Seconds the request took, None if it did not finish
+        """
+        self.in_flight -= 1
+        if latency is not None:
+            self._adapt(latency)
+
+        # Hand over free slots directly, so new requests can not overtake waiting ones
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._waiters.popleft().set_result(None)
+
+    def _adapt(self, latency: float) -> None:
+        self.latency = 0.8 * self.latency + 0.2 * latency
+
+        now = time.monotonic()
+        if latency > self.target_latency:
+            # Decrease at most once per target latency, requests started before cut already
+            # saw the old load
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                logger.info("Decreased concurrency limit", limiter=self.name, limit=int(self.limit), latency=latency)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+
+def _rejected_response(rejected: AdmissionRejected) -> JSONResponse:
+    error = Error(
+        status=rejected.status_code,
+        detail=rejected.detail,
+        schemas=["urn:ietf:params:scim:api:messages:2.0:Error"],
+    )
+    return JSONResponse(
+        status_code=rejected.status_code,
+        content=error.model_dump(exclude_none=True),
+        headers={"Retry-After": str(rejected.retry_after)},
+    )
+
+
+def add_admission_control_middleware(app: FastAPI, config: AdmissionConfig, prefix: str) -> None:
+    """
+    Limit the concurrent SCIM requests forwarded to the backend.
+
+    Reads and writes have separate limits, so a burst of writes does not block reads.
+    Requests which can not be admitted get a SCIM error with status 429 if the queue
+    is full or 503 if they waited too long, both with a Retry-After header.
+
+    Args:
+        app: The FastAPI application to add the middleware to
+        config: Admission control settings
+        prefix: Only requests below this path are limited
+    """
+    if not config.enabled:
+        return
+
+    limiters = {
+        "read": AdmissionLimiter(
+            "read",
+            config.read_limit,
+            config.min_limit,
+            config.queue_size,
+            config.queue_timeout,
+            config.target_latency,
+        ),
+        "write": AdmissionLimiter(
+            "write",
+            config.write_limit,
+            config.min_limit,
+            config.queue_size,
+            config.queue_timeout,
+            config.target_latency,
+        ),
+    }
+    app.state.admission_limiters = limiters
+
+    @app.middleware("http")
+    async def admission_control_middleware(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if not request.url.path.startswith(prefix):
+            return await call_next(request)
+
+        limiter = limiters["read" if request.method in READ_METHODS else "write"]
+        try:
+            with timed(QUEUE):
+                await limiter.acquire()
+        except AdmissionRejected as rejected:
+            return _rejected_response(rejected)
+
+        start_time = time.monotonic()
+        latency = None
+        try:
+            response = await call_next(request)
+            latency = time.monotonic() - start_time
+            return response
+        finally:
+            limiter.release(latency)
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import time
+from collections.abc import Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response
+
+from univention.scim.server.metrics import HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_DURATION
+
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def route_template(request: Request) -> str:
+    """
+    Get the path of a request with the values of path parameters replaced by their names.
+
+    Requests which did not match a route share one template, so unknown paths do not create
+    new metric labels.
+    Args:
+        request: A request which has been routed
+    Returns:
+        e.g. /scim/v2/Users/{user_id}
+    """
+    if "endpoint" not in request.scope:
+        return "unmatched"
+
+    path_params = request.scope.get("path_params") or {}
+    if not path_params:
+        return request.url.path
+
+    names = {str(value): name for name, value in path_params.items()}
+    return "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in request.url.path.split("/"))
+
+
+def add_metrics_middleware(app: FastAPI) -> None:
+    """
+    Record the number of running requests and the duration of each request.
+
+    Args:
+        app: The FastAPI application to add the middleware to
+    """
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            method = request.method if request.method in KNOWN_METHODS else "other"
+            HTTP_REQUEST_DURATION.labels(method, route_template(request), str(status_code)).observe(
+                time.perf_counter() - start_time
+            )
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import cProfile
+import marshal
+import random
+import secrets
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from fastapi import FastAPI, Request, Response
+from loguru import logger
+
+from univention.scim.server.config import ProfilingConfig
+
+
+PROFILE_HEADER = "X-SCIM-Profile"
+PROFILE_STATUS_HEADER = "X-SCIM-Profile-Status"
+
+
+class CProfileRecorder:
+    """
+    Deterministic profile of all Python calls in the event loop thread.
+
+    The result is the pstats format, e.g. for snakeviz or flameprof.
+    """
+
+    suffix = ".prof"
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> bytes:
+        self.profile.disable()
+        self.profile.create_stats()
+        # Same as Profile.dump_stats() writes
+        return marshal.dumps(self.profile.stats)
+
+
+class PyinstrumentRecorder:
+    """
+    Statistical profile of the request, following it across awaits.
+
+    The result is the speedscope JSON format, e.g. for https://www.speedscope.app.
+    """
+
+    suffix = ".speedscope.json"
+
+    def __init__(self) -> None:
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler(async_mode="enabled")
+
+    def start(self) -> None:
+        self.profiler.start()
+
+    def stop(self) -> bytes:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        self.profiler.stop()
+        return str(self.profiler.output(SpeedscopeRenderer())).encode()
+
+
+def _recorder_class(profiler: str) -> Any:
+    if profiler == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Profiling with pyinstrument is configured but it is not installed") from e
+        return PyinstrumentRecorder
+    return CProfileRecorder
+
+
+def _token_matches(value: str | None, token: str) -> bool:
+    return bool(value and token) and secrets.compare_digest(str(value).encode(), token.encode())
+
+
+def add_profiling_middleware(app: FastAPI, config: ProfilingConfig) -> None:
+    """
+    Profile requests with the configured token in the X-SCIM-Profile header and a sample of all requests.
+
+    Only one request is profiled at a time, other requests in the same event loop can show up
+    in the profile. Profiles are written to the configured directory, without a directory the
+    response of a requested profile is replaced by the profile, its status is returned in the
+    X-SCIM-Profile-Status header.
+    Args:
+        app: The FastAPI application to add the middleware to
+        config: Profiling settings
+    """
+    recorder_class = _recorder_class(config.profiler)
+    directory = Path(config.directory) if config.directory else None
+    if directory is not None:
+        directory.mkdir(parents=True, exist_ok=True)
+    elif config.sample_rate:
+        logger.warning("Profiling sample rate is set without a directory, only requested profiles are created")
+
+    running = False
+
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        nonlocal running
+
+        requested = _token_matches(request.headers.get(PROFILE_HEADER), config.token)
+        sampled = directory is not None and random.random() < config.sample_rate
+        if not (requested or sampled):
+            return await call_next(request)
+        if running:
+            logger.info("Not profiling request, another request is profiled", request_path=request.url.path)
+            return await call_next(request)
+
+        running = True
+        recorder = recorder_class()
+        recorder.start()
+        try:
+            response = await call_next(request)
+            if directory is None:
+                # Let the application finish the response before the profile is returned instead
+                async for _ in response.body_iterator:  # type: ignore[attr-defined]
+                    pass
+        finally:
+            profile = recorder.stop()
+            running = False
+
+        name = f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{request.method}-{uuid4().hex[:8]}{recorder.suffix}"
+        if directory is None:
+            return Response(
+                content=profile,
+                media_type="application/octet-stream",
+                headers={
+                    "Content-Disposition": f'attachment; filename="{name}"',
+                    PROFILE_STATUS_HEADER: str(response.status_code),
+                },
+            )
+
+        (directory / name).write_bytes(profile)
+        logger.info(
+            "Wrote request profile",
+            request_path=request.url.path,
+            request_method=request.method,
+            status_code=response.status_code,
+            file=str(directory / name),
+        )
+        return response
@@ -7,19 +7,26 @@ from collections.abc import Awaitable, Callable
 from fastapi import FastAPI, Request, Response
 from loguru import logger
 
+from univention.scim.server.request_timing import RequestTiming, current_timing
+
 
 def add_timing_middleware(
     app: FastAPI,
     prefix: str = "",
+    server_timing: bool = False,
+    backend_call_budget: int = 0,
 ) -> None:
     """
     Add timing middleware to the FastAPI application.
 
-    This middleware logs the processing time for each request in milliseconds.
+    This middleware logs the processing time for each request in milliseconds, broken down
+    into the parts recorded in the request timing (auth, UDM requests, id cache, mapping, ...).
 
     Args:
         app: The FastAPI application to add the middleware to.
         prefix: A prefix to add to log messages (optional).
+        server_timing: If true the breakdown is returned in the Server-Timing response header.
+        backend_call_budget: Log a warning for requests with more calls to UDM and LDAP, 0 disables the check.
     """
 
     @app.middleware("http")
@@ -28,13 +35,22 @@ def add_timing_middleware(
         route_path = request.url.path
 
         # Record start time
-        start_time = time.time()
+        start_time = time.perf_counter()
+        request.state.start_time = start_time
+
+        # Process the request, the parts of the request record into the timing of the context
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = await call_next(request)
+        finally:
+            current_timing.reset(token)
 
-        # Process the request
-        response = await call_next(request)
+        # Calculate processing time
+        process_time = time.perf_counter() - start_time
 
-        # Calculate processing time in milliseconds
-        process_time = (time.time() - start_time) * 1000
+        if server_timing:
+            response.headers["Server-Timing"] = timing.header(process_time)
 
         # Log the timing information with structured logging
         logger.info(
@@ -42,9 +58,23 @@ def add_timing_middleware(
             request_path=route_path,
             request_method=request.method,
             status_code=response.status_code,
-            process_time_ms=round(process_time, 2),
+            process_time_ms=round(process_time * 1000, 2),
+            timings_ms=timing.milliseconds(),
+            backend_calls=timing.backend_calls,
         )
 
+        # Usually an N+1 pattern, e.g. opening every object of a search result on its own
+        backend_calls = sum(timing.backend_calls.values())
+        if backend_call_budget and backend_calls > backend_call_budget:
+            logger.warning(
+                f"{prefix}Request exceeded backend call budget",
+                request_path=route_path,
+                request_method=request.method,
+                backend_calls=timing.backend_calls,
+                total_backend_calls=backend_calls,
+                budget=backend_call_budget,
+            )
+
         return response
 
 
@@ -62,7 +92,7 @@ def record_timing(request: Request, name: str) -> None:
         logger.warning("Timing middleware not installed or not properly initialized")
         return
 
-    process_time = (time.time() - request.state.start_time) * 1000
+    process_time = (time.perf_counter() - request.state.start_time) * 1000
     route_path = request.url.path
 
     logger.info(
@@ -0,0 +1,38 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from collections.abc import Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response
+
+from univention.scim.server.middlewares.metrics import route_template
+from univention.scim.server.tracing import server_span, set_error_status
+
+
+def add_tracing_middleware(app: FastAPI) -> None:
+    """
+    Run every request in a span, which is the parent of all spans created while handling it.
+
+    Only added if tracing is enabled.
+    Args:
+        app: The FastAPI application to add the middleware to
+    """
+
+    @app.middleware("http")
+    async def tracing_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        with server_span(
+            request.method, request.headers, {"http.request.method": request.method, "url.path": request.url.path}
+        ) as span:
+            response = await call_next(request)
+
+            # The route is only known after routing
+            route = route_template(request)
+            span.update_name(f"{request.method} {route}")
+            span.set_attribute("http.route", route)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if "X-Request-ID" in response.headers:
+                span.set_attribute("request.id", response.headers["X-Request-ID"])
+            if response.status_code >= 500:
+                set_error_status(span)
+
+            return response
@@ -1,9 +1,36 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import hashlib
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
-from scim2_models import ResourceType, Schema
+from pydantic import BaseModel
+from scim2_models import ListResponse, ResourceType, Schema
+
+
+@dataclass(frozen=True)
+class ScimDocument:
+    """
+    A serialized SCIM document together with its strong ETag.
+    """
+
+    content: bytes
+    etag: str
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "ScimDocument":
+        """
+        Serialize a SCIM model the same way it is returned by the API.
+
+        Args:
+            model: SCIM model to serialize
+
+        Returns:
+            Serialized document
+        """
+        content = model.model_dump_json().encode()
+        return cls(content=content, etag=f'"{hashlib.sha256(content).hexdigest()}"')
 
 
 class LoadSchemas(ABC):
@@ -32,3 +59,70 @@ class LoadSchemas(ABC):
             List of SCIM ResourceType objects
         """
         pass
+
+    def get_schemas_document(self) -> ScimDocument:
+        """
+        Get the serialized ListResponse of all supported schemas.
+
+        Implementations should build the document only once.
+
+        Returns:
+            Serialized ListResponse
+        """
+        schemas = self.get_supported_schemas()
+        return ScimDocument.from_model(
+            ListResponse[Schema](
+                total_results=len(schemas), items_per_page=len(schemas), start_index=1, resources=schemas
+            )
+        )
+
+    def get_schema_document(self, schema_id: str) -> ScimDocument | None:
+        """
+        Get a serialized schema by ID.
+
+        Args:
+            schema_id: ID of the schema
+
+        Returns:
+            Serialized schema or None if the schema does not exist
+        """
+        for schema in self.get_supported_schemas():
+            if schema.id == schema_id:
+                return ScimDocument.from_model(schema)
+
+        return None
+
+    def get_resource_types_document(self) -> ScimDocument:
+        """
+        Get the serialized ListResponse of all resource types.
+
+        Implementations should build the document only once.
+
+        Returns:
+            Serialized ListResponse
+        """
+        resource_types = self.get_resource_types()
+        return ScimDocument.from_model(
+            ListResponse[ResourceType](
+                total_results=len(resource_types),
+                items_per_page=len(resource_types),
+                start_index=1,
+                resources=resource_types,
+            )
+        )
+
+    def get_resource_type_document(self, resource_type_id: str) -> ScimDocument | None:
+        """
+        Get a serialized resource type by ID.
+
+        Args:
+            resource_type_id: ID of the resource type
+
+        Returns:
+            Serialized resource type or None if the resource type does not exist
+        """
+        for resource_type in self.get_resource_types():
+            if resource_type.id == resource_type_id:
+                return ScimDocument.from_model(resource_type)
+
+        return None
@@ -12,7 +12,7 @@ from scim2_models import (
     User,
 )
 
-from univention.scim.server.model_service.load_schemas import LoadSchemas
+from univention.scim.server.model_service.load_schemas import LoadSchemas, ScimDocument
 from univention.scim.server.models.extensions.customer1_user import Customer1User
 from univention.scim.server.models.extensions.univention_group import UniventionGroup
 from univention.scim.server.models.extensions.univention_user import UniventionUser
@@ -23,8 +23,22 @@ class LoadSchemasImpl(LoadSchemas):
     Implementation of schema loading service.
 
     Provides default SCIM schemas and resource types.
+
+    The schemas and resource types never change at runtime, so they are built
+    and serialized only once when the loader is created.
     """
 
+    def __init__(self) -> None:
+        self._schemas = self._build_supported_schemas()
+        self._resource_types = self._build_resource_types()
+
+        self._schemas_document = super().get_schemas_document()
+        self._schema_documents = {schema.id: ScimDocument.from_model(schema) for schema in self._schemas}
+        self._resource_types_document = super().get_resource_types_document()
+        self._resource_type_documents = {
+            resource_type.id: ScimDocument.from_model(resource_type) for resource_type in self._resource_types
+        }
+
     def _get_user_schema(self) -> Schema:
         """Get the User schema."""
         # scim2-models does not add parent members to schema so patch schema on our own
@@ -71,7 +85,7 @@ class LoadSchemasImpl(LoadSchemas):
         logger.debug("Loading ServiceProviderConfig schema")
         return ServiceProviderConfig.to_schema()
 
-    def get_supported_schemas(self) -> list[Schema]:
+    def _build_supported_schemas(self) -> list[Schema]:
         return [
             self._get_user_schema(),
             *self._get_user_extension_schemas(),
@@ -80,8 +94,7 @@ class LoadSchemasImpl(LoadSchemas):
             self._get_service_provider_config_schema(),
         ]
 
-    def get_resource_types(self) -> list[ResourceType]:
-        """Get the available resource types."""
+    def _build_resource_types(self) -> list[ResourceType]:
         logger.debug("Loading resource types")
 
         user_type = ResourceType.from_resource(User)
@@ -103,3 +116,22 @@ class LoadSchemasImpl(LoadSchemas):
             )
 
         return [user_type, group_type]
+
+    def get_supported_schemas(self) -> list[Schema]:
+        return list(self._schemas)
+
+    def get_resource_types(self) -> list[ResourceType]:
+        """Get the available resource types."""
+        return list(self._resource_types)
+
+    def get_schemas_document(self) -> ScimDocument:
+        return self._schemas_document
+
+    def get_schema_document(self, schema_id: str) -> ScimDocument | None:
+        return self._schema_documents.get(schema_id)
+
+    def get_resource_types_document(self) -> ScimDocument:
+        return self._resource_types_document
+
+    def get_resource_type_document(self, resource_type_id: str) -> ScimDocument | None:
+        return self._resource_type_documents.get(resource_type_id)
@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Names of the recorded parts, parts can overlap, e.g. mapping groups includes resolving their members
+QUEUE = "queue"
+AUTH = "auth"
+UDM = "udm"
+LDAP = "ldap"
+ID_CACHE = "idcache"
+MAPPING = "mapping"
+SERIALIZE = "serialize"
+TOTAL = "total"
+
+
+class RequestTiming:
+    """
+    Time spent in the parts of processing one request.
+
+    Blocking backend calls run in worker threads which get a copy of the context, so all
+    threads of a request record into the same instance.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        # Calls to UDM and LDAP by operation, e.g. {"udm open": 20}, to notice N+1 patterns
+        self.backend_calls: dict[str, int] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def add_backend_call(self, operation: str) -> None:
+        with self._lock:
+            self.backend_calls[operation] = self.backend_calls.get(operation, 0) + 1
+
+    def merge(self, other: "RequestTiming") -> None:
+        """
+        Add the durations and backend calls recorded in another timing.
+        Args:
+            other: Timing of work done for several requests, e.g. a shared read
+        """
+        with other._lock:
+            durations = dict(other.durations)
+            counts = dict(other.counts)
+            backend_calls = dict(other.backend_calls)
+        with self._lock:
+            for name, duration in durations.items():
+                self.durations[name] = self.durations.get(name, 0.0) + duration
+                self.counts[name] = self.counts.get(name, 0) + counts[name]
+            for operation, count in backend_calls.items():
+                self.backend_calls[operation] = self.backend_calls.get(operation, 0) + count
+
+    def milliseconds(self) -> dict[str, float]:
+        with self._lock:
+            return {name: round(duration * 1000, 2) for name, duration in self.durations.items()}
+
+    def header(self, total: float) -> str:
+        """
+        Format the timings as value of a W3C Server-Timing header.
+        Args:
+            total: Duration of the whole request in seconds
+        Returns:
+            e.g. udm;dur=12.5;desc="3 calls", total;dur=20.1
+        """
+        with self._lock:
+            metrics = [
+                f'{name};dur={duration * 1000:.2f};desc="{self.counts[name]} calls"'
+                for name, duration in self.durations.items()
+            ]
+        metrics.append(f"{TOTAL};dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar("current_timing", default=None)
+
+
+def record_duration(name: str, duration: float) -> None:
+    """
+    Add a duration to the timing of the current request, does nothing outside of a request.
+    Args:
+        name: Part of the request, e.g. udm
+        duration: Duration in seconds
+    """
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(name, duration)
+
+
+def record_backend_call(operation: str) -> None:
+    """
+    Count a call to UDM or LDAP in the timing of the current request, does nothing outside of a request.
+    Args:
+        operation: Backend and operation, e.g. udm search
+    """
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add_backend_call(operation)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Record the duration of the block in the timing of the current request.
+    """
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start_time)
@@ -7,6 +7,34 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 from scim2_models import Error
 
+from univention.scim.server.domain.repo.udm.circuit_breaker import CircuitOpenError
+
+
+def _circuit_open_error(exc: BaseException) -> CircuitOpenError | None:
+    # The repositories and routes wrap backend errors, so look through the whole chain
+    seen = set()
+    current: BaseException | None = exc
+    while current is not None and id(current) not in seen:
+        if isinstance(current, CircuitOpenError):
+            return current
+        seen.add(id(current))
+        current = current.__cause__ or current.__context__
+
+    return None
+
+
+def _service_unavailable_response(exc: CircuitOpenError) -> JSONResponse:
+    error = Error(
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        schemas=["urn:ietf:params:scim:api:messages:2.0:Error"],
+    )
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=error.model_dump(exclude_none=True),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 async def scim_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
     """
@@ -16,6 +44,10 @@ async def scim_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     """
     logger.debug("HTTP exception", code=exc.status_code, details=exc.detail)
 
+    circuit_open = _circuit_open_error(exc)
+    if circuit_open:
+        return _service_unavailable_response(circuit_open)
+
     # Check if the exception already has a SCIM-formatted error detail
     if isinstance(exc.detail, dict) and "schemas" in exc.detail:
         # Already formatted as SCIM error
@@ -47,6 +79,11 @@ async def generic_exception_handler(request: Request, exc: Exception) -> JSONRes
 
     Converts any exception to a proper SCIM error response.
     """
+    circuit_open = _circuit_open_error(exc)
+    if circuit_open:
+        logger.warning("Backend unavailable", error=str(circuit_open))
+        return _service_unavailable_response(circuit_open)
+
     logger.exception("Unhandled exception", exception=exc)
     error = Error(
         status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -12,10 +12,11 @@ from univention.scim.server.config import application_settings
 from univention.scim.server.container import ApplicationContainer
 from univention.scim.server.domain.group_service import GroupService
 from univention.scim.server.models.types import GroupWithExtensions
+from univention.scim.server.rest.response import ScimJSONResponse
 from univention.scim.transformation.exceptions import MappingError
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ScimJSONResponse)
 
 
 @router.get("", response_model=ListResponse[GroupWithExtensions])
@@ -27,7 +28,7 @@ async def list_groups(
     count: int | None = Query(None, ge=0, description="Maximum number of results"),
     attributes: str | None = Query(None, description="Comma-separated list of attributes to include"),
     excluded_attributes: str | None = Query(None, description="Comma-separated list of attributes to exclude"),
-) -> ListResponse[GroupWithExtensions]:
+) -> Response:
     """
     List groups with optional filtering and pagination.
 
@@ -36,7 +37,11 @@ async def list_groups(
     logger.debug("REST: List groups", filter=filter, start_index=start_index, count=count)
 
     try:
-        return await group_service.list_groups(filter, start_index, count)
+        return ScimJSONResponse(
+            await group_service.list_groups(
+                filter, start_index, count, _split_attributes(attributes), _split_attributes(excluded_attributes)
+            )
+        )
     except Exception as e:
         logger.error("Error listing groups", error=e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
@@ -49,7 +54,7 @@ async def get_group(
     group_id: str = Path(..., description="Group ID"),
     attributes: str | None = Query(None, description="Comma-separated list of attributes to include"),
     excluded_attributes: str | None = Query(None, description="Comma-separated list of attributes to exclude"),
-) -> GroupWithExtensions:
+) -> Response:
     """
     Get a specific group by ID.
 
@@ -59,7 +64,7 @@ async def get_group(
 
     try:
         group = await group_service.get_group(group_id)
-        return group
+        return ScimJSONResponse(group)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
     except Exception as e:
@@ -71,9 +76,8 @@ async def get_group(
 @inject
 async def create_group(
     group: GroupWithExtensions,
-    response: Response,
     group_service: Annotated[GroupService, Depends(Provide[ApplicationContainer.group_service])],
-) -> GroupWithExtensions:
+) -> Response:
     """
     Create a new group.
 
@@ -83,8 +87,9 @@ async def create_group(
 
     try:
         created_group = await group_service.create_group(group)
-        response.headers["Location"] = f"/Groups/{created_group.id}"
-        return created_group
+        return ScimJSONResponse(
+            created_group, status_code=status.HTTP_201_CREATED, headers={"Location": f"/Groups/{created_group.id}"}
+        )
     except MappingError as e:
         logger.error("Error user not found", group_id=e.element, user_id=e.value)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
@@ -101,7 +106,7 @@ async def update_group(
     group_service: Annotated[GroupService, Depends(Provide[ApplicationContainer.group_service])],
     group_id: str = Path(..., description="Group ID"),
     group: GroupWithExtensions = ...,
-) -> GroupWithExtensions:
+) -> Response:
     """
     Replace a group.
 
@@ -110,7 +115,7 @@ async def update_group(
     logger.debug("REST: Update group with ID", id=group_id)
 
     try:
-        return await group_service.update_group(group_id, group)
+        return ScimJSONResponse(await group_service.update_group(group_id, group))
     except MappingError as e:
         logger.error("Error user not found", group_id=e.element, user_id=e.value)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
@@ -129,7 +134,7 @@ async def patch_group(
     group_service: Annotated[GroupService, Depends(Provide[ApplicationContainer.group_service])],
     group_id: Annotated[str, Path(..., description="Group ID")],
     patch_request: Annotated[dict[str, Any], Body(..., description="Raw SCIM-compliant patch request body")],
-) -> GroupWithExtensions:
+) -> Response:
     """
     Patch a group using a raw SCIM JSON patch body.
     The request must contain an 'Operations' list, and may optionally contain a 'schemas' field.
@@ -149,12 +154,22 @@ async def patch_group(
             )
 
         updated_group = await group_service.apply_patch_operations(group_id, operations)
-        return updated_group
+        if updated_group is None:
+            # Only members were added or removed, RFC 7644 allows to answer without the group
+            if settings.patch_members_no_content:
+                return Response(status_code=status.HTTP_204_NO_CONTENT, media_type="application/scim+json")
+            updated_group = await group_service.get_group(group_id)
+
+        return ScimJSONResponse(updated_group)
 
     except HTTPException as e:
         # Already a well-formed client or not-found error, just raise it
         raise e
 
+    except MappingError as e:
+        logger.error("Error member not found", group_id=e.element, member_id=e.value)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
+
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
@@ -189,3 +204,10 @@ async def delete_group(
     except Exception as e:
         logger.error("Error deleting group", id=group_id, error=e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+
+def _split_attributes(attributes: str | None) -> list[str] | None:
+    if not attributes:
+        return None
+
+    return [attribute.strip() for attribute in attributes.split(",") if attribute.strip()]
@@ -0,0 +1,28 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from typing import Annotated, Any
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+
+from univention.scim.server.container import ApplicationContainer
+from univention.scim.server.domain.repo.udm.circuit_breaker import OPEN, CircuitBreaker
+
+
+router = APIRouter()
+
+
+@router.get("")
+@inject
+async def health(
+    circuit_breaker: Annotated[CircuitBreaker, Depends(Provide[ApplicationContainer.circuit_breaker])],
+) -> dict[str, Any]:
+    """
+    Report whether the server can reach its backend.
+
+    The server stays up while UDM is unavailable, it answers from its caches where possible,
+    so this is degraded and not an error.
+    """
+    udm_state = circuit_breaker.state
+    return {"status": "degraded" if udm_state == OPEN else "ok", "udm": udm_state}
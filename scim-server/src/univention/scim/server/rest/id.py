@@ -1,10 +1,11 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import asyncio
 from typing import Annotated
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from loguru import logger
 from scim2_models import ListResponse
 
@@ -12,9 +13,11 @@ from univention.scim.server.container import ApplicationContainer
 from univention.scim.server.domain.group_service import GroupService
 from univention.scim.server.domain.user_service import UserService
 from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.server.rest.response import ScimJSONResponse
+from univention.scim.transformation.id_cache import IdCache
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ScimJSONResponse)
 
 
 @router.get("/", response_model=ListResponse[UserWithExtensions | GroupWithExtensions])
@@ -27,34 +30,41 @@ async def list_users_and_groups(
     count: int | None = Query(None, ge=0, description="Maximum number of results"),
     attributes: str | None = Query(None, description="Comma-separated list of attributes to include"),
     excluded_attributes: str | None = Query(None, description="Comma-separated list of attributes to exclude"),
-) -> ListResponse[UserWithExtensions | GroupWithExtensions]:
+) -> Response:
     """
     List users and groups with optional filtering and pagination.
 
-    Returns a paginated list of users that match the specified filter.
+    Returns a paginated list of the users followed by the groups that match the specified filter.
     """
     logger.debug("REST: List users and groups with", filter=filter, start_index=start_index, count=count)
 
     try:
+        # Only the resources on the page are mapped, the totals count all matching resources
         users = await user_service.list_users(filter, start_index, count)
-        groups = await group_service.list_groups(filter, 1, None)
-
-        group_start = start_index - len(users.resources)
-        group_start = group_start if group_start > 0 else 1
-
-        group_count = None
-        if count is not None:
-            group_count = count - len(users.resources)
-            group_count = group_count if group_count > 0 else None
-
-        groups.resources = groups.resources[group_start - 1 : group_count]
-
-        return ListResponse[UserWithExtensions | GroupWithExtensions](
-            schemas=["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
-            total_results=users.total_results + groups.total_results,
-            resources=users.resources + groups.resources,
-            start_index=1,
-            items_per_page=len(users.resources) + len(groups.resources),
+        user_resources = users.resources or []
+        resources: list[UserWithExtensions | GroupWithExtensions] = [*user_resources]
+        total_users = users.total_results or 0
+
+        # Users come first, groups are only listed if the page is not yet full
+        if count is None or len(user_resources) < count:
+            # If the page starts behind the last user, skip the groups returned on previous pages
+            group_start = max(start_index - total_users, 1)
+            group_count = count - len(user_resources) if count is not None else None
+            groups = await group_service.list_groups(filter, group_start, group_count)
+            resources.extend(groups.resources or [])
+            total_groups = groups.total_results or 0
+        else:
+            total_groups = await group_service.count_groups(filter)
+        total_results = total_users + total_groups
+
+        return ScimJSONResponse(
+            ListResponse[UserWithExtensions | GroupWithExtensions](
+                schemas=["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
+                total_results=total_results,
+                resources=resources,
+                start_index=1,
+                items_per_page=len(resources),
+            )
         )
     except Exception as e:
         logger.error("Error listing users and groups", error=e)
@@ -66,24 +76,32 @@ async def list_users_and_groups(
 async def get_user_or_group(
     user_service: Annotated[UserService, Depends(Provide[ApplicationContainer.user_service])],
     group_service: Annotated[GroupService, Depends(Provide[ApplicationContainer.group_service])],
+    id_cache: Annotated[IdCache, Depends(Provide[ApplicationContainer.id_cache])],
     id: str = Path(..., description="Object ID"),
-) -> UserWithExtensions | GroupWithExtensions:
+) -> Response:
     """
     Get a specific object by ID.
 
-    Returns the object with the specified ID.
+    Returns the user or group with the specified ID. The id cache tells which of them to fetch,
+    ids which are not cached are looked up as user and as group concurrently.
     """
     logger.debug("REST: Get object with ID", id=id)
 
     try:
-        user = await user_service.get_user(id)
-        return user
-    except ValueError:
-        try:
-            group = await group_service.get_group(id)
-            return group
-        except ValueError as e:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+        resource_type = id_cache.cached_type(id)
+        if resource_type is None:
+            # The lookups block, the id cache runs them in worker threads and remembers the type of the id
+            user, group = await asyncio.gather(id_cache.aget_user(id), id_cache.aget_group(id))
+            resource_type = "User" if user else "Group" if group else None
+
+        if resource_type == "User":
+            return ScimJSONResponse(await user_service.get_user(id))
+        if resource_type == "Group":
+            return ScimJSONResponse(await group_service.get_group(id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
     except Exception as e:
         logger.error("Error getting object", id=id, error=e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
+
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Object with ID {id} not found")
@@ -0,0 +1,43 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from typing import Annotated
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends, Request, Response
+
+from univention.scim.server.container import ApplicationContainer
+from univention.scim.server.domain.repo.udm.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from univention.scim.server.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_LIMIT,
+    ADMISSION_QUEUED,
+    CONTENT_TYPE,
+    REGISTRY,
+    UDM_CIRCUIT_STATE,
+)
+
+
+router = APIRouter()
+
+
+@router.get("")
+@inject
+async def metrics(
+    request: Request,
+    circuit_breaker: Annotated[CircuitBreaker, Depends(Provide[ApplicationContainer.circuit_breaker])],
+) -> Response:
+    """
+    Metrics of this worker process in the Prometheus text format.
+    """
+    # State owned by other components is read when scraped instead of on every change
+    for name, limiter in getattr(request.app.state, "admission_limiters", {}).items():
+        ADMISSION_IN_FLIGHT.labels(name).set(limiter.in_flight)
+        ADMISSION_QUEUED.labels(name).set(limiter.queued)
+        ADMISSION_LIMIT.labels(name).set(int(limiter.limit))
+
+    state = circuit_breaker.state
+    for name in (CLOSED, HALF_OPEN, OPEN):
+        UDM_CIRCUIT_STATE.labels(name).set(1 if state == name else 0)
+
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
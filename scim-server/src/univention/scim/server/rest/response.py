@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from univention.scim.server.model_service.load_schemas import ScimDocument
+from univention.scim.server.request_timing import SERIALIZE, timed
+
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover
+    HAS_ORJSON = False
+
+
+class ScimJSONResponse(JSONResponse):
+    """
+    JSON response for SCIM resources which were already validated by the mapper.
+
+    Endpoints returning a model directly let FastAPI validate it against the
+    response_model a second time and serialize it via jsonable_encoder. Returning
+    this response instead serializes the model straight to JSON bytes with
+    pydantic's native serializer, keeping the SCIM camelCase aliases and the
+    exclude-none semantics. Plain dicts and lists are encoded with orjson if it
+    is installed.
+
+    The media type application/json is turned into application/scim+json by the
+    content type middleware.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timed(SERIALIZE):
+            return self._render(content)
+
+    def _render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True, exclude_none=True)
+
+        if HAS_ORJSON:
+            return orjson.dumps(content)
+
+        return super().render(content)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison, so ignore the weak indicator
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def document_response(request: Request, document: ScimDocument) -> Response:
+    """
+    Create a response for an already serialized SCIM document.
+
+    Answers conditional requests with 304 Not Modified if the client already has the document.
+
+    Args:
+        request: The current request
+        document: Serialized document to return
+
+    Returns:
+        Response with the document and its ETag
+    """
+    headers = {"ETag": document.etag}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, document.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # application/json is turned into application/scim+json by the content type middleware
+    return Response(content=document.content, media_type="application/json", headers=headers)
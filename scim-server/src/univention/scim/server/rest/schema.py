@@ -4,28 +4,28 @@
 from typing import Annotated
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
 from loguru import logger
 from scim2_models import Error, ListResponse, Schema
 
 from univention.scim.server.container import ApplicationContainer
-from univention.scim.server.model_service.load_schemas import LoadSchemas
+from univention.scim.server.model_service.load_schemas import LoadSchemas, ScimDocument
+from univention.scim.server.rest.response import document_response
 
 
 router = APIRouter()
 
 
-def _get_schema_by_id(schema_loader: LoadSchemas, schema_id: str) -> Schema:
+def _get_schema_by_id(schema_loader: LoadSchemas, schema_id: str) -> ScimDocument:
     """Helper function to get a specific schema by ID."""
-    schemas = schema_loader.get_supported_schemas()
-    for schema in schemas:
-        if schema.id == schema_id:
-            return schema
+    document = schema_loader.get_schema_document(schema_id)
+    if document is not None:
+        return document
 
     # Create a SCIM-compliant error
     error = Error(
         status=status.HTTP_404_NOT_FOUND,
-        detail="Schema '{schema_id}' not found",
+        detail=f"Schema '{schema_id}' not found",
         scim_type="invalidValue",
     )
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.model_dump())
@@ -34,32 +34,27 @@ def _get_schema_by_id(schema_loader: LoadSchemas, schema_id: str) -> Schema:
 @router.get("", response_model=ListResponse[Schema], response_model_exclude_none=True)
 @inject
 async def get_schemas(
+    request: Request,
     schema_loader: Annotated[LoadSchemas, Depends(Provide[ApplicationContainer.schema_loader])],
-) -> ListResponse[Schema]:
+) -> Response:
     """
     Get the list of schemas supported by the SCIM service.
 
-    Dynamically builds schema descriptions for all supported SCIM resource types
-    using the built-in Schema model from scim2_models.
+    The schema descriptions for all supported SCIM resource types are built
+    and serialized once by the schema loader.
     """
     logger.debug("REST: Get Schemas")
 
-    schemas = schema_loader.get_supported_schemas()
-
-    return ListResponse[Schema](
-        total_results=len(schemas),
-        items_per_page=len(schemas),
-        start_index=1,
-        resources=[x.model_dump() for x in schemas],
-    )
+    return document_response(request, schema_loader.get_schemas_document())
 
 
 @router.get("/{schema_id}", response_model=Schema, response_model_exclude_none=True)
 @inject
 async def get_schema_by_id(
+    request: Request,
     schema_loader: Annotated[LoadSchemas, Depends(Provide[ApplicationContainer.schema_loader])],
     schema_id: str = Path(..., description="Schema ID"),
-) -> Schema:
+) -> Response:
     """
     Get a specific schema by ID.
 
@@ -68,7 +63,7 @@ async def get_schema_by_id(
     logger.debug("REST: Get Schema by ID", id=schema_id)
 
     try:
-        return _get_schema_by_id(schema_loader, schema_id).model_dump()
+        return document_response(request, _get_schema_by_id(schema_loader, schema_id))
     except HTTPException:
         # Re-raise HTTPExceptions (these are already properly formatted)
         raise
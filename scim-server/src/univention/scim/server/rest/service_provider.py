@@ -1,30 +1,26 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
-from typing import Any
+from functools import lru_cache
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from loguru import logger
 from scim2_models import ServiceProviderConfig
 
 from univention.scim.server.config import application_settings
+from univention.scim.server.model_service.load_schemas import ScimDocument
+from univention.scim.server.rest.response import document_response
 
 
 router = APIRouter()
 
 
-@router.get("", response_model=ServiceProviderConfig)
-async def get_service_provider_config() -> Any:
-    """
-    Get the service provider configuration.
-
-    Returns information about the SCIM service provider's capabilities.
-    """
-    logger.debug("REST: Get ServiceProviderConfig")
-    settings = application_settings()
-    return ServiceProviderConfig(
+@lru_cache(maxsize=2)
+def _service_provider_config_document(patch_enabled: bool) -> ScimDocument:
+    """Build and serialize the service provider configuration only once."""
+    config = ServiceProviderConfig(
         documentation_uri="https://docs.univention.de/scim-api/",
-        patch={"supported": settings.patch_enabled},
+        patch={"supported": patch_enabled},
         bulk={"supported": False},
         filter={"supported": True, "max_results": 100},  # Note: document only 'eq' is supported
         change_password={"supported": True},
@@ -41,3 +37,17 @@ async def get_service_provider_config() -> Any:
             }
         ],
     )
+
+    return ScimDocument.from_model(config)
+
+
+@router.get("", response_model=ServiceProviderConfig)
+async def get_service_provider_config(request: Request) -> Response:
+    """
+    Get the service provider configuration.
+
+    Returns information about the SCIM service provider's capabilities.
+    """
+    logger.debug("REST: Get ServiceProviderConfig")
+    settings = application_settings()
+    return document_response(request, _service_provider_config_document(settings.patch_enabled))
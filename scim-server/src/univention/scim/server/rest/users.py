@@ -11,10 +11,11 @@ from univention.scim.server.config import application_settings
 from univention.scim.server.container import ApplicationContainer
 from univention.scim.server.domain.user_service import UserService
 from univention.scim.server.models.types import UserWithExtensions
+from univention.scim.server.rest.response import ScimJSONResponse
 from univention.scim.transformation.exceptions import MappingError
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ScimJSONResponse)
 
 
 @router.get("", response_model=ListResponse[UserWithExtensions])
@@ -26,7 +27,7 @@ async def list_users(
     count: int | None = Query(None, ge=0, description="Maximum number of results"),
     attributes: str | None = Query(None, description="Comma-separated list of attributes to include"),
     excluded_attributes: str | None = Query(None, description="Comma-separated list of attributes to exclude"),
-) -> ListResponse[UserWithExtensions]:
+) -> Response:
     """
     List users with optional filtering and pagination.
 
@@ -35,7 +36,7 @@ async def list_users(
     logger.debug("REST: List users with", filter=filter, start_index=start_index, count=count)
 
     try:
-        return await user_service.list_users(filter, start_index, count)
+        return ScimJSONResponse(await user_service.list_users(filter, start_index, count))
     except Exception as e:
         logger.error("Error listing users", error=e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
@@ -48,7 +49,7 @@ async def get_user(
     user_id: str = Path(..., description="User ID"),
     attributes: str | None = Query(None, description="Comma-separated list of attributes to include"),
     excluded_attributes: str | None = Query(None, description="Comma-separated list of attributes to exclude"),
-) -> UserWithExtensions:
+) -> Response:
     """
     Get a specific user by ID.
 
@@ -58,7 +59,7 @@ async def get_user(
 
     try:
         user = await user_service.get_user(user_id)
-        return user
+        return ScimJSONResponse(user)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
     except Exception as e:
@@ -71,8 +72,7 @@ async def get_user(
 async def create_user(
     user_service: Annotated[UserService, Depends(Provide[ApplicationContainer.user_service])],
     user: UserWithExtensions,
-    response: Response,
-) -> UserWithExtensions:
+) -> Response:
     """
     Create a new user.
 
@@ -82,8 +82,9 @@ async def create_user(
 
     try:
         created_user = await user_service.create_user(user)
-        response.headers["Location"] = f"/Users/{created_user.id}"
-        return created_user
+        return ScimJSONResponse(
+            created_user, status_code=status.HTTP_201_CREATED, headers={"Location": f"/Users/{created_user.id}"}
+        )
     except MappingError as e:
         logger.error("Error group not found", user_id=e.element, group_id=e.value)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
@@ -100,7 +101,7 @@ async def update_user(
     user_service: Annotated[UserService, Depends(Provide[ApplicationContainer.user_service])],
     user_id: str = Path(..., description="User ID"),
     user: UserWithExtensions = ...,
-) -> UserWithExtensions:
+) -> Response:
     """
     Replace a user.
 
@@ -109,7 +110,7 @@ async def update_user(
     logger.debug("REST: Update user with ID", id=user_id)
 
     try:
-        return await user_service.update_user(user_id, user)
+        return ScimJSONResponse(await user_service.update_user(user_id, user))
     except MappingError as e:
         logger.error("Error group not found", user_id=e.element, group_id=e.value)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
@@ -128,7 +129,7 @@ async def patch_user(
     user_service: Annotated[UserService, Depends(Provide[ApplicationContainer.user_service])],
     user_id: Annotated[str, Path(..., description="User ID")],
     patch_request: Annotated[dict[str, Any], Body(..., description="Raw SCIM-compliant patch request body")],
-) -> UserWithExtensions:
+) -> Response:
     """
     Patch a user using a raw SCIM JSON patch body.
     The request must contain an 'Operations' list, and may optionally contain a 'schemas' field.
@@ -148,7 +149,7 @@ async def patch_user(
             )
 
         updated_user = await user_service.apply_patch_operations(user_id, operations)
-        return updated_user
+        return ScimJSONResponse(updated_user)
     except HTTPException as e:
         # Already a well-formed client or not-found error, just raise it
         raise e
@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import math
+import os
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from univention.scim.server.config import ApplicationSettings
+
+
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+
+def _cgroup_cpu_limit(cpu_max: Path = CGROUP_CPU_MAX) -> int | None:
+    """
+    Read the CPU limit of a container from the cgroup v2 cpu.max file.
+
+    Returns:
+        Number of CPUs the quota allows, rounded up, or None if there is no limit
+    """
+    try:
+        quota, period = cpu_max.read_text().split()[:2]
+    except (OSError, ValueError):
+        return None
+
+    if quota == "max":
+        return None
+
+    try:
+        return max(1, math.ceil(int(quota) / int(period)))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def available_cpus(cpu_max: Path = CGROUP_CPU_MAX) -> int:
+    """
+    Number of CPUs the process can use.
+
+    Respects the CPU affinity of the process and the CPU limit of the container,
+    e.g. the CPU limit of a kubernetes pod.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+    limit = _cgroup_cpu_limit(cpu_max)
+    if limit is not None:
+        cpus = min(cpus, limit)
+
+    return max(1, cpus)
+
+
+def _resolve_implementation(configured: str, preferred: str, fallback: str) -> str:
+    if configured != "auto":
+        return configured
+
+    return preferred if find_spec(preferred) is not None else fallback
+
+
+def uvicorn_options(settings: ApplicationSettings) -> dict[str, Any]:
+    """
+    Build the keyword arguments for uvicorn.run from the application settings.
+    """
+    server = settings.server
+    workers = server.workers or available_cpus()
+
+    options: dict[str, Any] = {
+        "host": settings.listen,
+        "port": settings.port,
+        "workers": workers,
+        "loop": _resolve_implementation(server.loop, "uvloop", "asyncio"),
+        "http": _resolve_implementation(server.http, "httptools", "h11"),
+        "backlog": server.backlog,
+        "timeout_keep_alive": server.timeout_keep_alive,
+        "timeout_graceful_shutdown": server.timeout_graceful_shutdown,
+    }
+
+    if settings.metrics.enabled and workers > 1:
+        # Every worker process has its own metrics and a scrape is answered by any one of them
+        raise ValueError(
+            f"Metrics require a single worker, each of the {workers} workers would only report its own requests, "
+            "set SERVER_WORKERS=1 to enable metrics"
+        )
+
+    if server.limit_max_requests:
+        if workers > 1:
+            options["limit_max_requests"] = server.limit_max_requests
+            options["limit_max_requests_jitter"] = server.limit_max_requests_jitter
+        else:
+            # With a single process uvicorn would stop the whole server instead of restarting a worker
+            logger.warning("Ignoring limit_max_requests, worker recycling requires more than one worker")
+
+    logger.info(
+        "Server run mode",
+        workers=workers,
+        loop=options["loop"],
+        http=options["http"],
+        backlog=server.backlog,
+        timeout_keep_alive=server.timeout_keep_alive,
+        limit_max_requests=options.get("limit_max_requests"),
+    )
+
+    return options
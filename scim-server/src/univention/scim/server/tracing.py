@@ -0,0 +1,182 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import functools
+import inspect
+import sys
+from collections.abc import Awaitable, Callable, Iterator, Mapping, MutableMapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Any, TypeVar, cast
+
+from loguru import logger
+
+from univention.scim.server.config import TracingConfig
+
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover
+    propagate = None  # type: ignore[assignment]
+    trace = None  # type: ignore[assignment]
+
+
+T = TypeVar("T")
+
+# Returned instead of a span while tracing is disabled, so instrumented code only pays for a function call
+_NO_SPAN: AbstractContextManager[Any] = nullcontext()
+
+_tracer: Any = None
+_provider: Any = None
+
+
+def setup_tracing(config: TracingConfig, exporter: Any = None) -> None:
+    """
+    Create the tracer used for all spans of the server, or disable tracing.
+
+    Requires the packages opentelemetry-sdk and, for the otlp exporter, opentelemetry-exporter-otlp-proto-http.
+    They are not dependencies of the server and must be installed to enable tracing.
+    Args:
+        config: Tracing settings
+        exporter: Span exporter to use instead of the configured one, e.g. for tests
+    """
+    global _tracer, _provider
+
+    shutdown_tracing()
+    if not config.enabled:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError as e:
+        raise RuntimeError("Tracing is enabled but the OpenTelemetry SDK is not installed") from e
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": config.service_name}),
+        sampler=ParentBased(TraceIdRatioBased(config.sample_rate)),
+    )
+    if exporter is not None:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    elif config.exporter == "console":
+        # Written synchronously, meant for tests and debugging
+        out = open(config.file, "a") if config.file else sys.stdout  # noqa: SIM115
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter(out=out)))
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=config.endpoint)))
+
+    _provider = provider
+    _tracer = provider.get_tracer("univention.scim.server")
+    logger.info("Tracing enabled", exporter=config.exporter, endpoint=config.endpoint, sample_rate=config.sample_rate)
+
+
+def shutdown_tracing() -> None:
+    """
+    Export the remaining spans and disable tracing.
+    """
+    global _tracer, _provider
+
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+
+
+def span(name: str, attributes: Mapping[str, Any] | None = None) -> AbstractContextManager[Any]:
+    """
+    Start a span as child of the current span.
+    Args:
+        name: Name of the span
+        attributes: Attributes of the span
+    Returns:
+        Context manager returning the span, or None if tracing is disabled
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return cast(AbstractContextManager[Any], _tracer.start_as_current_span(name, attributes=attributes))
+
+
+def client_span(
+    name: str, headers: MutableMapping[str, Any], attributes: Mapping[str, Any] | None = None
+) -> AbstractContextManager[Any]:
+    """
+    Start a span for a request to another service and propagate it in the W3C traceparent header.
+    Args:
+        name: Name of the span
+        headers: Headers of the outgoing request, the trace context is added to them
+        attributes: Attributes of the span
+    Returns:
+        Context manager returning the span, or None if tracing is disabled
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _client_span(name, headers, attributes)
+
+
+@contextmanager
+def _client_span(name: str, headers: MutableMapping[str, Any], attributes: Mapping[str, Any] | None) -> Iterator[Any]:
+    with _tracer.start_as_current_span(name, kind=trace.SpanKind.CLIENT, attributes=attributes) as current:
+        propagate.inject(headers)
+        yield current
+
+
+def server_span(
+    name: str, headers: Mapping[str, str], attributes: Mapping[str, Any] | None = None
+) -> AbstractContextManager[Any]:
+    """
+    Start the span of an incoming request, continuing the trace of the caller if it sent a traceparent header.
+    Args:
+        name: Name of the span, can be changed later when the route is known
+        headers: Headers of the incoming request
+        attributes: Attributes of the span
+    Returns:
+        Context manager returning the span, or None if tracing is disabled
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return cast(
+        AbstractContextManager[Any],
+        _tracer.start_as_current_span(
+            name, context=propagate.extract(headers), kind=trace.SpanKind.SERVER, attributes=attributes
+        ),
+    )
+
+
+def set_error_status(current: Any) -> None:
+    """
+    Mark a span as failed, e.g. the span of a request answered with a 5xx status code.
+    """
+    current.set_status(trace.StatusCode.ERROR)
+
+
+def instrument_service(service: T, name: str) -> T:
+    """
+    Run every public coroutine method of a service in a span named after the method.
+
+    Tracing must be set up before the service is created, services created while tracing is
+    disabled are returned unchanged.
+    Args:
+        service: The service to instrument
+        name: Prefix of the span names, e.g. UserService
+    Returns:
+        The same service
+    """
+    if _tracer is None:
+        return service
+
+    for attribute, method in inspect.getmembers(service, inspect.iscoroutinefunction):
+        if not attribute.startswith("_"):
+            setattr(service, attribute, _traced(method, f"{name}.{attribute}"))
+    return service
+
+
+def _traced(method: Callable[..., Awaitable[T]], name: str) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with span(name):
+            return await method(*args, **kwargs)
+
+    return wrapper
@@ -1,9 +1,11 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
+import functools
 import os
 import random
 import socket
 import urllib.parse
+from collections import Counter
 from collections.abc import AsyncGenerator, Callable, Generator
 from contextlib import _GeneratorContextManager, contextmanager, suppress
 from typing import Any, TypeVar
@@ -19,11 +21,12 @@ from scim2_models import Address, Email, Group, GroupMember, Name, Resource, Use
 from univention.admin.rest.client import UDM, UnprocessableEntity
 
 from helpers.allow_all_authn import AllowAllAuthorization, AllowAllBearerAuthentication, OpenIDConnectConfigurationMock
-from helpers.udm_client import MockUdm
+from helpers.udm_client import MockUdm, udm_call_budget
 from univention.scim.server.authn.authn import Authentication
 from univention.scim.server.config import ApplicationSettings
 from univention.scim.server.container import ApplicationContainer
 from univention.scim.server.domain.group_service_impl import GroupServiceImpl
+from univention.scim.server.domain.repo.coalescing import RequestCoalescer
 from univention.scim.server.domain.repo.crud_manager import CrudManager
 from univention.scim.server.domain.repo.udm.crud_udm import CrudUdm
 from univention.scim.server.domain.repo.udm.udm_id_cache import UdmIdCache
@@ -203,8 +206,9 @@ def setup_mocks(
         external_id_mapping="testExternalId",
     )
 
-    user_crud_manager = CrudManager[UserWithExtensions](user_repo, "User")
-    group_crud_manager = CrudManager[GroupWithExtensions](group_repo, "Group")
+    coalescer = RequestCoalescer()
+    user_crud_manager = CrudManager[UserWithExtensions](user_repo, "User", coalescer)
+    group_crud_manager = CrudManager[GroupWithExtensions](group_repo, "Group", coalescer)
 
     # Create service instances
     user_service = UserServiceImpl(user_crud_manager)
@@ -220,6 +224,7 @@ def setup_mocks(
         ApplicationContainer.group_repo.override(group_crud_manager),
         ApplicationContainer.user_service.override(user_service),
         ApplicationContainer.group_service.override(group_service),
+        ApplicationContainer.id_cache.override(udm2scim_mapper.cache),
     ):
         yield
 
@@ -559,6 +564,20 @@ def udm_client(
             print(f"Error checking/deleting user: {e}")
 
 
+@pytest.fixture
+def assert_udm_calls(udm_client: UDM | MockUdm) -> Callable[..., _GeneratorContextManager[Counter[str], None, None]]:
+    """
+    Fail a block which sends more requests to UDM than expected, to catch N+1 patterns, e.g.
+
+        with assert_udm_calls(max=2):
+            client.get(f"{api_prefix}/Groups")
+    """
+    if not isinstance(udm_client, MockUdm):
+        pytest.skip("Requests to UDM are only counted with the mocked UDM")
+
+    return functools.partial(udm_call_budget, udm_client)
+
+
 fake = Faker()
 
 
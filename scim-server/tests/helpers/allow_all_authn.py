@@ -59,7 +59,7 @@ class OpenIDConnectConfigurationMock(OpenIDConnectConfiguration):
     This is a placeholder implementation for development purposes.
     """
 
-    def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
+    async def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
         """
         Get OpenID configuration from cache or from configured idp_openid_configuration_url
 
@@ -71,7 +71,7 @@ class OpenIDConnectConfigurationMock(OpenIDConnectConfiguration):
         """
         return {"authorization_endpoint": "/authorize", "token_endpoint": "/token"}
 
-    def get_jwks(self, force_reload: bool = False) -> JWKSet:
+    async def get_jwks(self, force_reload: bool = False) -> JWKSet:
         """
         Get JWKs from cache or from OpenID configuration key "jwk_uri"
 
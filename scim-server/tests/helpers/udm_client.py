@@ -1,8 +1,10 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
-from collections.abc import Callable
-from typing import Any
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
 from unittest.mock import MagicMock
 
 from scim2_models import GroupMember
@@ -12,6 +14,9 @@ from univention.scim.server.models.types import GroupWithExtensions, UserWithExt
 from univention.scim.transformation import ScimToUdmMapper
 
 
+T = TypeVar("T")
+
+
 class MockUdm:
     def __init__(
         self,
@@ -24,21 +29,19 @@ class MockUdm:
         self.scim2udm_mapper = scim2udm_mapper
         self.users: dict[str, MagicMock] = {}
         self.groups: dict[str, MagicMock] = {}
+        # Requests the real client would send to UDM, by operation
+        self.calls: Counter[str] = Counter()
 
         user_module = MagicMock(spec=Module)
         user_module.name = "users/user"
         user_module.search.side_effect = lambda *args, **kw: self._search(self.users, *args, **kw)
-        user_module.get.side_effect = (
-            lambda user_id, properties: self.users[user_id].open() if user_id in self.users else None
-        )
+        user_module.get.side_effect = lambda user_id, properties: self._get(self.users, user_id)
         user_module.new.side_effect = lambda: self._create_object(self.users, self._get_user_dn, user_module)
 
         group_module = MagicMock(spec=Module)
         group_module.name = "groups/group"
         group_module.search.side_effect = lambda *args, **kw: self._search(self.groups, *args, **kw)
-        group_module.get.side_effect = (
-            lambda group_id, properties: self.groups[group_id].open() if group_id in self.groups else None
-        )
+        group_module.get.side_effect = lambda group_id, properties: self._get(self.groups, group_id)
         group_module.new.side_effect = lambda: self._create_object(self.groups, self._get_group_dn, group_module)
 
         self.modules = {user_module.name: user_module, group_module.name: group_module}
@@ -50,8 +53,10 @@ class MockUdm:
         return f"cn={obj.properties['name']},ou=group,dc=example,dc=test"
 
     def _add_object(self, store: dict[str, MagicMock], obj: MagicMock, get_dn: Callable[[MagicMock], str]) -> None:
+        self.calls["save"] += 1
         obj_shallow = MagicMock(spec=ShallowObject)
-        obj_shallow.open.return_value = obj
+        obj_shallow.open.side_effect = lambda: self._call("open", obj)
+        obj_shallow.object = obj
 
         # Remove control properties
         if "overridePWHistory" in obj.properties:
@@ -68,18 +73,50 @@ class MockUdm:
     ) -> MagicMock:
         obj = MagicMock()
         obj.save.side_effect = lambda: self._add_object(store, obj, get_dn)
-        obj.delete.side_effect = lambda: store.pop(obj.dn)
+        obj.delete.side_effect = lambda: self._call("delete", store.pop(obj.dn))
+        obj.json_patch.side_effect = lambda patch, reload=True: self._json_patch(obj, patch)
         obj.properties = {}
         obj.module = module
 
         return obj
 
+    def _json_patch(self, obj: MagicMock, patch: list[dict[str, Any]]) -> None:
+        self.calls["save"] += 1
+        # Only the operations the SCIM server sends: setting properties and adding or removing list values
+        for operation in patch:
+            _, _, udm_property, *position = operation["path"].split("/")
+            if operation["op"] == "add" and not position:
+                obj.properties[udm_property] = operation["value"]
+            elif operation["op"] == "add" and position == ["-"]:
+                obj.properties.setdefault(udm_property, []).append(operation["value"])
+            elif operation["op"] == "remove" and position:
+                del obj.properties[udm_property][int(position[0])]
+            else:
+                raise NotImplementedError(f"JSON patch operation {operation} is not supported")
+
+    def _call(self, operation: str, result: T) -> T:
+        self.calls[operation] += 1
+        return result
+
+    def _get(self, store: dict[str, MagicMock], dn: str) -> MagicMock | None:
+        return self._call("open", store[dn].object if dn in store else None)
+
     def _search(self, store: dict[str, MagicMock], filter: str | None = None, *args: Any, **kw: Any) -> list[MagicMock]:
+        self.calls["search"] += 1
         if not filter:
-            return list(store.values())
+            results = list(store.values())
+        else:
+            # Values may contain "=" themselves, e.g. users=<dn>
+            key, _, value = filter.partition("=")
+            results = [obj for obj in store.values() if self._matches(obj.object.properties.get(key), value)]
 
-        key, value = filter.split("=")
-        return [obj for obj in store.values() if obj.open().properties[key] == value]
+        # Like the UDM client return the objects instead of shallow objects when opened
+        return [obj.object for obj in results] if kw.get("opened") else results
+
+    @staticmethod
+    def _matches(prop: Any, value: str) -> bool:
+        # Like UDM a filter on a multi value property matches if any of the values matches
+        return value in prop if isinstance(prop, list) else bool(prop == value)
 
     def get(self, module: str) -> MagicMock:
         return self.modules[module]
@@ -121,3 +158,24 @@ class MockUdm:
         user.save()
 
         return user
+
+
+@contextmanager
+def udm_call_budget(udm: MockUdm, max: int, operation: str | None = None) -> Iterator[Counter[str]]:
+    """
+    Fail if the block sends more requests to UDM than expected, e.g. one open per search result.
+
+    Args:
+        udm: The mocked UDM client the code under test uses
+        max: Maximum number of requests
+        operation: Only count requests of this operation (search, open, save, delete)
+    Returns:
+        The requests sent in the block by operation, filled when the block is left
+    """
+    before = udm.calls.copy()
+    calls: Counter[str] = Counter()
+    yield calls
+
+    calls.update(udm.calls - before)
+    count = calls[operation] if operation else calls.total()
+    assert count <= max, f"Expected at most {max} {operation or 'UDM'} requests, got {count}: {dict(calls)}"
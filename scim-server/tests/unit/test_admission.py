@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from univention.scim.server.config import AdmissionConfig
+from univention.scim.server.middlewares.admission import (
+    AdmissionLimiter,
+    AdmissionRejected,
+    add_admission_control_middleware,
+)
+
+
+def limiter(max_limit: int = 2, queue_size: int = 1, queue_timeout: float = 1) -> AdmissionLimiter:
+    return AdmissionLimiter(
+        "test", max_limit, min_limit=1, queue_size=queue_size, queue_timeout=queue_timeout, target_latency=0.5
+    )
+
+
+async def test_limit_and_queue() -> None:
+    admission = limiter()
+    await admission.acquire()
+    await admission.acquire()
+    assert admission.in_flight == 2
+
+    # The third request waits for a slot, the fourth does not fit into the queue
+    waiting = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0)
+    assert admission.queued == 1
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+
+    admission.release(0.1)
+    await waiting
+    assert admission.in_flight == 2
+    assert admission.queued == 0
+
+
+async def test_queue_deadline() -> None:
+    admission = limiter(max_limit=1, queue_timeout=0.01)
+    await admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire()
+    assert rejected.value.status_code == 503
+    assert admission.queued == 0
+
+    admission.release(0.1)
+    assert admission.in_flight == 0
+
+
+async def test_cancelled_waiter() -> None:
+    admission = limiter(max_limit=1)
+    await admission.acquire()
+    waiting = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert admission.queued == 0
+    admission.release(0.1)
+    assert admission.in_flight == 0
+
+
+def test_limit_adapts_to_latency() -> None:
+    admission = limiter(max_limit=10)
+    admission.in_flight = 1
+
+    # Slow requests decrease the limit multiplicatively
+    admission.release(1.0)
+    assert int(admission.limit) == 7
+
+    # Fast requests increase it by one per window up to the maximum
+    for _ in range(100):
+        admission.in_flight = 1
+        admission.release(0.1)
+    assert admission.limit == 10
+
+
+def test_rejected_response() -> None:
+    app = FastAPI()
+    add_admission_control_middleware(
+        app, AdmissionConfig(enabled=True, read_limit=1, write_limit=1, queue_size=0), prefix="/scim/v2"
+    )
+
+    @app.get("/scim/v2/Users")
+    async def users() -> dict[str, str]:
+        # Occupy the only read slot, so the next request is rejected
+        app.state.admission_limiters["read"].in_flight += 1
+        return {}
+
+    client = TestClient(app)
+    assert client.get("/scim/v2/Users").status_code == 200
+
+    response = client.get("/scim/v2/Users")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["schemas"] == ["urn:ietf:params:scim:api:messages:2.0:Error"]
+
+    # Writes have their own limit
+    assert client.post("/scim/v2/Users").status_code == 405
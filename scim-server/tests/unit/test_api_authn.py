@@ -70,7 +70,7 @@ def test_auth_success(
     authenticator_mock: Authentication,
     client: TestClient,
 ) -> None:
-    authenticator_mock.authenticate.returns = {"username": "admin", "roles": ["admin"]}
+    authenticator_mock.authenticate.return_value = {"username": "admin", "roles": ["admin"]}
 
     response = client.get("/scim/v2/Users")
     assert response.status_code == 200, repr(response.__dict__)
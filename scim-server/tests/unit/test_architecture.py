@@ -108,7 +108,12 @@ def test_what_layer_should_not_access(
 @pytest.mark.parametrize(
     ["importer", "imported"],
     itertools.permutations(
-        ["univention.scim.server.authn", "univention.scim.server.authz", "univention.scim.server.domain.repo.udm"],
+        [
+            "univention.scim.server.authn",
+            "univention.scim.server.authz",
+            "univention.scim.server.domain.repo.udm",
+            "univention.scim.server.domain.repo.ldap",
+        ],
         2,
     ),
 )
@@ -141,6 +146,6 @@ def test_business_only_imports_business(evaluable: EvaluableArchitecture) -> Non
         .have_name_matching(r"^univention\.scim\.server\.domain\.(crud_scim|group_*|user_*|repo.crud_*|rules\..*)")
         .should_not()
         .import_modules_that()
-        .have_name_matching(r"^univention\.scim\.server\.(authn|authz|domain\.repo\.udm|model_service|rest)")
+        .have_name_matching(r"^univention\.scim\.server\.(authn|authz|domain\.repo\.(udm|ldap)|model_service|rest)")
     )
     rule.assert_applies(evaluable)
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from collections import Counter
+from collections.abc import Callable
+from contextlib import _GeneratorContextManager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from helpers.udm_client import MockUdm
+
+
+UdmCallBudget = Callable[..., _GeneratorContextManager[Counter[str], None, None]]
+
+
+@pytest.fixture
+def force_mock() -> bool:
+    return True
+
+
+def test_get_user(client: TestClient, udm_client: MockUdm, api_prefix: str, assert_udm_calls: UdmCallBudget) -> None:
+    user = udm_client.add_user()
+
+    with assert_udm_calls(max=2) as calls:
+        response = client.get(f"{api_prefix}/Users/{user.properties['univentionObjectIdentifier']}")
+    assert response.status_code == 200
+    assert calls == {"search": 1, "open": 1}
+
+    with (
+        pytest.raises(AssertionError, match="Expected at most 0 open requests, got 1"),
+        assert_udm_calls(max=0, operation="open"),
+    ):
+        client.get(f"{api_prefix}/Users/{user.properties['univentionObjectIdentifier']}")
+
+
+def test_group_members_are_resolved_once(
+    client: TestClient, udm_client: MockUdm, api_prefix: str, assert_udm_calls: UdmCallBudget
+) -> None:
+    users = [udm_client.add_user() for _ in range(5)]
+    group = udm_client.add_group(users=[user.dn for user in users])
+    group_id = group.properties["univentionObjectIdentifier"]
+
+    with assert_udm_calls(max=2 + len(users)):
+        response = client.get(f"{api_prefix}/Groups/{group_id}")
+    assert len(response.json()["members"]) == len(users)
+
+    # The members are in the id cache now
+    with assert_udm_calls(max=2):
+        response = client.get(f"{api_prefix}/Groups/{group_id}")
+    assert len(response.json()["members"]) == len(users)
+
+    # Members which are not requested are not resolved
+    udm_client.add_user()
+    with assert_udm_calls(max=2):
+        client.get(f"{api_prefix}/Groups", params={"excludedAttributes": "members"})
+
+
+def test_list_users_does_not_open_every_user(
+    client: TestClient, udm_client: MockUdm, api_prefix: str, assert_udm_calls: UdmCallBudget
+) -> None:
+    for _ in range(5):
+        udm_client.add_user()
+
+    with assert_udm_calls(max=0, operation="open"):
+        response = client.get(f"{api_prefix}/Users")
+    assert response.json()["totalResults"] == 5
+
+
+def test_root_page_maps_only_its_resources(
+    client: TestClient, udm_client: MockUdm, api_prefix: str, assert_udm_calls: UdmCallBudget
+) -> None:
+    users = [udm_client.add_user() for _ in range(3)]
+    for user in users:
+        udm_client.add_group(users=[user.dn])
+
+    # The page only contains the first group, so only its member is resolved and the totals need no extra search
+    with assert_udm_calls(max=3) as calls:
+        response = client.get(f"{api_prefix}/", params={"start_index": 4, "count": 1})
+    assert response.json()["totalResults"] == 6
+    assert len(response.json()["Resources"]) == 1
+    assert calls == {"search": 2, "open": 1}
@@ -0,0 +1,182 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import time
+
+import pytest
+import requests
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pytest_httpserver.httpserver import HTTPServer
+
+from univention.scim.server.domain.repo.udm.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerAdapter,
+    CircuitOpenError,
+)
+from univention.scim.server.domain.repo.udm.udm_id_cache import UdmIdCache
+from univention.scim.server.rest.error_handler import generic_exception_handler, scim_exception_handler
+from univention.scim.transformation.id_cache import CacheItem
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        "test", failure_rate_threshold=0.5, slow_call_duration=1, window_size=4, minimum_calls=4, open_duration=10
+    )
+
+
+def fail(circuit_breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        circuit_breaker.before_call()
+        circuit_breaker.record(False, 0.1)
+
+
+def test_opens_on_failure_rate(clock: Clock) -> None:
+    circuit_breaker = breaker()
+    circuit_breaker.before_call()
+    circuit_breaker.record(True, 0.1)
+    circuit_breaker.before_call()
+    circuit_breaker.record(True, 0.1)
+
+    # Two of four calls failed
+    fail(circuit_breaker, 1)
+    assert circuit_breaker.state == CLOSED
+    fail(circuit_breaker, 1)
+    assert circuit_breaker.state == OPEN
+
+    clock.now += 3
+    with pytest.raises(CircuitOpenError) as error:
+        circuit_breaker.before_call()
+    assert error.value.retry_after == 7
+
+
+def test_slow_calls_fail(clock: Clock) -> None:
+    circuit_breaker = breaker()
+    for _ in range(4):
+        circuit_breaker.before_call()
+        circuit_breaker.record(True, 2)
+
+    assert circuit_breaker.state == OPEN
+
+
+def test_half_open_probes(clock: Clock) -> None:
+    circuit_breaker = breaker()
+    fail(circuit_breaker, 4)
+    assert circuit_breaker.state == OPEN
+
+    # A failed probe opens the circuit again
+    clock.now += 10
+    assert circuit_breaker.state == HALF_OPEN
+    fail(circuit_breaker, 1)
+    assert circuit_breaker.state == OPEN
+
+    # Only the configured number of probes is let through
+    clock.now += 10
+    for _ in range(3):
+        circuit_breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+    for _ in range(3):
+        circuit_breaker.record(True, 0.1)
+    assert circuit_breaker.state == CLOSED
+
+
+def test_adapter(httpserver: HTTPServer) -> None:
+    circuit_breaker = breaker()
+    session = requests.Session()
+    session.mount("http://", CircuitBreakerAdapter(circuit_breaker, connect_timeout=1))
+
+    httpserver.expect_request("/ok").respond_with_data("ok")
+    httpserver.expect_request("/error").respond_with_data("error", status=500)
+
+    assert session.get(httpserver.url_for("/ok")).status_code == 200
+    for _ in range(3):
+        assert session.get(httpserver.url_for("/error")).status_code == 500
+    assert circuit_breaker.state == OPEN
+
+    # No request reaches the server while the circuit is open
+    requests_sent = len(httpserver.log)
+    with pytest.raises(CircuitOpenError):
+        session.get(httpserver.url_for("/ok"))
+    assert len(httpserver.log) == requests_sent
+
+
+def test_adapter_connection_error() -> None:
+    circuit_breaker = breaker()
+    session = requests.Session()
+    session.mount("http://", CircuitBreakerAdapter(circuit_breaker, connect_timeout=1))
+
+    for _ in range(4):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            # Nothing listens on port 9 (discard) here
+            session.get("http://127.0.0.1:9/")
+
+    start_time = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        session.get("http://127.0.0.1:9/")
+    assert time.monotonic() - start_time < 0.1
+
+
+def test_service_unavailable_response() -> None:
+    app = FastAPI()
+    app.add_exception_handler(HTTPException, scim_exception_handler)
+    app.add_exception_handler(Exception, generic_exception_handler)
+
+    @app.get("/wrapped")
+    async def wrapped() -> None:
+        # Repositories and routes wrap the error like this
+        try:
+            try:
+                raise CircuitOpenError("UDM", 5)
+            except CircuitOpenError as e:
+                raise ValueError("Error retrieving User") from e
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+
+    @app.get("/unhandled")
+    async def unhandled() -> None:
+        raise CircuitOpenError("UDM", 5)
+
+    client = TestClient(app, raise_server_exceptions=False)
+    for path in ("/wrapped", "/unhandled"):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        assert response.json()["schemas"] == ["urn:ietf:params:scim:api:messages:2.0:Error"]
+
+
+class UnavailableUdm:
+    def get(self, name: str) -> None:
+        raise CircuitOpenError("UDM", 5)
+
+
+def test_id_cache_serves_expired_entries() -> None:
+    # Every entry is expired immediately
+    cache = UdmIdCache(UnavailableUdm(), ttl=-1)
+    cache.users.add(CacheItem("uid=user,dc=test", "b7c1ec4e-6f5a-4d0f-9a1b-2c4e3b8e0a11", "user"))
+
+    item = cache.get_user("uid=user,dc=test")
+    assert item is not None
+    assert item.uuid == "b7c1ec4e-6f5a-4d0f-9a1b-2c4e3b8e0a11"
+
+    with pytest.raises(CircuitOpenError):
+        cache.get_group("cn=group,dc=test")
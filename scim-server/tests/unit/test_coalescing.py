@@ -0,0 +1,167 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+from typing import Any, cast
+
+import pytest
+from scim2_models import User
+
+from univention.scim.server.domain.crud_scim import CrudScim
+from univention.scim.server.domain.repo.coalescing import RequestCoalescer, authorization_context
+from univention.scim.server.domain.repo.crud_manager import CrudManager
+from univention.scim.server.metrics import COALESCED_READS
+from univention.scim.server.request_timing import RequestTiming, current_timing, record_backend_call, timed
+
+
+class SlowRead:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> dict[str, int]:
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        return {"call": call}
+
+
+async def test_concurrent_reads_share_result() -> None:
+    coalescer = RequestCoalescer()
+    read = SlowRead()
+    coalesced = COALESCED_READS.labels().value
+
+    first = asyncio.create_task(coalescer.run(("User", "get", "1"), read))
+    second = asyncio.create_task(coalescer.run(("User", "get", "1"), read))
+    other = asyncio.create_task(coalescer.run(("User", "get", "2"), read))
+    await asyncio.sleep(0)
+    read.release.set()
+
+    assert await first is await second
+    assert await other is not await first
+    assert read.calls == 2
+    assert COALESCED_READS.labels().value == coalesced + 1
+
+    # Finished reads are not cached
+    assert (await coalescer.run(("User", "get", "1"), read))["call"] == 3
+
+
+async def test_authorization_context() -> None:
+    coalescer = RequestCoalescer()
+    read = SlowRead()
+
+    async def read_as(caller: str) -> dict[str, int]:
+        authorization_context.set(caller)
+        return await coalescer.run(("Group", "list", None), read)
+
+    first = asyncio.create_task(read_as("client-a"))
+    second = asyncio.create_task(read_as("client-b"))
+    await asyncio.sleep(0)
+    read.release.set()
+
+    assert await first != await second
+    assert read.calls == 2
+
+
+async def test_invalidate() -> None:
+    coalescer = RequestCoalescer()
+    read = SlowRead()
+
+    before_write = asyncio.create_task(coalescer.run(("User", "count", None), read))
+    await asyncio.sleep(0)
+    coalescer.invalidate()
+    after_write = asyncio.create_task(coalescer.run(("User", "count", None), read))
+    await asyncio.sleep(0)
+    read.release.set()
+
+    assert await before_write != await after_write
+    assert read.calls == 2
+
+
+async def test_cancel_and_error() -> None:
+    coalescer = RequestCoalescer()
+    read = SlowRead()
+
+    first = asyncio.create_task(coalescer.run(("User", "get", "1"), read))
+    second = asyncio.create_task(coalescer.run(("User", "get", "1"), read))
+    await asyncio.sleep(0)
+
+    # A caller giving up does not cancel the read of the other
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    read.release.set()
+    assert await second == {"call": 1}
+
+    async def fail() -> None:
+        raise ValueError("not found")
+
+    results = await asyncio.gather(
+        coalescer.run(("User", "get", "2"), fail), coalescer.run(("User", "get", "2"), fail), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not coalescer._in_flight
+
+
+async def test_timing_of_shared_read() -> None:
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def read() -> None:
+        with timed("udm"):
+            record_backend_call("udm get")
+            await release.wait()
+
+    async def read_in_request(timing: RequestTiming) -> None:
+        current_timing.set(timing)
+        await coalescer.run(("User", "get", "1"), read)
+
+    # Joined reads report the time and calls of the shared read, not only the first caller
+    timings = [RequestTiming() for _ in range(3)]
+    tasks = [asyncio.create_task(read_in_request(timing)) for timing in timings]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    for timing in timings:
+        assert timing.counts == {"udm": 1}
+        assert timing.backend_calls == {"udm get": 1}
+        assert timing.durations["udm"] > 0
+
+
+class CountingRepository:
+    def __init__(self) -> None:
+        self.reads = 0
+
+    async def get(self, resource_id: str) -> User[Any]:
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return User(id=resource_id, user_name="user")
+
+    async def update(self, resource_id: str, resource: User[Any]) -> User[Any]:
+        return resource
+
+    async def list(self, *args: Any) -> tuple[int, list[User[Any]]]:
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return 0, []
+
+
+async def test_crud_manager() -> None:
+    repository = CountingRepository()
+    manager = CrudManager[User[Any]](cast(CrudScim[User[Any]], repository), "User")
+
+    users = await asyncio.gather(*(manager.get("1") for _ in range(10)))
+    assert all(user is users[0] for user in users)
+    assert repository.reads == 1
+
+    # Different projections are different reads
+    await asyncio.gather(manager.list('userName eq "x"', attributes=["userName"]), manager.list('userName eq "x"'))
+    assert repository.reads == 3
+
+    # A read after a write does not join a read started before it
+    before_write = asyncio.create_task(manager.get("1"))
+    await asyncio.sleep(0)
+    await manager.update("1", users[0])
+    await asyncio.gather(before_write, manager.get("1"))
+    assert repository.reads == 5
@@ -0,0 +1,266 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import base64
+import uuid
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from ldap3 import MOCK_SYNC, Connection, Server
+from ldap3.core.exceptions import LDAPException
+from scim2_models import EnterpriseUser, Group, User
+
+from univention.scim.server.domain.repo.ldap.crud_ldap import CrudLdap
+from univention.scim.server.domain.repo.ldap.ldap_id_cache import LdapIdCache
+from univention.scim.server.domain.repo.ldap.ldap_pool import LdapConnectionPool
+from univention.scim.server.domain.repo.ldap.ldap_properties import group_property_mapping, user_property_mapping
+from univention.scim.server.models.extensions.univention_group import UniventionGroup
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation import ScimToUdmMapper, UdmToScimMapper
+
+
+BASE_DN = "dc=example,dc=test"
+BASE_URL = "https://scim.unit.test/scim/v2"
+
+
+class LdapDirectory:
+    """
+    In-process LDAP server, all connections of the pool share its entries.
+    """
+
+    def __init__(self) -> None:
+        self.server = Server("ldap-mock")
+        self.connection = Connection(self.server, client_strategy=MOCK_SYNC)
+        self.connection.bind()
+
+    def add_user(self, username: str, **attributes: Any) -> dict[str, Any]:
+        entry = {
+            "objectClass": ["person", "univentionObject"],
+            "univentionObjectType": "users/user",
+            "univentionObjectIdentifier": str(uuid.uuid4()),
+            "uid": username,
+            "displayName": f"{username} display",
+            "createTimestamp": "20250101120000Z",
+            "modifyTimestamp": "20250102120000Z",
+            **attributes,
+        }
+        self.connection.strategy.add_entry(f"uid={username},cn=users,{BASE_DN}", dict(entry))
+        return entry
+
+    def add_group(self, name: str, members: list[str], **attributes: Any) -> dict[str, Any]:
+        entry = {
+            "objectClass": ["univentionGroup", "univentionObject"],
+            "univentionObjectType": "groups/group",
+            "univentionObjectIdentifier": str(uuid.uuid4()),
+            "cn": name,
+            "uniqueMember": members,
+            **attributes,
+        }
+        self.connection.strategy.add_entry(f"cn={name},cn=groups,{BASE_DN}", dict(entry))
+        return entry
+
+
+@pytest.fixture
+def directory() -> LdapDirectory:
+    return LdapDirectory()
+
+
+@pytest.fixture
+def pool(directory: LdapDirectory) -> LdapConnectionPool:
+    return LdapConnectionPool(directory.server, size=2, client_strategy=MOCK_SYNC)
+
+
+@pytest.fixture
+def write_repository() -> AsyncMock:
+    return AsyncMock()
+
+
+@pytest.fixture
+def user_repo(pool: LdapConnectionPool, write_repository: AsyncMock) -> CrudLdap[UserWithExtensions]:
+    return CrudLdap[UserWithExtensions](
+        resource_type="User",
+        scim2udm_mapper=ScimToUdmMapper(external_id_user_mapping="testExternalId"),
+        udm2scim_mapper=UdmToScimMapper(
+            user_type=UserWithExtensions, group_type=GroupWithExtensions, external_id_user_mapping="testExternalId"
+        ),
+        resource_class=User,
+        pool=pool,
+        base_dn=BASE_DN,
+        property_mapping=user_property_mapping({"testExternalId": "univentionFreeAttribute3"}),
+        write_repository=write_repository,
+        base_url=BASE_URL,
+        page_size=2,
+    )
+
+
+@pytest.fixture
+def group_repo(pool: LdapConnectionPool) -> CrudLdap[GroupWithExtensions]:
+    cache = LdapIdCache(pool, BASE_DN, 120)
+    return CrudLdap[GroupWithExtensions](
+        resource_type="Group",
+        scim2udm_mapper=ScimToUdmMapper(cache=cache),
+        udm2scim_mapper=UdmToScimMapper(cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions),
+        resource_class=Group,
+        pool=pool,
+        base_dn=BASE_DN,
+        property_mapping=group_property_mapping(),
+        write_repository=AsyncMock(),
+        base_url=BASE_URL,
+    )
+
+
+async def test_get_user(directory: LdapDirectory, user_repo: CrudLdap[UserWithExtensions]) -> None:
+    entry = directory.add_user(
+        "jdoe",
+        givenName="Jane",
+        sn="Doe",
+        mailPrimaryAddress="jdoe@example.test",
+        mailAlternativeAddress=["jane@example.test", "doe@example.test"],
+        telephoneNumber=["1234"],
+        homePostalAddress="Home Street 1$12345$Home City",
+        employeeNumber="42",
+        univentionFreeAttribute3="external",
+        sambaAcctFlags="[UD         ]",
+        **{"userCertificate;binary": b"\x30\x82"},
+    )
+
+    user = await user_repo.get(entry["univentionObjectIdentifier"])
+
+    assert user.id == entry["univentionObjectIdentifier"]
+    assert user.external_id == "external"
+    assert user.user_name == "jdoe"
+    assert user.display_name == "jdoe display"
+    assert user.name.formatted == "Jane Doe"
+    assert user.active is False
+    assert [email.value for email in user.emails] == ["jdoe@example.test", "jane@example.test", "doe@example.test"]
+    assert [phone.value for phone in user.phone_numbers] == ["1234"]
+    assert user.addresses[0].postal_code == "12345"
+    assert user.addresses[0].locality == "Home City"
+    assert user.x509_certificates[0].value == b"\x30\x82"
+    assert user.meta.created.isoformat() == "2025-01-01T12:00:00+00:00"
+    assert user.meta.location == f"{BASE_URL}/Users/{user.id}"
+    assert user[EnterpriseUser].employee_number == "42"
+
+
+async def test_get_user_not_found(directory: LdapDirectory, user_repo: CrudLdap[UserWithExtensions]) -> None:
+    directory.add_user("jdoe")
+
+    with pytest.raises(ValueError, match="not found"):
+        await user_repo.get(str(uuid.uuid4()))
+
+
+async def test_list_users(directory: LdapDirectory, user_repo: CrudLdap[UserWithExtensions]) -> None:
+    for i in range(5):
+        directory.add_user(f"user{i}")
+    directory.add_user("hidden", univentionObjectFlag="hidden")
+    directory.add_user("invalid", univentionObjectIdentifier=[])
+
+    total, users = await user_repo.list()
+    assert total == 5
+    assert sorted(user.user_name for user in users) == [f"user{i}" for i in range(5)]
+
+    # The total counts all users, not only the ones on the page
+    total, users = await user_repo.list(start_index=2, count=2)
+    assert total == 5
+    assert len(users) == 2
+
+    total, users = await user_repo.list('userName eq "user3"')
+    assert [user.user_name for user in users] == ["user3"]
+
+    total, users = await user_repo.list('userName eq "user*"')
+    assert total == 0
+
+    assert await user_repo.count() == 5
+    assert await user_repo.count('userName eq "user3"') == 1
+
+
+async def test_list_users_filter_not_supported(user_repo: CrudLdap[UserWithExtensions]) -> None:
+    with pytest.raises(ValueError):
+        await user_repo.list("active eq true")
+
+
+async def test_get_group(directory: LdapDirectory, group_repo: CrudLdap[GroupWithExtensions]) -> None:
+    user = directory.add_user("member")
+    nested = directory.add_group("nested", [])
+    group = directory.add_group(
+        "group",
+        [f"uid=member,cn=users,{BASE_DN}", f"cn=nested,cn=groups,{BASE_DN}", f"uid=unknown,cn=users,{BASE_DN}"],
+        description="Test group",
+    )
+
+    scim_group = await group_repo.get(group["univentionObjectIdentifier"])
+
+    assert scim_group.display_name == "group"
+    assert scim_group[UniventionGroup].description == "Test group"
+    assert [(member.type, member.value, member.display) for member in scim_group.members] == [
+        ("User", user["univentionObjectIdentifier"], "member display"),
+        ("Group", nested["univentionObjectIdentifier"], "nested"),
+    ]
+
+    total, groups = await group_repo.list('displayName eq "nested"')
+    assert [group.id for group in groups] == [nested["univentionObjectIdentifier"]]
+
+
+async def test_list_groups_by_member(directory: LdapDirectory, group_repo: CrudLdap[GroupWithExtensions]) -> None:
+    user = directory.add_user("member")
+    nested = directory.add_group("nested", [f"uid=member,cn=users,{BASE_DN}"])
+    group = directory.add_group("group", [f"cn=nested,cn=groups,{BASE_DN}"])
+    directory.add_group("other", [])
+
+    total, groups = await group_repo.list(f'members.value eq "{user["univentionObjectIdentifier"]}"')
+    assert [group.id for group in groups] == [nested["univentionObjectIdentifier"]]
+    assert groups[0].members[0].value == user["univentionObjectIdentifier"]
+
+    total, groups = await group_repo.list(
+        f'members[value eq "{nested["univentionObjectIdentifier"]}"]', attributes=["displayName"]
+    )
+    assert [group.id for group in groups] == [group["univentionObjectIdentifier"]]
+    assert groups[0].members is None
+
+    total, groups = await group_repo.list(f'members.value eq "{uuid.uuid4()}"')
+    assert (total, groups) == (0, [])
+
+
+async def test_writes_are_delegated(user_repo: CrudLdap[UserWithExtensions], write_repository: AsyncMock) -> None:
+    user = UserWithExtensions(user_name="test")
+
+    await user_repo.create(user)
+    await user_repo.update("id", user)
+    await user_repo.delete("id")
+
+    write_repository.create.assert_awaited_once_with(user)
+    write_repository.update.assert_awaited_once_with("id", user)
+    write_repository.delete.assert_awaited_once_with("id")
+
+
+def test_pool_reuses_connections(pool: LdapConnectionPool) -> None:
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+
+    with pool.connection() as connection:
+        assert connection in (first, second)
+
+    pool.timeout = 0.01
+    with pool.connection(), pool.connection(), pytest.raises(TimeoutError), pool.connection():
+        pass
+
+
+def test_pool_discards_broken_connections(pool: LdapConnectionPool) -> None:
+    with pytest.raises(LDAPException), pool.connection() as broken:
+        raise LDAPException("connection lost")
+
+    with pool.connection() as connection:
+        assert connection is not broken
+
+
+def test_certificate_is_base64() -> None:
+    mapping = user_property_mapping()
+
+    obj = mapping.to_object(
+        {"dn": "uid=test", "raw_attributes": {"uid": [b"test"], "userCertificate;binary": [b"\x30\x82"]}}
+    )
+
+    assert obj.properties["userCertificate"] == base64.b64encode(b"\x30\x82").decode()
+    assert obj.properties["mailAlternativeAddress"] == []
+    assert obj.properties["disabled"] is False
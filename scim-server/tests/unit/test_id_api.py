@@ -1,13 +1,17 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import threading
 import urllib.parse
+from typing import Any
 
 import pytest
 from faker import Faker
 from fastapi.testclient import TestClient
 
+from helpers.udm_client import MockUdm
 from tests.conftest import CreateGroupFactory, CreateUserFactory
+from univention.scim.server.domain.repo.udm.udm_id_cache import UdmIdCache
 
 
 class TestIdAPI:
@@ -177,3 +181,64 @@ class TestIdAPI:
         assert len(data["Resources"]) == 1
         assert data["Resources"][0]["id"] == test_group.id
         assert data["Resources"][0]["meta"]["resourceType"] == "Group"
+
+
+class TestIdLookup:
+    """Tests for the backend requests of the global UUID endpoints."""
+
+    @pytest.fixture
+    def force_mock(self) -> bool:
+        return True
+
+    def test_get_cached_group(self, client: TestClient, udm_client: MockUdm, cache: UdmIdCache) -> None:
+        group = udm_client.add_group()
+        group_id = group.properties["univentionObjectIdentifier"]
+        assert cache.cached_type(group_id) is None
+        cache.get_group(group_id)
+        assert cache.cached_type(group_id) == "Group"
+
+        response = client.get(f"/scim/v2/{group_id}")
+        assert response.status_code == 200
+        assert response.json()["id"] == group_id
+
+        # The id cache knows it is a group, so no user is searched
+        udm_client.get("users/user").search.assert_not_called()
+
+    def test_get_unknown_type(
+        self, client: TestClient, udm_client: MockUdm, cache: UdmIdCache, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        user = udm_client.add_user()
+        user_id = user.properties["univentionObjectIdentifier"]
+
+        # Both lookups have to wait for each other, so they only finish if they run at the same time
+        lookups = threading.Barrier(2, timeout=5)
+        for name in ("_query_user", "_query_group"):
+            query = getattr(cache, name)
+
+            def concurrent_query(key: str, query: Any = query) -> Any:
+                lookups.wait()
+                return query(key)
+
+            monkeypatch.setattr(cache, name, concurrent_query)
+
+        response = client.get(f"/scim/v2/{user_id}")
+        assert response.status_code == 200
+        assert response.json()["id"] == user_id
+        assert cache.cached_type(user_id) == "User"
+
+    def test_list_pages(self, client: TestClient, udm_client: MockUdm) -> None:
+        users = [udm_client.add_user() for _ in range(3)]
+        groups = [udm_client.add_group() for _ in range(3)]
+
+        ids: list[str] = []
+        for start_index in range(1, 8, 2):
+            response = client.get(f"/scim/v2/?start_index={start_index}&count=2")
+            assert response.status_code == 200
+            assert response.json()["totalResults"] == 6
+            ids.extend(resource["id"] for resource in response.json()["Resources"])
+
+        response = client.get("/scim/v2/")
+        assert response.status_code == 200
+        assert response.json()["totalResults"] == 6
+
+        assert ids == [obj.properties["univentionObjectIdentifier"] for obj in users + groups]
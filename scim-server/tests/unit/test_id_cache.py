@@ -8,7 +8,7 @@ import pytest
 from scim2_models import GroupMember
 
 from helpers.udm_client import MockUdm
-from univention.scim.server.domain.repo.udm.udm_id_cache import CacheItem, UdmIdCache
+from univention.scim.server.domain.repo.udm.udm_id_cache import CacheItem, CacheItemStore, UdmIdCache
 from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
 from univention.scim.transformation import ScimToUdmMapper, UdmToScimMapper
 
@@ -39,7 +39,7 @@ class UdmIdCacheSpy(UdmIdCache):
             "get_group": 0,
         }
 
-    def _get_entry(self, cache: dict[str, CacheItem], key: str) -> CacheItem | None:
+    def _get_entry(self, cache: CacheItemStore, key: str) -> CacheItem | None:
         self.call_count["_get_entry"] += 1
         return super()._get_entry(cache, key)
 
@@ -58,3 +58,9 @@ def test_discovery_with_scim_client(client: TestClient, api_prefix: str) -> None
     client.base_url = client.base_url.copy_with(path=api_prefix)
     scim = SyncSCIMClient(client=client)
     scim.discover()
+
+
+def test_health(client: TestClient) -> None:
+    response = client.get("/health", headers={"Authorization": ""})
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "udm": "closed"}
@@ -0,0 +1,265 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import uuid
+from collections.abc import Callable
+from functools import partial
+
+import pytest
+from fastapi.testclient import TestClient
+from scim2_models import Group, GroupMember, User
+
+from helpers.udm_client import MockUdm
+from univention.scim.server.config import application_settings
+from univention.scim.server.domain.repo.membership import refresh_membership_index
+from univention.scim.server.domain.repo.udm.crud_udm import CrudUdm
+from univention.scim.server.domain.repo.udm.udm_id_cache import UdmIdCache
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation import ScimToUdmMapper, UdmToScimMapper
+from univention.scim.transformation.exceptions import MappingError
+from univention.scim.transformation.id_cache import IdCache
+from univention.scim.transformation.membership_index import MembershipIndex
+
+
+BASE_URL = "https://scim.unit.test/scim/v2"
+
+
+@pytest.fixture
+def udm_client(
+    random_user_factory: Callable[[list[GroupMember]], UserWithExtensions],
+    random_group_factory: Callable[[list[GroupMember]], GroupWithExtensions],
+    mappers_no_cache: tuple[ScimToUdmMapper, UdmToScimMapper],
+) -> MockUdm:
+    scim2udm_mapper, _ = mappers_no_cache
+    return MockUdm(random_user_factory, random_group_factory, scim2udm_mapper)
+
+
+@pytest.fixture
+def force_mock() -> bool:
+    return True
+
+
+@pytest.fixture
+def index() -> MembershipIndex:
+    return MembershipIndex()
+
+
+@pytest.fixture
+def udm2scim_mapper(cache: UdmIdCache, index: MembershipIndex) -> UdmToScimMapper:
+    return UdmToScimMapper[UserWithExtensions, GroupWithExtensions](
+        cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions, membership_index=index
+    )
+
+
+def repository(
+    resource_class: type[User | Group], udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper
+) -> CrudUdm[UserWithExtensions] | CrudUdm[GroupWithExtensions]:
+    return CrudUdm(
+        resource_type=resource_class.__name__,
+        scim2udm_mapper=ScimToUdmMapper(cache=udm2scim_mapper.cache),
+        udm2scim_mapper=udm2scim_mapper,
+        resource_class=resource_class,
+        udm_client=udm_client,
+        base_url=BASE_URL,
+    )
+
+
+async def test_user_groups(udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper, index: MembershipIndex) -> None:
+    user = udm_client.add_user()
+    group = udm_client.add_group(users=[user.dn])
+    parent = udm_client.add_raw_group(
+        {"univentionObjectIdentifier": "parent-id", "name": "parent", "nestedGroup": [group.dn]}
+    )
+    users = repository(User, udm_client, udm2scim_mapper)
+
+    # Users have no groups until all groups are loaded
+    scim_user = await users.get(user.properties["univentionObjectIdentifier"])
+    assert scim_user.groups is None
+
+    await refresh_membership_index(udm2scim_mapper.cache, index, 0)
+    assert index.complete
+    assert len(index) == 2
+
+    scim_user = await users.get(user.properties["univentionObjectIdentifier"])
+    assert [(group.value, group.type) for group in scim_user.groups] == [
+        (group.properties["univentionObjectIdentifier"], "direct"),
+        (parent.properties["univentionObjectIdentifier"], "indirect"),
+    ]
+
+
+async def test_group_writes_update_index(
+    udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper, index: MembershipIndex
+) -> None:
+    user = udm_client.add_user()
+    await refresh_membership_index(udm2scim_mapper.cache, index, 0)
+    user_id = user.properties["univentionObjectIdentifier"]
+    groups = repository(Group, udm_client, udm2scim_mapper)
+
+    group = await groups.create(
+        GroupWithExtensions(
+            id=str(uuid.uuid4()), display_name="new group", members=[GroupMember(value=user_id, type="User")]
+        )
+    )
+    assert [item.uuid for item, _ in index.get_groups(user.dn)] == [group.id]
+
+    await groups.delete(group.id)
+    assert index.get_groups(user.dn) == []
+
+
+async def test_list_groups_by_member(udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper) -> None:
+    user = udm_client.add_user()
+    group = udm_client.add_group(users=[user.dn])
+    parent = udm_client.add_raw_group(
+        {"univentionObjectIdentifier": "parent-id", "name": "parent", "users": [], "nestedGroup": [group.dn]}
+    )
+    udm_client.add_group()
+    groups = repository(Group, udm_client, udm2scim_mapper)
+
+    total, scim_groups = await groups.list(f'members.value eq "{user.properties["univentionObjectIdentifier"]}"')
+    assert [scim_group.id for scim_group in scim_groups] == [group.properties["univentionObjectIdentifier"]]
+    assert [member.value for member in scim_groups[0].members] == [user.properties["univentionObjectIdentifier"]]
+
+    total, scim_groups = await groups.list(
+        f'members[value eq "{group.properties["univentionObjectIdentifier"]}"]', excluded_attributes=["members"]
+    )
+    assert [scim_group.id for scim_group in scim_groups] == [parent.properties["univentionObjectIdentifier"]]
+    assert scim_groups[0].members is None
+
+    assert await groups.list('members.value eq "unknown"') == (0, [])
+
+
+async def test_update_members(udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper, index: MembershipIndex) -> None:
+    users = [udm_client.add_user() for _ in range(3)]
+    nested = udm_client.add_group()
+    group = udm_client.add_group(users=[users[0].dn, users[1].dn])
+    group_id = group.properties["univentionObjectIdentifier"]
+    await refresh_membership_index(udm2scim_mapper.cache, index, 0)
+    groups = repository(Group, udm_client, udm2scim_mapper)
+    group.save.reset_mock()
+
+    await groups.update_members(
+        group_id,
+        added=[
+            {"value": users[2].properties["univentionObjectIdentifier"]},
+            {"value": users[0].properties["univentionObjectIdentifier"], "type": "User"},
+            # Members without a type are looked up as group if there is no such user
+            {"value": nested.properties["univentionObjectIdentifier"]},
+        ],
+        removed=[{"value": users[1].properties["univentionObjectIdentifier"]}, {"value": str(uuid.uuid4())}],
+    )
+
+    # Only the changes are sent to UDM
+    group.save.assert_not_called()
+    group.json_patch.assert_called_once_with(
+        [
+            {"op": "remove", "path": "/properties/users/1"},
+            {"op": "add", "path": "/properties/users/-", "value": users[2].dn},
+            {"op": "add", "path": "/properties/nestedGroup/-", "value": nested.dn},
+        ],
+        reload=False,
+    )
+    assert group.properties["users"] == [users[0].dn, users[2].dn]
+    assert group.properties["nestedGroup"] == [nested.dn]
+    assert [item.uuid for item, _ in index.get_groups(users[2].dn)] == [group_id]
+    assert index.get_groups(users[1].dn) == []
+
+    with pytest.raises(MappingError):
+        await groups.update_members(group_id, added=[{"value": str(uuid.uuid4()), "type": "User"}], removed=[])
+
+
+async def test_put_group_sends_member_delta(udm_client: MockUdm, udm2scim_mapper: UdmToScimMapper) -> None:
+    users = [udm_client.add_user() for _ in range(3)]
+    group = udm_client.add_group(users=[users[0].dn, users[1].dn])
+    groups = repository(Group, udm_client, udm2scim_mapper)
+    scim_group = await groups.get(group.properties["univentionObjectIdentifier"])
+    group.save.reset_mock()
+
+    scim_group.display_name = "renamed"
+    scim_group.members = [
+        GroupMember(value=users[1].properties["univentionObjectIdentifier"], type="User"),
+        GroupMember(value=users[2].properties["univentionObjectIdentifier"], type="User"),
+    ]
+    updated = await groups.update(scim_group.id, scim_group)
+
+    group.save.assert_not_called()
+    (patch,), _ = group.json_patch.call_args
+    assert patch == [
+        {"op": "add", "path": "/properties/name", "value": "renamed"},
+        {"op": "remove", "path": "/properties/users/0"},
+        {"op": "add", "path": "/properties/users/-", "value": users[2].dn},
+    ]
+    assert updated.display_name == "renamed"
+    assert [member.value for member in updated.members] == [member.value for member in scim_group.members]
+
+    # Nothing is written if nothing changed
+    group.json_patch.reset_mock()
+    await groups.update(scim_group.id, updated)
+    group.json_patch.assert_not_called()
+
+
+def test_patch_group_members(udm_client: MockUdm, client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    user = udm_client.add_user()
+    other = udm_client.add_user()
+    group = udm_client.add_group(users=[other.dn])
+    group_url = f"/scim/v2/Groups/{group.properties['univentionObjectIdentifier']}"
+    user_id = user.properties["univentionObjectIdentifier"]
+    other_id = other.properties["univentionObjectIdentifier"]
+
+    response = client.patch(
+        group_url,
+        json={
+            "Operations": [
+                {"op": "add", "path": "members", "value": [{"value": user_id}]},
+                {"op": "remove", "path": f'members[value eq "{other_id}"]'},
+            ]
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    assert [member["value"] for member in response.json()["members"]] == [user_id]
+    assert [member["value"] for member in client.get(group_url).json()["members"]] == [user_id]
+
+    # Microsoft Entra ID style removal, answered without the group if configured
+    monkeypatch.setattr(application_settings(), "patch_members_no_content", True)
+    response = client.patch(
+        group_url, json={"Operations": [{"op": "Remove", "path": "members", "value": [{"value": user_id}]}]}
+    )
+    assert response.status_code == 204, response.text
+    assert not client.get(group_url).json().get("members")
+
+    response = client.patch(
+        group_url, json={"Operations": [{"op": "add", "path": "members", "value": [{"value": "x"}]}]}
+    )
+    assert response.status_code == 422
+
+    # Other operations still return the group
+    response = client.patch(group_url, json={"Operations": [{"op": "replace", "path": "displayName", "value": "new"}]})
+    assert response.status_code == 200
+    assert response.json()["displayName"] == "new"
+
+
+async def test_refresh_failure_is_logged(
+    udm_client: MockUdm, cache: UdmIdCache, index: MembershipIndex, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail() -> None:
+        raise ConnectionError("UDM not reachable")
+
+    monkeypatch.setattr(cache, "load_groups", fail)
+
+    await refresh_membership_index(cache, index, 0)
+
+    assert not index.complete
+
+
+async def test_refresh_without_load_groups(
+    udm_client: MockUdm, cache: UdmIdCache, index: MembershipIndex, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Caches which can not load all groups use the default of the id cache
+    monkeypatch.setattr(cache, "load_groups", partial(IdCache.load_groups, cache))
+
+    # The refresh stops, also if it should be repeated
+    await asyncio.wait_for(refresh_membership_index(cache, index, 60), timeout=5)
+
+    assert not index.complete
+    assert len(index) == 0
@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import pytest
+from fastapi.testclient import TestClient
+
+from univention.scim.server.config import AdmissionConfig, ApplicationSettings, MetricsConfig
+from univention.scim.server.domain.repo.udm.circuit_breaker import udm_operation
+from univention.scim.server.metrics import Counter, Histogram, Registry
+
+
+@pytest.fixture
+def application_settings(application_settings: ApplicationSettings) -> ApplicationSettings:
+    application_settings.admission = AdmissionConfig(enabled=True)
+    application_settings.metrics = MetricsConfig(enabled=True)
+    return application_settings
+
+
+def test_render() -> None:
+    registry = Registry()
+    requests = Counter("test_requests_total", "Requests", ("method",), registry=registry)
+    duration = Histogram("test_duration_seconds", "Duration", buckets=(0.1, 1), registry=registry)
+
+    requests.labels("GET").inc()
+    requests.labels("GET").inc(2)
+    requests.labels('a"b').inc()
+    duration.observe(0.1)
+    duration.observe(0.5)
+    duration.observe(3)
+
+    assert registry.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{method="GET"} 3.0',
+        'test_requests_total{method="a\\"b"} 1.0',
+        "# HELP test_duration_seconds Duration",
+        "# TYPE test_duration_seconds histogram",
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1.0"} 2',
+        'test_duration_seconds_bucket{le="+Inf"} 3',
+        "test_duration_seconds_sum 3.6",
+        "test_duration_seconds_count 3",
+    ]
+
+    with pytest.raises(ValueError):
+        requests.labels()
+
+
+@pytest.mark.parametrize(
+    ["method", "url", "operation"],
+    [
+        ("GET", "http://udm/univention/udm/users/user/?filter=uid%3Dx&scope=sub", "search"),
+        ("GET", "http://udm/univention/udm/users/user/uid%3Dx%2Cdc%3Dtest", "open"),
+        ("GET", "http://udm/univention/udm/users/user/", "other"),
+        ("GET", "http://udm/univention/udm/users/user/add", "other"),
+        ("POST", "http://udm/univention/udm/users/user/", "save"),
+        ("PUT", "http://udm/univention/udm/users/user/uid%3Dx%2Cdc%3Dtest", "save"),
+        ("DELETE", "http://udm/univention/udm/users/user/uid%3Dx%2Cdc%3Dtest", "delete"),
+    ],
+)
+def test_udm_operation(method: str, url: str, operation: str) -> None:
+    assert udm_operation(method, url) == operation
+
+
+def test_metrics_endpoint(client: TestClient, api_prefix: str) -> None:
+    client.get(f"{api_prefix}/Users")
+    client.get(f"{api_prefix}/Users/does-not-exist")
+    client.get("/does-not-exist")
+
+    response = client.get("/metrics", headers={"Authorization": ""})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = response.text
+    assert f'scim_http_request_duration_seconds_count{{method="GET",route="{api_prefix}/Users",status="200"}}' in text
+    assert f'route="{api_prefix}/Users/{{user_id}}",status="404"' in text
+    assert 'route="unmatched",status="404"' in text
+    assert "does-not-exist" not in text
+    assert 'scim_admission_limit{limiter="read"}' in text
+    assert 'scim_udm_circuit_state{state="closed"} 1.0' in text
+    assert "# TYPE scim_mapping_duration_seconds histogram" in text
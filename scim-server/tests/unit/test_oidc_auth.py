@@ -1,19 +1,22 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import asyncio
 import time
 from collections.abc import Callable, Generator
 from contextlib import _GeneratorContextManager, contextmanager, nullcontext
 from typing import Any
 
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from jwcrypto.jwk import JWK
+from jwcrypto.jwk import JWK, JWKSet
 from jwcrypto.jwt import JWT
 from pytest_httpserver.httpserver import HTTPServer
 
 from univention.scim.server.authn.authn_impl import OpenIDConnectAuthentication
-from univention.scim.server.authn.oidc_configuration_impl import OpenIDConnectConfigurationImpl
+from univention.scim.server.authn.oidc_configuration import OpenIDConnectConfiguration
+from univention.scim.server.authn.oidc_configuration_impl import OpenIDConnectConfigurationImpl, _max_age
 from univention.scim.server.authz.authz_impl import AllowAudience
 from univention.scim.server.config import AuthenticatorConfig
 from univention.scim.server.container import ApplicationContainer
@@ -168,3 +171,185 @@ class TestAuthz(TestAuthBase):
         header = {"alg": jwk.alg}
         jwt = JWT(header=header, claims=claims)
         self.check_response(client, jwk, jwt, 403)
+
+
+class StaticOpenIDConnectConfiguration(OpenIDConnectConfiguration):
+    def __init__(self, jwk: JWK) -> None:
+        self.jwks = JWKSet()
+        self.jwks.add(jwk)
+
+    async def get_configuration(self, force_reload: bool = False) -> dict[str, Any]:
+        return {"id_token_signing_alg_values_supported": ["RS256"]}
+
+    async def get_jwks(self, force_reload: bool = False) -> JWKSet:
+        return self.jwks
+
+
+class TestTokenCache:
+    @pytest.fixture
+    def jwk(self) -> JWK:
+        return JWK.generate(kty="RSA", size=RSA_KEY_SIZE, alg="RS256", use="sig", kid="good")
+
+    def token(self, jwk: JWK, expiry: int = TOKEN_EXPIRY_SECONDS) -> str:
+        claims = {"aud": "scim-access", "azp": "scim-api", "exp": int(time.time()) + expiry}
+        jwt = JWT(header={"alg": jwk.alg, "kid": jwk.kid}, claims=claims)
+        jwt.make_signed_token(jwk)
+        return str(jwt.serialize())
+
+    def count_validations(
+        self, authentication: OpenIDConnectAuthentication, monkeypatch: pytest.MonkeyPatch
+    ) -> list[str]:
+        validated = []
+        validate_token = authentication._validate_token
+
+        async def counting_validate_token(token: str, *args: Any) -> JWT:
+            validated.append(token)
+            return await validate_token(token, *args)
+
+        monkeypatch.setattr(authentication, "_validate_token", counting_validate_token)
+        return validated
+
+    async def test_repeated_token_is_validated_once(self, jwk: JWK, monkeypatch: pytest.MonkeyPatch) -> None:
+        authentication = OpenIDConnectAuthentication(StaticOpenIDConnectConfiguration(jwk), "scim-api")
+        validated = self.count_validations(authentication, monkeypatch)
+        token = self.token(jwk)
+
+        first = await authentication.authenticate(token)
+        assert await authentication.authenticate(token) == first
+        assert validated == [token]
+
+        other_token = self.token(jwk, TOKEN_EXPIRY_SECONDS + 1)
+        await authentication.authenticate(other_token)
+        assert validated == [token, other_token]
+
+    async def test_cache_limits(self, jwk: JWK, monkeypatch: pytest.MonkeyPatch) -> None:
+        authentication = OpenIDConnectAuthentication(
+            StaticOpenIDConnectConfiguration(jwk), "scim-api", token_cache_size=1
+        )
+        validated = self.count_validations(authentication, monkeypatch)
+        tokens = [self.token(jwk, TOKEN_EXPIRY_SECONDS + i) for i in range(2)]
+
+        for token in [*tokens, *tokens]:
+            await authentication.authenticate(token)
+        # Only the most recent token is kept
+        assert validated == [*tokens, *tokens]
+
+        authentication = OpenIDConnectAuthentication(
+            StaticOpenIDConnectConfiguration(jwk), "scim-api", token_cache_ttl=0
+        )
+        validated = self.count_validations(authentication, monkeypatch)
+        await authentication.authenticate(tokens[0])
+        await authentication.authenticate(tokens[0])
+        assert validated == [tokens[0], tokens[0]]
+
+    async def test_cache_expires(self, jwk: JWK, monkeypatch: pytest.MonkeyPatch) -> None:
+        authentication = OpenIDConnectAuthentication(StaticOpenIDConnectConfiguration(jwk), "scim-api")
+        validated = self.count_validations(authentication, monkeypatch)
+        token = self.token(jwk)
+        await authentication.authenticate(token)
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + TOKEN_EXPIRY_SECONDS)
+        # The token is expired, but the signature check accepts a small clock skew
+        await authentication.authenticate(token)
+        assert validated == [token, token]
+
+    async def test_jwks_rotation_clears_cache(self, jwk: JWK, monkeypatch: pytest.MonkeyPatch) -> None:
+        oidc_configuration = StaticOpenIDConnectConfiguration(jwk)
+        authentication = OpenIDConnectAuthentication(oidc_configuration, "scim-api")
+        validated = self.count_validations(authentication, monkeypatch)
+        token = self.token(jwk)
+        await authentication.authenticate(token)
+
+        # A new key set, e.g. after an additional key was published, requires validating the token again
+        oidc_configuration.jwks = JWKSet()
+        oidc_configuration.jwks.add(jwk)
+        await authentication.authenticate(token)
+        assert validated == [token, token]
+
+
+class TestJwksRefresh:
+    @pytest.fixture
+    def jwk(self) -> JWK:
+        return JWK.generate(kty="RSA", size=RSA_KEY_SIZE, alg="RS256", use="sig", kid="good")
+
+    @pytest.fixture
+    def oidc_configuration(self, jwk: JWK, httpserver: HTTPServer) -> OpenIDConnectConfigurationImpl:
+        httpserver.expect_request("/.well-known/openid-configuration").respond_with_json(
+            {
+                "jwks_uri": httpserver.url_for("/oauth2/v3/certs"),
+                "id_token_signing_alg_values_supported": [jwk.alg],
+                "authorization_endpoint": httpserver.url_for("/authorize"),
+                "token_endpoint": httpserver.url_for("/token"),
+            }
+        )
+        httpserver.expect_request("/oauth2/v3/certs").respond_with_json(
+            {"keys": [jwk.export(private_key=False, as_dict=True)]}, headers={"Cache-Control": "public, max-age=120"}
+        )
+        return OpenIDConnectConfigurationImpl(
+            AuthenticatorConfig(
+                idp_openid_configuration_url=httpserver.url_for("/.well-known/openid-configuration"),
+                jwks_min_reload_interval=60,
+            )
+        )
+
+    def jwks_requests(self, httpserver: HTTPServer) -> int:
+        return len([request for request, _ in httpserver.log if request.path == "/oauth2/v3/certs"])
+
+    async def test_reloads_are_shared_and_limited(
+        self, oidc_configuration: OpenIDConnectConfigurationImpl, httpserver: HTTPServer
+    ) -> None:
+        results = await asyncio.gather(*(oidc_configuration.get_jwks(True) for _ in range(5)))
+        assert all(jwks is results[0] for jwks in results)
+        assert self.jwks_requests(httpserver) == 1
+        assert oidc_configuration.jwks_max_age == 120
+
+        # Reloaded recently, no new request
+        assert await oidc_configuration.get_jwks(True) is results[0]
+        assert self.jwks_requests(httpserver) == 1
+
+    async def test_unknown_keys_do_not_flood_idp(
+        self, jwk: JWK, oidc_configuration: OpenIDConnectConfigurationImpl, httpserver: HTTPServer
+    ) -> None:
+        authentication = OpenIDConnectAuthentication(oidc_configuration, "scim-api")
+        await oidc_configuration.get_configuration()
+        await oidc_configuration.get_jwks()
+
+        unknown_key = JWK.generate(kty="RSA", size=RSA_KEY_SIZE, alg="RS256", use="sig", kid="unknown")
+        claims = {"aud": "scim-access", "azp": "scim-api", "exp": int(time.time()) + TOKEN_EXPIRY_SECONDS}
+        jwt = JWT(header={"alg": unknown_key.alg, "kid": unknown_key.kid}, claims=claims)
+        jwt.make_signed_token(unknown_key)
+
+        for _ in range(5):
+            with pytest.raises(HTTPException):
+                await authentication.authenticate(jwt.serialize())
+
+        assert self.jwks_requests(httpserver) == 1
+
+    async def test_refresh_in_background(
+        self, oidc_configuration: OpenIDConnectConfigurationImpl, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        delays = []
+
+        async def sleep(delay: float) -> None:
+            delays.append(delay)
+            if len(delays) == 2:
+                raise asyncio.CancelledError()
+            oidc_configuration.config.jwks_min_reload_interval = 0
+
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+
+        with pytest.raises(asyncio.CancelledError):
+            await oidc_configuration.refresh_jwks()
+
+        # The IdP allows caching the keys for 120 seconds
+        assert delays == [120, 120]
+        assert oidc_configuration.jwks is not None
+
+
+def test_max_age() -> None:
+    assert _max_age(None) is None
+    assert _max_age("public") is None
+    assert _max_age("public, max-age=300, must-revalidate") == 300
+    assert _max_age("s-maxage=10, max-age=20") == 20
+    assert _max_age("no-store") == 0
@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import pstats
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from helpers.udm_client import MockUdm
+from univention.scim.server.config import ApplicationSettings, ProfilingConfig
+from univention.scim.server.middlewares.profiling import add_profiling_middleware
+
+
+@pytest.fixture
+def force_mock() -> bool:
+    return True
+
+
+@pytest.fixture
+def application_settings(application_settings: ApplicationSettings) -> ApplicationSettings:
+    application_settings.profiling = ProfilingConfig(enabled=True, token="let-me-profile")
+    return application_settings
+
+
+def test_download_profile(client: TestClient, udm_client: MockUdm, api_prefix: str, tmp_path: Path) -> None:
+    udm_client.add_user()
+
+    response = client.get(f"{api_prefix}/Users", headers={"X-SCIM-Profile": "wrong"})
+    assert response.json()["totalResults"] == 1
+
+    response = client.get(f"{api_prefix}/Users", headers={"X-SCIM-Profile": "let-me-profile"})
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["X-SCIM-Profile-Status"] == "200"
+    assert response.headers["content-disposition"].endswith('.prof"')
+
+    profile = tmp_path / "users.prof"
+    profile.write_bytes(response.content)
+    functions = {function for _, _, function in pstats.Stats(str(profile)).stats}  # type: ignore[attr-defined]
+    assert "map_users" in functions
+
+
+def test_sampled_profiles(tmp_path: Path) -> None:
+    app = FastAPI()
+    add_profiling_middleware(app, ProfilingConfig(enabled=True, sample_rate=1, directory=str(tmp_path)))
+
+    @app.get("/")
+    async def root() -> dict[str, str]:
+        return {"status": "ok"}
+
+    client = TestClient(app)
+    assert client.get("/").json() == {"status": "ok"}
+    assert client.get("/").json() == {"status": "ok"}
+
+    profiles = list(tmp_path.glob("*-GET-*.prof"))
+    assert len(profiles) == 2
+    assert any(function == "root" for _, _, function in pstats.Stats(str(profiles[0])).stats)  # type: ignore[attr-defined]
@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from univention.scim.server.config import ApplicationSettings, MetricsConfig
+from univention.scim.server.middlewares.timing import add_timing_middleware
+from univention.scim.server.request_timing import (
+    RequestTiming,
+    current_timing,
+    record_backend_call,
+    record_duration,
+    timed,
+)
+
+
+@pytest.fixture
+def application_settings(application_settings: ApplicationSettings) -> ApplicationSettings:
+    application_settings.metrics = MetricsConfig(server_timing=True)
+    return application_settings
+
+
+def test_header() -> None:
+    timing = RequestTiming()
+    timing.add("udm", 0.01)
+    timing.add("udm", 0.0025)
+    timing.add("mapping", 0.001)
+
+    assert timing.header(0.02) == 'udm;dur=12.50;desc="2 calls", mapping;dur=1.00;desc="1 calls", total;dur=20.00'
+    assert timing.milliseconds() == {"udm": 12.5, "mapping": 1.0}
+
+
+async def test_worker_threads_record_into_request() -> None:
+    # Outside of a request nothing is recorded
+    record_duration("udm", 1)
+
+    timing = RequestTiming()
+    current_timing.set(timing)
+
+    def blocking_call() -> None:
+        with timed("udm"):
+            pass
+
+    await asyncio.gather(*(asyncio.to_thread(blocking_call) for _ in range(5)))
+    assert timing.counts == {"udm": 5}
+
+
+def test_server_timing_header(client: TestClient, api_prefix: str) -> None:
+    response = client.get(f"{api_prefix}/Users")
+    assert response.status_code == 200
+
+    metrics = dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["Server-Timing"]))
+    assert {"auth", "mapping", "serialize", "total"} <= metrics.keys()
+    assert all(float(metrics[name]) <= float(metrics["total"]) for name in ("auth", "mapping", "serialize"))
+
+
+def test_no_server_timing_header_by_default() -> None:
+    assert MetricsConfig().server_timing is False
+
+    app = FastAPI()
+    add_timing_middleware(app)
+
+    @app.get("/")
+    async def root() -> None:
+        record_duration("udm", 0.01)
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+
+def test_backend_call_budget(caplog: pytest.LogCaptureFixture) -> None:
+    app = FastAPI()
+    add_timing_middleware(app, backend_call_budget=2)
+
+    @app.get("/calls/{count}")
+    async def calls(count: int) -> None:
+        for _ in range(count):
+            record_backend_call("udm open")
+
+    client = TestClient(app)
+    client.get("/calls/2")
+    assert "Request exceeded backend call budget" not in caplog.text
+
+    client.get("/calls/3")
+    assert "Request exceeded backend call budget" in caplog.text
@@ -104,3 +104,18 @@ class TestResourceTypesEndpoint:
         assert isinstance(univention_ext, dict)
         assert univention_ext.get("schema") == "urn:ietf:params:scim:schemas:extension:Univention:1.0:Group"
         assert univention_ext.get("required") is False
+
+    def test_get_resource_types_etag(self, client: TestClient) -> None:
+        """Test that resource types support conditional requests."""
+        response = client.get("/scim/v2/ResourceTypes/User")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get("/scim/v2/ResourceTypes/User", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+
+    def test_get_resource_type_not_found(self, client: TestClient) -> None:
+        """Test retrieving an unknown resource type."""
+        response = client.get("/scim/v2/ResourceTypes/Unknown")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Resource type 'Unknown' not found"
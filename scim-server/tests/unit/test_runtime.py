@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from pathlib import Path
+
+import pytest
+
+from univention.scim.server.config import ApplicationSettings, MetricsConfig, ServerConfig
+from univention.scim.server.runtime import _cgroup_cpu_limit, available_cpus, uvicorn_options
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        ("max 100000\n", None),
+        ("400000 100000\n", 4),
+        ("150000 100000\n", 2),
+        ("50000 100000\n", 1),
+        ("invalid\n", None),
+    ],
+)
+def test_cgroup_cpu_limit(tmp_path: Path, content: str, expected: int | None) -> None:
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text(content)
+
+    assert _cgroup_cpu_limit(cpu_max) == expected
+
+
+def test_cgroup_cpu_limit_missing(tmp_path: Path) -> None:
+    assert _cgroup_cpu_limit(tmp_path / "cpu.max") is None
+
+
+def test_available_cpus_respects_cgroup_limit(tmp_path: Path) -> None:
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("100000 100000\n")
+
+    assert available_cpus(cpu_max) == 1
+
+
+def test_uvicorn_options(application_settings: ApplicationSettings) -> None:
+    application_settings.server = ServerConfig(workers=4, loop="asyncio", http="h11", limit_max_requests=1000)
+
+    options = uvicorn_options(application_settings)
+
+    assert options["host"] == application_settings.listen
+    assert options["port"] == application_settings.port
+    assert options["workers"] == 4
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+    assert options["backlog"] == 2048
+    assert options["timeout_keep_alive"] == 5
+    assert options["limit_max_requests"] == 1000
+
+
+def test_uvicorn_options_no_recycling_with_single_worker(application_settings: ApplicationSettings) -> None:
+    application_settings.server = ServerConfig(workers=1, limit_max_requests=1000)
+
+    options = uvicorn_options(application_settings)
+
+    assert options["workers"] == 1
+    assert "limit_max_requests" not in options
+
+
+def test_uvicorn_options_metrics_require_single_worker(application_settings: ApplicationSettings) -> None:
+    application_settings.metrics = MetricsConfig(enabled=True)
+    application_settings.server = ServerConfig(workers=4)
+
+    with pytest.raises(ValueError, match="SERVER_WORKERS=1"):
+        uvicorn_options(application_settings)
+
+    application_settings.server = ServerConfig(workers=1)
+    assert uvicorn_options(application_settings)["workers"] == 1
+
+
+def test_server_config_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SERVER_WORKERS", "3")
+    monkeypatch.setenv("SERVER_LIMIT_MAX_REQUESTS", "5000")
+    monkeypatch.setenv("SERVER_TIMEOUT_KEEP_ALIVE", "30")
+
+    settings = ApplicationSettings()
+
+    assert settings.server.workers == 3
+    assert settings.server.limit_max_requests == 5000
+    assert settings.server.timeout_keep_alive == 30
@@ -120,3 +120,35 @@ class TestSchemasEndpoint:
         user_attributes = {attr["name"] for attr in user_schema["attributes"]}
         assert "userName" in user_attributes, "userName attribute missing from User schema"
         assert "displayName" in user_attributes, "displayName attribute missing from User schema"
+
+    def test_get_schema_by_id_not_found(self, client: TestClient) -> None:
+        """Test retrieving an unknown SCIM schema."""
+        response = client.get("/scim/v2/Schemas/urn:unknown")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Schema 'urn:unknown' not found"
+
+    def test_get_schemas_etag(self, client: TestClient) -> None:
+        """Test that schemas are served with a strong ETag and support conditional requests."""
+        response = client.get("/scim/v2/Schemas")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('"')
+        assert response.headers["content-type"] == "application/scim+json; charset=utf-8"
+
+        # The documents are built only once, so the ETag is stable
+        response = client.get("/scim/v2/Schemas")
+        assert response.headers["ETag"] == etag
+
+        response = client.get("/scim/v2/Schemas", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+        response = client.get("/scim/v2/Schemas", headers={"If-None-Match": '"other"'})
+        assert response.status_code == 200
+
+        response = client.get(
+            "/scim/v2/Schemas/urn:ietf:params:scim:schemas:core:2.0:User", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
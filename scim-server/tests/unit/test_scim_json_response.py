@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import json
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+from scim2_models import GroupMember, ListResponse
+
+from univention.scim.server.models.types import UserWithExtensions
+from univention.scim.server.rest.response import ScimJSONResponse
+
+
+def test_render_model(random_user_factory: Callable[[list[GroupMember]], UserWithExtensions]) -> None:
+    user = random_user_factory([])
+
+    response = ScimJSONResponse(user)
+
+    assert response.body == user.model_dump_json().encode()
+    data = json.loads(response.body)
+    assert data["userName"] == user.user_name
+    assert data["name"]["givenName"] == user.name.given_name
+    # exclude none semantics
+    assert "nickName" not in data
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_render_list_response(random_user_factory: Callable[[list[GroupMember]], UserWithExtensions]) -> None:
+    users = [random_user_factory([]) for _ in range(3)]
+    list_response = ListResponse[UserWithExtensions](total_results=3, items_per_page=3, start_index=1, resources=users)
+
+    data = json.loads(ScimJSONResponse(list_response).body)
+
+    assert data["totalResults"] == 3
+    assert [x["userName"] for x in data["Resources"]] == [x.user_name for x in users]
+
+
+def test_render_dict() -> None:
+    response = ScimJSONResponse({"userName": "täst", "emails": [{"value": "test@example.test"}]}, status_code=201)
+
+    assert json.loads(response.body) == {"userName": "täst", "emails": [{"value": "test@example.test"}]}
+    assert response.status_code == 201
+
+
+def test_create_user_response(
+    client: TestClient, random_user_factory: Callable[[list[GroupMember]], UserWithExtensions]
+) -> None:
+    user = random_user_factory([])
+
+    response = client.post("/scim/v2/Users", json=user.model_dump(by_alias=True, exclude_none=True))
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/scim+json; charset=utf-8"
+    assert response.headers["Location"] == f"/Users/{response.json()['id']}"
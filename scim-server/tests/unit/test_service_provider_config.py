@@ -36,3 +36,12 @@ class TestServiceProviderConfig:
         assert scheme["specUri"] == "http://www.rfc-editor.org/info/rfc6750"
         assert scheme["documentationUri"] == "https://docs.univention.de/scim-api/auth/oauth.html"
         assert scheme["primary"] is True
+
+    def test_get_service_provider_config_etag(self, client: TestClient) -> None:
+        """Test that the service provider configuration supports conditional requests."""
+        response = client.get("/scim/v2/ServiceProviderConfig")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get("/scim/v2/ServiceProviderConfig", headers={"If-None-Match": etag})
+        assert response.status_code == 304
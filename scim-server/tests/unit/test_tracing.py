@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_httpserver.httpserver import HTTPServer
+
+from univention.scim.server.config import TracingConfig
+from univention.scim.server.domain.repo.udm.circuit_breaker import CircuitBreaker, CircuitBreakerAdapter
+from univention.scim.server.middlewares.tracing import add_tracing_middleware
+from univention.scim.server.tracing import client_span, instrument_service, setup_tracing, shutdown_tracing, span
+
+
+class Service:
+    async def get_user(self, user_id: str) -> str:
+        with span("inner"):
+            return user_id
+
+
+@pytest.fixture
+def exporter() -> Generator[Any, None, None]:
+    in_memory = pytest.importorskip("opentelemetry.sdk.trace.export.in_memory_span_exporter")
+    exporter = in_memory.InMemorySpanExporter()
+    setup_tracing(TracingConfig(enabled=True), exporter=exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+async def test_disabled() -> None:
+    setup_tracing(TracingConfig(enabled=False))
+
+    service = Service()
+    assert instrument_service(service, "Service") is service
+    assert "get_user" not in vars(service)
+
+    headers: dict[str, str] = {}
+    with span("ignored") as current, client_span("ignored", headers) as client:
+        assert current is None
+        assert client is None
+    assert not headers
+
+
+async def test_instrument_service(exporter: Any) -> None:
+    service = instrument_service(Service(), "UserService")
+    assert await service.get_user("1") == "1"
+
+    inner, outer = exporter.get_finished_spans()
+    assert outer.name == "UserService.get_user"
+    assert inner.name == "inner"
+    assert inner.parent.span_id == outer.context.span_id
+
+
+def test_request_to_udm(exporter: Any, httpserver: HTTPServer) -> None:
+    httpserver.expect_request("/univention/udm/users/user/uid%3Dx").respond_with_data("{}")
+    session = requests.Session()
+    session.mount("http://", CircuitBreakerAdapter(CircuitBreaker("test")))
+
+    app = FastAPI()
+    add_tracing_middleware(app)
+
+    @app.get("/Users/{user_id}")
+    async def get_user(user_id: str) -> None:
+        session.get(httpserver.url_for("/univention/udm/users/user/uid%3Dx"))
+
+    response = TestClient(app).get(
+        "/Users/1", headers={"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+    )
+    assert response.status_code == 200
+
+    udm, route = exporter.get_finished_spans()
+    assert route.name == "GET /Users/{user_id}"
+    assert route.attributes["http.response.status_code"] == 200
+    # The trace of the caller is continued and passed on to UDM
+    assert format(route.context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert udm.name == "UDM open"
+    assert udm.parent.span_id == route.context.span_id
+    traceparent = httpserver.log[0][0].headers["traceparent"]
+    assert traceparent.split("-")[1:3] == ["0af7651916cd43dd8448eb211c80319c", format(udm.context.span_id, "016x")]
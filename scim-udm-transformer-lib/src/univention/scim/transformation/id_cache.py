@@ -1,17 +1,109 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import asyncio
+import sys
 import time
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Iterable, Iterator
 from uuid import UUID
 
 
+_last_timestamp = [0]
+
+# Default number of concurrent backend lookups when resolving many keys asynchronously
+DEFAULT_CONCURRENCY = 10
+
+
+def _timestamp() -> int:
+    """
+    Current time in seconds, items created within the same second share the int object.
+    """
+    now = int(time.time())
+    if now == _last_timestamp[0]:
+        return _last_timestamp[0]
+
+    _last_timestamp[0] = now
+    return now
+
+
+def split_dn(dn: str) -> tuple[str, str]:
+    """
+    Split a DN into its first RDN and the remaining suffix.
+
+    Escaped commas (``\\,``) inside the RDN are respected.
+    args:
+        dn: DN to split
+    returns:
+        Tuple of RDN and suffix, the suffix is empty for single RDN DNs
+    """
+    if "\\" not in dn:
+        rdn, _, suffix = dn.partition(",")
+        return rdn, suffix
+
+    pos = dn.find(",")
+    while pos != -1:
+        backslashes = 0
+        while pos - backslashes > 0 and dn[pos - backslashes - 1] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return dn[:pos], dn[pos + 1 :]
+        pos = dn.find(",", pos + 1)
+
+    return dn, ""
+
+
+def pack_uuid(value: str | UUID) -> bytes | str:
+    """
+    Convert a UUID into its compact 16 byte representation.
+
+    Values which are no UUID in canonical lower case form are returned
+    unchanged so that they can be restored without loss.
+    args:
+        value: UUID or string to convert
+    """
+    if isinstance(value, UUID):
+        return value.bytes
+
+    try:
+        uuid = UUID(value)
+    except ValueError:
+        return value
+
+    return uuid.bytes if str(uuid) == value else value
+
+
+def unpack_uuid(value: bytes | str) -> str:
+    """
+    Convert a value created by pack_uuid back into its string form.
+    args:
+        value: Packed UUID
+    """
+    if isinstance(value, bytes):
+        return str(UUID(bytes=value))
+
+    return value
+
+
 class CacheItem:
     """
     An item in the cache, holding all required information.
+
+    To keep the memory footprint small for large directories the item has no
+    per-instance ``__dict__``, the DN is stored as RDN plus an interned suffix
+    which is shared by all objects in the same container and the UUID is
+    stored as 16 byte value.
     """
 
-    def __init__(self, dn: str, uuid: UUID, display_name: str, univention_object_identifier: str | None = None):
+    __slots__ = ("_rdn", "_suffix", "_uuid", "created", "display_name", "univention_object_identifier")
+
+    def __init__(
+        self,
+        dn: str,
+        uuid: UUID | str | None,
+        display_name: str,
+        univention_object_identifier: str | None = None,
+    ):
         """
         Initialize a CacheItem.
         args:
@@ -19,12 +111,90 @@ class CacheItem:
             uuid: UUID of the object
             display_name: Display name of the object
         """
-        self.dn = dn
-        self.uuid = uuid
+        rdn, suffix = split_dn(dn)
+        self._rdn = rdn
+        self._suffix = sys.intern(suffix)
+        self._uuid = pack_uuid(uuid) if uuid else None
         self.display_name = display_name
-        self.created = int(time.time())
+        self.created = _timestamp()
         self.univention_object_identifier = univention_object_identifier
 
+    @property
+    def dn(self) -> str:
+        return f"{self._rdn},{self._suffix}" if self._suffix else self._rdn
+
+    @property
+    def uuid(self) -> str | None:
+        return unpack_uuid(self._uuid) if self._uuid is not None else None
+
+    def __repr__(self) -> str:
+        return f"CacheItem(dn={self.dn!r}, uuid={self.uuid!r}, display_name={self.display_name!r})"
+
+
+class CacheItemStore:
+    """
+    Compact index of cache items by DN and UUID.
+
+    Items are indexed by their packed UUID and by a two level index of DN
+    suffix and RDN. The index keys are the very same objects stored in the
+    items, so every item is only held once without any additional string copies.
+    """
+
+    def __init__(self) -> None:
+        self._by_uuid: dict[bytes | str, CacheItem] = {}
+        self._by_dn: dict[str, dict[str, CacheItem]] = {}
+
+    def add(self, item: CacheItem) -> None:
+        """
+        Add an item, replacing any item with the same DN or UUID.
+        args:
+            item: Item to add
+        """
+        self._by_dn.setdefault(item._suffix, {})[item._rdn] = item
+        if item._uuid is not None:
+            self._by_uuid[item._uuid] = item
+
+    def get(self, key: str) -> CacheItem | None:
+        """
+        Get an item by DN or UUID
+        args:
+            key: Either the dn or the uuid of a cache item
+        """
+        if "=" not in key:
+            return self._by_uuid.get(pack_uuid(key))
+
+        rdn, suffix = split_dn(key)
+        rdns = self._by_dn.get(suffix)
+        return rdns.get(rdn) if rdns is not None else None
+
+    def remove(self, item: CacheItem) -> None:
+        """
+        Remove an item from all indexes.
+        args:
+            item: Item to remove
+        """
+        rdns = self._by_dn.get(item._suffix)
+        if rdns is not None and rdns.get(item._rdn) is item:
+            del rdns[item._rdn]
+            if not rdns:
+                del self._by_dn[item._suffix]
+        if item._uuid is not None and self._by_uuid.get(item._uuid) is item:
+            del self._by_uuid[item._uuid]
+
+    def clear(self) -> None:
+        self._by_uuid.clear()
+        self._by_dn.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[CacheItem]:
+        for rdns in self._by_dn.values():
+            yield from rdns.values()
+
+    def __len__(self) -> int:
+        return sum(len(rdns) for rdns in self._by_dn.values())
+
 
 class IdCache(ABC):
     """
@@ -52,3 +222,121 @@ class IdCache(ABC):
             key: Either the dn or the uuid of a cache item
         """
         pass
+
+    def cached_type(self, key: str) -> str | None:
+        """
+        Get the SCIM resource type of a cached item without querying the backend
+
+        Used to decide whether a UUID refers to a user or a group before fetching it.
+        args:
+            key: Either the dn or the uuid of a cache item
+        returns:
+            "User" or "Group" if the item is cached, otherwise None
+        """
+        return None
+
+    def get_users(self, keys: Iterable[str]) -> dict[str, CacheItem]:
+        """
+        Get user cache items for many DNs or UUIDs at once
+
+        Used to prefetch all users referenced by a page of objects. Every key is only
+        looked up once, keys which are not found are missing in the result.
+        Implementations may override it to fetch missing items in bulk.
+        args:
+            keys: DNs or uuids of cache items
+        """
+        users = {}
+        for key in dict.fromkeys(keys):
+            user = self.get_user(key)
+            if user is not None:
+                users[key] = user
+
+        return users
+
+    def get_groups(self, keys: Iterable[str]) -> dict[str, CacheItem]:
+        """
+        Get group cache items for many DNs or UUIDs at once
+
+        Used to prefetch all groups referenced by a page of objects. Every key is only
+        looked up once, keys which are not found are missing in the result.
+        Implementations may override it to fetch missing items in bulk.
+        args:
+            keys: DNs or uuids of cache items
+        """
+        groups = {}
+        for key in dict.fromkeys(keys):
+            group = self.get_group(key)
+            if group is not None:
+                groups[key] = group
+
+        return groups
+
+    def load_groups(self) -> list[tuple[CacheItem, list[str]]] | None:
+        """
+        Load all groups into the cache
+
+        Used to warm up the cache and to fill the membership index, so the groups
+        of a user can be mapped without querying the backend. The default implementation
+        loads nothing and returns None, the membership index then stays incomplete and
+        the groups of a user are always read from the backend.
+        returns:
+            Cache item and DNs of the direct user and group members of every group,
+            None if the cache can not load all groups
+        """
+        return None
+
+    async def aget_user(self, key: str) -> CacheItem | None:
+        """
+        Get a user cache item by DN or UUID without blocking the event loop
+
+        The default implementation runs get_user in a worker thread. Implementations
+        doing network I/O should override it to answer cache hits directly.
+        args:
+            key: Either the dn or the uuid of a cache item
+        """
+        return await asyncio.to_thread(self.get_user, key)
+
+    async def aget_group(self, key: str) -> CacheItem | None:
+        """
+        Get a group cache item by DN or UUID without blocking the event loop
+
+        The default implementation runs get_group in a worker thread. Implementations
+        doing network I/O should override it to answer cache hits directly.
+        args:
+            key: Either the dn or the uuid of a cache item
+        """
+        return await asyncio.to_thread(self.get_group, key)
+
+    async def aget_users(self, keys: Iterable[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, CacheItem]:
+        """
+        Async variant of get_users, resolving the keys concurrently
+        args:
+            keys: DNs or uuids of cache items
+            max_concurrency: Maximum number of keys resolved at the same time
+        """
+        return await _gather_items(self.aget_user, keys, max_concurrency)
+
+    async def aget_groups(
+        self, keys: Iterable[str], max_concurrency: int = DEFAULT_CONCURRENCY
+    ) -> dict[str, CacheItem]:
+        """
+        Async variant of get_groups, resolving the keys concurrently
+        args:
+            keys: DNs or uuids of cache items
+            max_concurrency: Maximum number of keys resolved at the same time
+        """
+        return await _gather_items(self.aget_group, keys, max_concurrency)
+
+
+async def _gather_items(
+    get_item: Callable[[str], Awaitable[CacheItem | None]], keys: Iterable[str], max_concurrency: int
+) -> dict[str, CacheItem]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_bounded(key: str) -> CacheItem | None:
+        async with semaphore:
+            return await get_item(key)
+
+    unique_keys = list(dict.fromkeys(keys))
+    items = await asyncio.gather(*(get_bounded(key) for key in unique_keys))
+    return {key: item for key, item in zip(unique_keys, items, strict=True) if item is not None}
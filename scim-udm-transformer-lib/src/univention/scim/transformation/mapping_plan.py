@@ -0,0 +1,231 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from loguru import logger
+from scim2_models import Resource
+
+
+ENTERPRISE_USER_SCHEMA = "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User"
+UNIVENTION_USER_SCHEMA = "urn:ietf:params:scim:schemas:extension:Univention:1.0:User"
+CUSTOMER1_USER_SCHEMA = "urn:ietf:params:scim:schemas:extension:UniventionUser:2.0:User"
+UNIVENTION_GROUP_SCHEMA = "urn:ietf:params:scim:schemas:extension:Univention:1.0:Group"
+
+
+@dataclass(frozen=True)
+class AttributeMapping:
+    """
+    Correspondence between a UDM property and an attribute of a SCIM extension.
+
+    Attributes:
+        udm_property: Name of the UDM property
+        attribute: Name of the attribute on the pydantic extension model
+        to_scim: Converter applied to the UDM value when mapping to SCIM
+        to_udm: Converter applied to the SCIM value when mapping to UDM
+        udm_optional: Do not set the UDM property at all if the converted value is None
+    """
+
+    udm_property: str
+    attribute: str
+    to_scim: Callable[[Any], Any] | None = None
+    to_udm: Callable[[Any], Any] | None = None
+    udm_optional: bool = False
+
+
+@dataclass(frozen=True)
+class AttributeStep:
+    """
+    A compiled AttributeMapping, additionally knowing the SCIM name of the attribute.
+    """
+
+    udm_property: str
+    attribute: str
+    alias: str
+    to_scim: Callable[[Any], Any] | None
+    to_udm: Callable[[Any], Any] | None
+    udm_optional: bool
+
+
+@dataclass(frozen=True)
+class ExtensionPlan:
+    """
+    Steps to map one extension of a resource type.
+
+    Attributes:
+        schema: Schema URN of the extension
+        attribute: Name of the extension attribute on the resource model
+        model: Pydantic model of the extension
+        steps: Steps to map the attributes of the extension
+    """
+
+    schema: str
+    attribute: str
+    model: type[Any]
+    steps: tuple[AttributeStep, ...]
+
+
+@dataclass(frozen=True)
+class ResourcePlan:
+    """
+    Compiled mapping plan of a resource type.
+
+    Attributes:
+        schemas: All schemas of the resource type, including the extension schemas
+        extensions: Plans of all extensions with a known mapping
+    """
+
+    schemas: tuple[str, ...]
+    extensions: tuple[ExtensionPlan, ...]
+
+
+def _or_none(value: Any) -> Any:
+    return value or None
+
+
+def _or_empty_list(value: Any) -> Any:
+    return value or []
+
+
+def _item_value(item: Any, name: str) -> Any:
+    # Items are models when mapping models and dicts when mapping dicts
+    return item.get(name) if isinstance(item, dict) else getattr(item, name)
+
+
+def _guardian_member_roles_to_scim(roles: list[str] | None) -> list[dict[str, str]] | None:
+    if not roles:
+        return None
+
+    return [{"type": "guardian", "value": role} for role in roles]
+
+
+def _guardian_member_roles_to_udm(roles: list[Any] | None) -> list[str] | None:
+    if not roles:
+        return None
+
+    return [_item_value(role, "value") for role in roles if _item_value(role, "type") == "guardian"]
+
+
+EXTENSION_MAPPINGS: dict[str, tuple[AttributeMapping, ...]] = {
+    ENTERPRISE_USER_SCHEMA: (AttributeMapping("employeeNumber", "employee_number", to_udm=_or_none),),
+    UNIVENTION_USER_SCHEMA: (
+        AttributeMapping("description", "description", to_udm=_or_none),
+        AttributeMapping("PasswordRecoveryEmail", "password_recovery_email", to_udm=_or_none),
+    ),
+    CUSTOMER1_USER_SCHEMA: (
+        AttributeMapping("primaryOrgUnit", "primary_org_unit", to_udm=_or_none),
+        AttributeMapping("secondaryOrgUnits", "secondary_org_units", to_udm=_or_empty_list),
+    ),
+    UNIVENTION_GROUP_SCHEMA: (
+        AttributeMapping(
+            "guardianMemberRoles",
+            "member_roles",
+            to_scim=_guardian_member_roles_to_scim,
+            to_udm=_guardian_member_roles_to_udm,
+            udm_optional=True,
+        ),
+        AttributeMapping("description", "description", to_udm=_or_none, udm_optional=True),
+    ),
+}
+
+
+def register_extension_mapping(schema: str, mappings: tuple[AttributeMapping, ...]) -> None:
+    """
+    Register the attribute mappings of an additional SCIM extension.
+
+    Must be called before the first object of a resource type with this extension is mapped.
+
+    Args:
+        schema: Schema URN of the extension
+        mappings: Attribute mappings of the extension
+    """
+    EXTENSION_MAPPINGS[schema] = mappings
+    compile_plan.cache_clear()
+
+
+def _compile_extension(schema: str, attribute: str, model: type[Any]) -> ExtensionPlan:
+    steps = []
+    for mapping in EXTENSION_MAPPINGS[schema]:
+        field = model.model_fields.get(mapping.attribute)
+        if field is None:
+            raise ValueError(f"Extension {model.__name__} has no attribute {mapping.attribute}")
+
+        steps.append(
+            AttributeStep(
+                udm_property=mapping.udm_property,
+                attribute=mapping.attribute,
+                alias=field.serialization_alias or mapping.attribute,
+                to_scim=mapping.to_scim,
+                to_udm=mapping.to_udm,
+                udm_optional=mapping.udm_optional,
+            )
+        )
+
+    return ExtensionPlan(schema=schema, attribute=attribute, model=model, steps=tuple(steps))
+
+
+@cache
+def compile_plan(resource_type: type[Resource[Any]]) -> ResourcePlan:
+    """
+    Compile the mapping plan of a resource type.
+
+    Plans are compiled once per resource type, mapping an object then only runs the plan.
+
+    Args:
+        resource_type: Pydantic model of the resource, e.g. User[EnterpriseUser]
+
+    Returns:
+        Mapping plan of the resource type
+    """
+    extensions = []
+    extension_models = resource_type.get_extension_models()
+    for schema, model in extension_models.items():
+        if schema not in EXTENSION_MAPPINGS:
+            logger.info("Ignoring unknown extension", resource_type=resource_type.__name__, schema=schema)
+            continue
+
+        extensions.append(_compile_extension(schema, model.__name__, model))
+
+    schemas = [*resource_type.model_fields["schemas"].default]
+    schemas.extend(schema for schema in extension_models if schema not in schemas)
+    logger.debug("Compiled mapping plan", resource_type=resource_type.__name__, schemas=schemas)
+
+    return ResourcePlan(schemas=tuple(schemas), extensions=tuple(extensions))
+
+
+def extension_to_scim_dict(plan: ExtensionPlan, props: dict[str, Any]) -> dict[str, Any]:
+    """
+    Map UDM properties to a SCIM extension dict without None values.
+    """
+    extension = {}
+    for step in plan.steps:
+        value = props.get(step.udm_property)
+        if step.to_scim:
+            value = step.to_scim(value)
+        if value is not None:
+            extension[step.alias] = value
+
+    return extension
+
+
+def extension_to_udm(plan: ExtensionPlan, source: dict[str, Any] | None, properties: dict[str, Any]) -> None:
+    """
+    Set UDM properties from a SCIM extension dict.
+
+    Args:
+        plan: Plan of the extension
+        source: SCIM extension dict or None if the resource has no value for the extension
+        properties: UDM properties to update
+    """
+    for step in plan.steps:
+        value = source.get(step.alias) if source is not None else None
+
+        if step.to_udm:
+            value = step.to_udm(value)
+        if value is None and step.udm_optional:
+            continue
+
+        properties[step.udm_property] = value
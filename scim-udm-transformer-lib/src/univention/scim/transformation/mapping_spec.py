@@ -0,0 +1,659 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+"""
+Declarative specification of the mapping between UDM properties and SCIM attributes.
+
+A MappingSpec lists the correspondences of the core attributes of a resource type.
+compile_spec turns it, together with the extension plan of the resource model, into a
+CompiledMapping with specialized forward and reverse mapping functions. The same
+compiled mapping translates SCIM filters to UDM filters and SCIM attribute
+projections to the UDM properties which have to be requested.
+"""
+
+import json
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from scim2_models import Resource
+
+from univention.scim.transformation.mapping_plan import (
+    ExtensionPlan,
+    compile_plan,
+    extension_to_scim_dict,
+    extension_to_udm,
+)
+
+
+Converter = Callable[[Any], Any]
+
+# UDM properties which are always required to map an object, e.g. for the SCIM id and meta
+REQUIRED_PROPERTIES = ("univentionObjectIdentifier", "createTimestamp", "modifyTimestamp")
+
+
+@dataclass(frozen=True)
+class Attribute:
+    """
+    A single valued SCIM attribute stored in one UDM property.
+
+    Attributes:
+        scim: SCIM attribute name
+        udm: UDM property name
+        to_scim: Converter applied to the UDM value
+        to_udm: Converter applied to the SCIM value
+        default: Value used if the UDM object does not have the property
+        returned: False if the attribute is only written to UDM, e.g. the password
+        udm_optional: Do not set the UDM property at all if the converted value is None
+    """
+
+    scim: str
+    udm: str
+    to_scim: Converter | None = None
+    to_udm: Converter | None = None
+    default: Any = None
+    returned: bool = True
+    udm_optional: bool = False
+
+
+@dataclass(frozen=True)
+class TypedValue:
+    """
+    Values of a multi-valued SCIM attribute with a specific type, stored in one UDM property.
+
+    Attributes:
+        type: Value of the SCIM type sub-attribute
+        udm: UDM property name
+        single: The UDM property is single valued, only the first value is stored
+        other: Store all values with a type not mapped explicitly in this UDM property
+    """
+
+    type: str
+    udm: str
+    single: bool = False
+    other: bool = False
+
+
+@dataclass(frozen=True)
+class MultiValued:
+    """
+    A multi-valued SCIM attribute split by its type into several UDM properties.
+
+    Attributes:
+        scim: SCIM attribute name
+        values: UDM property of each type, in the order the values are returned
+        extra: Additional sub-attributes of every returned value, e.g. primary=False
+        empty_list: Set the UDM properties to an empty list instead of None if the SCIM attribute is empty
+    """
+
+    scim: str
+    values: tuple[TypedValue, ...]
+    extra: tuple[tuple[str, Any], ...] = ()
+    empty_list: bool = False
+
+
+@dataclass(frozen=True)
+class Compound:
+    """
+    A SCIM attribute built from several UDM properties by custom functions.
+
+    Attributes:
+        scim: SCIM attribute name
+        udm: All UDM properties the attribute is built from
+        to_scim: Builds the SCIM value from the UDM properties, None if the mapper maps it itself
+        to_udm: Sets the UDM properties from the SCIM value, None if the mapper maps it itself
+        sub_attributes: SCIM sub-attributes stored unchanged in a UDM property, used for filtering
+    """
+
+    scim: str
+    udm: tuple[str, ...]
+    to_scim: Callable[[dict[str, Any]], Any] | None = None
+    to_udm: Callable[[Any, dict[str, Any]], None] | None = None
+    sub_attributes: tuple[tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class MappingSpec:
+    """
+    Mapping of the core attributes of a resource type.
+    """
+
+    attributes: tuple[Attribute | MultiValued | Compound, ...]
+
+
+def without_none(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Drop all attributes without a value, like the SCIM models do when serializing.
+    """
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def format_address(data: dict[str, Any]) -> str:
+    """
+    Format a UDM address as the SCIM formatted sub-attribute.
+    """
+    formatted_address = ""
+    if data.get("street"):
+        formatted_address += data["street"] + "\n"
+    if data.get("city"):
+        formatted_address += data["city"] + " "
+    if data.get("postcode"):
+        formatted_address += data["postcode"] + "\n"
+    if data.get("zipcode"):
+        formatted_address += data["zipcode"] + "\n"
+    if data.get("state"):
+        formatted_address += data["state"] + " "
+    if data.get("country"):
+        formatted_address += data["country"]
+
+    return formatted_address.strip()
+
+
+def _not(value: Any) -> bool:
+    return not value
+
+
+def _active_to_disabled(value: Any) -> bool:
+    return not value if value is not None else False
+
+
+def _or_none(value: Any) -> Any:
+    return value or None
+
+
+def _name_to_scim(props: dict[str, Any]) -> dict[str, Any] | None:
+    firstname = props.get("firstname")
+    lastname = props.get("lastname")
+    if not firstname and not lastname:
+        return None
+
+    formatted = " ".join(name for name in (firstname, lastname) if name)
+    return without_none({"formatted": formatted, "familyName": lastname, "givenName": firstname})
+
+
+def _name_to_udm(name: dict[str, Any] | None, properties: dict[str, Any]) -> None:
+    name = name or {}
+    properties["firstname"] = name.get("givenName")
+    properties["lastname"] = name.get("familyName")
+
+
+def _addresses_to_scim(props: dict[str, Any]) -> list[dict[str, Any]] | None:
+    addresses: list[dict[str, Any]] | None = None
+    address_fields = {
+        "street": props.get("street"),
+        "city": props.get("city"),
+        "postcode": props.get("postcode"),
+        "country": props.get("country"),
+        "state": props.get("state"),
+    }
+
+    if any(address_fields.values()):
+        addresses = [
+            without_none(
+                {
+                    "type": "work",
+                    "formatted": format_address(address_fields),
+                    "streetAddress": address_fields["street"],
+                    "locality": address_fields["city"],
+                    "postalCode": address_fields["postcode"],
+                    "region": address_fields["state"],
+                    "country": address_fields["country"],
+                }
+            )
+        ]
+
+    if props.get("homePostalAddress") is not None:
+        if addresses is None:
+            addresses = []
+
+        for address in props["homePostalAddress"]:
+            addresses.append(
+                without_none(
+                    {
+                        "type": "home",
+                        "formatted": format_address(address),
+                        "streetAddress": address.get("street"),
+                        "locality": address.get("city"),
+                        "postalCode": address.get("zipcode"),
+                    }
+                )
+            )
+
+    return addresses
+
+
+def _addresses_to_udm(addresses: list[dict[str, Any]] | None, properties: dict[str, Any]) -> None:
+    if not addresses:
+        return
+
+    work_address = next((x for x in addresses if x.get("type") == "work"), None)
+    other_addresses = [x for x in addresses if x is not work_address]
+
+    if work_address:
+        properties["street"] = work_address.get("streetAddress")
+        properties["city"] = work_address.get("locality")
+        properties["postcode"] = work_address.get("postalCode")
+        properties["country"] = work_address.get("country")
+        properties["state"] = work_address.get("region")
+    if other_addresses:
+        properties["homePostalAddress"] = [
+            {"street": x.get("streetAddress"), "city": x.get("locality"), "zipcode": x.get("postalCode")}
+            for x in other_addresses
+        ]
+
+
+def _certificates_to_scim(props: dict[str, Any]) -> list[dict[str, Any]] | None:
+    if not props.get("userCertificate"):
+        return None
+
+    # UDM already stores the certificate base64 encoded like SCIM returns it
+    return [without_none({"value": props["userCertificate"], "display": props.get("certificateSubjectCommonName")})]
+
+
+def _certificates_to_udm(certificates: list[dict[str, Any]] | None, properties: dict[str, Any]) -> None:
+    if certificates and len(certificates) == 1:
+        properties["userCertificate"] = certificates[0].get("value")
+        properties["certificateSubjectCommonName"] = certificates[0].get("display")
+
+
+# Attributes of a SCIM Role in the order the Role model dumps them
+ROLE_ATTRIBUTES = ("type", "primary", "display", "value")
+GUARDIAN_ROLES = (
+    TypedValue("guardian-direct", "guardianRoles"),
+    TypedValue("guardian-indirect", "guardianInheritedRoles"),
+)
+
+
+def _roles(roles_property: str | None) -> Compound:
+    def to_scim(props: dict[str, Any]) -> list[dict[str, Any]] | None:
+        roles: list[dict[str, Any]] | None = None
+        for guardian_roles in GUARDIAN_ROLES:
+            if props.get(guardian_roles.udm) is None:
+                continue
+
+            if roles is None:
+                roles = []
+            roles.extend({"value": role, "type": guardian_roles.type} for role in props[guardian_roles.udm])
+
+        if roles_property and props.get(roles_property) is not None:
+            if roles is None:
+                roles = []
+            roles.extend(without_none(role) for role in json.loads(props[roles_property]))
+
+        return roles
+
+    def to_udm(roles: list[dict[str, Any]] | None, properties: dict[str, Any]) -> None:
+        roles = roles or []
+        for guardian_roles in GUARDIAN_ROLES:
+            properties[guardian_roles.udm] = [x.get("value") for x in roles if x.get("type") == guardian_roles.type]
+
+        if roles_property:
+            guardian_types = {guardian_roles.type for guardian_roles in GUARDIAN_ROLES}
+            custom_roles = [
+                {key: x[key] for key in ROLE_ATTRIBUTES if x.get(key) is not None}
+                for x in roles
+                if x.get("type") not in guardian_types
+            ]
+            properties[roles_property] = json.dumps(custom_roles) if roles else None
+
+    udm = tuple(guardian_roles.udm for guardian_roles in GUARDIAN_ROLES)
+    return Compound("roles", (*udm, roles_property) if roles_property else udm, to_scim, to_udm)
+
+
+@cache
+def user_spec(
+    username_property: str | None = None,
+    external_id_property: str | None = None,
+    roles_property: str | None = None,
+) -> MappingSpec:
+    """
+    Mapping of the core attributes of a SCIM User.
+
+    Args:
+        username_property: UDM property mapped to userName, defaults to username
+        external_id_property: UDM property mapped to externalId
+        roles_property: UDM property storing additional roles as JSON
+    """
+    external_id = (
+        (Attribute("externalId", external_id_property, to_udm=_or_none, udm_optional=True),)
+        if external_id_property
+        else ()
+    )
+
+    return MappingSpec(
+        attributes=(
+            Attribute("id", "univentionObjectIdentifier"),
+            *external_id,
+            Attribute("userName", username_property or "username"),
+            Attribute("password", "password", returned=False),
+            Compound(
+                "name",
+                ("firstname", "lastname"),
+                _name_to_scim,
+                _name_to_udm,
+                sub_attributes=(("givenName", "firstname"), ("familyName", "lastname")),
+            ),
+            Attribute("displayName", "displayName"),
+            Attribute("title", "title"),
+            Attribute("userType", "employeeType"),
+            Attribute("preferredLanguage", "preferredLanguage"),
+            Attribute("active", "disabled", to_scim=_not, to_udm=_active_to_disabled, default=False),
+            MultiValued(
+                "emails",
+                (
+                    TypedValue("mailbox", "mailPrimaryAddress", single=True),
+                    TypedValue("alias", "mailAlternativeAddress"),
+                    TypedValue("other", "e-mail", other=True),
+                ),
+                extra=(("primary", False),),
+            ),
+            MultiValued(
+                "phoneNumbers",
+                (
+                    TypedValue("work", "phone"),
+                    TypedValue("mobile", "mobileTelephoneNumber"),
+                    TypedValue("home", "homeTelephoneNumber"),
+                    TypedValue("pager", "pagerTelephoneNumber"),
+                ),
+                empty_list=True,
+            ),
+            Compound(
+                "addresses",
+                ("street", "city", "postcode", "country", "state", "homePostalAddress"),
+                _addresses_to_scim,
+                _addresses_to_udm,
+            ),
+            _roles(roles_property),
+            Compound(
+                "x509Certificates",
+                ("userCertificate", "certificateSubjectCommonName"),
+                _certificates_to_scim,
+                _certificates_to_udm,
+            ),
+        )
+    )
+
+
+@cache
+def group_spec(external_id_property: str | None = None) -> MappingSpec:
+    """
+    Mapping of the core attributes of a SCIM Group.
+
+    Args:
+        external_id_property: UDM property mapped to externalId
+    """
+    external_id = (
+        (Attribute("externalId", external_id_property, to_udm=_or_none, udm_optional=True),)
+        if external_id_property
+        else ()
+    )
+
+    return MappingSpec(
+        attributes=(
+            Attribute("id", "univentionObjectIdentifier"),
+            *external_id,
+            Attribute("displayName", "name", default=""),
+            # Members require the id cache, so the mappers map them themselves
+            Compound("members", ("users", "nestedGroup")),
+        )
+    )
+
+
+def _compile_attribute_to_scim(attribute: Attribute) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim, udm, default, to_scim = attribute.scim, attribute.udm, attribute.default, attribute.to_scim
+
+    if to_scim is None:
+
+        def forward(props: dict[str, Any], resource: dict[str, Any]) -> None:
+            value = props.get(udm, default)
+            if value is not None:
+                resource[scim] = value
+
+    else:
+
+        def forward(props: dict[str, Any], resource: dict[str, Any]) -> None:
+            value = to_scim(props.get(udm, default))
+            if value is not None:
+                resource[scim] = value
+
+    return forward
+
+
+def _compile_attribute_to_udm(attribute: Attribute) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim, udm, to_udm, optional = attribute.scim, attribute.udm, attribute.to_udm, attribute.udm_optional
+
+    def reverse(resource: dict[str, Any], properties: dict[str, Any]) -> None:
+        value = resource.get(scim)
+        if to_udm is not None:
+            value = to_udm(value)
+        if value is None and optional:
+            return
+        properties[udm] = value
+
+    return reverse
+
+
+def _compile_multi_valued_to_scim(attribute: MultiValued) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim, extra = attribute.scim, dict(attribute.extra)
+    values = tuple((typed.udm, typed.type) for typed in attribute.values)
+
+    def forward(props: dict[str, Any], resource: dict[str, Any]) -> None:
+        items: list[dict[str, Any]] | None = None
+        for udm, value_type in values:
+            udm_values = props.get(udm)
+            if udm_values is None:
+                continue
+
+            if isinstance(udm_values, str):
+                udm_values = [udm_values]
+            if items is None:
+                items = []
+            items.extend({"value": value, "type": value_type, **extra} for value in udm_values)
+
+        if items is not None:
+            resource[scim] = items
+
+    return forward
+
+
+def _compile_multi_valued_to_udm(attribute: MultiValued) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim, empty_list = attribute.scim, attribute.empty_list
+    mapped_types = frozenset(typed.type for typed in attribute.values if not typed.other)
+
+    def reverse(resource: dict[str, Any], properties: dict[str, Any]) -> None:
+        items = resource.get(scim)
+        if not items:
+            for typed in attribute.values:
+                properties[typed.udm] = [] if empty_list else None
+            return
+
+        for typed in attribute.values:
+            if typed.other:
+                udm_values = [x.get("value") for x in items if x.get("type") not in mapped_types]
+            else:
+                udm_values = [x.get("value") for x in items if x.get("type") == typed.type]
+            properties[typed.udm] = (udm_values[0] if udm_values else None) if typed.single else udm_values
+
+    return reverse
+
+
+def _compile_compound_to_scim(
+    attribute: Compound, to_scim: Callable[[dict[str, Any]], Any]
+) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim = attribute.scim
+
+    def forward(props: dict[str, Any], resource: dict[str, Any]) -> None:
+        value = to_scim(props)
+        if value is not None:
+            resource[scim] = value
+
+    return forward
+
+
+def _compile_compound_to_udm(
+    attribute: Compound, to_udm: Callable[[Any, dict[str, Any]], None]
+) -> Callable[[dict[str, Any], dict[str, Any]], None]:
+    scim = attribute.scim
+
+    def reverse(resource: dict[str, Any], properties: dict[str, Any]) -> None:
+        to_udm(resource.get(scim), properties)
+
+    return reverse
+
+
+_FILTER_PATTERN = re.compile(r'^\s*(?P<path>[\w:.$-]+)\s+eq\s+(?P<value>"(?:[^"\\]|\\.)*"|\S+)\s*$', re.IGNORECASE)
+
+
+class CompiledMapping:
+    """
+    Mapping functions compiled from a MappingSpec and the extension plan of a resource type.
+    """
+
+    def __init__(self, spec: MappingSpec, extensions: tuple[ExtensionPlan, ...] = ()):
+        self.spec = spec
+        self.extensions = extensions
+
+        forward: list[Callable[[dict[str, Any], dict[str, Any]], None]] = []
+        reverse: list[Callable[[dict[str, Any], dict[str, Any]], None]] = []
+        # Lower case SCIM attribute path -> UDM properties required to return it
+        self._projection: dict[str, tuple[str, ...]] = {}
+        # Lower case SCIM attribute path -> UDM property which can be filtered with eq
+        self._filterable: dict[str, str] = {}
+        self._filter_names: list[str] = []
+
+        for attribute in spec.attributes:
+            if isinstance(attribute, Attribute):
+                if attribute.returned:
+                    forward.append(_compile_attribute_to_scim(attribute))
+                    self._projection[attribute.scim.lower()] = (attribute.udm,)
+                    if attribute.to_scim is None:
+                        self._add_filterable(attribute.scim, attribute.udm)
+                reverse.append(_compile_attribute_to_udm(attribute))
+            elif isinstance(attribute, MultiValued):
+                forward.append(_compile_multi_valued_to_scim(attribute))
+                reverse.append(_compile_multi_valued_to_udm(attribute))
+                self._projection[attribute.scim.lower()] = tuple(typed.udm for typed in attribute.values)
+            else:
+                if attribute.to_scim is not None:
+                    forward.append(_compile_compound_to_scim(attribute, attribute.to_scim))
+                if attribute.to_udm is not None:
+                    reverse.append(_compile_compound_to_udm(attribute, attribute.to_udm))
+                self._projection[attribute.scim.lower()] = attribute.udm
+                for sub_attribute, udm in attribute.sub_attributes:
+                    self._add_filterable(f"{attribute.scim}.{sub_attribute}", udm)
+
+        for extension in extensions:
+            properties = tuple(step.udm_property for step in extension.steps)
+            self._projection[extension.schema.lower()] = properties
+            for step in extension.steps:
+                path = f"{extension.schema}:{step.alias}"
+                self._projection[path.lower()] = (step.udm_property,)
+                if step.to_scim is None:
+                    self._add_filterable(path, step.udm_property)
+
+        self._forward = tuple(forward)
+        self._reverse = tuple(reverse)
+
+    def _add_filterable(self, path: str, udm: str) -> None:
+        self._filterable[path.lower()] = udm
+        self._filter_names.append(path)
+
+    def to_scim(self, props: dict[str, Any]) -> dict[str, Any]:
+        """
+        Map UDM properties to a SCIM resource dict, including the extensions.
+        """
+        resource: dict[str, Any] = {}
+        for forward in self._forward:
+            forward(props, resource)
+
+        for extension in self.extensions:
+            # Like the SCIM models, omit extensions without any value
+            extension_dict = extension_to_scim_dict(extension, props)
+            if extension_dict:
+                resource[extension.schema] = extension_dict
+
+        return resource
+
+    def to_udm(self, resource: dict[str, Any]) -> dict[str, Any]:
+        """
+        Map a SCIM resource dict, including the extensions, to UDM properties.
+        """
+        properties: dict[str, Any] = {}
+        for reverse in self._reverse:
+            reverse(resource, properties)
+
+        for extension in self.extensions:
+            extension_to_udm(extension, resource.get(extension.schema), properties)
+
+        return properties
+
+    def udm_filter(self, scim_filter: str) -> str:
+        """
+        Translate a SCIM filter to a UDM filter.
+
+        Only equality filters on attributes stored unchanged in a UDM property are supported.
+
+        Raises:
+            ValueError: If the filter can not be translated
+        """
+        match = _FILTER_PATTERN.match(scim_filter)
+        udm = self._filterable.get(match["path"].lower()) if match else None
+        if not match or not udm:
+            raise ValueError(
+                "Filter query not supported yet. Filtering is only supported with eq for: "
+                + ", ".join(self._filter_names)
+            )
+
+        value = match["value"]
+        if value.startswith('"'):
+            value = json.loads(value)
+
+        return f"{udm}={value}"
+
+    def udm_properties(
+        self, attributes: list[str] | None = None, excluded_attributes: list[str] | None = None
+    ) -> list[str] | None:
+        """
+        UDM properties required to return the requested SCIM attributes.
+
+        Args:
+            attributes: SCIM attributes to return, all if empty
+            excluded_attributes: SCIM attributes not to return
+
+        Returns:
+            UDM properties to request or None if all properties are required
+        """
+        if not attributes and not excluded_attributes:
+            return None
+
+        if attributes:
+            requested = [attribute.lower() for attribute in attributes]
+        else:
+            excluded = {attribute.lower() for attribute in excluded_attributes or []}
+            requested = [path for path in self._projection if path not in excluded]
+
+        properties = dict.fromkeys(REQUIRED_PROPERTIES)
+        for path in requested:
+            # Sub-attributes like name.givenName require the properties of the whole attribute
+            udm = self._projection.get(path) or self._projection.get(path.rsplit(".", 1)[0])
+            if udm is None:
+                continue
+            properties.update(dict.fromkeys(udm))
+
+        return list(properties)
+
+
+@cache
+def compile_spec(spec: MappingSpec, resource_type: type[Resource[Any]]) -> CompiledMapping:
+    """
+    Compile the mapping of a resource type.
+
+    Mappings are compiled once per spec and resource type.
+
+    Args:
+        spec: Mapping of the core attributes
+        resource_type: Pydantic model of the resource, defines the mapped extensions
+    """
+    return CompiledMapping(spec, compile_plan(resource_type).extensions)
@@ -0,0 +1,213 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from univention.scim.transformation.id_cache import CacheItem
+
+
+_EMPTY: frozenset[str] = frozenset()
+
+
+class MembershipIndex:
+    """
+    Reverse index of group memberships, mapping member DNs to the groups they belong to.
+
+    The index is filled from the groups the mapper sees, e.g. when listing groups, and
+    from a full load of all groups. Only after a full load it knows every group of a
+    member, before that it is not ``complete`` and must not be used to answer requests.
+
+    DNs are compared case-insensitively. Readers never lock: the member sets are
+    immutable and replaced as a whole, so a reader always sees a consistent set.
+
+    Every change increases the generation of the index. While a full load runs, the
+    changes are recorded, so ``replace`` can re-apply the ones made after the load started
+    on top of the loaded groups.
+    """
+
+    def __init__(self) -> None:
+        self._groups: dict[str, CacheItem] = {}
+        self._members: dict[str, frozenset[str]] = {}
+        self._member_of: dict[str, frozenset[str]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._loads = 0
+        self._changes: list[tuple[int, Callable[..., None], tuple[Any, ...]]] = []
+        self.complete = False
+
+    def set_group(self, group: CacheItem, member_dns: Iterable[str]) -> None:
+        """
+        Add or update a group with all of its members.
+        args:
+            group: Cache item of the group
+            member_dns: DNs of all direct user and group members
+        """
+        members = frozenset(dn.lower() for dn in member_dns)
+        with self._lock:
+            self._change(self._set_group, group, members)
+
+    def _set_group(self, group: CacheItem, members: frozenset[str]) -> None:
+        key = group.dn.lower()
+        old_members = self._members.get(key, _EMPTY)
+        self._groups[key] = group
+        self._members[key] = members
+        for dn in old_members - members:
+            self._discard_membership(dn, key)
+        for dn in members - old_members:
+            self._member_of[dn] = self._member_of.get(dn, _EMPTY) | {key}
+
+    def update_members(self, dn: str, added: Iterable[str], removed: Iterable[str]) -> None:
+        """
+        Add and remove some members of a group, groups which are not indexed yet are ignored.
+        args:
+            dn: DN of the group
+            added: DNs of the new members
+            removed: DNs of the removed members
+        """
+        added_keys = frozenset(member.lower() for member in added)
+        removed_keys = frozenset(member.lower() for member in removed) - added_keys
+        with self._lock:
+            self._change(self._update_members, dn.lower(), added_keys, removed_keys)
+
+    def _update_members(self, key: str, added_keys: frozenset[str], removed_keys: frozenset[str]) -> None:
+        old_members = self._members.get(key)
+        if old_members is None:
+            return
+
+        self._members[key] = (old_members | added_keys) - removed_keys
+        for member in removed_keys & old_members:
+            self._discard_membership(member, key)
+        for member in added_keys - old_members:
+            self._member_of[member] = self._member_of.get(member, _EMPTY) | {key}
+
+    def remove_group(self, dn: str) -> None:
+        """
+        Remove a deleted group, both as group and as member of other groups.
+        args:
+            dn: DN of the group
+        """
+        with self._lock:
+            self._change(self._remove_group, dn.lower())
+
+    def _remove_group(self, key: str) -> None:
+        self._groups.pop(key, None)
+        for member in self._members.pop(key, _EMPTY):
+            self._discard_membership(member, key)
+        self._remove_member(key)
+
+    def remove_member(self, dn: str) -> None:
+        """
+        Remove a deleted user from all groups.
+        args:
+            dn: DN of the user
+        """
+        with self._lock:
+            self._change(self._remove_member, dn.lower())
+
+    def begin_load(self) -> int:
+        """
+        Start recording changes for a full load, which has to be ended with ``end_load``.
+        returns:
+            Generation of the index when the load started, to be passed to ``replace``
+        """
+        with self._lock:
+            self._loads += 1
+            return self._generation
+
+    def end_load(self) -> None:
+        """
+        End a full load started with ``begin_load``, also if it failed.
+        """
+        with self._lock:
+            self._loads -= 1
+            if not self._loads:
+                self._changes = []
+
+    def replace(self, groups: Iterable[tuple[CacheItem, Iterable[str]]], since: int | None = None) -> None:
+        """
+        Replace the index with all groups of the directory and mark it complete.
+        args:
+            groups: Cache item and member DNs of every group
+            since: Generation returned by ``begin_load``, changes made after it are re-applied
+        """
+        new_groups: dict[str, CacheItem] = {}
+        new_members: dict[str, frozenset[str]] = {}
+        member_of: dict[str, set[str]] = {}
+        for group, member_dns in groups:
+            key = group.dn.lower()
+            members = frozenset(dn.lower() for dn in member_dns)
+            new_groups[key] = group
+            new_members[key] = members
+            for dn in members:
+                member_of.setdefault(dn, set()).add(key)
+
+        new_member_of = {dn: frozenset(keys) for dn, keys in member_of.items()}
+        with self._lock:
+            self._groups = new_groups
+            self._members = new_members
+            self._member_of = new_member_of
+            self.complete = True
+            # The loaded groups may not contain the changes made while loading
+            if since is not None:
+                for generation, change, args in self._changes:
+                    if generation > since:
+                        change(*args)
+
+    def get_groups(self, dn: str) -> list[tuple[CacheItem, bool]]:
+        """
+        Get all groups of a member, including the groups it belongs to through nested groups.
+        args:
+            dn: DN of the user or group
+        returns:
+            Cache item of every group and whether the membership is direct, direct memberships first
+        """
+        # Keep references, replace() may swap the dicts while iterating
+        groups = self._groups
+        member_of = self._member_of
+
+        direct = member_of.get(dn.lower(), _EMPTY)
+        seen = set(direct)
+        pending = list(direct)
+        indirect = []
+        while pending:
+            for parent in member_of.get(pending.pop(), _EMPTY) - seen:
+                seen.add(parent)
+                pending.append(parent)
+                indirect.append(parent)
+
+        result = [(item, True) for key in direct if (item := groups.get(key)) is not None]
+        result.extend((item, False) for key in indirect if (item := groups.get(key)) is not None)
+        result.sort(key=lambda entry: (not entry[1], entry[0].display_name))
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._groups = {}
+            self._members = {}
+            self._member_of = {}
+            self.complete = False
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def _change(self, change: Callable[..., None], *args: Any) -> None:
+        # Called with the lock held
+        self._generation += 1
+        if self._loads:
+            self._changes.append((self._generation, change, args))
+        change(*args)
+
+    def _discard_membership(self, member: str, group: str) -> None:
+        remaining = self._member_of.get(member, _EMPTY) - {group}
+        if remaining:
+            self._member_of[member] = remaining
+        else:
+            self._member_of.pop(member, None)
+
+    def _remove_member(self, member: str) -> None:
+        for group in self._member_of.pop(member, _EMPTY):
+            members = self._members.get(group)
+            if members is not None:
+                self._members[group] = members - {member}
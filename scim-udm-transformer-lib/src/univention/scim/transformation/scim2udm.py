@@ -3,13 +3,25 @@
 
 import base64
 import json
+import re
+from enum import Enum
 from typing import Any
 
 from loguru import logger
-from scim2_models import EnterpriseUser, Group, User
+from pydantic import BaseModel
+from scim2_models import Group, Resource, User
 
 from univention.scim.transformation.exceptions import MappingError
-from univention.scim.transformation.id_cache import IdCache
+from univention.scim.transformation.id_cache import DEFAULT_CONCURRENCY, CacheItem, IdCache
+from univention.scim.transformation.mapping_spec import CompiledMapping, compile_spec, group_spec, user_spec
+
+
+# members.value eq "<id>" or members[value eq "<id>"]
+_MEMBER_FILTER_PATTERN = re.compile(
+    r'^\s*members(?:\.value\s+eq\s+(?P<value>"(?:[^"\\]|\\.)*"|\S+)'
+    r'|\[\s*value\s+eq\s+(?P<bracket_value>"(?:[^"\\]|\\.)*"|[^\s\]]+)\s*\])\s*$',
+    re.IGNORECASE,
+)
 
 
 class ScimToUdmMapper:
@@ -25,6 +37,9 @@ class ScimToUdmMapper:
         external_id_user_mapping: str | None = None,
         external_id_group_mapping: str | None = None,
         roles_user_mapping: str | None = None,
+        user_type: type[Resource[Any]] = User,
+        group_type: type[Resource[Any]] = Group,
+        username_mapping: str | None = None,
     ):
         """
         Initialize the ScimToUdmMapper.
@@ -33,11 +48,23 @@ class ScimToUdmMapper:
             external_id_user_mapping: UDM property to map to SCIM User externalId
             external_id_group_mapping: UDM property to map to SCIM Group externalId
             roles_user_mapping: UDM property to map to SCIM User roles
+            user_type: Pydantic model of users, defines the extensions mapped by map_user_dict
+            group_type: Pydantic model of groups, defines the extensions mapped by map_group_dict
+            username_mapping: UDM property to map to SCIM User userName (overrides default 'username')
         """
         self.cache = cache
+        self.user_type = user_type
+        self.group_type = group_type
         self.external_id_user_mapping = external_id_user_mapping
         self.external_id_group_mapping = external_id_group_mapping
         self.roles_user_mapping = roles_user_mapping
+        self.username_mapping = username_mapping
+
+        # Compile the mappings up front, so invalid extension mappings fail early
+        self._user_spec = user_spec(username_mapping, external_id_user_mapping, roles_user_mapping)
+        self._group_spec = group_spec(external_id_group_mapping)
+        self._user_mapping = compile_spec(self._user_spec, user_type)
+        self._group_mapping = compile_spec(self._group_spec, group_type)
 
     def map_user(self, user: User) -> dict[str, Any]:
         """
@@ -48,263 +75,332 @@ class ScimToUdmMapper:
             Dictionary of UDM properties and additional UDM object attributes
         """
         logger.debug(f"Mapping SCIM User {user.id} to UDM properties")
-        properties = {
-            "username": user.user_name,
-            "password": user.password,
-            "disabled": not user.active if user.active is not None else False,
-            "univentionObjectIdentifier": user.id,
-            "preferredLanguage": user.preferred_language,
-            "employeeType": user.user_type,
-            "title": user.title,
-            "displayName": user.display_name,
-        }
-
-        for schema, extension in user.get_extension_models().items():
-            if not hasattr(user, extension.__name__):
+        # Mapped like the dict of the model, so the mapping spec is the only definition of the attributes
+        return self._map_user_dict(_to_dict(user), compile_spec(self._user_spec, type(user)))
+
+    def map_group(self, group: Group) -> dict[str, Any]:
+        """
+        Map a SCIM Group to UDM group properties.
+        Args:
+            group: SCIM Group object
+        Returns:
+            Dictionary of UDM properties and additional UDM object attributes
+        """
+        logger.debug(f"Mapping SCIM Group {group.id} to UDM properties")
+        users, groups = self._prefetch_members(group.members)
+        return self._map_group(group, users, groups)
+
+    async def amap_group(self, group: Group, max_concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, Any]:
+        """
+        Async variant of map_group, resolving the members concurrently without blocking the event loop.
+        Args:
+            group: SCIM Group object
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            Dictionary of UDM properties and additional UDM object attributes
+        """
+        logger.debug(f"Mapping SCIM Group {group.id} to UDM properties")
+        users, groups = await self._aprefetch_members(group.members, max_concurrency)
+        return self._map_group(group, users, groups)
+
+    def _prefetch_members(
+        self, members: list[Any] | None
+    ) -> tuple[dict[str, CacheItem] | None, dict[str, CacheItem] | None]:
+        """
+        Resolve the IDs of all members with one lookup per distinct ID.
+        Args:
+            members: Members as models or SCIM dicts
+        Returns:
+            Cache items of the user and group members by ID, None if there is no cache
+        """
+        if not members or not self.cache:
+            return None, None
+
+        user_ids, group_ids = _member_ids(members)
+        return self.cache.get_users(user_ids), self.cache.get_groups(group_ids)
+
+    async def _aprefetch_members(
+        self, members: list[Any] | None, max_concurrency: int
+    ) -> tuple[dict[str, CacheItem] | None, dict[str, CacheItem] | None]:
+        if not members or not self.cache:
+            return None, None
+
+        user_ids, group_ids = _member_ids(members)
+        return (
+            await self.cache.aget_users(user_ids, max_concurrency),
+            await self.cache.aget_groups(group_ids, max_concurrency),
+        )
+
+    def _map_group(
+        self, group: Group, users: dict[str, CacheItem] | None, groups: dict[str, CacheItem] | None
+    ) -> dict[str, Any]:
+        return self._map_group_dict(_to_dict(group), users, groups, compile_spec(self._group_spec, type(group)))
+
+    async def amap_member_dns(
+        self,
+        group_id: str,
+        members: list[dict[str, Any]],
+        ignore_missing: bool = False,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> tuple[list[str], list[str]]:
+        """
+        Resolve the IDs of some members of a group to DNs, e.g. the members added or removed by a PATCH.
+        Only the given members are looked up, independent of the size of the group. Members without
+        a type are users, unless there is no such user but a group with the ID.
+        Args:
+            group_id: ID of the group, used for errors
+            members: SCIM members as dicts
+            ignore_missing: Skip members which do not exist instead of failing
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            DNs of the users and of the nested groups
+        Raises:
+            MappingError: If a member does not exist
+        """
+        if not self.cache:
+            raise ValueError("Resolving members requires an id cache")
+
+        users, groups = await self._aprefetch_members(members, max_concurrency)
+        if users is None or groups is None:
+            return [], []
+
+        untyped = [x["value"] for x in members if x.get("value") and not x.get("type") and x["value"] not in users]
+        if untyped:
+            groups.update(await self.cache.aget_groups(untyped, max_concurrency))
+
+        user_members: list[dict[str, Any]] = []
+        group_members: list[dict[str, Any]] = []
+        for member in members:
+            value = member.get("value")
+            if not value:
                 continue
 
-            extension_obj = getattr(user, extension.__name__)
-            if extension_obj is None:
-                setattr(user, extension.__name__, extension())
-                extension_obj = getattr(user, extension.__name__)
-
-            if schema == EnterpriseUser.to_schema().id:
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_enterprise_extension(extension_obj, properties)
-            elif schema == "urn:ietf:params:scim:schemas:extension:Univention:1.0:User":
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_univention_extension(extension_obj, properties)
-            elif schema == "urn:ietf:params:scim:schemas:extension:UniventionUser:2.0:User":
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_customer1_extension(extension_obj, properties)
-            else:
-                logger.info("Ignoring unknown user extension", schema=schema)
-
-        # Map external ID using configurable property
-        if self.external_id_user_mapping:
-            if user.external_id:
-                properties[self.external_id_user_mapping] = user.external_id
-        else:
-            logger.warning("No external ID mapping configured", resource_type="User")
+            is_group = member.get("type") == "Group" or (not member.get("type") and value in groups)
+            if ignore_missing and value not in (groups if is_group else users):
+                continue
 
-        # Map name components
-        if user.name:
-            properties["firstname"] = user.name.given_name
-            properties["lastname"] = user.name.family_name
-        else:
-            properties["firstname"] = None
-            properties["lastname"] = None
-
-        # Map email addresses
-        if user.emails:
-            primary_email = next((email.value for email in user.emails if email.type == "mailbox"), None)
-            properties["mailPrimaryAddress"] = primary_email
-            # Alias emails as alternative addresses
-            alias_emails = [email.value for email in user.emails if email.type == "alias"]
-            properties["mailAlternativeAddress"] = alias_emails
-            # Other emails as e-mails
-            other_emails = [email.value for email in user.emails if email.type != "alias" and email.type != "mailbox"]
-            properties["e-mail"] = other_emails
-        else:
-            properties["mailPrimaryAddress"] = None
-            properties["mailAlternativeAddress"] = None
-            properties["e-mail"] = None
-
-        # Map phone numbers
-        if user.phone_numbers:
-            work_phone = [phone.value for phone in user.phone_numbers if phone.type == "work"]
-            properties["phone"] = work_phone
-            mobile_phone = [phone.value for phone in user.phone_numbers if phone.type == "mobile"]
-            properties["mobileTelephoneNumber"] = mobile_phone
-            pager_phone = [phone.value for phone in user.phone_numbers if phone.type == "pager"]
-            properties["pagerTelephoneNumber"] = pager_phone
-            home_phone = [phone.value for phone in user.phone_numbers if phone.type == "home"]
-            properties["homeTelephoneNumber"] = home_phone
-        else:
-            properties["phone"] = []
-            properties["mobileTelephoneNumber"] = []
-            properties["pagerTelephoneNumber"] = []
-            properties["homeTelephoneNumber"] = []
-
-        # Map title
-        if user.title:
-            properties["title"] = user.title
-
-        # Map addresses
-        if user.addresses:
-            work_address = None
-            other_addresses = []
-            for address in user.addresses:
-                if address.type == "work" and work_address is None:
-                    work_address = address
-                else:
-                    other_addresses.append(address)
-
-            if work_address:
-                properties["street"] = work_address.street_address
-                properties["city"] = work_address.locality
-                properties["postcode"] = work_address.postal_code
-                properties["country"] = work_address.country
-                properties["state"] = work_address.region
-            if len(other_addresses) > 0:
-                properties["homePostalAddress"] = []
-                for address in other_addresses:
-                    properties["homePostalAddress"].append(
-                        {"street": address.street_address, "city": address.locality, "zipcode": address.postal_code}
-                    )
-
-        # Map certificates
-        if user.x509_certificates:
-            if len(user.x509_certificates) == 0:
-                properties["userCertificate"] = None
-                properties["certificateSubjectCommonName"] = None
-            elif len(user.x509_certificates) == 1:
-                # Store cert as b64 encoded string in UDM
-                properties["userCertificate"] = base64.b64encode(user.x509_certificates[0].value).decode("utf-8")
-                properties["certificateSubjectCommonName"] = user.x509_certificates[0].display
-
-        # Map roles
-        if user.roles:
-            properties["guardianRoles"] = [x.value for x in user.roles if x.type == "guardian-direct"]
-            properties["guardianInheritedRoles"] = [x.value for x in user.roles if x.type == "guardian-indirect"]
-
-            if self.roles_user_mapping:
-                properties[self.roles_user_mapping] = json.dumps(
-                    [
-                        x.model_dump()
-                        for x in user.roles
-                        if x.type != "guardian-direct" and x.type != "guardian-indirect"
-                    ]
+            (group_members if is_group else user_members).append(member)
+
+        return (
+            self._map_member_dns(group_id, user_members, "User", users),
+            self._map_member_dns(group_id, group_members, "Group", groups),
+        )
+
+    def _map_member_dns(
+        self, group_id: str, members: list[dict[str, Any]], resource_type: str, resolved: dict[str, CacheItem]
+    ) -> list[str]:
+        dns = []
+        # UDM expects DNs for members, but SCIM only has IDs
+        for member in members:
+            cached = resolved.get(member["value"]) if member.get("value") else None
+            # When mapping from SCIM to UDM it is a write request to the scim-server
+            # so we raise an exception if a mapping can not be done
+            if not cached:
+                raise MappingError(
+                    f"Failed to find {resource_type.lower()} {member['value']}", group_id, member["value"]
                 )
-        else:
-            properties["guardianRoles"] = []
-            properties["guardianInheritedRoles"] = []
-            if self.roles_user_mapping:
-                properties[self.roles_user_mapping] = None
-
-        # TODO: Do not map groups for now, it will reduce performance because many LDAP queries are required
-        # Map groups
-        # if user.groups and self.cache:
-        #    properties["groups"] = []
-        #    # UDM expects DNs for members, but SCIM only has IDs
-        #    for member in user.groups:
-        #        group = self.cache.get_group(member.value)
-        #        # When mapping from SCIM to UDM it is a write request to the scim-server
-        #        # so we raise an exception if a mapping can not be done
-        #        if not group:
-        #            raise MappingError(f"Failed to find group {group.dn}", user.id, group.dn)
-
-        #        properties["groups"].append(group.dn)
-
-        # Store any attributes that should be set on the UDM object directly
-
-        # Return both properties and object attributes that should be set on the UDM object directly
-        return properties
 
-    def _map_user_enterprise_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        if obj.employee_number:
-            props["employeeNumber"] = obj.employee_number
-        else:
-            props["employeeNumber"] = None
+            dns.append(cached.dn)
 
-    def _map_user_univention_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        if obj.description:
-            props["description"] = obj.description
-        else:
-            props["description"] = None
+        return dns
 
-        if obj.password_recovery_email:
-            props["PasswordRecoveryEmail"] = obj.password_recovery_email
-        else:
-            props["PasswordRecoveryEmail"] = None
+    # The dict mapping below works on SCIM-shaped dicts (camelCase attribute names) which were already
+    # validated at the API boundary, e.g. by dumping the request model with model_dump(by_alias=True).
+    # map_user and map_group map the dicts of their models the same way.
 
-    def _map_user_customer1_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        if obj.primary_org_unit:
-            props["primaryOrgUnit"] = obj.primary_org_unit
-        else:
-            props["primaryOrgUnit"] = None
+    def map_user_dict(self, user: dict[str, Any]) -> dict[str, Any]:
+        """
+        Map a SCIM User dict to UDM user properties.
+        Args:
+            user: SCIM User as dict
+        Returns:
+            Dictionary of UDM properties
+        """
+        logger.debug("Mapping SCIM User dict to UDM properties", id=user.get("id"))
+        return self._map_user_dict(user, self._user_mapping)
 
-        if obj.secondary_org_units:
-            props["secondaryOrgUnits"] = obj.secondary_org_units
-        else:
-            props["secondaryOrgUnits"] = []
+    def _map_user_dict(self, user: dict[str, Any], mapping: CompiledMapping) -> dict[str, Any]:
+        if not self.external_id_user_mapping:
+            logger.warning("No external ID mapping configured", resource_type="User")
 
-    def map_group(self, group: Group) -> dict[str, Any]:
+        return mapping.to_udm(user)
+
+    def map_group_dict(self, group: dict[str, Any]) -> dict[str, Any]:
         """
-        Map a SCIM Group to UDM group properties.
+        Map a SCIM Group dict to UDM group properties.
         Args:
-            group: SCIM Group object
+            group: SCIM Group as dict
         Returns:
-            Dictionary of UDM properties and additional UDM object attributes
+            Dictionary of UDM properties
         """
-        logger.debug(f"Mapping SCIM Group {group.id} to UDM properties")
-        properties = {
-            "name": group.display_name,
-            "univentionObjectIdentifier": group.id,
-        }
+        logger.debug("Mapping SCIM Group dict to UDM properties", id=group.get("id"))
+        users, groups = self._prefetch_members(group.get("members"))
+        return self._map_group_dict(group, users, groups, self._group_mapping)
 
-        for schema, extension in group.get_extension_models().items():
-            if not hasattr(group, extension.__name__):
-                continue
+    async def amap_group_dict(
+        self, group: dict[str, Any], max_concurrency: int = DEFAULT_CONCURRENCY
+    ) -> dict[str, Any]:
+        """
+        Async variant of map_group_dict, resolving the members concurrently without blocking the event loop.
+        Args:
+            group: SCIM Group as dict
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            Dictionary of UDM properties
+        """
+        logger.debug("Mapping SCIM Group dict to UDM properties", id=group.get("id"))
+        users, groups = await self._aprefetch_members(group.get("members"), max_concurrency)
+        return self._map_group_dict(group, users, groups, self._group_mapping)
 
-            extension_obj = getattr(group, extension.__name__)
-            if extension_obj is None:
-                setattr(group, extension.__name__, extension())
-                extension_obj = getattr(group, extension.__name__)
+    def _map_group_dict(
+        self,
+        group: dict[str, Any],
+        users: dict[str, CacheItem] | None,
+        groups: dict[str, CacheItem] | None,
+        mapping: CompiledMapping,
+    ) -> dict[str, Any]:
+        if not self.external_id_group_mapping:
+            logger.warning("No external ID mapping configured", resource_type="Group")
 
-            if schema == "urn:ietf:params:scim:schemas:extension:Univention:1.0:Group":
-                logger.debug("Mapping group extension", schema=schema)
-                self._map_group_univention_extension(extension_obj, properties)
-            else:
-                logger.info("Ignoring unknown group extension", schema=schema)
+        properties = mapping.to_udm(group)
 
-            group.schemas.append(schema)
+        members = group.get("members")
+        if members and users is not None and groups is not None:
+            user_members = [x for x in members if x.get("type") != "Group"]
+            group_members = [x for x in members if x.get("type") == "Group"]
 
-        # Map external ID using configurable property
-        if self.external_id_group_mapping:
-            if group.external_id:
-                properties[self.external_id_group_mapping] = group.external_id
-        else:
-            logger.warning("No external ID mapping configured", resource_type="Group")
+            if user_members:
+                properties["users"] = self._map_member_dns(group.get("id", ""), user_members, "User", users)
+            if group_members:
+                properties["nestedGroup"] = self._map_member_dns(group.get("id", ""), group_members, "Group", groups)
 
-        # Map members
-        if group.members and self.cache:
-            members = [x for x in group.members if x.type != "Group"]
-            nested_groups = [x for x in group.members if x.type == "Group"]
-
-            if len(members) > 0:
-                properties["users"] = []
-                # UDM expects DNs for members, but SCIM only has IDs
-                for member in members:
-                    user = self.cache.get_user(member.value)
-                    # When mapping from SCIM to UDM it is a write request to the scim-server
-                    # so we raise an exception if a mapping can not be done
-                    if not user:
-                        raise MappingError(f"Failed to find user {member.value}", group.id, member.value)
-
-                    properties["users"].append(user.dn)
-            if len(nested_groups) > 0:
-                properties["nestedGroup"] = []
-                # UDM expects DNs for members, but SCIM only has IDs
-                for member in nested_groups:
-                    nested_group = self.cache.get_group(member.value)
-                    # When mapping from SCIM to UDM it is a write request to the scim-server
-                    # so we raise an exception if a mapping can not be done
-                    if not nested_group:
-                        raise MappingError(f"Failed to find group {member.value}", group.id, member.value)
-
-                    properties["nestedGroup"].append(nested_group.dn)
-
-        # Return both properties and object attributes that should be set on the UDM object directly
         return properties
 
-    def _map_group_univention_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        if obj.member_roles:
-            props["guardianMemberRoles"] = []
+    def map_user_filter(self, scim_filter: str) -> str:
+        """
+        Translate a SCIM filter on users to a UDM filter.
+        Raises:
+            ValueError: If the filter is not supported
+        """
+        return self._user_mapping.udm_filter(scim_filter)
+
+    def map_group_filter(self, scim_filter: str) -> str:
+        """
+        Translate a SCIM filter on groups to a UDM filter.
+        Raises:
+            ValueError: If the filter is not supported
+        """
+        return self._group_mapping.udm_filter(scim_filter)
+
+    def is_member_filter(self, scim_filter: str) -> bool:
+        """
+        Check if a SCIM filter on groups asks for the groups with a member, e.g. members.value eq "<id>".
+        """
+        return _member_filter_id(scim_filter) is not None
+
+    async def amap_group_filter(self, scim_filter: str) -> str | None:
+        """
+        Translate a SCIM filter on groups to a UDM filter, including filters on a member.
+
+        The ID of a member is resolved to its DN, so the filter becomes a membership search
+        which is answered from the index of the backend instead of reading all groups.
+        Returns:
+            UDM filter, None if no group can match because the member does not exist
+        Raises:
+            ValueError: If the filter is not supported
+        """
+        member_id = _member_filter_id(scim_filter)
+        if member_id is None:
+            return self.map_group_filter(scim_filter)
+
+        if not self.cache:
+            raise ValueError("Filtering groups by members requires an id cache")
+
+        # The filter does not tell the type of the member, so try users first as they are the common case
+        user = await self.cache.aget_user(member_id)
+        if user:
+            return f"users={user.dn}"
+
+        group = await self.cache.aget_group(member_id)
+        if group:
+            return f"nestedGroup={group.dn}"
+
+        logger.debug("Member of group filter not found", member_id=member_id)
+        return None
+
+    def user_properties(
+        self, attributes: list[str] | None = None, excluded_attributes: list[str] | None = None
+    ) -> list[str] | None:
+        """
+        UDM properties required to return the requested SCIM attributes of users.
+        Returns:
+            UDM properties to request or None if all properties are required
+        """
+        return self._user_mapping.udm_properties(attributes, excluded_attributes)
+
+    def group_properties(
+        self, attributes: list[str] | None = None, excluded_attributes: list[str] | None = None
+    ) -> list[str] | None:
+        """
+        UDM properties required to return the requested SCIM attributes of groups.
+        Returns:
+            UDM properties to request or None if all properties are required
+        """
+        return self._group_mapping.udm_properties(attributes, excluded_attributes)
+
+    def group_members_requested(
+        self, attributes: list[str] | None = None, excluded_attributes: list[str] | None = None
+    ) -> bool:
+        """
+        Check if the members of groups have to be resolved to return the requested SCIM attributes.
+        """
+        properties = self.group_properties(attributes, excluded_attributes)
+        return properties is None or "users" in properties
+
+
+def _to_dict(model: BaseModel) -> dict[str, Any]:
+    # Same as model_dump(mode="json", by_alias=True, exclude_none=True) for the values the mapping reads,
+    # model_dump runs the SCIM serializers of every attribute and takes longer than mapping the object
+    result = {}
+    for name, field in type(model).model_fields.items():
+        value = getattr(model, name)
+        if value is not None and not field.exclude:
+            result[field.serialization_alias or name] = _to_json(value)
+    return result
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return _to_dict(value)
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _member_ids(members: list[Any]) -> tuple[list[str], list[str]]:
+    # Members are models when mapping models and dicts when mapping dicts
+    user_ids: list[str] = []
+    group_ids: list[str] = []
+    for member in members:
+        if isinstance(member, dict):
+            member_type, value = member.get("type"), member.get("value")
+        else:
+            member_type, value = member.type, member.value
+
+        if value:
+            (group_ids if member_type == "Group" else user_ids).append(value)
+
+    return user_ids, group_ids
+
 
-            for member_role in obj.member_roles:
-                if member_role.type == "guardian":
-                    props["guardianMemberRoles"].append(member_role.value)
+def _member_filter_id(scim_filter: str) -> str | None:
+    match = _MEMBER_FILTER_PATTERN.match(scim_filter)
+    if not match:
+        return None
 
-        if obj.description:
-            props["description"] = obj.description
+    value: str = match["value"] or match["bracket_value"]
+    return json.loads(value) if value.startswith('"') else value
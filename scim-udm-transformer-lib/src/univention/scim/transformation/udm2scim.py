@@ -1,32 +1,31 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
-import json
+import typing
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from functools import cache
 from typing import Any, Generic, TypeVar, cast
 
 from loguru import logger
-from scim2_models import (
-    Address,
-    EnterpriseUser,
-    Group,
-    GroupMember,
-    Meta,
-    PhoneNumber,
-    Resource,
-    Role,
-    User,
-    X509Certificate,
-)
+from pydantic import BaseModel, TypeAdapter
+from scim2_models import Group, Resource
 
 # FIXME: Use the models from the server for now because the original models are to strict
 #        For example with the email type.
-#        In the future the mapper should not operate on pydantic models but just dictionaries
-from univention.scim.server.models.user import Email, Name
-from univention.scim.transformation.id_cache import IdCache
+from univention.scim.server.models.user import User
+from univention.scim.transformation.id_cache import DEFAULT_CONCURRENCY, CacheItem, IdCache
+from univention.scim.transformation.mapping_plan import compile_plan
+from univention.scim.transformation.mapping_spec import compile_spec, group_spec, user_spec, without_none
+from univention.scim.transformation.membership_index import MembershipIndex
 
 
 UserType = TypeVar("UserType", bound=Resource)
 GroupType = TypeVar("GroupType", bound=Resource)
+R = TypeVar("R")
+ResourceT = TypeVar("ResourceT", bound=Resource[Any])
+
+_datetime_adapter: TypeAdapter[datetime] = TypeAdapter(datetime)
 
 
 class UdmToScimMapper(Generic[UserType, GroupType]):
@@ -45,6 +44,7 @@ class UdmToScimMapper(Generic[UserType, GroupType]):
         external_id_group_mapping: str | None = None,
         username_mapping: str | None = None,
         roles_user_mapping: str | None = None,
+        membership_index: MembershipIndex | None = None,
     ):
         """
         Initialize the UdmToScimMapper.
@@ -56,6 +56,8 @@ class UdmToScimMapper(Generic[UserType, GroupType]):
             external_id_group_mapping: UDM property to map to SCIM Group externalId
             username_mapping: UDM property to map to SCIM User userName (overrides default 'username')
             roles_user_mapping: UDM property to map to SCIM User roles
+            membership_index: Reverse index of group memberships to map the SCIM User groups,
+                it is filled with every group mapped
         """
         self.cache = cache
         self.user_type = user_type
@@ -64,50 +66,13 @@ class UdmToScimMapper(Generic[UserType, GroupType]):
         self.external_id_group_mapping = external_id_group_mapping
         self.username_mapping = username_mapping
         self.roles_user_mapping = roles_user_mapping
+        self.membership_index = membership_index
 
-    def _get_external_id(self, obj: Any, resource_type: str) -> str | None:
-        """
-        Get external ID from UDM object based on configuration.
-
-        Args:
-            obj: UDM object
-            resource_type: Type of resource ("User" or "Group")
-
-        Returns:
-            External ID value
-        """
-        mapping_property = None
-        if resource_type == "User":
-            mapping_property = self.external_id_user_mapping
-        elif resource_type == "Group":
-            mapping_property = self.external_id_group_mapping
-
-        # If no mapping configured, use fallback
-        if not mapping_property:
-            logger.warning("No external ID mapping configured", resource_type=resource_type)
-            return None
-
-        # Try to get the configured property
-        external_id: str = obj.properties.get(mapping_property)
-
-        if external_id is None:
-            logger.warning(
-                "Configured external ID property not found in UDM object, external ID will not be mapped",
-                resource_type=resource_type,
-                configured_property=mapping_property,
-                dn=obj.dn,
-                available_properties=list(obj.properties.keys()),
-            )
-            return None
-
-        logger.debug(
-            "Mapped external ID from configured property",
-            resource_type=resource_type,
-            configured_property=mapping_property,
-            external_id=external_id,
-            dn=obj.dn,
+        # Compile the mappings up front, so invalid extension mappings fail early
+        self._user_mapping = compile_spec(
+            user_spec(username_mapping, external_id_user_mapping, roles_user_mapping), user_type
         )
-        return external_id
+        self._group_mapping = compile_spec(group_spec(external_id_group_mapping), group_type)
 
     def _get_ref(self, base_url: str, resource_type: str, id: str) -> str | None:
         if not base_url:
@@ -118,206 +83,38 @@ class UdmToScimMapper(Generic[UserType, GroupType]):
 
         raise ValueError(f"Unknown resource type: {resource_type}")
 
-    def _get_meta(self, base_url: str, obj: Any, resource_type: str) -> Meta:
+    def _get_user_groups(self, dn: str) -> list[tuple[CacheItem, bool]]:
+        # Until all groups are indexed a user might miss groups, so better return none at all
+        if self.membership_index is None or not self.membership_index.complete:
+            return []
+
+        return [(group, direct) for group, direct in self.membership_index.get_groups(dn) if group.uuid]
+
+    def _index_groups(self, udm_groups: list[Any]) -> None:
         """
-        Map UDM object to SCIM Meta object
+        Update the membership index with the members of the given groups.
         Args:
-            obj: UDM object
-            base_url: Base URL for resource location
-        Returns:
-            SCIM Meta object
+            udm_groups: UDM group objects
         """
-        meta_data = Meta(
-            resource_type=resource_type,
-            location=self._get_ref(base_url, resource_type, obj.properties.get("univentionObjectIdentifier")),
-            created=obj.properties.get("createTimestamp", None),
-            last_modified=obj.properties.get("modifyTimestamp", None),
-        )
-
-        # Add version if available from etag
-        if hasattr(obj, "etag") and obj.etag:
-            meta_data.version = obj.etag
-
-        return meta_data
-
-    def _get_formarted_address(self, data: dict[str, str | None]) -> str:
-        formatted_address = ""
-        if "street" in data and data["street"]:
-            formatted_address += data["street"] + "\n"
-        if "city" in data and data["city"]:
-            formatted_address += data["city"] + " "
-        if "postcode" in data and data["postcode"]:
-            formatted_address += data["postcode"] + "\n"
-        if "zipcode" in data and data["zipcode"]:
-            formatted_address += data["zipcode"] + "\n"
-        if "state" in data and data["state"]:
-            formatted_address += data["state"] + " "
-        if "country" in data and data["country"]:
-            formatted_address += data["country"]
-
-        return formatted_address.strip()
-
-    def _map_emails(self, props: dict[str, Any]) -> list[Email] | None:
-        emails: list[Email] | None = None
-        if "mailPrimaryAddress" in props and props["mailPrimaryAddress"] is not None:
-            if not emails:
-                emails = []
-            # scim2-models are very strict and only allow specific email types while RFC allows any type
-            # so don't use scim2-models email type
-            emails.append(Email(value=props["mailPrimaryAddress"], type="mailbox", primary=False))
-
-        if "mailAlternativeAddress" in props and props["mailAlternativeAddress"] is not None:
-            if not emails:
-                emails = []
-            alt_addresses = props["mailAlternativeAddress"]
-            if isinstance(alt_addresses, str):
-                alt_addresses = [alt_addresses]
-
-            for email in alt_addresses:
-                # scim2-models are very strict and only allow specific email types while RFC allows any type
-                # so don't use scim2-models email type
-                emails.append(Email(value=email, type="alias", primary=False))
-
-        if "e-mail" in props and props["e-mail"] is not None:
-            if not emails:
-                emails = []
-            for email in props["e-mail"]:
-                emails.append(Email(value=email, type="other", primary=False))
-
-        return emails
-
-    def _map_phone_numbers(self, props: dict[str, Any]) -> list[PhoneNumber] | None:
-        phones: list[PhoneNumber] | None = None
-        if "phone" in props and props["phone"] is not None:
-            if not phones:
-                phones = []
-            phone_numbers = props["phone"]
-            for phone in phone_numbers:
-                phones.append(PhoneNumber(value=phone, type="work"))
-
-        if "mobileTelephoneNumber" in props and props["mobileTelephoneNumber"] is not None:
-            if not phones:
-                phones = []
-            mobile_numbers = props["mobileTelephoneNumber"]
-            for mobile in mobile_numbers:
-                phones.append(PhoneNumber(value=mobile, type="mobile"))
-
-        if "homeTelephoneNumber" in props and props["homeTelephoneNumber"] is not None:
-            if not phones:
-                phones = []
-            home_numbers = props["homeTelephoneNumber"]
-            for home in home_numbers:
-                phones.append(PhoneNumber(value=home, type="home"))
-
-        if "pagerTelephoneNumber" in props and props["pagerTelephoneNumber"] is not None:
-            if not phones:
-                phones = []
-            pager_numbers = props["pagerTelephoneNumber"]
-            for pager in pager_numbers:
-                phones.append(PhoneNumber(value=pager, type="pager"))
-
-        return phones
-
-    def _map_addresses(self, props: dict[str, Any]) -> list[Address] | None:
-        addresses: list[Address] | None = None
-        address_fields: dict[str, str | None] = {
-            "street": props.get("street"),
-            "city": props.get("city"),
-            "postcode": props.get("postcode"),
-            "country": props.get("country"),
-            "state": props.get("state"),
-        }
+        if self.membership_index is None:
+            return
 
-        # If any address field is available, create an address
-        if any(value for value in address_fields.values() if value):
-            if not addresses:
-                addresses = []
-            addresses.append(
-                Address(
-                    formatted=self._get_formarted_address(address_fields),
-                    street_address=address_fields["street"],
-                    locality=address_fields["city"],
-                    postal_code=address_fields["postcode"],
-                    region=address_fields["state"],
-                    country=address_fields["country"],
-                    type="work",
-                )
-            )
-
-        if "homePostalAddress" in props and props["homePostalAddress"] is not None:
-            if not addresses:
-                addresses = []
-            home_addresses = props["homePostalAddress"]
-
-            for address in home_addresses:
-                addresses.append(
-                    Address(
-                        formatted=self._get_formarted_address(address),
-                        street_address=address.get("street"),
-                        locality=address.get("city"),
-                        postal_code=address.get("zipcode"),
-                        type="home",
-                    )
-                )
-
-        return addresses
-
-    def _map_roles(self, props: dict[str, Any]) -> list[Role] | None:
-        roles: list[Role] | None = None
-        if "guardianRoles" in props and props["guardianRoles"] is not None:
-            if not roles:
-                roles = []
-            for role in props["guardianRoles"]:
-                roles.append(Role(value=role, type="guardian-direct"))
-
-        if "guardianInheritedRoles" in props and props["guardianInheritedRoles"] is not None:
-            if not roles:
-                roles = []
-            for role in props["guardianInheritedRoles"]:
-                roles.append(Role(value=role, type="guardian-indirect"))
-
-        if self.roles_user_mapping and self.roles_user_mapping in props and props[self.roles_user_mapping] is not None:
-            if not roles:
-                roles = []
-
-            for role in json.loads(props[self.roles_user_mapping]):
-                roles.append(Role(**role))
-
-        return roles
+        for udm_group in udm_groups:
+            props = udm_group.properties
+            # Objects opened with a subset of the properties don't know their members
+            if props.get("users") is None and props.get("nestedGroup") is None:
+                continue
 
-    def _map_username(self, props: dict[str, Any]) -> Name | None:
-        name_fields = {
-            "firstname": props.get("firstname"),
-            "lastname": props.get("lastname"),
-        }
-        username = None
-        if any(value for value in name_fields.values() if value):
-            formatted = None
-            if props.get("firstname"):
-                formatted = props.get("firstname")
-            if props.get("lastname"):
-                if formatted:
-                    formatted += f" {props.get('lastname')}"
-                else:
-                    formatted = props.get("lastname")
-
-            username = Name(
-                given_name=props.get("firstname"),
-                family_name=props.get("lastname"),
-                formatted=formatted,
+            self.membership_index.set_group(
+                CacheItem(udm_group.dn, props.get("univentionObjectIdentifier"), props.get("name") or ""),
+                [*(props.get("users") or []), *(props.get("nestedGroup") or [])],
             )
-        return username
-
-    def _map_certificates(self, props: dict[str, Any]) -> list[X509Certificate] | None:
-        certificates = None
-        # FIXME Check how to handle difference between None and [] (Not handled / deleted)
-        if props.get("userCertificate"):
-            cert_value = props["userCertificate"]
-            display = props.get("certificateSubjectCommonName")
-
-            certificates = [X509Certificate(value=cert_value, display=display)]
 
-        return certificates
+    def _add_empty_extensions(self, resource: Resource[Any]) -> None:
+        # The dict mapping omits extensions without any value, the models always have them
+        for extension in compile_plan(type(resource)).extensions:
+            if getattr(resource, extension.attribute) is None:
+                setattr(resource, extension.attribute, extension.model())
 
     def map_user(self, udm_user: Any, base_url: str = "") -> UserType:
         """
@@ -329,209 +126,421 @@ class UdmToScimMapper(Generic[UserType, GroupType]):
             SCIM User object
         """
         logger.debug("Mapping UDM user to SCIM User", dn=udm_user.dn)
-        # Access properties directly from UDM user object
-        props = udm_user.properties
-        # Get univentionObjectIdentifier for user ID, fall back to username
-        user_id = props.get("univentionObjectIdentifier")
+        return self._map_user(udm_user, base_url)
 
-        if not user_id:
-            logger.error("univentionObjectIdentifier is required", dn=udm_user.dn)
-            raise ValueError("univentionObjectIdentifier is required")
+    def _map_user(self, udm_user: Any, base_url: str) -> UserType:
+        # The model is created from the dict mapping, so the mapping spec is the only definition of the attributes
+        user = _to_resource(self.user_type, self._map_user_dict(udm_user, base_url))
+        self._add_empty_extensions(user)
+        return user
 
-        # Create User object with basic properties
-        username_udm_prop = self.username_mapping or "username"
-        user = self.user_type(
-            id=user_id,
-            user_name=props.get(username_udm_prop),
-            active=not props.get("disabled", False),
-            meta=self._get_meta(base_url, udm_user, "User"),
-            display_name=props.get("displayName"),
-            title=props.get("title"),
-            user_type=props.get("employeeType"),
-            preferred_language=props.get("preferredLanguage"),
-        )
+    def map_group(self, udm_group: Any, base_url: str = "") -> GroupType:
+        """
+        Map UDM group properties to a SCIM Group.
+        Args:
+            udm_group: UDM group object
+            base_url: Base URL for resource location
+        Returns:
+            SCIM Group object
+        """
+        logger.debug("Mapping UDM group to SCIM Group", dn=udm_group.dn)
+        users, groups = self._prefetch_members([udm_group])
+        return self._map_group(udm_group, base_url, users, groups)
 
-        for schema, extension in user.get_extension_models().items():
-            if not hasattr(user, extension.__name__):
-                continue
+    def _prefetch_members(
+        self, udm_groups: list[Any]
+    ) -> tuple[dict[str, CacheItem] | None, dict[str, CacheItem] | None]:
+        """
+        Resolve the members of all given groups with one lookup per distinct DN.
+        Args:
+            udm_groups: UDM group objects
+        Returns:
+            Cache items of the user and group members by DN, None if there is no cache
+        """
+        self._index_groups(udm_groups)
+        if not self.cache:
+            return None, None
 
-            extension_obj = getattr(user, extension.__name__)
-            if extension_obj is None:
-                setattr(user, extension.__name__, extension())
-                extension_obj = getattr(user, extension.__name__)
+        user_dns = (dn for udm_group in udm_groups for dn in udm_group.properties.get("users") or [])
+        group_dns = (dn for udm_group in udm_groups for dn in udm_group.properties.get("nestedGroup") or [])
+        return self.cache.get_users(user_dns), self.cache.get_groups(group_dns)
 
-            if schema == EnterpriseUser.to_schema().id:
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_enterprise_extension(extension_obj, props)
-            elif schema == "urn:ietf:params:scim:schemas:extension:Univention:1.0:User":
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_univention_extension(extension_obj, props)
-            elif schema == "urn:ietf:params:scim:schemas:extension:UniventionUser:2.0:User":
-                logger.debug("Mapping user extension", schema=schema)
-                self._map_user_customer1_extension(extension_obj, props)
-            else:
-                logger.info("Ignoring unknown user extension", schema=schema)
+    def _map_group(
+        self,
+        udm_group: Any,
+        base_url: str,
+        users: dict[str, CacheItem] | None,
+        groups: dict[str, CacheItem] | None,
+    ) -> GroupType:
+        group = _to_resource(self.group_type, self._map_group_dict(udm_group, base_url, users, groups))
+        self._add_empty_extensions(group)
+        return group
+
+    def map_users(self, udm_users: Iterable[Any], base_url: str = "") -> list[UserType]:
+        """
+        Map a page of UDM users to SCIM Users.
 
-            user.schemas = user.set_extension_schemas([schema])
+        Objects which can not be mapped are logged and skipped.
+        Args:
+            udm_users: UDM user objects
+            base_url: Base URL for resource location
+        Returns:
+            SCIM User objects, in the order of the UDM users
+        """
+        udm_users = list(udm_users)
+        logger.debug("Mapping UDM users to SCIM Users", count=len(udm_users))
 
-        # Map external ID using configurable property
-        user.external_id = self._get_external_id(udm_user, "User")
+        return _map_objects(udm_users, lambda udm_user: self._map_user(udm_user, base_url))
 
-        user.name = self._map_username(props)
+    def map_groups(self, udm_groups: Iterable[Any], base_url: str = "") -> list[GroupType]:
+        """
+        Map a page of UDM groups to SCIM Groups.
 
-        user.emails = self._map_emails(props)
+        The members of all groups are resolved up front, so a member of many groups is only looked up once.
+        Objects which can not be mapped are logged and skipped.
+        Args:
+            udm_groups: UDM group objects
+            base_url: Base URL for resource location
+        Returns:
+            SCIM Group objects, in the order of the UDM groups
+        """
+        udm_groups = list(udm_groups)
+        logger.debug("Mapping UDM groups to SCIM Groups", count=len(udm_groups))
+
+        users, groups = self._prefetch_members(udm_groups)
+        return _map_objects(udm_groups, lambda udm_group: self._map_group(udm_group, base_url, users, groups))
+
+    # Async variants of the group mapping, resolving the members concurrently without blocking the event loop.
+    # Users reference no other objects, so their mapping never blocks and has no async variant.
+
+    async def _aprefetch_members(
+        self, udm_groups: list[Any], max_concurrency: int
+    ) -> tuple[dict[str, CacheItem] | None, dict[str, CacheItem] | None]:
+        self._index_groups(udm_groups)
+        if not self.cache:
+            return None, None
+
+        user_dns = (dn for udm_group in udm_groups for dn in udm_group.properties.get("users") or [])
+        group_dns = (dn for udm_group in udm_groups for dn in udm_group.properties.get("nestedGroup") or [])
+        return (
+            await self.cache.aget_users(user_dns, max_concurrency),
+            await self.cache.aget_groups(group_dns, max_concurrency),
+        )
 
-        user.phone_numbers = self._map_phone_numbers(props)
+    async def amap_group(
+        self, udm_group: Any, base_url: str = "", max_concurrency: int = DEFAULT_CONCURRENCY
+    ) -> GroupType:
+        """
+        Async variant of map_group.
+        Args:
+            udm_group: UDM group object
+            base_url: Base URL for resource location
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            SCIM Group object
+        """
+        logger.debug("Mapping UDM group to SCIM Group", dn=udm_group.dn)
+        users, groups = await self._aprefetch_members([udm_group], max_concurrency)
+        return self._map_group(udm_group, base_url, users, groups)
 
-        user.addresses = self._map_addresses(props)
+    async def amap_groups(
+        self,
+        udm_groups: Iterable[Any],
+        base_url: str = "",
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        resolve_members: bool = True,
+    ) -> list[GroupType]:
+        """
+        Async variant of map_groups.
+        Args:
+            udm_groups: UDM group objects
+            base_url: Base URL for resource location
+            max_concurrency: Maximum number of members resolved at the same time
+            resolve_members: If false the members are not resolved and the groups are mapped without members
+        Returns:
+            SCIM Group objects, in the order of the UDM groups
+        """
+        udm_groups = list(udm_groups)
+        logger.debug("Mapping UDM groups to SCIM Groups", count=len(udm_groups), resolve_members=resolve_members)
 
-        user.roles = self._map_roles(props)
+        if resolve_members:
+            users, groups = await self._aprefetch_members(udm_groups, max_concurrency)
+        else:
+            self._index_groups(udm_groups)
+            users, groups = None, None
 
-        # FIXME: because of a bug when creating the pydantic model from a schema, the variable name may differ.
-        #        in the future the mapper should not operate on pydantic models but just dictionaries, so
-        #        for now work around it.
-        if hasattr(user, "x509_certificates"):
-            user.x509_certificates = self._map_certificates(props)
-        elif hasattr(user, "x_509_certificates"):
-            user.x_509_certificates = self._map_certificates(props)
+        return _map_objects(udm_groups, lambda udm_group: self._map_group(udm_group, base_url, users, groups))
 
-        # TODO: Do not map groups for now, it will reduce performance because many LDAP queries are required
-        # # Map groups if available
-        # if "groups" in props and props["groups"] and self.cache:
-        #    user.groups = []
-        #    group_dns = props["groups"]
-        #    if isinstance(group_dns, str):
-        #        group_dns = [group_dns]
+    # The dict mapping below returns SCIM-shaped dicts (camelCase attribute names, no None values)
+    # which can be serialized directly. map_user and map_group create their models from these dicts,
+    # so dumping the models with model_dump(mode="json") returns the same dicts.
 
-        #    from scim2_models import GroupMember
+    def _get_timestamp_dict(self, value: Any) -> str | None:
+        if value is None:
+            return None
 
-        #    for dn in group_dns:
-        #        group = self.cache.get_group(dn)
-        #        # When mapping from UDM to SCIM it is a read request from the scim-server
-        #        # so just ignore entities which are not found
-        #        if not group:
-        #            continue
+        # Use pydantic only for the timestamp to get exactly the same format as the SCIM models
+        return cast(str, _datetime_adapter.dump_python(_datetime_adapter.validate_python(value), mode="json"))
+
+    def _get_meta_dict(self, base_url: str, obj: Any, resource_type: str) -> dict[str, Any]:
+        return without_none(
+            {
+                "resourceType": resource_type,
+                "created": self._get_timestamp_dict(obj.properties.get("createTimestamp")),
+                "lastModified": self._get_timestamp_dict(obj.properties.get("modifyTimestamp")),
+                "location": self._get_ref(base_url, resource_type, obj.properties.get("univentionObjectIdentifier")),
+                "version": obj.etag if hasattr(obj, "etag") and obj.etag else None,
+            }
+        )
 
-        #        user.groups.append(
-        #            GroupMember(
-        #                value=group,
-        #                display=group,
-        #                type="Group",
-        #            )
-        #        )
+    def map_user_dict(self, udm_user: Any, base_url: str = "") -> dict[str, Any]:
+        """
+        Map UDM user properties to a SCIM User dict without creating pydantic models.
+        Args:
+            udm_user: UDM user object
+            base_url: Base URL for resource location
+        Returns:
+            SCIM User as dict, ready to be serialized
+        """
+        logger.debug("Mapping UDM user to SCIM User dict", dn=udm_user.dn)
+        return self._map_user_dict(udm_user, base_url)
 
-        return cast(UserType, user)
+    def _map_user_dict(self, udm_user: Any, base_url: str) -> dict[str, Any]:
+        props = udm_user.properties
+        user_id = props.get("univentionObjectIdentifier")
 
-    def _map_user_enterprise_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        obj.employee_number = props.get("employeeNumber")
+        if not user_id:
+            logger.error("univentionObjectIdentifier is required", dn=udm_user.dn)
+            raise ValueError("univentionObjectIdentifier is required")
 
-    def _map_user_univention_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        obj.description = props.get("description")
-        obj.password_recovery_email = props.get("PasswordRecoveryEmail")
+        user = {
+            "schemas": list(compile_plan(self.user_type).schemas),
+            "meta": self._get_meta_dict(base_url, udm_user, "User"),
+            **self._user_mapping.to_scim(props),
+        }
+        groups = [
+            without_none(
+                {
+                    "value": group.uuid,
+                    "$ref": self._get_ref(base_url, "Group", str(group.uuid)),
+                    "display": group.display_name,
+                    "type": "direct" if direct else "indirect",
+                }
+            )
+            for group, direct in self._get_user_groups(udm_user.dn)
+        ]
+        if groups:
+            user["groups"] = groups
 
-    def _map_user_customer1_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        obj.primary_org_unit = props.get("primaryOrgUnit")
-        obj.secondary_org_units = props.get("secondaryOrgUnits")
+        return user
 
-    def map_group(self, udm_group: Any, base_url: str = "") -> GroupType:
+    def map_group_dict(self, udm_group: Any, base_url: str = "") -> dict[str, Any]:
         """
-        Map UDM group properties to a SCIM Group.
+        Map UDM group properties to a SCIM Group dict without creating pydantic models.
         Args:
             udm_group: UDM group object
             base_url: Base URL for resource location
         Returns:
-            SCIM Group object
+            SCIM Group as dict, ready to be serialized
         """
-        logger.debug("Mapping UDM group to SCIM Group", dn=udm_group.dn)
-        # Access properties directly from UDM group object
+        logger.debug("Mapping UDM group to SCIM Group dict", dn=udm_group.dn)
+        users, groups = self._prefetch_members([udm_group])
+        return self._map_group_dict(udm_group, base_url, users, groups)
+
+    def _map_group_dict(
+        self,
+        udm_group: Any,
+        base_url: str,
+        users: dict[str, CacheItem] | None,
+        groups: dict[str, CacheItem] | None,
+    ) -> dict[str, Any]:
         props = udm_group.properties
-        # Extract group ID
         group_id = props.get("univentionObjectIdentifier")
 
         if not group_id:
             logger.error("No univentionObjectIdentifier found", dn=udm_group.dn)
             raise ValueError("univentionObjectIdentifier is required")
 
-        # Create Group object
-        group = self.group_type(
-            id=group_id, display_name=props.get("name", ""), meta=self._get_meta(base_url, udm_group, "Group")
-        )
-
-        for schema, extension in group.get_extension_models().items():
-            if not hasattr(group, extension.__name__):
-                continue
-
-            extension_obj = getattr(group, extension.__name__)
-            if extension_obj is None:
-                setattr(group, extension.__name__, extension())
-                extension_obj = getattr(group, extension.__name__)
-
-            if schema == "urn:ietf:params:scim:schemas:extension:Univention:1.0:Group":
-                logger.debug("Mapping group extension", schema=schema)
-                self._map_group_univention_extension(extension_obj, props)
-            else:
-                logger.info("Ignoring unknown group extension", schema=schema)
-
-            group.schemas.append(schema)
-
-        # Map external ID using configurable property
-        group.external_id = self._get_external_id(udm_group, "Group")
-
-        # Map members if available
-        if "users" in props and props["users"] is not None and self.cache:
-            if not group.members:
-                group.members = []
-
-            user_dns = props["users"]
-
-            for dn in user_dns:
-                cached_user = self.cache.get_user(dn)
+        members: list[dict[str, Any]] | None = None
+        if (
+            users is not None
+            and groups is not None
+            and (props.get("users") is not None or props.get("nestedGroup") is not None)
+        ):
+            members = []
+            for dn in props.get("users") or []:
+                cached_user = users.get(dn)
                 # When mapping from UDM to SCIM it is a read request from the scim-server
                 # so just ignore entities which are not found
                 if not cached_user:
                     continue
 
-                group.members.append(
-                    GroupMember(
-                        value=cached_user.uuid,
-                        display=cached_user.display_name,
-                        ref=self._get_ref(base_url, "User", cached_user.uuid),
-                        type="User",
+                members.append(
+                    without_none(
+                        {
+                            "type": "User",
+                            "display": cached_user.display_name,
+                            "value": cached_user.uuid,
+                            "$ref": self._get_ref(base_url, "User", str(cached_user.uuid)),
+                        }
                     )
                 )
 
-        if "nestedGroup" in props and props["nestedGroup"] is not None and self.cache:
-            if not group.members:
-                group.members = []
-
-            group_dns = props["nestedGroup"]
-
-            for dn in group_dns:
-                cached_group = self.cache.get_group(dn)
-                # When mapping from UDM to SCIM it is a read request from the scim-server
-                # so just ignore entities which are not found
+            for dn in props.get("nestedGroup") or []:
+                cached_group = groups.get(dn)
                 if not cached_group:
                     continue
 
-                group.members.append(
-                    GroupMember(
-                        value=cached_group.uuid,
-                        display=cached_group.display_name,
-                        ref=self._get_ref(base_url, "Group", cached_group.uuid),
-                        type="Group",
+                members.append(
+                    without_none(
+                        {
+                            "type": "Group",
+                            "display": cached_group.display_name,
+                            "value": cached_group.uuid,
+                            "$ref": self._get_ref(base_url, "Group", str(cached_group.uuid)),
+                        }
                     )
                 )
 
-        return cast(GroupType, group)
+        group = {
+            "schemas": list(compile_plan(self.group_type).schemas),
+            "meta": self._get_meta_dict(base_url, udm_group, "Group"),
+            **self._group_mapping.to_scim(props),
+        }
+        if members is not None:
+            group["members"] = members
+
+        return group
+
+    def map_users_dict(self, udm_users: Iterable[Any], base_url: str = "") -> list[dict[str, Any]]:
+        """
+        Map a page of UDM users to SCIM User dicts.
+
+        Objects which can not be mapped are logged and skipped.
+        Args:
+            udm_users: UDM user objects
+            base_url: Base URL for resource location
+        Returns:
+            SCIM Users as dicts, in the order of the UDM users
+        """
+        udm_users = list(udm_users)
+        logger.debug("Mapping UDM users to SCIM User dicts", count=len(udm_users))
+
+        return _map_objects(udm_users, lambda udm_user: self._map_user_dict(udm_user, base_url))
+
+    def map_groups_dict(self, udm_groups: Iterable[Any], base_url: str = "") -> list[dict[str, Any]]:
+        """
+        Map a page of UDM groups to SCIM Group dicts.
+
+        The members of all groups are resolved up front, so a member of many groups is only looked up once.
+        Objects which can not be mapped are logged and skipped.
+        Args:
+            udm_groups: UDM group objects
+            base_url: Base URL for resource location
+        Returns:
+            SCIM Groups as dicts, in the order of the UDM groups
+        """
+        udm_groups = list(udm_groups)
+        logger.debug("Mapping UDM groups to SCIM Group dicts", count=len(udm_groups))
+
+        users, groups = self._prefetch_members(udm_groups)
+        return _map_objects(udm_groups, lambda udm_group: self._map_group_dict(udm_group, base_url, users, groups))
+
+    async def amap_group_dict(
+        self, udm_group: Any, base_url: str = "", max_concurrency: int = DEFAULT_CONCURRENCY
+    ) -> dict[str, Any]:
+        """
+        Async variant of map_group_dict.
+        Args:
+            udm_group: UDM group object
+            base_url: Base URL for resource location
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            SCIM Group as dict, ready to be serialized
+        """
+        logger.debug("Mapping UDM group to SCIM Group dict", dn=udm_group.dn)
+        users, groups = await self._aprefetch_members([udm_group], max_concurrency)
+        return self._map_group_dict(udm_group, base_url, users, groups)
+
+    async def amap_groups_dict(
+        self, udm_groups: Iterable[Any], base_url: str = "", max_concurrency: int = DEFAULT_CONCURRENCY
+    ) -> list[dict[str, Any]]:
+        """
+        Async variant of map_groups_dict.
+        Args:
+            udm_groups: UDM group objects
+            base_url: Base URL for resource location
+            max_concurrency: Maximum number of members resolved at the same time
+        Returns:
+            SCIM Groups as dicts, in the order of the UDM groups
+        """
+        udm_groups = list(udm_groups)
+        logger.debug("Mapping UDM groups to SCIM Group dicts", count=len(udm_groups))
+
+        users, groups = await self._aprefetch_members(udm_groups, max_concurrency)
+        return _map_objects(udm_groups, lambda udm_group: self._map_group_dict(udm_group, base_url, users, groups))
+
 
-    def _map_group_univention_extension(self, obj: Any, props: dict[str, Any]) -> None:
-        if "guardianMemberRoles" in props and props["guardianMemberRoles"]:
-            obj.member_roles = []
+def _map_objects(udm_objects: list[Any], map_object: Callable[[Any], R]) -> list[R]:
+    resources = []
+    for udm_object in udm_objects:
+        try:
+            resources.append(map_object(udm_object))
+        except ValueError:
+            logger.error("Failed to map object, ignoring it", dn=udm_object.dn)
 
-            # FIXME: Hack for now to hardcode it, when only using a dict pydantic will fail to serialize it
-            from univention.scim.server.models.extensions.univention_group import GuardianMember
+    return resources
 
-            for member_role in props["guardianMemberRoles"]:
-                obj.member_roles.append(GuardianMember(value=member_role, type="guardian"))
 
-        obj.description = props.get("description")
+def _model_class(annotation: Any) -> type[BaseModel] | None:
+    # The first pydantic model of a type, e.g. the server Email of list[Email | ScimEmail] | None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+
+    for arg in typing.get_args(annotation):
+        model_class = _model_class(arg)
+        if model_class is not None:
+            return model_class
+
+    return None
+
+
+@cache
+def _attribute_models(resource_type: type[Resource[Any]]) -> dict[str, tuple[str, type[BaseModel] | None]]:
+    return {
+        field.serialization_alias or name: (name, _model_class(field.annotation))
+        for name, field in resource_type.model_fields.items()
+    }
+
+
+def _to_resource(resource_type: type[ResourceT], resource: dict[str, Any]) -> ResourceT:
+    """
+    Create a resource model from a SCIM dict of the dict mapping.
+
+    Only the complex attributes are validated, each by the first model its type allows. Validating the
+    whole resource would also try every model of a union and normalize the names of all attributes,
+    which takes longer than mapping the object.
+    Args:
+        resource_type: Pydantic model of the resource
+        resource: SCIM resource as dict
+    Returns:
+        The resource model
+    Raises:
+        ValueError: If an attribute is not valid
+    """
+    attribute_models = _attribute_models(resource_type)
+    model = cast(ResourceT, resource_type.model_construct(schemas=resource["schemas"]))
+    for key, value in resource.items():
+        if key not in attribute_models:
+            continue
+
+        name, model_class = attribute_models[key]
+        if model_class is not None:
+            value = (
+                [model_class.model_validate(item) for item in value]
+                if isinstance(value, list)
+                else model_class.model_validate(value)
+            )
+        setattr(model, name, value)
+
+    return model
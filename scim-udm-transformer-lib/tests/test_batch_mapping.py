@@ -0,0 +1,209 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import asyncio
+import json
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation.exceptions import MappingError
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore, IdCache
+from univention.scim.transformation.scim2udm import ScimToUdmMapper
+from univention.scim.transformation.udm2scim import UdmToScimMapper
+
+
+BASE_URL = "https://scim.unit.test/scim/v2"
+
+
+class CountingIdCache(IdCache):
+    def __init__(self, users: list[CacheItem], groups: list[CacheItem]) -> None:
+        self.users = CacheItemStore()
+        self.groups = CacheItemStore()
+        for user in users:
+            self.users.add(user)
+        for group in groups:
+            self.groups.add(group)
+        self.lookups: Counter[str] = Counter()
+
+    def get_user(self, key: str) -> CacheItem | None:
+        self.lookups[key] += 1
+        return self.users.get(key)
+
+    def get_group(self, key: str) -> CacheItem | None:
+        self.lookups[key] += 1
+        return self.groups.get(key)
+
+
+members = [CacheItem(f"uid=member{i},cn=users,dc=example,dc=test", uuid.uuid4(), f"Member {i}") for i in range(3)]
+nested = CacheItem("cn=nested,cn=groups,dc=example,dc=test", uuid.uuid4(), "nested")
+
+
+def udm_user(i: int) -> SimpleNamespace:
+    properties = {
+        "univentionObjectIdentifier": str(uuid.uuid4()),
+        "username": f"user{i}",
+        "firstname": "Jane",
+        "lastname": f"Doe {i}",
+        "mailPrimaryAddress": f"user{i}@example.test",
+        "phone": [f"{i}"],
+    }
+    return SimpleNamespace(dn=f"uid=user{i},cn=users,dc=example,dc=test", properties=properties, etag="1.0")
+
+
+def udm_group(i: int) -> SimpleNamespace:
+    properties = {
+        "univentionObjectIdentifier": str(uuid.uuid4()),
+        "name": f"group{i}",
+        "users": [member.dn for member in members] + ["uid=unknown,cn=users,dc=example,dc=test"],
+        "nestedGroup": [nested.dn],
+    }
+    return SimpleNamespace(dn=f"cn=group{i},cn=groups,dc=example,dc=test", properties=properties, etag="1.0")
+
+
+def invalid_object() -> SimpleNamespace:
+    return SimpleNamespace(dn="cn=invalid,dc=example,dc=test", properties={"username": "invalid", "name": "invalid"})
+
+
+@pytest.fixture
+def cache() -> CountingIdCache:
+    return CountingIdCache(members, [nested])
+
+
+@pytest.fixture
+def udm2scim(cache: CountingIdCache) -> UdmToScimMapper:
+    return UdmToScimMapper(cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions)
+
+
+def test_map_users(udm2scim: UdmToScimMapper) -> None:
+    udm_users = [udm_user(i) for i in range(5)]
+
+    users = udm2scim.map_users([*udm_users[:2], invalid_object(), *udm_users[2:]], BASE_URL)
+
+    assert users == [udm2scim.map_user(obj, BASE_URL) for obj in udm_users]
+
+
+def test_map_groups(udm2scim: UdmToScimMapper, cache: CountingIdCache) -> None:
+    udm_groups = [udm_group(i) for i in range(5)]
+    expected = [udm2scim.map_group(obj, BASE_URL) for obj in udm_groups]
+    cache.lookups.clear()
+
+    groups = udm2scim.map_groups([*udm_groups, invalid_object()], BASE_URL)
+
+    assert groups == expected
+    assert [member.value for member in groups[0].members] == [*(member.uuid for member in members), nested.uuid]
+    # Members shared by all groups are only looked up once per page
+    assert set(cache.lookups.values()) == {1}
+
+
+def test_map_users_without_objects(udm2scim: UdmToScimMapper) -> None:
+    assert udm2scim.map_users([]) == []
+    assert udm2scim.map_groups([]) == []
+    assert udm2scim.map_users_dict([]) == []
+
+
+def test_map_groups_without_cache() -> None:
+    udm2scim = UdmToScimMapper(user_type=UserWithExtensions, group_type=GroupWithExtensions)
+
+    groups = udm2scim.map_groups([udm_group(1)])
+
+    assert groups[0].members is None
+
+
+def test_map_dicts(udm2scim: UdmToScimMapper) -> None:
+    udm_users = [udm_user(i) for i in range(10)]
+    udm_groups = [udm_group(i) for i in range(10)]
+
+    users = udm2scim.map_users_dict([*udm_users, invalid_object()], BASE_URL)
+    groups = udm2scim.map_groups_dict([*udm_groups, invalid_object()], BASE_URL)
+
+    assert users == [json.loads(user.model_dump_json()) for user in udm2scim.map_users(udm_users, BASE_URL)]
+    assert groups == [json.loads(group.model_dump_json()) for group in udm2scim.map_groups(udm_groups, BASE_URL)]
+
+
+@pytest.mark.asyncio
+async def test_amap_groups(udm2scim: UdmToScimMapper, cache: CountingIdCache) -> None:
+    udm_groups = [udm_group(i) for i in range(5)]
+    expected = udm2scim.map_groups(udm_groups, BASE_URL)
+    cache.lookups.clear()
+
+    groups = await udm2scim.amap_groups([*udm_groups, invalid_object()], BASE_URL, max_concurrency=2)
+
+    assert groups == expected
+    assert await udm2scim.amap_group(udm_groups[0], BASE_URL) == expected[0]
+    assert await udm2scim.amap_groups_dict(udm_groups, BASE_URL) == udm2scim.map_groups_dict(udm_groups, BASE_URL)
+
+
+@pytest.mark.asyncio
+async def test_aget_users_bounded() -> None:
+    running = 0
+    max_running = 0
+
+    class SlowIdCache(CountingIdCache):
+        async def aget_user(self, key: str) -> CacheItem | None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return self.get_user(key)
+
+    slow_cache = SlowIdCache(members, [nested])
+    keys = [member.dn for member in members] * 2 + ["uid=unknown,cn=users,dc=example,dc=test"]
+
+    users = await slow_cache.aget_users(keys, max_concurrency=2)
+
+    assert users == {member.dn: member for member in members}
+    assert max_running == 2
+    assert set(slow_cache.lookups.values()) == {1}
+
+
+@pytest.mark.asyncio
+async def test_scim2udm_amap_group(udm2scim: UdmToScimMapper, cache: CountingIdCache) -> None:
+    scim2udm = ScimToUdmMapper(cache=cache, user_type=UserWithExtensions, group_type=GroupWithExtensions)
+    group = udm2scim.map_group(udm_group(1), BASE_URL)
+    group_dict = json.loads(group.model_dump_json())
+
+    properties = await scim2udm.amap_group(group)
+
+    assert properties == scim2udm.map_group(group)
+    assert properties["users"] == [member.dn for member in members]
+    assert properties["nestedGroup"] == [nested.dn]
+    assert await scim2udm.amap_group_dict(group_dict) == scim2udm.map_group_dict(group_dict)
+
+    group_dict["members"].append({"type": "User", "value": str(uuid.uuid4())})
+    with pytest.raises(MappingError):
+        await scim2udm.amap_group_dict(group_dict)
+
+
+@pytest.mark.asyncio
+async def test_amap_group_filter_members(cache: CountingIdCache) -> None:
+    scim2udm = ScimToUdmMapper(cache=cache)
+
+    assert await scim2udm.amap_group_filter(f'members.value eq "{members[0].uuid}"') == f"users={members[0].dn}"
+    assert await scim2udm.amap_group_filter(f"members[value eq {nested.uuid}]") == f"nestedGroup={nested.dn}"
+    assert await scim2udm.amap_group_filter(f'members.value eq "{uuid.uuid4()}"') is None
+    assert await scim2udm.amap_group_filter('displayName eq "Admins"') == "name=Admins"
+
+    assert scim2udm.is_member_filter(' MEMBERS[VALUE EQ "1234"] ')
+    assert not scim2udm.is_member_filter('members.display eq "1234"')
+    with pytest.raises(ValueError):
+        await ScimToUdmMapper().amap_group_filter('members.value eq "1234"')
+
+
+@pytest.mark.asyncio
+async def test_amap_groups_without_members(udm2scim: UdmToScimMapper, cache: CountingIdCache) -> None:
+    scim2udm = ScimToUdmMapper(cache=cache)
+
+    groups = await udm2scim.amap_groups([udm_group(i) for i in range(3)], BASE_URL, resolve_members=False)
+
+    assert [group.display_name for group in groups] == ["group0", "group1", "group2"]
+    assert all(group.members is None for group in groups)
+    assert not cache.lookups
+    assert scim2udm.group_members_requested()
+    assert scim2udm.group_members_requested(["members.value"])
+    assert not scim2udm.group_members_requested(["displayName"])
+    assert not scim2udm.group_members_requested(excluded_attributes=["members"])
@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import base64
+import json
+import uuid
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore, IdCache
+from univention.scim.transformation.scim2udm import ScimToUdmMapper
+from univention.scim.transformation.udm2scim import UdmToScimMapper
+
+
+class StaticIdCache(IdCache):
+    def __init__(self, users: list[CacheItem], groups: list[CacheItem]) -> None:
+        self.users = CacheItemStore()
+        self.groups = CacheItemStore()
+        for user in users:
+            self.users.add(user)
+        for group in groups:
+            self.groups.add(group)
+
+    def get_user(self, key: str) -> CacheItem | None:
+        return self.users.get(key)
+
+    def get_group(self, key: str) -> CacheItem | None:
+        return self.groups.get(key)
+
+
+user_properties = {
+    "univentionObjectIdentifier": str(uuid.uuid4()),
+    "username": "test_user",
+    "description": "This is a test user",
+    "disabled": True,
+    "displayName": "Test User",
+    "title": "CEO",
+    "employeeNumber": "99999",
+    "employeeType": "Cheffe",
+    "preferredLanguage": "EN",
+    "firstname": "Jane",
+    "lastname": "Doe",
+    "mailPrimaryAddress": "primary@testmail.org",
+    "mailAlternativeAddress": ["alternative2@testmail.org", "alternative42@testmail.org"],
+    "e-mail": ["other5@testmail.org"],
+    "phone": ["1234", "2345"],
+    "mobileTelephoneNumber": ["3456"],
+    "homeTelephoneNumber": [],
+    "pagerTelephoneNumber": None,
+    "street": "The Univention Way 1",
+    "city": "Uni",
+    "postcode": "11111",
+    "country": "Germany",
+    "state": "TheLand",
+    "homePostalAddress": [{"street": "Home Stree 42", "city": "Home", "zipcode": "22222"}],
+    "userCertificate": base64.b64encode(b"data").decode("utf-8"),
+    "certificateSubjectCommonName": "Test User cert",
+    "guardianRoles": ["Role1", "Role2"],
+    "guardianInheritedRoles": ["InheritedRole1"],
+    "PasswordRecoveryEmail": "recovery@testmail.org",
+    "primaryOrgUnit": "Sales",
+    "secondaryOrgUnits": ["Marketing", "CustomerService"],
+    "scimRoles": json.dumps([{"type": "test", "value": "admin"}, {"type": "test2", "value": "user", "primary": True}]),
+    "testExternalId": "external",
+    "createTimestamp": 1700000000,
+    "modifyTimestamp": "2025-01-01T12:00:00+00:00",
+}
+
+member = CacheItem("uid=member,cn=users,dc=example,dc=test", uuid.uuid4(), "Member")
+nested = CacheItem("cn=nested,cn=groups,dc=example,dc=test", uuid.uuid4(), "nested")
+
+group_properties = {
+    "univentionObjectIdentifier": str(uuid.uuid4()),
+    "name": "test_group",
+    "description": "This is a test group",
+    "users": [member.dn, "uid=unknown,cn=users,dc=example,dc=test"],
+    "nestedGroup": [nested.dn],
+    "guardianMemberRoles": ["app:namespace:role"],
+    "testExternalId": "external",
+}
+
+
+@pytest.fixture
+def cache() -> StaticIdCache:
+    return StaticIdCache([member], [nested])
+
+
+@pytest.fixture
+def udm2scim(cache: StaticIdCache) -> UdmToScimMapper:
+    return UdmToScimMapper(
+        cache=cache,
+        user_type=UserWithExtensions,
+        group_type=GroupWithExtensions,
+        external_id_user_mapping="testExternalId",
+        external_id_group_mapping="testExternalId",
+        roles_user_mapping="scimRoles",
+    )
+
+
+@pytest.fixture
+def scim2udm(cache: StaticIdCache) -> ScimToUdmMapper:
+    return ScimToUdmMapper(
+        cache=cache,
+        external_id_user_mapping="testExternalId",
+        external_id_group_mapping="testExternalId",
+        roles_user_mapping="scimRoles",
+        user_type=UserWithExtensions,
+        group_type=GroupWithExtensions,
+    )
+
+
+def udm_object(dn: str, properties: dict[str, Any]) -> SimpleNamespace:
+    return SimpleNamespace(dn=dn, properties=properties, etag="1.0")
+
+
+@pytest.mark.parametrize(
+    "properties",
+    [
+        user_properties,
+        {"univentionObjectIdentifier": str(uuid.uuid4()), "username": "minimal", "lastname": "Doe"},
+        {**user_properties, "firstname": None, "mailPrimaryAddress": None, "e-mail": None, "street": None},
+    ],
+)
+def test_map_user_dict(udm2scim: UdmToScimMapper, properties: dict[str, Any]) -> None:
+    udm_user = udm_object("uid=test_user,cn=users,dc=example,dc=test", properties)
+
+    user = udm2scim.map_user_dict(udm_user, "https://scim.unit.test/scim/v2")
+
+    assert user == json.loads(udm2scim.map_user(udm_user, "https://scim.unit.test/scim/v2").model_dump_json())
+
+
+def test_map_group_dict(udm2scim: UdmToScimMapper) -> None:
+    udm_group = udm_object("cn=test_group,cn=groups,dc=example,dc=test", group_properties)
+
+    group = udm2scim.map_group_dict(udm_group, "https://scim.unit.test/scim/v2")
+
+    assert [x["value"] for x in group["members"]] == [member.uuid, nested.uuid]
+    assert group == json.loads(udm2scim.map_group(udm_group, "https://scim.unit.test/scim/v2").model_dump_json())
+
+
+@pytest.mark.parametrize(
+    "properties",
+    [
+        user_properties,
+        {"univentionObjectIdentifier": str(uuid.uuid4()), "username": "minimal", "lastname": "Doe"},
+    ],
+)
+def test_map_user_validated(udm2scim: UdmToScimMapper, properties: dict[str, Any]) -> None:
+    user = udm2scim.map_user(udm_object("uid=test_user,cn=users,dc=example,dc=test", properties))
+
+    # The model is created from the dict mapping, it has to be the same as validating the dict
+    validated = UserWithExtensions.model_validate(user.model_dump(mode="json", by_alias=True, exclude_none=True))
+    assert user.model_dump() == validated.model_dump()
+
+
+def test_map_group_validated(udm2scim: UdmToScimMapper) -> None:
+    group = udm2scim.map_group(udm_object("cn=test_group,cn=groups,dc=example,dc=test", group_properties))
+
+    validated = GroupWithExtensions.model_validate(group.model_dump(mode="json", by_alias=True, exclude_none=True))
+    assert group.model_dump() == validated.model_dump()
+
+
+def test_map_user_dict_missing_id(udm2scim: UdmToScimMapper) -> None:
+    with pytest.raises(ValueError):
+        udm2scim.map_user_dict(udm_object("uid=test_user,cn=users,dc=example,dc=test", {"username": "test_user"}))
+
+
+def test_map_user_dict_reverse(udm2scim: UdmToScimMapper, scim2udm: ScimToUdmMapper) -> None:
+    user = udm2scim.map_user(udm_object("uid=test_user,cn=users,dc=example,dc=test", user_properties))
+    user.password = "secret"
+
+    properties = scim2udm.map_user_dict(user.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+    assert properties == scim2udm.map_user(user)
+
+
+def test_map_user_dict_reverse_empty(scim2udm: ScimToUdmMapper) -> None:
+    user = UserWithExtensions(user_name="test_user")
+
+    properties = scim2udm.map_user_dict(user.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+    assert properties == scim2udm.map_user(user)
+
+
+def test_map_group_dict_reverse(udm2scim: UdmToScimMapper, scim2udm: ScimToUdmMapper) -> None:
+    group = udm2scim.map_group(udm_object("cn=test_group,cn=groups,dc=example,dc=test", group_properties))
+
+    properties = scim2udm.map_group_dict(group.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+    assert properties["users"] == [member.dn]
+    assert properties["nestedGroup"] == [nested.dn]
+    assert properties == scim2udm.map_group(group)
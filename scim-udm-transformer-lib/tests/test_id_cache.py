@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import uuid
+
+import pytest
+
+from univention.scim.transformation.id_cache import CacheItem, CacheItemStore, pack_uuid, split_dn, unpack_uuid
+
+
+@pytest.mark.parametrize(
+    "dn,expected",
+    [
+        ("uid=test,cn=users,dc=example,dc=test", ("uid=test", "cn=users,dc=example,dc=test")),
+        ("cn=Doe\\, John,cn=users,dc=test", ("cn=Doe\\, John", "cn=users,dc=test")),
+        ("cn=back\\\\,cn=users,dc=test", ("cn=back\\\\", "cn=users,dc=test")),
+        ("dc=test", ("dc=test", "")),
+    ],
+)
+def test_split_dn(dn: str, expected: tuple[str, str]) -> None:
+    assert split_dn(dn) == expected
+
+
+def test_pack_uuid() -> None:
+    value = str(uuid.uuid4())
+
+    packed = pack_uuid(value)
+    assert isinstance(packed, bytes)
+    assert len(packed) == 16
+    assert unpack_uuid(packed) == value
+
+    # Non canonical values must survive unchanged
+    assert pack_uuid(value.upper()) == value.upper()
+    assert pack_uuid("not-a-uuid") == "not-a-uuid"
+
+
+def test_cache_item() -> None:
+    value = str(uuid.uuid4())
+    item = CacheItem("uid=test,cn=users,dc=example,dc=test", value, "Test User")
+
+    assert item.dn == "uid=test,cn=users,dc=example,dc=test"
+    assert item.uuid == value
+    assert item.display_name == "Test User"
+    assert not hasattr(item, "__dict__")
+
+
+def test_cache_item_shares_dn_suffix() -> None:
+    first = CacheItem("uid=first,cn=users,dc=example,dc=test", str(uuid.uuid4()), "First")
+    second = CacheItem("uid=second," + ",".join(["cn=users", "dc=example", "dc=test"]), str(uuid.uuid4()), "Second")
+
+    assert first._suffix is second._suffix
+
+
+def test_cache_item_store() -> None:
+    value = str(uuid.uuid4())
+    item = CacheItem("uid=test,cn=users,dc=example,dc=test", value, "Test User")
+    store = CacheItemStore()
+    store.add(item)
+
+    assert store.get(item.dn) is item
+    assert store.get(value) is item
+    assert store.get("uid=other,cn=users,dc=example,dc=test") is None
+    assert store.get(str(uuid.uuid4())) is None
+    assert len(store) == 1
+    assert list(store) == [item]
+
+    store.remove(item)
+    assert store.get(item.dn) is None
+    assert store.get(value) is None
+    assert len(store) == 0
+
+
+def test_cache_item_store_replace() -> None:
+    value = str(uuid.uuid4())
+    store = CacheItemStore()
+    store.add(CacheItem("uid=test,cn=users,dc=example,dc=test", value, "Old"))
+    store.add(CacheItem("uid=test,cn=users,dc=example,dc=test", value, "New"))
+
+    replaced = store.get(value)
+    assert len(store) == 1
+    assert replaced is not None
+    assert replaced.display_name == "New"
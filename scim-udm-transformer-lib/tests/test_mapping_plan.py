@@ -0,0 +1,100 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+from collections.abc import Generator
+from types import SimpleNamespace
+from typing import Annotated
+
+import pytest
+from scim2_models import EnterpriseUser, Extension, Required
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.server.models.user import User
+from univention.scim.transformation.mapping_plan import (
+    ENTERPRISE_USER_SCHEMA,
+    EXTENSION_MAPPINGS,
+    UNIVENTION_GROUP_SCHEMA,
+    AttributeMapping,
+    compile_plan,
+    register_extension_mapping,
+)
+from univention.scim.transformation.scim2udm import ScimToUdmMapper
+from univention.scim.transformation.udm2scim import UdmToScimMapper
+
+
+CUSTOM_SCHEMA = "urn:ietf:params:scim:schemas:extension:Custom:1.0:User"
+
+
+class CustomUser(Extension):
+    schemas: Annotated[list[str], Required.true] = [CUSTOM_SCHEMA]
+
+    cost_center: str | None = None
+
+
+@pytest.fixture
+def custom_mapping() -> Generator[None, None, None]:
+    register_extension_mapping(CUSTOM_SCHEMA, (AttributeMapping("costCenter", "cost_center"),))
+    yield
+    del EXTENSION_MAPPINGS[CUSTOM_SCHEMA]
+    compile_plan.cache_clear()
+
+
+def test_compile_plan() -> None:
+    plan = compile_plan(UserWithExtensions)
+
+    assert plan.schemas == (
+        "urn:ietf:params:scim:schemas:core:2.0:User",
+        ENTERPRISE_USER_SCHEMA,
+        "urn:ietf:params:scim:schemas:extension:Univention:1.0:User",
+        "urn:ietf:params:scim:schemas:extension:UniventionUser:2.0:User",
+    )
+    assert [extension.schema for extension in plan.extensions] == list(plan.schemas[1:])
+    assert plan.extensions[0].attribute == "EnterpriseUser"
+    assert [(step.udm_property, step.attribute, step.alias) for step in plan.extensions[0].steps] == [
+        ("employeeNumber", "employee_number", "employeeNumber")
+    ]
+    # Plans are only compiled once per resource type
+    assert compile_plan(UserWithExtensions) is plan
+
+
+def test_compile_plan_group() -> None:
+    plan = compile_plan(GroupWithExtensions)
+
+    assert [extension.schema for extension in plan.extensions] == [UNIVENTION_GROUP_SCHEMA]
+    assert [step.alias for step in plan.extensions[0].steps] == ["memberRoles", "description"]
+
+
+def test_compile_plan_unknown_extension() -> None:
+    plan = compile_plan(User[EnterpriseUser | CustomUser])
+
+    assert CUSTOM_SCHEMA in plan.schemas
+    assert [extension.schema for extension in plan.extensions] == [ENTERPRISE_USER_SCHEMA]
+
+
+def test_compile_plan_invalid_attribute() -> None:
+    register_extension_mapping(CUSTOM_SCHEMA, (AttributeMapping("costCenter", "unknown"),))
+    try:
+        with pytest.raises(ValueError):
+            UdmToScimMapper(user_type=User[CustomUser])
+    finally:
+        del EXTENSION_MAPPINGS[CUSTOM_SCHEMA]
+        compile_plan.cache_clear()
+
+
+@pytest.mark.usefixtures("custom_mapping")
+def test_custom_extension() -> None:
+    user_type = User[EnterpriseUser | CustomUser]
+    udm_user = SimpleNamespace(
+        dn="uid=test,cn=users,dc=example,dc=test",
+        properties={"univentionObjectIdentifier": "id", "username": "test", "costCenter": "4711"},
+    )
+
+    user = UdmToScimMapper(user_type=user_type).map_user(udm_user)
+    user_dict = UdmToScimMapper(user_type=user_type).map_user_dict(udm_user)
+
+    assert user[CustomUser].cost_center == "4711"
+    assert user_dict[CUSTOM_SCHEMA] == {"costCenter": "4711"}
+
+    scim2udm = ScimToUdmMapper(user_type=user_type)
+    assert scim2udm.map_user(user)["costCenter"] == "4711"
+    assert scim2udm.map_user_dict(user_dict)["costCenter"] == "4711"
@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import pytest
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation.mapping_spec import (
+    REQUIRED_PROPERTIES,
+    Attribute,
+    CompiledMapping,
+    MappingSpec,
+    MultiValued,
+    TypedValue,
+    compile_spec,
+    group_spec,
+    user_spec,
+)
+from univention.scim.transformation.scim2udm import ScimToUdmMapper
+
+
+@pytest.fixture
+def user_mapping() -> CompiledMapping:
+    return compile_spec(user_spec(external_id_property="testExternalId"), UserWithExtensions)
+
+
+@pytest.fixture
+def group_mapping() -> CompiledMapping:
+    return compile_spec(group_spec(), GroupWithExtensions)
+
+
+@pytest.mark.parametrize(
+    "scim_filter,udm_filter",
+    [
+        ('id eq "1234"', "univentionObjectIdentifier=1234"),
+        ("id eq 1234", "univentionObjectIdentifier=1234"),
+        ('externalId eq "ext"', "testExternalId=ext"),
+        ('userName eq "test"', "username=test"),
+        ('USERNAME EQ "test"', "username=test"),
+        ('  displayName eq "Test \\"User\\""  ', 'displayName=Test "User"'),
+        ('name.givenName eq "Jane"', "firstname=Jane"),
+        ('urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber eq "42"', "employeeNumber=42"),
+    ],
+)
+def test_user_filter(user_mapping: CompiledMapping, scim_filter: str, udm_filter: str) -> None:
+    assert user_mapping.udm_filter(scim_filter) == udm_filter
+
+
+@pytest.mark.parametrize(
+    "scim_filter",
+    [
+        "active eq true",
+        'userName co "test"',
+        'userName eq "a" and title eq "b"',
+        'password eq "secret"',
+        'unknown eq "value"',
+    ],
+)
+def test_user_filter_not_supported(user_mapping: CompiledMapping, scim_filter: str) -> None:
+    with pytest.raises(ValueError, match="Filter query not supported yet"):
+        user_mapping.udm_filter(scim_filter)
+
+
+def test_user_filter_username_mapping() -> None:
+    scim2udm = ScimToUdmMapper(username_mapping="univentionFreeAttribute1", user_type=UserWithExtensions)
+
+    assert scim2udm.map_user_filter('userName eq "jane"') == "univentionFreeAttribute1=jane"
+    assert scim2udm.map_user(UserWithExtensions(user_name="jane"))["univentionFreeAttribute1"] == "jane"
+
+
+def test_group_filter(group_mapping: CompiledMapping) -> None:
+    assert group_mapping.udm_filter('displayName eq "Admins"') == "name=Admins"
+
+    # externalId is only supported if a mapping is configured
+    with pytest.raises(ValueError):
+        group_mapping.udm_filter('externalId eq "ext"')
+    with pytest.raises(ValueError):
+        group_mapping.udm_filter('userName eq "test"')
+
+
+def test_udm_properties_all(user_mapping: CompiledMapping) -> None:
+    assert user_mapping.udm_properties() is None
+    assert user_mapping.udm_properties([], []) is None
+
+
+def test_udm_properties_attributes(user_mapping: CompiledMapping) -> None:
+    properties = user_mapping.udm_properties(
+        ["userName", "name.givenName", "emails", "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User"]
+    )
+
+    assert properties == [
+        *REQUIRED_PROPERTIES,
+        "username",
+        "firstname",
+        "lastname",
+        "mailPrimaryAddress",
+        "mailAlternativeAddress",
+        "e-mail",
+        "employeeNumber",
+    ]
+
+
+def test_udm_properties_excluded_attributes(user_mapping: CompiledMapping) -> None:
+    properties = user_mapping.udm_properties(excluded_attributes=["phoneNumbers", "addresses", "x509Certificates"])
+
+    assert properties is not None
+    assert "username" in properties
+    assert "PasswordRecoveryEmail" in properties
+    assert "phone" not in properties
+    assert "street" not in properties
+    assert "userCertificate" not in properties
+    # Never returned, so never requested
+    assert "password" not in properties
+
+
+def test_udm_properties_group(group_mapping: CompiledMapping) -> None:
+    assert group_mapping.udm_properties(["displayName"]) == [*REQUIRED_PROPERTIES, "name"]
+    assert group_mapping.udm_properties(["members.value"]) == [*REQUIRED_PROPERTIES, "users", "nestedGroup"]
+
+
+def test_custom_spec() -> None:
+    spec = MappingSpec(
+        attributes=(
+            Attribute("id", "univentionObjectIdentifier"),
+            Attribute("userName", "uid", to_scim=str.lower),
+            MultiValued("phoneNumbers", (TypedValue("work", "telephoneNumber"), TypedValue("fax", "fax"))),
+        )
+    )
+    mapping = compile_spec(spec, UserWithExtensions)
+
+    user = mapping.to_scim({"univentionObjectIdentifier": "1234", "uid": "Test", "telephoneNumber": ["1"]})
+
+    assert user == {"id": "1234", "userName": "test", "phoneNumbers": [{"value": "1", "type": "work"}]}
+    assert mapping.to_udm(user) == {
+        "univentionObjectIdentifier": "1234",
+        "uid": "test",
+        "telephoneNumber": ["1"],
+        "fax": [],
+        "employeeNumber": None,
+        "description": None,
+        "PasswordRecoveryEmail": None,
+        "primaryOrgUnit": None,
+        "secondaryOrgUnits": [],
+    }
+    # Converted attributes can not be filtered, the UDM value differs
+    assert mapping.udm_filter("id eq 1234") == "univentionObjectIdentifier=1234"
+    with pytest.raises(ValueError):
+        mapping.udm_filter("userName eq test")
@@ -0,0 +1,181 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# SPDX-FileCopyrightText: 2025 Univention GmbH
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from univention.scim.server.models.types import GroupWithExtensions, UserWithExtensions
+from univention.scim.transformation.id_cache import CacheItem
+from univention.scim.transformation.membership_index import MembershipIndex
+from univention.scim.transformation.udm2scim import UdmToScimMapper
+
+
+BASE_URL = "https://scim.unit.test/scim/v2"
+USER_DN = "uid=user,cn=users,dc=example,dc=test"
+
+
+def group_item(name: str) -> CacheItem:
+    return CacheItem(f"cn={name},cn=groups,dc=example,dc=test", uuid.uuid4(), name)
+
+
+def udm_group(group: CacheItem, users: list[str], nested_groups: list[str]) -> SimpleNamespace:
+    properties = {
+        "univentionObjectIdentifier": group.uuid,
+        "name": group.display_name,
+        "users": users,
+        "nestedGroup": nested_groups,
+    }
+    return SimpleNamespace(dn=group.dn, properties=properties, etag="1.0")
+
+
+def udm_user() -> SimpleNamespace:
+    properties = {"univentionObjectIdentifier": str(uuid.uuid4()), "username": "user"}
+    return SimpleNamespace(dn=USER_DN, properties=properties, etag="1.0")
+
+
+@pytest.fixture
+def groups() -> dict[str, CacheItem]:
+    return {name: group_item(name) for name in ("direct", "other", "parent", "grandparent")}
+
+
+@pytest.fixture
+def index(groups: dict[str, CacheItem]) -> MembershipIndex:
+    index = MembershipIndex()
+    index.replace(
+        [
+            (groups["direct"], [USER_DN]),
+            (groups["other"], [USER_DN.upper()]),
+            (groups["parent"], [groups["direct"].dn]),
+            (groups["grandparent"], [groups["parent"].dn, groups["other"].dn]),
+        ]
+    )
+    return index
+
+
+def test_get_groups(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    assert index.complete
+    assert index.get_groups(USER_DN) == [
+        (groups["direct"], True),
+        (groups["other"], True),
+        (groups["grandparent"], False),
+        (groups["parent"], False),
+    ]
+    assert index.get_groups(groups["parent"].dn) == [(groups["grandparent"], True)]
+    assert index.get_groups("uid=unknown,cn=users,dc=example,dc=test") == []
+
+
+def test_get_groups_cycle(groups: dict[str, CacheItem]) -> None:
+    index = MembershipIndex()
+    index.set_group(groups["parent"], [USER_DN, groups["direct"].dn])
+    index.set_group(groups["direct"], [groups["parent"].dn])
+
+    assert index.get_groups(USER_DN) == [(groups["parent"], True), (groups["direct"], False)]
+
+
+def test_set_group(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    new_group = group_item("new")
+    index.set_group(new_group, [USER_DN])
+    index.set_group(groups["direct"], [])
+
+    assert [group.display_name for group, _ in index.get_groups(USER_DN)] == ["new", "other", "grandparent"]
+    assert len(index) == 5
+
+
+def test_remove_group(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    index.remove_group(groups["parent"].dn)
+
+    assert index.get_groups(USER_DN) == [
+        (groups["direct"], True),
+        (groups["other"], True),
+        (groups["grandparent"], False),
+    ]
+    assert index.get_groups(groups["direct"].dn) == []
+
+
+def test_remove_member(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    index.remove_member(USER_DN)
+
+    assert index.get_groups(USER_DN) == []
+    index.set_group(groups["direct"], [USER_DN])
+    assert index.get_groups(USER_DN)[0] == (groups["direct"], True)
+
+
+def test_map_user_groups(groups: dict[str, CacheItem]) -> None:
+    index = MembershipIndex()
+    mapper = UdmToScimMapper(user_type=UserWithExtensions, group_type=GroupWithExtensions, membership_index=index)
+
+    mapper.map_groups(
+        [udm_group(groups["direct"], [USER_DN], []), udm_group(groups["parent"], [], [groups["direct"].dn])]
+    )
+    # Not all groups are known yet
+    assert mapper.map_user(udm_user(), BASE_URL).groups is None
+    assert "groups" not in mapper.map_user_dict(udm_user(), BASE_URL)
+
+    index.complete = True
+    user = mapper.map_user(udm_user(), BASE_URL)
+
+    assert [(group.value, group.display, group.type) for group in user.groups] == [
+        (groups["direct"].uuid, "direct", "direct"),
+        (groups["parent"].uuid, "parent", "indirect"),
+    ]
+    assert user.groups[0].ref == f"{BASE_URL}/Groups/{groups['direct'].uuid}"
+    user_dict = mapper.map_user_dict(udm_user(), BASE_URL)
+    assert user_dict["groups"] == user.model_dump(mode="json", by_alias=True)["groups"]
+
+
+@pytest.mark.asyncio
+async def test_amap_group_updates_index(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    mapper = UdmToScimMapper(user_type=UserWithExtensions, group_type=GroupWithExtensions, membership_index=index)
+
+    await mapper.amap_group(udm_group(groups["other"], [], []))
+
+    assert [group.display_name for group, _ in index.get_groups(USER_DN)] == ["direct", "grandparent", "parent"]
+
+
+def test_update_members(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    index.update_members(groups["other"].dn, [groups["direct"].dn], [USER_DN])
+
+    assert index.get_groups(USER_DN) == [
+        (groups["direct"], True),
+        (groups["grandparent"], False),
+        (groups["other"], False),
+        (groups["parent"], False),
+    ]
+
+    # Groups which are not indexed are not partially added
+    unknown = group_item("unknown")
+    index.update_members(unknown.dn, [USER_DN], [])
+    assert unknown not in [group for group, _ in index.get_groups(USER_DN)]
+
+
+def test_replace_keeps_changes_made_while_loading(index: MembershipIndex, groups: dict[str, CacheItem]) -> None:
+    # The groups are read when the load starts, so they miss the changes made while loading
+    loaded = [
+        (groups["direct"], [USER_DN]),
+        (groups["other"], [USER_DN]),
+        (groups["parent"], [groups["direct"].dn]),
+        (groups["grandparent"], [groups["parent"].dn, groups["other"].dn]),
+    ]
+    generation = index.begin_load()
+    new_group = group_item("new")
+    index.set_group(new_group, [USER_DN])
+    index.update_members(groups["grandparent"].dn, [], [groups["parent"].dn])
+    index.remove_group(groups["other"].dn)
+    index.replace(loaded, since=generation)
+    index.end_load()
+
+    assert index.get_groups(USER_DN) == [(groups["direct"], True), (new_group, True), (groups["parent"], False)]
+
+    # Changes made before the load started are not re-applied
+    generation = index.begin_load()
+    index.replace(loaded, since=generation)
+    index.end_load()
+
+    assert index.get_groups(USER_DN) == [
+        (groups["direct"], True),
+        (groups["other"], True),
+        (groups["grandparent"], False),
+        (groups["parent"], False),
+    ]
@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: AGPL-3.0-only
 # SPDX-FileCopyrightText: 2025 Univention GmbH
 
+import uuid
+from types import SimpleNamespace
 from typing import Any
 
 from scim2_models import Address, PhoneNumber, Role, X509Certificate
@@ -9,6 +11,14 @@ from univention.scim.server.models.user import Email, Name
 from univention.scim.transformation.udm2scim import UdmToScimMapper
 
 
+def map_user(udm2scim_mapper: UdmToScimMapper, props: dict[str, Any]) -> Any:
+    udm_user = SimpleNamespace(
+        dn="uid=test,cn=users,dc=example,dc=test",
+        properties={"univentionObjectIdentifier": str(uuid.uuid4()), "username": "test", **props},
+    )
+    return udm2scim_mapper.map_user(udm_user)
+
+
 def test_map_emails(udm2scim_mapper: UdmToScimMapper) -> None:
     props = {
         "mailPrimaryAddress": "test@test.de",
@@ -20,14 +30,14 @@ def test_map_emails(udm2scim_mapper: UdmToScimMapper) -> None:
         Email(value="test.alt@test.de", type="alias", primary=False),
         Email(value="test.two@test.de", type="other", primary=False),
     ]
-    emails = udm2scim_mapper._map_emails(props)
+    emails = map_user(udm2scim_mapper, props).emails
 
     assert emails == expected_emails
 
 
 def test_map_emails_empty(udm2scim_mapper: UdmToScimMapper) -> None:
     props: dict[str, Any | None] = {"mailPrimaryAddress": None, "mailAlternativeAddress": [], "e-mail": []}
-    emails = udm2scim_mapper._map_emails(props)
+    emails = map_user(udm2scim_mapper, props).emails
 
     assert emails == []
 
@@ -38,7 +48,7 @@ def test_map_emails_none(udm2scim_mapper: UdmToScimMapper) -> None:
         "mailAlternativeAddress": None,
         "e-mail": None,
     }
-    emails = udm2scim_mapper._map_emails(props)
+    emails = map_user(udm2scim_mapper, props).emails
 
     assert emails is None
 
@@ -56,7 +66,7 @@ def test_map_phone_numbers(udm2scim_mapper: UdmToScimMapper) -> None:
         PhoneNumber(value="3333333", type="home"),
         PhoneNumber(value="4444444", type="pager"),
     ]
-    phones = udm2scim_mapper._map_phone_numbers(props)
+    phones = map_user(udm2scim_mapper, props).phone_numbers
 
     assert phones == expected_phones
 
@@ -68,7 +78,7 @@ def test_map_phone_numbers_empty(udm2scim_mapper: UdmToScimMapper) -> None:
         "homeTelephoneNumber": [],
         "pagerTelephoneNumber": [],
     }
-    phones = udm2scim_mapper._map_phone_numbers(props)
+    phones = map_user(udm2scim_mapper, props).phone_numbers
 
     assert phones == []
 
@@ -80,7 +90,7 @@ def test_map_phone_numbers_none(udm2scim_mapper: UdmToScimMapper) -> None:
         "homeTelephoneNumber": None,
         "pagerTelephoneNumber": None,
     }
-    phones = udm2scim_mapper._map_phone_numbers(props)
+    phones = map_user(udm2scim_mapper, props).phone_numbers
 
     assert phones is None
 
@@ -120,7 +130,7 @@ def test_map_addresses(udm2scim_mapper: UdmToScimMapper) -> None:
             type="home",
         ),
     ]
-    addresses = udm2scim_mapper._map_addresses(props)
+    addresses = map_user(udm2scim_mapper, props).addresses
 
     assert addresses == expected_addresses
 
@@ -134,7 +144,7 @@ def test_map_addresses_empty(udm2scim_mapper: UdmToScimMapper) -> None:
         "state": None,
         "homePostalAddress": [],
     }
-    addresses = udm2scim_mapper._map_addresses(props)
+    addresses = map_user(udm2scim_mapper, props).addresses
 
     assert addresses == []
 
@@ -148,7 +158,7 @@ def test_map_addresses_none(udm2scim_mapper: UdmToScimMapper) -> None:
         "state": None,
         "homePostalAddress": None,
     }
-    addresses = udm2scim_mapper._map_addresses(props)
+    addresses = map_user(udm2scim_mapper, props).addresses
 
     assert addresses is None
 
@@ -159,21 +169,21 @@ def test_map_roles(udm2scim_mapper: UdmToScimMapper) -> None:
         Role(value="testRoleDirect", type="guardian-direct"),
         Role(value="testRoleIndirect", type="guardian-indirect"),
     ]
-    roles = udm2scim_mapper._map_roles(props)
+    roles = map_user(udm2scim_mapper, props).roles
 
     assert roles == expected_roles
 
 
 def test_map_roles_empty(udm2scim_mapper: UdmToScimMapper) -> None:
     props: dict[str, list[str]] = {"guardianRoles": [], "guardianInheritedRoles": []}
-    roles = udm2scim_mapper._map_roles(props)
+    roles = map_user(udm2scim_mapper, props).roles
 
     assert roles == []
 
 
 def test_map_roles_none(udm2scim_mapper: UdmToScimMapper) -> None:
     props = {"guardianRoles": None, "guardianInheritedRoles": None}
-    roles = udm2scim_mapper._map_roles(props)
+    roles = map_user(udm2scim_mapper, props).roles
 
     assert roles is None
 
@@ -185,14 +195,14 @@ def test_map_username(udm2scim_mapper: UdmToScimMapper) -> None:
         family_name="User",
         formatted="Test User",
     )
-    name = udm2scim_mapper._map_username(props)
+    name = map_user(udm2scim_mapper, props).name
 
     assert name == expected_name
 
 
 def test_map_username_none(udm2scim_mapper: UdmToScimMapper) -> None:
     props = {"firstname": None, "lastname": None}
-    name = udm2scim_mapper._map_username(props)
+    name = map_user(udm2scim_mapper, props).name
 
     assert name is None
 
@@ -200,13 +210,13 @@ def test_map_username_none(udm2scim_mapper: UdmToScimMapper) -> None:
 def test_map_certificates(udm2scim_mapper: UdmToScimMapper) -> None:
     props = {"userCertificate": "###################", "certificateSubjectCommonName": "testCertificate"}
     expected_certificates = [X509Certificate(value="###################", display="testCertificate")]
-    certificates = udm2scim_mapper._map_certificates(props)
+    certificates = map_user(udm2scim_mapper, props).x509_certificates
 
     assert certificates == expected_certificates
 
 
 def test_map_certificates_none(udm2scim_mapper: UdmToScimMapper) -> None:
     props = {"userCertificate": None, "certificateSubjectCommonName": None}
-    certificates = udm2scim_mapper._map_certificates(props)
+    certificates = map_user(udm2scim_mapper, props).x509_certificates
 
     assert certificates is None